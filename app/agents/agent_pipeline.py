@@ -28,7 +28,7 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Callable, TYPE_CHECKING, Union, Set
+from typing import Optional, List, Dict, Any, Awaitable, Callable, TYPE_CHECKING, Tuple, Union, Set
 import pycodestyle
 from app.services.tree_sitter_parser import MultiLanguageParser, FaultTolerantParser
 from config.settings import cfg
@@ -38,6 +38,10 @@ from app.services.syntax_fixer_agent import attempt_ai_syntax_fix, extract_surro
 from app.services.virtual_fs import VirtualFileSystem, ChangeType, CommitResult, PendingChange
 from app.services.backup_manager import BackupManager
 from app.services.change_validator import ChangeValidator, ValidationResult, ValidationLevel
+from app.services.vfs_materializer import ShadowWorkspace
+from app.services.ast_cache import get_ast_cache
+from app.services.mypy_backend import MypyBackend
+from app.services.pyright_session import PyrightSession, PyrightSessionError
 
 # Agents
 from app.agents.orchestrator import orchestrate_agent, OrchestratorResult
@@ -66,6 +70,7 @@ from app.history.manager import HistoryManager
 
 
 from app.tools.dependency_manager import DependencyManager
+from app.tools.tool_memo import ToolResultMemo
 from app.agents.feedback_prompt_loader import reset_feedback_loader
 
 # Utils
@@ -76,12 +81,15 @@ from app.services.project_map_builder import get_project_map_for_prompt
 # Validation logging
 from app.utils.validation_logger import get_validation_logger, log_validation_error
 
-from app.services.change_validator import ChangeValidator, ValidationResult, ValidationLevel, IssueSeverity
+from app.services.change_validator import ChangeValidator, ValidationResult, ValidationLevel, ValidatorConfig, IssueSeverity
 if TYPE_CHECKING:
     from app.history.storage import Thread
 
 logger = logging.getLogger(__name__)
 
+# Сбоев pyright-langserver подряд, после которых структурные проверки идут только через CLI
+PYRIGHT_SESSION_MAX_FAILURES = 3
+
 
 def _load_compact_index_md(project_dir: str) -> str:
     """
@@ -497,6 +505,13 @@ class ApplyResult:
     backup_session_id: Optional[str] = None
 
 
+@dataclass
+class StagedCandidate:
+    """Кандидат Code Generator, уже застейдженный в свой overlay VFS"""
+    vfs: VirtualFileSystem  # fork VFS сессии
+    staging_errors: List[Dict[str, Any]]
+
+
 # ============================================================================
 # CALLBACKS TYPE
 # ============================================================================
@@ -639,6 +654,11 @@ class AgentPipeline:
         # [NEW] Модель оркестратора (если None — используется роутер)
         self._orchestrator_model: Optional[str] = None
         
+        # Решение роутера для текущего запроса: один вызов роутера на запрос,
+        # стартует в начале process_request параллельно с подготовкой сессии
+        self._request_model: Optional[str] = None
+        self._routing_task: Optional[asyncio.Task] = None
+        
         # [NEW] Модель генератора
         self._generator_model: Optional[str] = generator_model
         
@@ -695,6 +715,24 @@ class AgentPipeline:
         
         self._last_pyright_warnings: List[str] = []
         
+        # Долгоживущее материализованное дерево (pyright, mypy, ruff, runtime).
+        # Создаётся лениво, между итерациями обновляется только дельта.
+        self._shadow_workspace: Optional[ShadowWorkspace] = None
+        
+        # Тёплый mypy (dmypy) на дереве _shadow_workspace, живёт всю сессию;
+        # по backend на набор настроек (mode, strict, ignore_missing_imports)
+        self._type_checkers: Dict[tuple, MypyBackend] = {}
+        
+        # Тёплый pyright-langserver для структурных проверок (None - только CLI)
+        self._pyright_session: Optional[PyrightSession] = None
+        self._pyright_session_disabled = False
+        # Сбои сервера подряд: после PYRIGHT_SESSION_MAX_FAILURES - только CLI
+        self._pyright_session_failures = 0
+        
+        # Результаты инструментов оркестратора в пределах сессии
+        # (инвалидируются по изменениям VFS в зависимых файлах)
+        self._tool_memo = ToolResultMemo(self.project_dir, virtual_fs=self.vfs)
+        
         # Callbacks
         self._on_thinking: Optional[OnThinkingCallback] = None
         self._on_tool_call: Optional[OnToolCallCallback] = None
@@ -805,6 +843,7 @@ class AgentPipeline:
             on_stage: Optional[OnStageCallback] = None,
             on_user_decision: Optional[OnUserDecisionCallback] = None,
             prefilter_advice: str = "",
+            routed_model: Optional[str] = None,
         ) -> PipelineResult:
             """
             Process a user request through the complete pipeline with feedback loops.
@@ -823,6 +862,10 @@ class AgentPipeline:
             6. User confirmation → apply to real files
         
             History is preserved across all iterations!
+            
+            routed_model - модель, уже выбранная роутером в плане запроса
+            (main.py); если не передана, роутер запускается здесь сразу,
+            параллельно с подготовкой сессии.
             """
             import time
             from app.utils.pipeline_trace_logger import PipelineTraceLogger
@@ -837,6 +880,12 @@ class AgentPipeline:
             self._on_stage = on_stage
             self._on_user_decision = on_user_decision
             self._prefilter_advice = prefilter_advice
+            
+            # Роутер - один раз на запрос, не дожидаясь подготовки сессии
+            self._request_model = routed_model
+            self._routing_task = None
+            if not self._orchestrator_model and not routed_model:
+                self._routing_task = asyncio.create_task(self._route_request(user_request))
         
             # Initialize result
             result = PipelineResult(
@@ -875,6 +924,13 @@ class AgentPipeline:
             self._pending_user_request = user_request
             self._current_generated_code = ""  # Track generated code for feedback
             self.vfs.discard_all()
+            
+            # Проект мог измениться на диске между запросами - пересобрать дерево
+            if self._shadow_workspace is not None:
+                self._shadow_workspace.invalidate()
+            # Сервер не видит правок на диске вне VFS - новый запрос, новый сервер
+            self._reset_pyright_session()
+            self._tool_memo.clear()
         
             # Reset feedback loader for new session
             reset_feedback_loader()
@@ -896,6 +952,7 @@ class AgentPipeline:
                     result.success = True
                     result.status = PipelineStatus.COMPLETED
                     result.duration_ms = (time.time() - start_time) * 1000
+                    trace.set_tool_memo_stats(self._tool_memo.stats.to_dict())
                     trace.complete(success=True, status="completed_ask_mode", duration_ms=result.duration_ms)
                     return result
             
@@ -906,6 +963,7 @@ class AgentPipeline:
                 iteration = 0
                 while iteration < self.MAX_FEEDBACK_ITERATIONS:
                     iteration += 1
+                    ast_cache_mark = get_ast_cache().stats.snapshot()
                     self._notify_stage("ITERATION", f"Итерация {iteration}/{self.MAX_FEEDBACK_ITERATIONS}", {
                         "iteration": iteration,
                     })
@@ -934,6 +992,7 @@ class AgentPipeline:
                         for tc in orchestrator_result.tool_calls:
                             target = tc.arguments.get("file_path") or tc.arguments.get("query") or tc.arguments.get("chunk_name") or ""
                             trace.add_tool_call(tc.name, str(target)[:200], tc.success)
+                        trace.set_tool_memo_stats(self._tool_memo.stats.to_dict())
                     
                     except Exception as e:
                         vlog.log_error("ORCHESTRATOR", e, {"user_request": user_request[:200]})
@@ -1090,7 +1149,7 @@ class AgentPipeline:
                     self._notify_stage("CODE_GEN", "Генерация кода...", None)
                 
                     try:
-                        code_blocks, raw_response = await self._run_code_generator(
+                        code_blocks, raw_response, staged_candidate = await self._run_code_generator(
                             instruction=orchestrator_result.instruction,
                             target_file=orchestrator_result.target_file,
                             target_files=orchestrator_result.target_files,
@@ -1201,7 +1260,8 @@ class AgentPipeline:
                     apply_errors_data = []
                 
                     while staging_attempt < MAX_STAGING_ATTEMPTS:
-                        apply_errors_data = await self._stage_code_blocks(code_blocks)
+                        apply_errors_data = await self._stage_generated(code_blocks, staged_candidate)
+                        staged_candidate = None
                     
                         if not apply_errors_data:
                             # Success!
@@ -1280,7 +1340,7 @@ class AgentPipeline:
                             
                             # 5. Generate new code
                             self._notify_stage("CODE_GEN", "Генерация исправленного кода...", None)
-                            code_blocks, raw_response = await self._run_code_generator(
+                            code_blocks, raw_response, staged_candidate = await self._run_code_generator(
                                 instruction=orchestrator_result.instruction,
                                 target_file=orchestrator_result.target_file,
                                 target_files=orchestrator_result.target_files,
@@ -1484,6 +1544,14 @@ class AgentPipeline:
                         except Exception as e:
                             logger.error(f"Dependency scan failed: {e}")
                 
+                    # Разборы Python AST за итерацию (стейджинг + валидация)
+                    ast_cache_delta = get_ast_cache().stats.since(ast_cache_mark)
+                    logger.info(
+                        f"Iteration {iteration}: AST cache - {ast_cache_delta.parses} parses, "
+                        f"{ast_cache_delta.hits} avoided"
+                    )
+                    trace.add_ast_cache_stats(iteration, ast_cache_delta.to_dict())
+                    
                     # ==============================================================
                     # STEP 4.5: CHECK FOR BLOCKING ERRORS
                     # ==============================================================
@@ -2037,6 +2105,12 @@ class AgentPipeline:
                 trace.set_error(f"Pipeline error: {e}")
                 trace.complete(success=False, status="error", duration_ms=result.duration_ms)
             
+            finally:
+                # ASK-режим и ранние выходы могут не дождаться роутера
+                if self._routing_task is not None and not self._routing_task.done():
+                    self._routing_task.cancel()
+                self._routing_task = None
+            
             return result
         
     async def _validation_loop(
@@ -2076,7 +2150,7 @@ class AgentPipeline:
             self._notify_stage("CODE_GEN", f"Генерация кода (итерация {iteration})...", None)
             
             try:
-                code_blocks, raw_response = await self._run_code_generator(
+                code_blocks, raw_response, staged_candidate = await self._run_code_generator(
                     instruction=current_instruction,
                     target_file=target_file,
                     target_files=target_files,
@@ -2109,7 +2183,7 @@ class AgentPipeline:
             # STEP B: Stage to VFS
             # ============================================================
             # self.vfs.discard_all()  # [Cumulative Staging] Preserve successes across iterations
-            apply_errors_data = await self._stage_code_blocks(code_blocks)
+            apply_errors_data = await self._stage_generated(code_blocks, staged_candidate)
             
             if apply_errors_data:
                 self._notify_stage("STAGING", f"⚠️ Ошибки стейджинга: {len(apply_errors_data)}", None)
@@ -2575,7 +2649,7 @@ Please analyze this feedback and provide a revised instruction.""",
             self._notify_stage("CODE_GEN", "Генерация кода...", None)
             
             try:
-                code_blocks, raw_response = await self._run_code_generator(
+                code_blocks, raw_response, staged_candidate = await self._run_code_generator(
                     instruction=orchestrator_result.instruction,
                     target_file=orchestrator_result.target_file,
                     target_files=orchestrator_result.target_files,
@@ -2615,7 +2689,8 @@ Please analyze this feedback and provide a revised instruction.""",
             apply_errors_data = []
             
             while staging_attempt < MAX_STAGING_ATTEMPTS:
-                apply_errors_data = await self._stage_code_blocks(code_blocks)
+                apply_errors_data = await self._stage_generated(code_blocks, staged_candidate)
+                staged_candidate = None
                 
                 if not apply_errors_data:
                     break
@@ -2673,7 +2748,7 @@ Please analyze this feedback and provide a revised instruction.""",
                         
                     # 5. Generate new code
                     self._notify_stage("CODE_GEN", "Генерация исправленного кода...", None)
-                    code_blocks, raw_response = await self._run_code_generator(
+                    code_blocks, raw_response, staged_candidate = await self._run_code_generator(
                         instruction=orchestrator_result.instruction,
                         target_file=orchestrator_result.target_file,
                         target_files=orchestrator_result.target_files,
@@ -3539,23 +3614,21 @@ Remember: You can override the validator if you believe the critique is incorrec
             history: Conversation history
             orchestrator_model: Pre-selected model (если None, используется роутер)
         """
-        from app.agents.router import route_request
+        # Контекст читается параллельно с ожиданием роутера
+        # === ИСПРАВЛЕНИЕ: Загружаем compact_index.md вместо генерации JSON ===
+        context_future = asyncio.gather(
+            asyncio.to_thread(_load_compact_index_md, self.project_dir),
+            asyncio.to_thread(get_project_map_for_prompt, self.project_dir),
+        )
         
         # Определяем модель: либо переданную, либо через роутер
         if orchestrator_model:
             model = orchestrator_model
             logger.info(f"Pipeline: Using pre-selected model {cfg.get_model_display_name(model)}")
         else:
-            routing = await route_request(user_request, self.project_index)
-            model = routing.orchestrator_model
-            logger.info(f"Pipeline: Router selected {cfg.get_model_display_name(model)} "
-                    f"(complexity: {routing.complexity_level})")
+            model = await self._get_request_model(user_request)
         
-        # === ИСПРАВЛЕНИЕ: Загружаем compact_index.md вместо генерации JSON ===
-        compact_index = _load_compact_index_md(self.project_dir)
-        
-        # Project map
-        project_map = get_project_map_for_prompt(self.project_dir)
+        compact_index, project_map = await context_future
         
         # DEBUG: логируем размеры контекста
         compact_tokens = len(compact_index) // 4
@@ -3563,25 +3636,31 @@ Remember: You can override the validator if you believe the critique is incorrec
         logger.info(f"Context sizes: compact_index={compact_tokens} tokens, project_map={map_tokens} tokens")
         
         # [FIXED] Синхронный tool executor с callback-уведомлениями
+        from app.tools.tool_executor import ToolExecutor
+        executor = ToolExecutor(
+            project_dir=self.project_dir, 
+            index=self.project_index,
+            virtual_fs=self.vfs,  # NEW: Pass VFS for staged file access
+            memo=self._tool_memo,  # Повторы в пределах сессии берутся из memo
+        )
+        
+        callback_lock = threading.Lock()
+        
         def tool_executor_with_callbacks(name: str, args: Dict) -> str:
             """
             Синхронный executor для инструментов.
-            orchestrate_agent вызывает его синхронно, поэтому async здесь не нужен.
+            orchestrate_agent выполняет независимые read-only вызовы параллельно
+            в пуле потоков (run_tool_batch), поэтому callback сериализован.
             
             UPDATED: Passes VFS to executor so read_file returns staged content.
             """
-            from app.tools.tool_executor import ToolExecutor
-            executor = ToolExecutor(
-                project_dir=self.project_dir, 
-                index=self.project_index,
-                virtual_fs=self.vfs,  # NEW: Pass VFS for staged file access
-            )
             result = executor.execute(name, args)
             
             # Уведомляем callback о вызове инструмента
             success = not result.startswith("<!-- ERROR")
             if self._on_tool_call:
-                self._on_tool_call(name, args, result[:500], success)
+                with callback_lock:
+                    self._on_tool_call(name, args, result[:500], success)
             
             return result
         
@@ -3610,6 +3689,30 @@ Remember: You can override the validator if you believe the critique is incorrec
     
     
     
+    async def _route_request(self, user_request: str) -> str:
+        """Вызов роутера, возвращает модель оркестратора"""
+        from app.agents.router import route_request
+        
+        routing = await route_request(user_request, self.project_index)
+        logger.info(f"Pipeline: Router selected {cfg.get_model_display_name(routing.orchestrator_model)} "
+                    f"(complexity: {routing.complexity_level})")
+        return routing.orchestrator_model
+    
+    async def _get_request_model(self, user_request: str) -> str:
+        """
+        Модель роутера для текущего запроса.
+        
+        Роутер вызывается один раз на запрос (process_request запускает его
+        заранее); итерации обратной связи используют то же решение.
+        """
+        if self._request_model:
+            return self._request_model
+        if self._routing_task is None:
+            self._routing_task = asyncio.create_task(self._route_request(user_request))
+        self._request_model = await self._routing_task
+        return self._request_model
+    
+    
     # ========================================================================
     # INTERNAL: CODE GENERATOR
     # ========================================================================
@@ -3619,12 +3722,16 @@ Remember: You can override the validator if you believe the critique is incorrec
             instruction: str,
             target_file: Optional[str] = None,
             target_files: Optional[List[str]] = None,
-        ) -> tuple[List[ParsedCodeBlock], str]:
+        ) -> tuple[List[ParsedCodeBlock], str, Optional[StagedCandidate]]:
             """
             Run Code Generator to produce code blocks with retry logic.
         
             If no blocks are found but the instruction requires code, 
             attempts a retry with a format reminder.
+            
+            Третий элемент - выбранный кандидат (generator_candidates > 1),
+            уже застейдженный в свой overlay; вызывающий код передаёт его в
+            _stage_generated вместе с блоками. None - блоки ещё не стейджились.
             """
             file_contents: Dict[str, str] = {}
         
@@ -3659,55 +3766,174 @@ Remember: You can override the validator if you believe the critique is incorrec
         
             logger.info(f"Code Generator: {len(file_contents)} file(s) in context: {list(file_contents.keys())}")
         
-            # Initial call
-            blocks, raw_response = await generate_code_agent_mode(
-                instruction=instruction,
-                file_contents=file_contents,
-                model=self._generator_model,
-            )
-        
-            # NEW LOGIC: Retry if blocks are empty but instruction requires code
-            if not blocks:
-                if self._instruction_requires_code(instruction):
-                    if raw_response:
-                        logger.warning(f"Code Generator returned no blocks but instruction requires code. Raw response length: {len(raw_response)}. Attempting retry...")
-                    
-                        format_reminder = (
-                            "[FORMAT REMINDER]\n\n"
-                            "Your previous response was received but did not contain any CODE_BLOCK sections that could be parsed.\n\n"
-                            "REQUIRED FORMAT (mandatory):\n"
-                            "Each code change MUST be wrapped in exactly this structure:\n"
-                            "```python\n"
-                            "FILE: path/to/file.py\n"
-                            "MODE: REPLACE_FILE | REPLACE_METHOD | ADD_METHOD | etc.\n"
-                            "TARGET_CLASS: ClassName  (if applicable)\n"
-                            "TARGET_METHOD: method_name  (if applicable)\n"
-                            "[your code here]\n"
-                            "```\n\n"
-                            "Please rewrite your response using ONLY the CODE_BLOCK format above.\n"
-                            "Do NOT include explanations outside the code blocks."
-                        )
-                    
-                        retry_instruction = instruction + "\n\n" + format_reminder
-                        blocks, raw_response = await generate_code_agent_mode(
-                            instruction=retry_instruction,
-                            file_contents=file_contents,
-                            model=self._generator_model,
-                        )
-                    
-                        if not blocks:
-                            logger.error(f"Code Generator retry also returned no blocks. Instruction: {instruction[:100]}")
-                    else:
-                        # raw_response is empty - Generator crashed
-                        print(f"\n[CODE GENERATOR ERROR] Generator failed to respond for instruction targeting: {instruction[:200]!r}...")
-                        print(f"[CODE GENERATOR ERROR] This may indicate an API error, timeout, or model crash.")
-                        print(f"[CODE GENERATOR ERROR] Check logs for details. Instruction preview: {instruction[:100]}")
-                        return [], ""
+            staged: Optional[StagedCandidate] = None
+            candidates = cfg.AGENT_MODE_CONFIG.get("generator_candidates", 1)
+            if candidates > 1:
+                blocks, raw_response, staged = await self._generate_candidates(instruction, file_contents, candidates)
+            else:
+                blocks, raw_response = await self._generate_with_retry(
+                    instruction, file_contents, self._generator_model
+                )
 
             logger.info(f"Code Generator: produced {len(blocks)} code block(s) for files: {[b.file_path for b in blocks]}")
-            return blocks, raw_response
+            return blocks, raw_response, staged
+
 
 
+    async def _generate_with_retry(
+        self,
+        instruction: str,
+        file_contents: Dict[str, str],
+        model: Optional[str],
+    ) -> tuple[List[ParsedCodeBlock], str]:
+        """Один вызов Code Generator (с повтором, если блоки не распарсились)"""
+        # Initial call
+        blocks, raw_response = await generate_code_agent_mode(
+            instruction=instruction,
+            file_contents=file_contents,
+            model=model,
+        )
+    
+        # NEW LOGIC: Retry if blocks are empty but instruction requires code
+        if not blocks:
+            if self._instruction_requires_code(instruction):
+                if raw_response:
+                    logger.warning(f"Code Generator returned no blocks but instruction requires code. Raw response length: {len(raw_response)}. Attempting retry...")
+                
+                    format_reminder = (
+                        "[FORMAT REMINDER]\n\n"
+                        "Your previous response was received but did not contain any CODE_BLOCK sections that could be parsed.\n\n"
+                        "REQUIRED FORMAT (mandatory):\n"
+                        "Each code change MUST be wrapped in exactly this structure:\n"
+                        "```python\n"
+                        "FILE: path/to/file.py\n"
+                        "MODE: REPLACE_FILE | REPLACE_METHOD | ADD_METHOD | etc.\n"
+                        "TARGET_CLASS: ClassName  (if applicable)\n"
+                        "TARGET_METHOD: method_name  (if applicable)\n"
+                        "[your code here]\n"
+                        "```\n\n"
+                        "Please rewrite your response using ONLY the CODE_BLOCK format above.\n"
+                        "Do NOT include explanations outside the code blocks."
+                    )
+                
+                    retry_instruction = instruction + "\n\n" + format_reminder
+                    blocks, raw_response = await generate_code_agent_mode(
+                        instruction=retry_instruction,
+                        file_contents=file_contents,
+                        model=model,
+                    )
+                
+                    if not blocks:
+                        logger.error(f"Code Generator retry also returned no blocks. Instruction: {instruction[:100]}")
+                else:
+                    # raw_response is empty - Generator crashed
+                    print(f"\n[CODE GENERATOR ERROR] Generator failed to respond for instruction targeting: {instruction[:200]!r}...")
+                    print(f"[CODE GENERATOR ERROR] This may indicate an API error, timeout, or model crash.")
+                    print(f"[CODE GENERATOR ERROR] Check logs for details. Instruction preview: {instruction[:100]}")
+                    return [], ""
+        return blocks, raw_response
+
+    async def _generate_candidates(
+        self,
+        instruction: str,
+        file_contents: Dict[str, str],
+        count: int,
+    ) -> tuple[List[ParsedCodeBlock], str, Optional[StagedCandidate]]:
+        """
+        Несколько кандидатов Code Generator параллельно, выбор по валидации.
+        
+        Каждый кандидат стейджится в свой overlay VFS (fork) и проходит быструю
+        проверку (SYNTAX + IMPORTS), кандидаты - параллельно. Первый чистый
+        кандидат побеждает, остальные отменяются; если чистых нет - кандидат с
+        наименьшим числом ошибок. Overlay проигравших отбрасываются, overlay
+        победителя возвращается как StagedCandidate - VFS сессии не меняется,
+        пока вызывающий код не применит его через _stage_generated.
+        """
+        from app.services.change_validator import ValidatorConfig
+        
+        models = cfg.AGENT_MODE_CONFIG.get("generator_candidate_models") or [self._generator_model]
+        
+        async def run_candidate(index: int) -> Dict[str, Any]:
+            model = models[index % len(models)]
+            blocks, raw_response = await self._generate_with_retry(instruction, file_contents, model)
+            candidate = {
+                "index": index,
+                "model": model,
+                "blocks": blocks,
+                "raw_response": raw_response,
+                "staged": None,
+                "error_count": None,
+            }
+            if not blocks:
+                return candidate
+            
+            fork = self.vfs.fork()
+            staging_errors = await self._stage_code_blocks(blocks, vfs=fork)
+            validator = ChangeValidator(
+                vfs=fork,
+                config=ValidatorConfig(enabled_levels=[ValidationLevel.SYNTAX, ValidationLevel.IMPORTS]),
+            )
+            validation = await validator.validate_quick()
+            candidate.update(
+                staged=StagedCandidate(vfs=fork, staging_errors=staging_errors),
+                error_count=len(staging_errors) + validation.error_count,
+            )
+            return candidate
+        
+        tasks = [asyncio.create_task(run_candidate(i)) for i in range(count)]
+        finished: List[Dict[str, Any]] = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    candidate = await next_done
+                except Exception as e:
+                    logger.warning(f"Code Generator candidate failed: {e}")
+                    continue
+                finished.append(candidate)
+                if candidate["error_count"] == 0:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        staged = [c for c in finished if c["staged"] is not None]
+        if not staged:
+            # Ни один кандидат не дал блоков - как при одиночной генерации
+            return ([], finished[0]["raw_response"], None) if finished else ([], "", None)
+        
+        winner = min(staged, key=lambda c: c["error_count"])
+        for candidate in staged:
+            if candidate is not winner:
+                candidate["staged"].vfs.discard_overlay()
+        logger.info(
+            f"Code Generator: candidate {winner['index'] + 1}/{count} ({winner['model']}) selected "
+            f"with {winner['error_count']} error(s); "
+            f"candidates checked: {[(c['index'] + 1, c['error_count']) for c in finished]}"
+        )
+        return winner["blocks"], winner["raw_response"], winner["staged"]
+    
+    async def _stage_generated(
+        self,
+        code_blocks: List[ParsedCodeBlock],
+        staged: Optional[StagedCandidate],
+    ) -> List[Dict[str, Any]]:
+        """
+        Стейджит блоки, полученные от _run_code_generator, в VFS сессии.
+        
+        Если блоки уже застейджены в overlay выбранного кандидата, overlay
+        переносится как есть (commit_overlay) - без повторного стейджинга и
+        AI-фиксов, т.е. ровно то, что прошло проверку.
+        """
+        if staged is None:
+            return await self._stage_code_blocks(code_blocks)
+        
+        touched = staged.vfs.commit_overlay()
+        if self.feedback_loop:
+            for path in touched:
+                if self.vfs.get_change(path) is not None:
+                    self.feedback_loop.feedback_handler.add_successfully_staged_file(path)
+        return staged.staging_errors
 
     def _extract_files_from_instruction(self, instruction: str) -> List[str]:
         """
@@ -3784,10 +4010,59 @@ Remember: You can override the validator if you believe the critique is incorrec
             return self.ml_parser is not None
         return True
 
-    async def _stage_code_blocks(self, code_blocks: List[ParsedCodeBlock]) -> List[Dict[str, Any]]:
+    async def _run_file_ordered(
+        self,
+        file_paths: List[str],
+        prepare: Callable[[int], Awaitable[Any]],
+        commit: Callable[[int, Any], Awaitable[None]],
+    ) -> None:
+        """
+        Обрабатывает элементы стейджинга параллельно по файлам.
+        
+        file_paths[i] - файл i-го элемента. Элементы одного файла идут строго
+        по очереди (prepare следующего - после commit предыдущего), разные
+        файлы - параллельно. commit(i) начинается только после commit(i-1):
+        проверки структуры (pyright видит застейдженные файлы проекта) и
+        записи в VFS идут в исходном порядке и видят то же состояние, что и
+        при последовательном стейджинге, поэтому итоговый VFS и порядок ошибок
+        не зависят от того, какой файл подготовился раньше.
+        """
+        committed = [asyncio.Event() for _ in file_paths]
+        groups: Dict[str, List[int]] = {}
+        for idx, path in enumerate(file_paths):
+            groups.setdefault(path, []).append(idx)
+        
+        async def run_group(indices: List[int]) -> None:
+            for idx in indices:
+                prepared = await prepare(idx)
+                if idx > 0:
+                    await committed[idx - 1].wait()
+                await commit(idx, prepared)
+                committed[idx].set()
+        
+        tasks = [asyncio.create_task(run_group(indices)) for indices in groups.values()]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def _stage_code_blocks(
+        self,
+        code_blocks: List[ParsedCodeBlock],
+        vfs: Optional[VirtualFileSystem] = None,
+    ) -> List[Dict[str, Any]]:
         """
         Stage code blocks using 3-pass validation with Atomic Rollback and Pre-check.
+        
+        vfs - изолированный overlay (VirtualFileSystem.fork()) для проверки
+        кандидата генератора; по умолчанию стейджинг идёт в VFS сессии.
+        Успехи в feedback handler записываются только для VFS сессии.
         """
+        vfs = vfs or self.vfs
+        track_success = vfs is self.vfs
         final_errors = []
         structural_queue = []
         dependency_queue = []
@@ -3807,7 +4082,7 @@ Remember: You can override the validator if you believe the critique is incorrec
         pre_corrupted_files: Dict[str, List[str]] = {}  # Map path -> list of error details
         unique_paths = {b.file_path for b in code_blocks}
         for path in unique_paths:
-            content = self.vfs.read_file(path)
+            content = vfs.read_file(path)
             if not content: continue
             
             is_pre_broken = False
@@ -3822,7 +4097,7 @@ Remember: You can override the validator if you believe the critique is incorrec
             
             try:
                 is_pre_broken, _, error_details = self._check_tree_structure_broken(
-                    parser_obj, content, language=lang_name, file_path=path
+                    parser_obj, content, language=lang_name, file_path=path, vfs=vfs
                 )
             except ValidationToolchainError:
                 # Validation toolchain (pyright + ruff) is non-functional — propagate
@@ -3842,15 +4117,39 @@ Remember: You can override the validator if you believe the critique is incorrec
                 print(f"❌ [STAGING-PHASE-0] {msg}") # Output to terminal as per user instruction
                 pre_corrupted_files[path] = error_details
 
+        # Блоки разных файлов независимы: применение (FileModifier, возможный
+        # AI-фикс синтаксиса) и вызовы AI Fixer идут параллельно по файлам,
+        # а проверка структуры и запись в VFS - в исходном порядке блоков
+        # (см. _run_file_ordered). Блоки одного файла - строго по очереди.
+
         # --- PASS 1: Discovery ---
         logger.info(f"Starting Pass 1 (Discovery) for {len(code_blocks)} blocks")
         modified_files: set[str] = set()
-        
-        for block_idx, block in enumerate(code_blocks):
+
+        async def apply_pass1(block_idx: int):
+            block = code_blocks[block_idx]
+            if block.file_path in pre_corrupted_files and block.mode != "REPLACE_FILE":
+                return None
+            try:
+                if not self._ensure_parsers_ready(block.file_path):
+                    return None
+                # 4. Pre-process
+                if block.code and '\t' in block.code:
+                    block.code = block.code.replace('\t', '    ')
+                existing_content = vfs.read_file(block.file_path) or ""
+                # 5. Application attempt (в потоке - может ждать AI-фикс синтаксиса)
+                return await asyncio.to_thread(self.file_modifier.apply_code_block, existing_content, block)
+            except Exception as e:
+                return e
+
+        async def commit_pass1(block_idx: int, result) -> None:
+            block = code_blocks[block_idx]
+            current_change = None
+            backup_content = None
             try:
                 # 1. State Capture
-                current_change = self.vfs.get_change(block.file_path)
-                backup_content = self.vfs.read_file(block.file_path)
+                current_change = vfs.get_change(block.file_path)
+                backup_content = vfs.read_file(block.file_path)
                 existing_content = backup_content or ""
 
                 # 2. Phase 0 Guard: Hard-block corrupted files except for full REPLACE_FILE
@@ -3859,20 +4158,17 @@ Remember: You can override the validator if you believe the critique is incorrec
                     logger.error(f"Phase 0 Guard: Block {block_idx+1} rejected due to pre-existing corruption in {block.file_path}. Details: {details}")
                     msg = f"File {block.file_path} is already broken (pre-existing corruption). Details: {details}. Fix its structure manually or use REPLACE_FILE mode."
                     final_errors.append(self._format_staging_error(block, "PRE_EXISTING_CORRUPTION", msg, backup_content))
-                    continue
+                    return
 
                 # 3. Parser readiness
                 if not self._ensure_parsers_ready(block.file_path):
                     final_errors.append(self._format_staging_error(block, "STAGING_SYSTEM_ERROR", "Parser unavailable", backup_content))
-                    continue
+                    return
 
-                # 4. Pre-process
-                if block.code and '\t' in block.code:
-                    block.code = block.code.replace('\t', '    ')
+                # 4-5. Pre-process and application attempt - in apply_pass1
+                if isinstance(result, Exception):
+                    raise result
 
-                # 5. Application attempt
-                result = self.file_modifier.apply_code_block(existing_content, block)
-                
                 if result.success and result.new_content is not None:
                     # 6. Integrity validation [V18.20]
                     final_content = result.new_content
@@ -3886,15 +4182,20 @@ Remember: You can override the validator if you believe the critique is incorrec
                     error_type = "NONE"
                     error_details = []
 
+                    # Пробный стейджинг в overlay: VFS меняется только при commit
+                    change_type = ChangeType.CREATE if not backup_content else ChangeType.MODIFY
+                    trial = vfs.fork()
+                    trial.stage_change(block.file_path, final_content, change_type)
+
                     if is_code_file:
                         lang_name = block.language or _lang_map.get(ext, 'unknown') if not is_python else 'python'
                         parser_obj = self.ts_parser if is_python else self.ml_parser
-                        
+
                         try:
                             # [V18.20] Only checks for SYNTAX_ERROR now
                             is_broken, error_type, error_details = self._check_tree_structure_broken(
                                 parser_obj, final_content, block, language=lang_name,
-                                file_path=block.file_path, baseline_content=existing_content
+                                file_path=block.file_path, baseline_content=existing_content, vfs=trial
                             )
                         except Exception as e:
                             logger.error(f"Validation crashed: {e}")
@@ -3904,29 +4205,28 @@ Remember: You can override the validator if you believe the critique is incorrec
 
                     # 7. Classification and Routing [V18.20]
                     if is_broken:
-                        # [ATOMIC-ROLLBACK] Revert VFS to backup immediately
-                        self.vfs.stage_change(block.file_path, backup_content, current_change.change_type if current_change else ChangeType.MODIFY)
-                        
+                        # [ATOMIC-ROLLBACK] Discard the trial overlay - VFS was never touched
+                        trial.discard_overlay()
+
                         # [V18.20] Any breakage after successful FileModifier application is a structural/syntax regression.
                         # These are routed to Pass 2 (AI Fixer).
                         structural_queue.append((block_idx, block, error_details))
                         print(f"🔧 [STAGING-P1] Block {block_idx+1} tree corruption ({error_type}). Rolling back and deferring to Pass 2 (AI Fixer)...")
                     else:
                         # [DEEP-INTEGRITY-OK] Commit change to VFS
-                        change_type = ChangeType.CREATE if not backup_content else ChangeType.MODIFY
-                        self.vfs.stage_change(block.file_path, final_content, change_type)
+                        trial.commit_overlay()
                         modified_files.add(block.file_path)
                         # [Point 5] Record success in feedback handler
-                        self.feedback_loop.feedback_handler.add_successfully_staged_file(block.file_path)
+                        if track_success:
+                            self.feedback_loop.feedback_handler.add_successfully_staged_file(block.file_path)
                         print(f"✅ [STAGING-P1] Block {block_idx+1}/{len(code_blocks)} staged successfully: {block.file_path}")
 
                 else:
-                    # Application error
-                    self.vfs.stage_change(block.file_path, backup_content, current_change.change_type if current_change else ChangeType.MODIFY)
+                    # Application error (VFS not modified)
                     err_type_obj = classify_staging_error(result.message, block.mode)
                     err_type = err_type_obj.value
                     is_python = block.file_path.endswith('.py')
-                    
+
                     if err_type in ["class_not_found", "method_not_found", "function_not_found", "insert_pattern_not_found"]:
                         dependency_queue.append((block_idx, block, backup_content, current_change, result.message))
                     elif err_type == "syntax_validation_failed" and not is_python:
@@ -3946,45 +4246,39 @@ Remember: You can override the validator if you believe the critique is incorrec
 
             except Exception as e:
                 logger.error(f"Pass 1 exception: {e}")
-                try: self.vfs.stage_change(block.file_path, backup_content, current_change.change_type if current_change else ChangeType.MODIFY)
-                except: pass
                 final_errors.append(self._format_staging_error(block, "SYSTEM_ERROR", str(e), backup_content))
 
+        await self._run_file_ordered([b.file_path for b in code_blocks], apply_pass1, commit_pass1)
+
         # --- PASS 1 Results & Snapshots ---
         last_good_states: Dict[str, str] = {}
         for fp in modified_files:
-            last_good_states[fp] = self.vfs.read_file(fp) or ""
-        
+            last_good_states[fp] = vfs.read_file(fp) or ""
+
         # --- PASS 2: Structural Repairs ---
         any_fixes_succeeded = False
         if structural_queue:
             logger.info(f"Starting Pass 2 (System Cascade) for {len(structural_queue)} deferred blocks")
             print(f"\n🔧 [STAGING] Starting Pass 2: System-controlled cascade A->B for {len(structural_queue)} blocks...")
             import copy
-            
+
             # Model references
             from config.settings import cfg
             MODEL_A = cfg.MODEL_QWEN3_Coder_Next
             MODEL_B = cfg.MODEL_NORMAL
 
-            for queue_item in structural_queue:
-                block_idx, block, error_details = queue_item
-                # [Partial Staging] Capture current state as backup for this specific fix attempt
-                current_vfs_content = self.vfs.read_file(block.file_path) or ""
-                if block.file_path not in last_good_states:
-                    last_good_states[block.file_path] = current_vfs_content
-
+            def block_language(block):
                 _, ext = os.path.splitext(block.file_path)
                 is_python = (ext == '.py')
                 lang_name = block.language or _lang_map.get(ext.lower(), 'unknown') if not is_python else 'python'
                 parser_obj = self.ts_parser if is_python else self.ml_parser
+                return lang_name, parser_obj
 
-                # 1. CREATE SNAPSHOT (state before THIS fix attempt)
-                snapshot_content = current_vfs_content
-                logger.info(f"Pass 2: Snapshot saved for {block.file_path} before cascade.")
-                
-                fixed_snippet = None
-                attempt_model = None
+            async def attempt_model_a(queue_pos: int):
+                """Вызов Model A и применение его фикса (без проверки структуры)"""
+                block_idx, block, error_details = structural_queue[queue_pos]
+                current_vfs_content = vfs.read_file(block.file_path) or ""
+                lang_name, parser_obj = block_language(block)
 
                 # 2. ATTEMPT A (Primary Model)
                 print(f"🤖 [PASS 2-A] Attempting fix with Model A...")
@@ -3995,13 +4289,35 @@ Remember: You can override the validator if you believe the critique is incorrec
                     broken_content=broken_contents.get(block_idx, None),
                 )
 
+                temp_res = None
                 if fixed_snippet and fixed_snippet != block.code:
-                    print(f"🤖 [DEBUG] Model A proposed code:\n{fixed_snippet}\n" + "-"*40)
                     temp_block = copy.copy(block)
                     temp_block.code = fixed_snippet
-                    temp_res = self.file_modifier.apply_code_block(current_vfs_content, temp_block)
+                    temp_res = await asyncio.to_thread(self.file_modifier.apply_code_block, current_vfs_content, temp_block)
+                return fixed_snippet, temp_res
+
+            async def commit_pass2(queue_pos: int, attempt_a) -> None:
+                nonlocal any_fixes_succeeded
+                block_idx, block, error_details = structural_queue[queue_pos]
+                fixed_snippet, temp_res = attempt_a
+                # [Partial Staging] Capture current state as backup for this specific fix attempt
+                current_vfs_content = vfs.read_file(block.file_path) or ""
+                if block.file_path not in last_good_states:
+                    last_good_states[block.file_path] = current_vfs_content
+
+                lang_name, parser_obj = block_language(block)
+
+                # 1. CREATE SNAPSHOT (state before THIS fix attempt)
+                snapshot_content = current_vfs_content
+                logger.info(f"Pass 2: Snapshot saved for {block.file_path} before cascade.")
+
+                attempt_model = None
+
+                # 2. ATTEMPT A (Primary Model) - proposed in attempt_model_a
+                if fixed_snippet and fixed_snippet != block.code:
+                    print(f"🤖 [DEBUG] Model A proposed code:\n{fixed_snippet}\n" + "-"*40)
                     if temp_res.success and temp_res.new_content:
-                        is_broken, _, _ = self._check_tree_structure_broken(parser_obj, temp_res.new_content, block, language=lang_name, file_path=block.file_path, baseline_content=current_vfs_content)
+                        is_broken, _, _ = self._check_tree_structure_broken(parser_obj, temp_res.new_content, block, language=lang_name, file_path=block.file_path, baseline_content=current_vfs_content, vfs=vfs)
                         if not is_broken:
                             attempt_model = "A"
                             print(f"✅ [PASS 2-A] Model A validated.")
@@ -4011,14 +4327,14 @@ Remember: You can override the validator if you believe the critique is incorrec
                     else:
                         print(f"⚠️ [PASS 2-A] Model A failed to apply: {temp_res.message}")
                         fixed_snippet = None
-                
+
                 last_attempted_snippet = fixed_snippet or None
 
                 # 3. IF A FAILED -> IMMEDIATE ROLLBACK & ATTEMPT B
                 if fixed_snippet is None:
-                    print(f"⚠️ [PASS 2-A] Model A failed. Rolling back to snapshot...")
-                    self.vfs.stage_change(block.file_path, snapshot_content)
-                    
+                    # Фикс A проверялся на строке, VFS не менялась - откатывать нечего
+                    print(f"⚠️ [PASS 2-A] Model A failed. Falling back to snapshot...")
+
                     print(f"🤖 [PASS 2-B] Attempting fix with Fallback Model B...")
                     fixed_snippet = await self._attempt_ai_structure_fix(
                         block=block, existing_content=snapshot_content,
@@ -4031,9 +4347,9 @@ Remember: You can override the validator if you believe the critique is incorrec
                         print(f"🤖 [DEBUG] Model B (Fallback) proposed code:\n{fixed_snippet}\n" + "-"*40)
                         temp_block = copy.copy(block)
                         temp_block.code = fixed_snippet
-                        temp_res = self.file_modifier.apply_code_block(snapshot_content, temp_block)
+                        temp_res = await asyncio.to_thread(self.file_modifier.apply_code_block, snapshot_content, temp_block)
                         if temp_res.success and temp_res.new_content:
-                            is_broken, _, _ = self._check_tree_structure_broken(parser_obj, temp_res.new_content, block, language=lang_name, file_path=block.file_path, baseline_content=snapshot_content)
+                            is_broken, _, _ = self._check_tree_structure_broken(parser_obj, temp_res.new_content, block, language=lang_name, file_path=block.file_path, baseline_content=snapshot_content, vfs=vfs)
                             if not is_broken:
                                 attempt_model = "B"
                                 print(f"✅ [PASS 2-B] Model B validated.")
@@ -4043,22 +4359,21 @@ Remember: You can override the validator if you believe the critique is incorrec
                         else:
                             print(f"⚠️ [PASS 2-B] Model B failed to apply: {temp_res.message}")
                             fixed_snippet = None
-                    
+
                     if fixed_snippet:
                         last_attempted_snippet = fixed_snippet
 
                     # 4. TERMINAL ROLLBACK TO LAST GOOD STATE IF B FAILS
                     if fixed_snippet is None:
-                        print(f"❌ [PASS 2-B] Model B failed. Rolling back to last stable version of {block.file_path}")
-                        self.vfs.stage_change(block.file_path, last_good_states.get(block.file_path, snapshot_content))
+                        print(f"❌ [PASS 2-B] Model B failed. Keeping last stable version of {block.file_path}")
                         final_errors.append(self._format_staging_error(
-                            block, "AI_CASCADE_FAILED", 
-                            "Both Model A and Model B failed structural validation.", 
+                            block, "AI_CASCADE_FAILED",
+                            "Both Model A and Model B failed structural validation.",
                             last_good_states.get(block.file_path, snapshot_content),
                             ai_fixed_code=last_attempted_snippet,
                             validation_errors=error_details
                         ))
-                        continue
+                        return
 
                 # 5. COMMIT SUCCESSFUL FIX & UPDATE LAST GOOD STATE
                 if fixed_snippet and attempt_model:
@@ -4068,67 +4383,86 @@ Remember: You can override the validator if you believe the critique is incorrec
 
                     if repair_apply_result.success and repair_apply_result.new_content:
                         final_vfs_content = repair_apply_result.new_content
+                        trial = vfs.fork()
+                        trial.stage_change(block.file_path, final_vfs_content)
                         is_broken_final, _, details_final = self._check_tree_structure_broken(
                             parser_obj, final_vfs_content, block, language=lang_name,
-                            file_path=block.file_path, baseline_content=snapshot_content
+                            file_path=block.file_path, baseline_content=snapshot_content, vfs=trial
                         )
-                        
+
                         if not is_broken_final:
-                            self.vfs.stage_change(block.file_path, final_vfs_content)
+                            trial.commit_overlay()
                             last_good_states[block.file_path] = final_vfs_content  # Update stable version
                             print(f"🔧 [STAGING-P2] Block {block_idx+1} REPAIRED and VALIDATED via {attempt_model}: {block.file_path}")
                             any_fixes_succeeded = True
                             modified_files.add(block.file_path)
                             # [Point 5] Record success in feedback handler
-                            self.feedback_loop.feedback_handler.add_successfully_staged_file(block.file_path)
+                            if track_success:
+                                self.feedback_loop.feedback_handler.add_successfully_staged_file(block.file_path)
                         else:
-                            print(f"❌ [STAGING-P2] Block {block_idx+1} AI fix ({attempt_model}) produced INVALID structure. Rolling back to stable.")
-                            self.vfs.stage_change(block.file_path, last_good_states.get(block.file_path, snapshot_content))
+                            print(f"❌ [STAGING-P2] Block {block_idx+1} AI fix ({attempt_model}) produced INVALID structure. Discarding it.")
+                            trial.discard_overlay()
                             final_errors.append(self._format_staging_error(
-                                block, "SYNTAX_VALIDATION_FAILED", 
-                                f"AI repair ({attempt_model}) resulted in broken structure during final application: {'; '.join(details_final)}", 
+                                block, "SYNTAX_VALIDATION_FAILED",
+                                f"AI repair ({attempt_model}) resulted in broken structure during final application: {'; '.join(details_final)}",
                                 last_good_states.get(block.file_path, snapshot_content),
                                 validation_errors=details_final
                             ))
                     else:
-                        self.vfs.stage_change(block.file_path, last_good_states.get(block.file_path, snapshot_content))
                         final_errors.append(self._format_staging_error(block, "STRUCTURAL_APPLY_FAILED", "Failed to apply validated fix.", last_good_states.get(block.file_path, snapshot_content)))
 
+            await self._run_file_ordered(
+                [block.file_path for _, block, _ in structural_queue], attempt_model_a, commit_pass2
+            )
+
         # --- PASS 3: Dependency Retry ---
         if dependency_queue:
             logger.info(f"Starting Pass 3 (Dependency Retry) for {len(dependency_queue)} deferred blocks")
+        if dependency_queue and not any_fixes_succeeded:
             for block_idx, block, backup_content, current_change, first_err_msg in dependency_queue:
-                if not any_fixes_succeeded:
-                    logger.warning(f"Pass 3: Skipping retry for Block {block_idx+1} (no new successful fixes in Pass 2)")
-                    final_errors.append(self._format_staging_error(block, classify_staging_error(first_err_msg, block.mode).value, first_err_msg, last_good_states.get(block.file_path, backup_content)))
-                    continue
+                logger.warning(f"Pass 3: Skipping retry for Block {block_idx+1} (no new successful fixes in Pass 2)")
+                final_errors.append(self._format_staging_error(block, classify_staging_error(first_err_msg, block.mode).value, first_err_msg, last_good_states.get(block.file_path, backup_content)))
+        elif dependency_queue:
+            async def apply_pass3(queue_pos: int):
+                block = dependency_queue[queue_pos][1]
+                try:
+                    current_content = vfs.read_file(block.file_path) or ""
+                    return await asyncio.to_thread(self.file_modifier.apply_code_block, current_content, block)
+                except Exception as e:
+                    return e
 
+            async def commit_pass3(queue_pos: int, result) -> None:
+                block_idx, block, backup_content, current_change, first_err_msg = dependency_queue[queue_pos]
                 logger.info(f"Pass 3: Retrying Block {block_idx+1} in {block.file_path} after Pass 2 fixes")
                 try:
-                    current_content = self.vfs.read_file(block.file_path) or ""
-                    result = self.file_modifier.apply_code_block(current_content, block)
-                    
+                    current_content = vfs.read_file(block.file_path) or ""
+                    if isinstance(result, Exception):
+                        raise result
+
                     if result.success and result.new_content is not None:
                         is_broken = False
+                        change_type = ChangeType.MODIFY if current_content else ChangeType.CREATE
+                        trial = vfs.fork()
+                        trial.stage_change(block.file_path, result.new_content, change_type)
                         if block.file_path.endswith('.py') and self.ts_parser:
-                            is_broken, _, _ = self._check_tree_structure_broken(self.ts_parser, result.new_content, block, file_path=block.file_path, baseline_content=current_content)
+                            is_broken, _, _ = self._check_tree_structure_broken(self.ts_parser, result.new_content, block, file_path=block.file_path, baseline_content=current_content, vfs=trial)
                         elif self.ml_parser and self.ml_parser.is_supported(block.file_path):
                             _, ext = os.path.splitext(block.file_path)
                             lang_name = block.language or _lang_map.get(ext.lower(), 'unknown') if ext.lower() != '.py' else 'python'
                             is_val, _ = self.ml_parser.validate_syntax(result.new_content, lang_name)
                             is_broken = not is_val
-                        
+
                         if not is_broken:
-                            change_type = ChangeType.MODIFY if current_content else ChangeType.CREATE
-                            self.vfs.stage_change(block.file_path, result.new_content, change_type)
+                            trial.commit_overlay()
                             last_good_states[block.file_path] = result.new_content
                             logger.info(f"Pass 3: Block {block_idx+1} staged successfully on retry.")
                             print(f"🔄 [STAGING-P3] Block {block_idx+1}/{len(code_blocks)} staged on retry: {block.file_path}")
                             modified_files.add(block.file_path)
                             # [Point 5] Record success in feedback handler
-                            self.feedback_loop.feedback_handler.add_successfully_staged_file(block.file_path)
+                            if track_success:
+                                self.feedback_loop.feedback_handler.add_successfully_staged_file(block.file_path)
                         else:
-                            self.vfs.stage_change(block.file_path, last_good_states.get(block.file_path, current_content))
+                            trial.discard_overlay()
                             final_errors.append(self._format_staging_error(block, "SYNTAX_VALIDATION_FAILED", "Structural break persists after dependency resolution", last_good_states.get(block.file_path, current_content)))
                     else:
                         final_errors.append(self._format_staging_error(block, classify_staging_error(result.message, block.mode).value, result.message, last_good_states.get(block.file_path, current_content)))
@@ -4136,6 +4470,10 @@ Remember: You can override the validator if you believe the critique is incorrec
                     logger.error(f"Pass 3: Exception during retry of block {block_idx+1}: {e}")
                     final_errors.append(self._format_staging_error(block, "SYSTEM_ERROR", str(e), last_good_states.get(block.file_path, "")))
 
+            await self._run_file_ordered(
+                [item[1].file_path for item in dependency_queue], apply_pass3, commit_pass3
+            )
+
         # [PARTIAL STAGING] Final report without global rollback (Point 3 & 5 of the plan)
         if final_errors and modified_files:
             print(f"⚠️ [STAGING] Partial success: {len(modified_files)} files staged, but {len(final_errors)} blocks failed. Keeping successful changes.")
@@ -4350,14 +4688,17 @@ Remember: You can override the validator if you believe the critique is incorrec
         language: str = 'python',
         file_path: Optional[str] = None,
         baseline_content: Optional[str] = None,
+        vfs: Optional[VirtualFileSystem] = None,
     ) -> Tuple[bool, str, List[str]]:
         """
         Validates structural integrity with optional differential baseline filtering.
 
-        For Python: runs pyright (PRIMARY) WITH FULL PROJECT CONTEXT by
-        materializing the VFS (whole project + staged changes) into a temp
-        directory, placing the checked `content` at its real relative path
-        (`file_path`), and invoking `pyright --project <temp_root>`. This lets
+        For Python: first tries the session's persistent pyright language
+        server (staged VFS files are pushed as open documents, see
+        `_check_with_pyright_session`). Otherwise runs the pyright CLI
+        WITH FULL PROJECT CONTEXT by syncing the session ShadowWorkspace (whole project + staged changes),
+        overlaying the checked `content` at its real relative path
+        (`file_path`), and invoking `pyright --project <workspace_root>`. This lets
         pyright resolve all `app.*` imports and apply `pyrightconfig.json`
         (which already restricts diagnostics to critical structural errors).
         Falls back to pycodestyle if pyright is unavailable.
@@ -4373,33 +4714,107 @@ Remember: You can override the validator if you believe the critique is incorrec
         """
         import os
         import json
-        import shutil
         import tempfile
         import subprocess
         import re
+        from app.services.vfs_materializer import VFSMaterializer
         error_details = []
         is_python = (language.lower() == 'python')
 
         if is_python:
-            temp_root = None
+            workspace = None
+            rel_path = None
             try:
-                # 1. Materialize the FULL project (with VFS staged changes) so
+                rel_path = file_path.replace('\\', '/') if file_path else "__pyright_check__.py"
+                norm_target: Optional[str] = None
+
+                # === HELPER: Normalize message by stripping line/column numbers ===
+                def _normalize_msg(rule: str, message: str) -> str:
+                    """Strip line/column numbers and variable-specific digits for signature matching."""
+                    normalized = re.sub(r'\d+', '#', message).strip()
+                    return f"{rule}::{normalized}"
+
+                # === HELPER: Collect critical diagnostics from pyright output ===
+                def _collect_diags(data_obj: Dict) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+                    """Extract critical and warning diagnostics from pyright JSON output."""
+                    critical_diags = []
+                    warning_diags = []
+                    
+                    for diag in data_obj.get("generalDiagnostics", []):
+                        severity = diag.get("severity", "")
+                        
+                        # Only keep diagnostics for the file we are validating
+                        diag_file = diag.get("file") or diag.get("uri") or ""
+                        if diag_file and norm_target is not None:
+                            norm_diag = os.path.normcase(os.path.abspath(diag_file))
+                            if norm_diag != norm_target:
+                                continue
+
+                        rule = diag.get("rule")
+                        message = diag.get("message", "")
+                        start = diag.get("range", {}).get("start", {})
+                        line_1based = start.get("line", 0) + 1
+                        col_1based = start.get("character", 0) + 1
+                        formatted = f"Line {line_1based}:{col_1based} - {rule or 'syntax'}: {message}"
+                        
+                        diag_dict = {
+                            "rule": rule,
+                            "message": message,
+                            "formatted": formatted,
+                            "sig": _normalize_msg(rule or "syntax", message),
+                        }
+                        
+                        # CRITICAL classification: error with no rule OR reportSyntaxError
+                        if severity == "error" and (rule is None or rule == "reportSyntaxError"):
+                            critical_diags.append(diag_dict)
+                        # WARNING classification: everything else with error/warning severity
+                        elif severity in ("error", "warning"):
+                            warning_diags.append(diag_dict)
+                    
+                    return critical_diags, warning_diags
+
+                # === HELPER: Report non-baseline critical diagnostics + warnings ===
+                def _report_diags(data_obj: Dict, baseline_data_obj: Optional[Dict]) -> None:
+                    current_critical, current_warnings = _collect_diags(data_obj)
+
+                    baseline_sigs: Set[str] = set()
+                    if baseline_data_obj is not None:
+                        base_critical, _base_warn = _collect_diags(baseline_data_obj)
+                        for d in base_critical:
+                            baseline_sigs.add(d["sig"])
+                        logger.info(f"Baseline filtering: {len(baseline_sigs)} baseline signatures, {len(current_critical)} current critical diagnostics")
+
+                    # Append only non-baseline critical diagnostics
+                    for d in current_critical:
+                        if d["sig"] not in baseline_sigs:
+                            error_details.append(d["formatted"])
+                    
+                    # Store warnings separately (non-blocking)
+                    warning_formatted = [w["formatted"] for w in current_warnings]
+                    self._last_pyright_warnings = warning_formatted
+                    if warning_formatted:
+                        logger.info(f"Pyright non-blocking warnings ({len(warning_formatted)}): {warning_formatted[:10]}")
+
+                # 0. WARM path: persistent pyright language server. Staged VFS
+                #    files are open documents in the server, the checked
+                #    `content` is pushed as `rel_path` - no tree sync at all.
+                session_result = self._check_with_pyright_session(rel_path, content, baseline_content, vfs)
+                if session_result is not None:
+                    _report_diags(*session_result)
+                    return self._finish_structure_check(error_details)
+
+                # 1. Sync the session workspace (FULL project + VFS staged changes) so
                 #    pyright sees every sibling module -> no false reportMissingImports.
-                temp_root = self._materialize_vfs_for_pyright()
-
-                # 2. Determine the target file's location inside the materialized tree.
-                #    If file_path is known, overwrite that exact file with `content`
-                #    (the version actually being validated). Otherwise create a temp
-                #    module at the project root.
-                if file_path:
-                    rel_path = file_path.replace('\\', '/')
-                    target_file = os.path.join(temp_root, *rel_path.split('/'))
-                else:
-                    target_file = os.path.join(temp_root, "__pyright_check__.py")
+                #    Only files changed since the previous check are rewritten.
+                workspace = self._get_shadow_workspace()
+                workspace.sync(vfs)
+                temp_root = workspace.root
 
-                os.makedirs(os.path.dirname(target_file), exist_ok=True)
-                with open(target_file, 'w', encoding='utf-8') as f:
-                    f.write(content)
+                # 2. Overlay the checked `content` (the version actually being
+                #    validated) at the file's real location inside the workspace.
+                #    Otherwise create a temp module at the project root.
+                #    The overlay is reverted in `finally`.
+                target_file = workspace.apply_overlay(rel_path, content)
 
                 # 3. Resolve config presence in the materialized root.
                 config_path = os.path.join(temp_root, "pyrightconfig.json")
@@ -4436,64 +4851,12 @@ Remember: You can override the validator if you believe the critique is incorrec
                     # Normalize the target path for matching diagnostics to our file.
                     norm_target = os.path.normcase(os.path.abspath(target_file))
 
-                    # === HELPER: Normalize message by stripping line/column numbers ===
-                    def _normalize_msg(rule: str, message: str) -> str:
-                        """Strip line/column numbers and variable-specific digits for signature matching."""
-                        normalized = re.sub(r'\d+', '#', message).strip()
-                        return f"{rule}::{normalized}"
-
-                    # === HELPER: Collect critical diagnostics from pyright output ===
-                    def _collect_diags(data_obj: Dict) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
-                        """Extract critical and warning diagnostics from pyright JSON output."""
-                        critical_diags = []
-                        warning_diags = []
-                        
-                        for diag in data_obj.get("generalDiagnostics", []):
-                            severity = diag.get("severity", "")
-                            
-                            # Only keep diagnostics for the file we are validating
-                            diag_file = diag.get("file") or diag.get("uri") or ""
-                            if diag_file:
-                                norm_diag = os.path.normcase(os.path.abspath(diag_file))
-                                if norm_diag != norm_target:
-                                    continue
-
-                            rule = diag.get("rule")
-                            message = diag.get("message", "")
-                            start = diag.get("range", {}).get("start", {})
-                            line_1based = start.get("line", 0) + 1
-                            col_1based = start.get("character", 0) + 1
-                            formatted = f"Line {line_1based}:{col_1based} - {rule or 'syntax'}: {message}"
-                            
-                            diag_dict = {
-                                "rule": rule,
-                                "message": message,
-                                "formatted": formatted,
-                                "sig": _normalize_msg(rule or "syntax", message),
-                            }
-                            
-                            # CRITICAL classification: error with no rule OR reportSyntaxError
-                            if severity == "error" and (rule is None or rule == "reportSyntaxError"):
-                                critical_diags.append(diag_dict)
-                            # WARNING classification: everything else with error/warning severity
-                            elif severity in ("error", "warning"):
-                                warning_diags.append(diag_dict)
-                        
-                        return critical_diags, warning_diags
-
-                    # === COLLECT CURRENT DIAGNOSTICS ===
-                    current_critical, current_warnings = _collect_diags(data)
-
-                    # === BUILD BASELINE SIGNATURE SET (if baseline_content provided) ===
-                    baseline_sigs: Set[str] = set()
+                    # === BASELINE RUN (if baseline_content provided) ===
+                    baseline_data = None
                     if baseline_content is not None and baseline_content != content:
                         try:
-                            # Save current content
-                            new_content_saved = content
-                            
                             # Write baseline to target file
-                            with open(target_file, 'w', encoding='utf-8') as f:
-                                f.write(baseline_content)
+                            VFSMaterializer.write_file(target_file, baseline_content)
                             
                             # Re-run pyright on baseline
                             result_b = subprocess.run(
@@ -4507,31 +4870,14 @@ Remember: You can override the validator if you believe the critique is incorrec
                             )
                             baseline_data = json.loads(self._sanitize_pyright_json(result_b.stdout))
                             
-                            # Collect baseline critical diagnostics and build signature set
-                            base_critical, _base_warn = _collect_diags(baseline_data)
-                            for d in base_critical:
-                                baseline_sigs.add(d["sig"])
-                            
-                            # Restore new content
-                            with open(target_file, 'w', encoding='utf-8') as f:
-                                f.write(new_content_saved)
-                            
-                            logger.info(f"Baseline filtering: {len(baseline_sigs)} baseline signatures, {len(current_critical)} current critical diagnostics")
-                            
                         except (FileNotFoundError, subprocess.TimeoutExpired, json.JSONDecodeError) as e:
                             logger.warning(f"Baseline run failed, proceeding without filtering: {e}")
-                            baseline_sigs = set()
+                            baseline_data = None
+                        finally:
+                            # Restore new content
+                            VFSMaterializer.write_file(target_file, content)
 
-                    # === APPEND ONLY NON-BASELINE CRITICAL DIAGNOSTICS ===
-                    for d in current_critical:
-                        if d["sig"] not in baseline_sigs:
-                            error_details.append(d["formatted"])
-                    
-                    # === STORE WARNINGS SEPARATELY (non-blocking) ===
-                    warning_formatted = [w["formatted"] for w in current_warnings]
-                    self._last_pyright_warnings = warning_formatted
-                    if warning_formatted:
-                        logger.info(f"Pyright non-blocking warnings ({len(warning_formatted)}): {warning_formatted[:10]}")
+                    _report_diags(data, baseline_data)
 
                 except (FileNotFoundError, subprocess.TimeoutExpired) as e:
                     # FALLBACK path: ruff (pyright unavailable).
@@ -4588,11 +4934,11 @@ Remember: You can override the validator if you believe the critique is incorrec
                 logger.error(f"Error during Python integrity check: {e}")
                 error_details.append(f"System evaluation error (pyright/ruff): {str(e)}")
             finally:
-                if temp_root and os.path.isdir(temp_root):
+                if workspace is not None and rel_path:
                     try:
-                        shutil.rmtree(temp_root, ignore_errors=True)
-                    except Exception:
-                        pass
+                        workspace.discard_overlay(rel_path)
+                    except Exception as e:
+                        logger.warning(f"Could not revert workspace overlay for {rel_path}: {e}")
         
         
         else:
@@ -4608,6 +4954,87 @@ Remember: You can override the validator if you believe the critique is incorrec
                 all_errors = list(set(ts_errors + missing_nodes))
                 error_details.extend([str(e) for e in all_errors[:5]])
 
+        return self._finish_structure_check(error_details)
+    
+    def _get_pyright_session(self) -> Optional[PyrightSession]:
+        """Returns the session's pyright language server, or None if it is unavailable."""
+        if self._pyright_session_disabled:
+            return None
+        if self._pyright_session is None:
+            if not PyrightSession.is_available():
+                logger.info("pyright-langserver not found, structure checks use the pyright CLI")
+                self._pyright_session_disabled = True
+                return None
+            self._pyright_session = PyrightSession(self.project_dir)
+        return self._pyright_session
+    
+    def _reset_pyright_session(self) -> None:
+        """Stops the language server; the next check starts a fresh one."""
+        if self._pyright_session is not None:
+            self._pyright_session.close()
+            self._pyright_session = None
+    
+    def _check_with_pyright_session(
+        self,
+        rel_path: str,
+        content: str,
+        baseline_content: Optional[str],
+        vfs: Optional[VirtualFileSystem] = None,
+    ) -> Optional[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]:
+        """
+        Runs the structure check through the persistent pyright language server.
+        
+        The server is rooted at the real project; staged .py/.pyi files are
+        open documents holding their VFS content, and `content` is pushed as
+        `rel_path`. Only documents that changed since the previous check are
+        resent, so repeat checks in the feedback loop reuse the server's
+        analysis of the rest of the project.
+        
+        Returns (data, baseline_data) in `pyright --outputjson` form, or None
+        when the CLI path must be used: no server, staged deletions or a
+        staged pyrightconfig.json (open documents cannot express those), or a
+        server failure. A failed server is stopped and the next check starts
+        a fresh one; after PYRIGHT_SESSION_MAX_FAILURES consecutive failures
+        the session is disabled for this pipeline.
+        """
+        session = self._get_pyright_session()
+        if session is None:
+            return None
+        
+        vfs = vfs or self.vfs
+        overlays: Dict[str, str] = {}
+        for staged_path in vfs.get_staged_files():
+            change = vfs.get_change(staged_path)
+            if change is None:
+                continue
+            if change.is_deletion or staged_path.endswith("pyrightconfig.json"):
+                return None
+            if staged_path.endswith((".py", ".pyi")):
+                overlays[staged_path] = change.new_content
+        
+        try:
+            data = session.check(rel_path, content, overlays)
+            baseline_data = None
+            if baseline_content is not None and baseline_content != content:
+                baseline_data = session.check(rel_path, baseline_content, overlays)
+            self._pyright_session_failures = 0
+            return data, baseline_data
+        except PyrightSessionError as e:
+            self._reset_pyright_session()
+            self._pyright_session_failures += 1
+            if self._pyright_session_failures >= PYRIGHT_SESSION_MAX_FAILURES:
+                logger.warning(
+                    f"pyright language server failed {self._pyright_session_failures} times in a row, "
+                    f"using the pyright CLI for the rest of the session: {e}"
+                )
+                self._pyright_session_disabled = True
+            else:
+                logger.warning(f"pyright language server failed, restarting it on the next check: {e}")
+            return None
+    
+    @staticmethod
+    def _finish_structure_check(error_details: List[str]) -> Tuple[bool, str, List[str]]:
+        """Deduplicates collected errors into the (is_broken, error_type, details) result."""
         if error_details:
             # Deduplicate errors
             seen = set()
@@ -4690,118 +5117,51 @@ Remember: You can override the validator if you believe the critique is incorrec
             error_details.append(f"System evaluation error (ruff fallback): {str(e)}")
 
     
-    def _materialize_vfs_for_pyright(self) -> str:
+    def _get_shadow_workspace(self) -> ShadowWorkspace:
         """
-        Materialize the entire VFS (whole project + staged changes) into a
-        temporary directory so pyright can resolve all ``app.*`` imports and
-        apply ``pyrightconfig.json``.
-
-        The materialized tree mirrors the real project layout:
-          - Real (unmodified) files are COPIED (NOT symlinked) so that pyright
-            resolves every module's real path inside the temp root, preventing
-            false ``reportMissingImports`` that cascade into
-            ``reportAttributeAccessIssue`` / ``reportReturnType`` on valid code.
+        Returns the session's long-lived materialized tree (whole project +
+        staged changes), shared by pyright, ruff, mypy and the runtime tester.
+
+        The tree mirrors the real project layout:
+          - Real (unmodified) files are reflinked (or COPIED, NOT symlinked)
+            so that pyright resolves every module's real path inside the
+            workspace root, preventing false ``reportMissingImports`` that
+            cascade into ``reportAttributeAccessIssue`` / ``reportReturnType``
+            on valid code.
           - Staged (modified / new) files are written as real files with the
-            VFS content.
-          - Deleted files are omitted.
-
-        Additionally, ``pyrightconfig.json`` is explicitly copied into the
-        materialized root (with VFS-staged override honored) so that pyright
-        can ALWAYS discover the config, independent of any ``os.walk`` skip
-        rules.
-
-        Returns:
-            Absolute path to the temporary root directory.
+            VFS content; deleted files are omitted.
+          - ``pyrightconfig.json`` at the project root is part of the tree
+            (VFS-staged override honored).
 
-        The caller is responsible for cleaning up the returned directory.
+        Each ``sync()`` rewrites only files whose staged content changed since
+        the previous sync, so later feedback-loop iterations cost the delta,
+        not the project size.
         """
-        import os
-        import shutil
-        import tempfile
-        from pathlib import Path
-
-        project_root = Path(self.project_dir).resolve()
-        temp_root = tempfile.mkdtemp(prefix="pyright_vfs_")
-
-        # --- 1. Walk the real project tree, copy everything ---
-        for dirpath, dirnames, filenames in os.walk(str(project_root)):
-            # Skip common non-source directories
-            dirnames[:] = [
-                d for d in dirnames
-                if not d.startswith((".", "__pycache__", "node_modules", "venv", ".venv"))
-            ]
-
-            rel_dir = os.path.relpath(dirpath, str(project_root))
-            target_dir = os.path.join(temp_root, rel_dir) if rel_dir != "." else temp_root
-            os.makedirs(target_dir, exist_ok=True)
-
-            for fn in filenames:
-                src = os.path.join(dirpath, fn)
-                dst = os.path.join(target_dir, fn)
-
-                # --- 2. Overwrite with VFS staged content if present ---
-                # Build the VFS-relative path (forward-slash, no leading slash).
-                vfs_rel = os.path.join(rel_dir, fn).replace("\\", "/")
-                if vfs_rel.startswith("/"):
-                    vfs_rel = vfs_rel[1:]
-
-                staged = self.vfs.read_file(vfs_rel)
-                if staged is not None:
-                    # Staged file (modified or new) – write real file.
-                    with open(dst, "w", encoding="utf-8") as f:
-                        f.write(staged)
-                else:
-                    # Unmodified file – COPY (do NOT symlink).
-                    # [CRITICAL] Pyright resolves imports via the REAL path of a
-                    # file. If siblings are symlinks back to the original tree,
-                    # pyright follows them to the original root and the import
-                    # graph rooted at temp_root breaks -> false reportMissingImports
-                    # cascading into reportAttributeAccessIssue / reportReturnType
-                    # on perfectly valid code. Real copies keep every module's
-                    # real path inside temp_root so imports resolve consistently.
-                    try:
-                        shutil.copy2(src, dst)
-                    except (OSError, shutil.SameFileError):
-                        # Best effort: skip unreadable/duplicate files.
-                        pass
-
-        # --- 3. Also materialise any VFS-only (new) files that live outside
-        #         the real project tree (edge case – should not normally happen
-        #         for pyright analysis, but be safe).
-        staged_files = self.vfs.get_staged_files()
-        for sf in staged_files:
-            target = os.path.join(temp_root, sf.replace("\\", "/"))
-            if not os.path.exists(target):
-                content = self.vfs.read_file(sf)
-                if content is not None:
-                    os.makedirs(os.path.dirname(target), exist_ok=True)
-                    with open(target, "w", encoding="utf-8") as f:
-                        f.write(content)
-
-        # --- 4. [EXPLICIT] Ensure pyrightconfig.json is present at the
-        #         materialized root, independent of the os.walk path above.
-        #         This guarantees pyright --project <temp_root> always finds
-        #         the config. VFS-staged content takes priority (consistent
-        #         with the rest of the materializer's override semantics);
-        #         otherwise we copy the real on-disk config.
-        config_rel = "pyrightconfig.json"
-        config_dst = os.path.join(temp_root, config_rel)
-        try:
-            staged_config = self.vfs.read_file(config_rel)
-            if staged_config is not None:
-                with open(config_dst, "w", encoding="utf-8") as f:
-                    f.write(staged_config)
-            else:
-                real_config = os.path.join(str(project_root), config_rel)
-                if os.path.exists(real_config):
-                    shutil.copy2(real_config, config_dst)
-                # If neither exists in VFS nor on disk, skip silently —
-                # pyright will run with its built-in defaults.
-        except (OSError, IOError) as e:
-            # Best effort: log and continue; pyright can still run with defaults.
-            logger.warning(f"Could not materialize pyrightconfig.json: {e}")
-
-        return temp_root
+        if self._shadow_workspace is None:
+            # node_modules is kept, as in the fresh trees the RUNTIME/TESTS
+            # levels execute code in (pyright excludes it itself).
+            self._shadow_workspace = ShadowWorkspace(self.vfs)
+        return self._shadow_workspace
+    
+    def _get_type_checker(self, config: ValidatorConfig) -> MypyBackend:
+        """
+        Returns the session's mypy backend for the TYPES level of `config`.
+        
+        Backends are keyed by the config's mypy mode and flags, so the warm
+        daemon reports the same diagnostics as the one-shot run it replaces.
+        The daemon is bound to the shadow workspace root; when the workspace
+        is rebuilt into a new directory the backend restarts it by itself.
+        """
+        key = (config.mypy_mode, config.mypy_strict, config.mypy_ignore_missing_imports)
+        backend = self._type_checkers.get(key)
+        if backend is None:
+            backend = MypyBackend(
+                mode=config.mypy_mode,
+                strict=config.mypy_strict,
+                ignore_missing_imports=config.mypy_ignore_missing_imports,
+            )
+            self._type_checkers[key] = backend
+        return backend
     
     
     # ========================================================================
@@ -4825,8 +5185,6 @@ Remember: You can override the validator if you believe the critique is incorrec
         Returns:
             ValidationResult with all check results
         """
-        from app.services.change_validator import ValidatorConfig
-        
         # Build list of validation levels
         levels = [
             ValidationLevel.SYNTAX,
@@ -4851,7 +5209,12 @@ Remember: You can override the validator if you believe the critique is incorrec
             test_timeout_sec=test_timeout_sec,
         )
         
-        validator = ChangeValidator(vfs=self.vfs, config=config)
+        validator = ChangeValidator(
+            vfs=self.vfs,
+            config=config,
+            workspace=self._get_shadow_workspace(),
+            type_checker=self._get_type_checker(config),
+        )
         
         # Pass project python path to syntax checker for proper tool resolution
         if hasattr(self, '_project_python_path') and self._project_python_path:
@@ -5707,14 +6070,14 @@ Remember: You can override the validator if you believe the critique is incorrec
                     orchestrator_model=self._orchestrator_model,
                 )
                 
-                code_blocks, _ = await self._run_code_generator(
+                code_blocks, _, staged_candidate = await self._run_code_generator(
                     instruction=orchestrator_result.instruction,
                     target_file=orchestrator_result.target_file,
                     target_files=getattr(orchestrator_result, 'target_files', []),  # NEW
                 )
                 
                 if code_blocks:
-                    await self._stage_code_blocks(code_blocks)
+                    await self._stage_generated(code_blocks, staged_candidate)
                     
                     # Run full validation with tests
                     validation_result = await self._run_validation(include_tests=True)
@@ -5774,14 +6137,14 @@ Remember: You can override the validator if you believe the critique is incorrec
                     new_instruction=orchestrator_result.instruction,
                 )
                 
-                code_blocks, _ = await self._run_code_generator(
+                code_blocks, _, staged_candidate = await self._run_code_generator(
                     instruction=orchestrator_result.instruction,
                     target_file=orchestrator_result.target_file,
                     target_files=getattr(orchestrator_result, 'target_files', []),  # NEW
                 )
                 
                 if code_blocks:
-                    await self._stage_code_blocks(code_blocks)
+                    await self._stage_generated(code_blocks, staged_candidate)
                     
                     # Run full validation with tests
                     validation_result = await self._run_validation(include_tests=True)
@@ -5934,7 +6297,7 @@ Remember: You can override the validator if you believe the critique is incorrec
         self._notify_stage("CODE_GEN", "Генерация исправленного кода...", None)
         
         # Generate new code
-        code_blocks, _ = await self._run_code_generator(
+        code_blocks, _, staged_candidate = await self._run_code_generator(
             instruction=orchestrator_result.instruction,
             target_file=orchestrator_result.target_file,
             target_files=getattr(orchestrator_result, 'target_files', []),  # NEW
@@ -5950,7 +6313,7 @@ Remember: You can override the validator if you believe the critique is incorrec
         )
         
         # Stage and validate again
-        await self._stage_code_blocks(code_blocks)
+        await self._stage_generated(code_blocks, staged_candidate)
         
         # === NOTIFY: Validation ===
         self._notify_stage("VALIDATION", "Валидация исправленного кода...", None)
@@ -6083,14 +6446,14 @@ Provide a corrected version of your instruction.""",
             new_instruction=orchestrator_result.instruction,
         )
         
-        code_blocks, _ = await self._run_code_generator(
+        code_blocks, _, staged_candidate = await self._run_code_generator(
             instruction=orchestrator_result.instruction,
             target_file=orchestrator_result.target_file,
             target_files=getattr(orchestrator_result, 'target_files', []),  # NEW
         )
         
         if code_blocks:
-            await self._stage_code_blocks(code_blocks)
+            await self._stage_generated(code_blocks, staged_candidate)
             
             # Re-validate
             new_validation = await self._run_validation(include_tests=False)
@@ -6172,14 +6535,14 @@ Please analyze the errors and provide a revised instruction.""",
         
         self._notify_stage("CODE_GEN", "Генерация исправленного кода...", None)
         
-        code_blocks, _ = await self._run_code_generator(
+        code_blocks, _, staged_candidate = await self._run_code_generator(
             instruction=orchestrator_result.instruction,
             target_file=orchestrator_result.target_file,
             target_files=getattr(orchestrator_result, 'target_files', []),  # NEW
         )
         
         if code_blocks:
-            await self._stage_code_blocks(code_blocks)
+            await self._stage_generated(code_blocks, staged_candidate)
             
             self._notify_stage("VALIDATION", "Повторная валидация...", None)
             new_validation = await self._run_validation(include_tests=False)
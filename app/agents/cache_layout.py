@@ -0,0 +1,277 @@
+# app/agents/cache_layout.py
+"""
+Cache Layout - раскладка сообщений оркестратора под prompt caching провайдеров.
+
+Провайдеры кэшируют ПРЕФИКС запроса: байт-в-байт совпадающее начало
+(tools -> system -> сообщения) читается из кэша, всё после первого
+расхождения считается заново. Раньше оркестратор этот префикс ломал сам:
+- переписывал system prompt на каждой итерации (счётчик web_search);
+- удалял сообщение с чанками после первого tool call (сдвиг всего хвоста);
+- ставил cache_control на самые крупные tool results, а не на границы
+  стабильного префикса.
+
+CacheLayoutPlanner держит раскладку:
+
+    [system: инструкции + compact index + project map]   <- breakpoint 1
+    [history ...]                                         <- breakpoint 2
+    [chunks] [user query]                                 <- breakpoint 3
+    [assistant/tool ... итерации]                         <- breakpoint 4 (хвост)
+
+- explicit (Anthropic): cache_control на границах выше, не больше 4
+  (лимит API). Хвостовой breakpoint сдвигается каждую итерацию, поэтому
+  итерация N+1 читает из кэша всё, что было отправлено на итерации N;
+- automatic (OpenAI, DeepSeek, Gemini, ...): кэш префикса неявный,
+  cache_control не нужен - достаточно не менять префикс;
+- none: провайдер не кэширует, старое поведение (чанки удаляются).
+
+CacheUsageStats считает cache read / cache write токены из ответов за
+сессию оркестратора.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+CACHE_MODE_EXPLICIT = "explicit"
+CACHE_MODE_AUTOMATIC = "automatic"
+CACHE_MODE_NONE = "none"
+
+# Anthropic принимает не больше 4 блоков с cache_control на запрос
+MAX_CACHE_BREAKPOINTS = 4
+
+# Модели с неявным кэшированием префикса (по префиксу model id)
+AUTOMATIC_CACHE_PREFIXES = (
+    "deepseek",
+    "openai/",
+    "google/gemini",
+    "x-ai/",
+    "moonshotai/",
+    "z-ai/",
+)
+
+
+def get_cache_mode(model: str) -> str:
+    """Режим кэширования провайдера для модели"""
+    model_id = (model or "").lower()
+    if "claude" in model_id or model_id.startswith("anthropic/"):
+        return CACHE_MODE_EXPLICIT
+    if model_id.startswith(AUTOMATIC_CACHE_PREFIXES):
+        return CACHE_MODE_AUTOMATIC
+    return CACHE_MODE_NONE
+
+
+# ============================================================================
+# USAGE STATS
+# ============================================================================
+
+@dataclass
+class CacheUsageStats:
+    """Статистика кэша за сессию оркестратора"""
+    requests: int = 0
+    input_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    latencies_ms: List[float] = field(default_factory=list)
+
+    def record(self, usage: Optional[Dict[str, Any]]) -> None:
+        if not usage:
+            return
+        self.requests += 1
+        self.input_tokens += usage.get("input_tokens", 0) or 0
+        self.cache_read_tokens += usage.get("cache_read_tokens", 0) or 0
+        self.cache_write_tokens += usage.get("cache_write_tokens", 0) or 0
+        if usage.get("latency_ms"):
+            self.latencies_ms.append(usage["latency_ms"])
+
+    @property
+    def hit_ratio(self) -> float:
+        """Доля входных токенов, прочитанных из кэша"""
+        return self.cache_read_tokens / self.input_tokens if self.input_tokens else 0.0
+
+    def summary(self) -> str:
+        text = (
+            f"{self.requests} requests, input {self.input_tokens:,} tokens: "
+            f"cache read {self.cache_read_tokens:,}, cache write {self.cache_write_tokens:,} "
+            f"({self.hit_ratio:.0%} cached)"
+        )
+        if len(self.latencies_ms) > 1:
+            later = self.latencies_ms[1:]
+            text += (
+                f", latency first {self.latencies_ms[0]:.0f} ms / "
+                f"next avg {sum(later) / len(later):.0f} ms"
+            )
+        return text
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "input_tokens": self.input_tokens,
+            "cache_read_tokens": self.cache_read_tokens,
+            "cache_write_tokens": self.cache_write_tokens,
+            "hit_ratio": round(self.hit_ratio, 4),
+        }
+
+
+# ============================================================================
+# PLANNER
+# ============================================================================
+
+class CacheLayoutPlanner:
+    """
+    Раскладка cache breakpoints для одной сессии оркестратора.
+
+    Использование:
+        planner = CacheLayoutPlanner(model)
+        messages = [system, *history, chunks, query]
+        planner.mark_prefix(messages)        # запоминаем стабильные границы
+        loop:
+            planner.apply(messages)          # перед каждым вызовом LLM
+            response = await call_llm_with_tools(...)
+            planner.record(response)
+    """
+
+    def __init__(self, model: str, label: str = "Orchestrator"):
+        self.model = model
+        self.mode = get_cache_mode(model)
+        self.label = label
+        self.usage = CacheUsageStats()
+        # Границы стабильного префикса - храним сами dict сообщений,
+        # индексы поплывут после компрессии контекста
+        self._anchors: List[Dict[str, Any]] = []
+
+    @property
+    def keeps_prefix(self) -> bool:
+        """Провайдер кэширует префикс - его нельзя переписывать между итерациями"""
+        return self.mode != CACHE_MODE_NONE
+
+    def mark_prefix(self, messages: List[Dict[str, Any]], history_len: int = 0) -> None:
+        """
+        Запоминает границы стабильного префикса:
+        system, последнее сообщение истории, последнее сообщение запроса.
+
+        Сообщения заменяются поверхностными копиями: breakpoints меняют
+        content, а dict истории принадлежат HistoryManager.
+        """
+        self._anchors = []
+        if not messages:
+            return
+        messages[:] = [dict(msg) for msg in messages]
+        self._anchors.append(messages[0])
+        if history_len > 0 and history_len < len(messages):
+            self._anchors.append(messages[history_len])
+        self._anchors.append(messages[-1])
+
+    def apply(self, messages: List[Dict[str, Any]]) -> None:
+        """Ставит cache_control на границы префикса и хвост (только explicit)"""
+        if self.mode != CACHE_MODE_EXPLICIT or not messages:
+            return
+
+        for msg in messages:
+            _strip_cache_control(msg)
+
+        present = {id(msg) for msg in messages}
+        targets = [msg for msg in self._anchors if id(msg) in present and _has_text(msg)]
+        if not targets and _has_text(messages[0]):
+            targets.append(messages[0])
+
+        # Хвост: последнее сообщение с текстом (у assistant с tool_calls его может не быть)
+        for msg in reversed(messages):
+            if _has_text(msg):
+                if all(msg is not t for t in targets):
+                    targets.append(msg)
+                break
+
+        if len(targets) > MAX_CACHE_BREAKPOINTS:
+            # system и хвост важнее всего: первый даёт хит между запросами,
+            # второй - между итерациями
+            targets = targets[:1] + targets[-(MAX_CACHE_BREAKPOINTS - 1):]
+
+        for msg in targets:
+            _add_cache_control(msg)
+
+    def update_system_prompt(self, messages: List[Dict[str, Any]], system_prompt: str) -> bool:
+        """
+        Обновляет system prompt, только если провайдер не кэширует префикс
+        (иначе изменения сообщаются через append_status).
+
+        Returns:
+            True, если system prompt заменён
+        """
+        if self.keeps_prefix:
+            return False
+        messages[0]["content"] = system_prompt
+        return True
+
+    def append_status(self, messages: List[Dict[str, Any]], note: str) -> None:
+        """Дописывает служебную строку в хвост (вместо переписывания system prompt)"""
+        if not messages or not note:
+            return
+        msg = messages[-1]
+        content = msg.get("content")
+        if isinstance(content, list):
+            for block in reversed(content):
+                if isinstance(block, dict) and block.get("type") == "text":
+                    block["text"] = f"{block.get('text', '')}\n\n{note}"
+                    return
+            content.append({"type": "text", "text": note})
+        else:
+            msg["content"] = f"{content or ''}\n\n{note}"
+
+    def record(self, response: Dict[str, Any]) -> None:
+        """Учитывает usage из ответа call_llm_with_tools"""
+        self.usage.record(response.get("usage"))
+
+    def log_summary(self) -> None:
+        if self.usage.requests:
+            logger.info(f"{self.label}: prompt cache ({self.mode}) - {self.usage.summary()}")
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def _has_text(msg: Dict[str, Any]) -> bool:
+    content = msg.get("content")
+    if isinstance(content, str):
+        return bool(content.strip())
+    if isinstance(content, list):
+        return any(
+            isinstance(block, dict) and block.get("type") == "text" and block.get("text", "").strip()
+            for block in content
+        )
+    return False
+
+
+def _strip_cache_control(msg: Dict[str, Any]) -> None:
+    """Снимает cache_control (блоки копируются - они могут быть общими с историей)"""
+    content = msg.get("content")
+    if isinstance(content, list) and any(
+        isinstance(block, dict) and "cache_control" in block for block in content
+    ):
+        msg["content"] = [
+            {k: v for k, v in block.items() if k != "cache_control"} if isinstance(block, dict) else block
+            for block in content
+        ]
+
+
+def _add_cache_control(msg: Dict[str, Any]) -> None:
+    """
+    cache_control на последний текстовый блок сообщения.
+
+    Строковый content переводится в список блоков и таким остаётся -
+    текст при этом не меняется, префикс для провайдера тот же.
+    """
+    content = msg.get("content")
+    if isinstance(content, str):
+        msg["content"] = [{"type": "text", "text": content, "cache_control": {"type": "ephemeral"}}]
+        return
+    for i in range(len(content) - 1, -1, -1):
+        block = content[i]
+        if isinstance(block, dict) and block.get("type") == "text" and block.get("text", "").strip():
+            msg["content"] = content[:i] + [{**block, "cache_control": {"type": "ephemeral"}}] + content[i + 1:]
+            return
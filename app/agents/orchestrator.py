@@ -37,9 +37,15 @@ from app.llm.prompt_templates import (
 
 # Tools
 from app.tools.tool_definitions import ORCHESTRATOR_TOOLS
-from app.tools.tool_executor import ToolExecutor, parse_tool_call
+from app.tools.tool_executor import (
+    ToolExecutor,
+    parse_tool_call,
+    run_tool_batch_async,
+    run_async_tool_batch,
+)
 
 from app.agents.pre_filter import SelectedChunk
+from app.agents.cache_layout import CacheLayoutPlanner, CacheUsageStats
 
 # NEW: Import intra-session compression for DeepSeek Reasoner and Gemini 3.0 Pro
 from app.history.context_manager import (
@@ -58,6 +64,9 @@ logger = logging.getLogger(__name__)
 MAX_TOOL_ITERATIONS = 10  # Maximum total tool call iterations
 MAX_TEST_RUNS = 5  # NEW
 
+# Инструменты, которые запускают тесты и делят лимит MAX_TEST_RUNS
+TEST_RUN_TOOLS = frozenset({"run_project_tests", "run_affected_tests"})
+
 # NEW: Batch file reading limit for models with smaller context windows
 # Applies ONLY to Claude Opus 4.5 and DeepSeek Reasoner
 BATCH_FILE_TOKEN_LIMIT = 82000  # 82k tokens max per batch of file reads
@@ -74,6 +83,7 @@ class ToolCall:
     output: str
     success: bool
     thinking: str = ""
+    duration_ms: float = 0.0  # Wall time of the tool execution
 
 
 @dataclass
@@ -103,7 +113,7 @@ class ToolUsageStats:
             self.read_file_count += 1
         elif tool_name == "search_code":
             self.search_code_count += 1
-        elif tool_name == "run_project_tests":  # NEW
+        elif tool_name in TEST_RUN_TOOLS:  # NEW
             self.test_run_count += 1
     
     def get_remaining_web_searches(self) -> int:
@@ -124,6 +134,7 @@ class OrchestratorResult:
     target_files: List[str] = field(default_factory=list)  # NEW: все файлы
     raw_response: str = ""
     tool_usage: Optional[ToolUsageStats] = None
+    cache_usage: Optional[CacheUsageStats] = None  # prompt cache read/write за сессию
 
 
 # ============================================================================
@@ -157,7 +168,9 @@ async def orchestrate(
     - Total iterations: max 7 (increased from 5)
     
     UPDATED: Selected chunks are now passed as a SEPARATE user message before the query.
-    After the first tool call, this message is REMOVED to save tokens.
+    After the first tool call, this message is REMOVED to save tokens - unless the
+    provider caches the prompt prefix (see app/agents/cache_layout.py), then it stays
+    and is read from cache on later iterations.
     
     Args:
         user_query: User's question
@@ -182,7 +195,7 @@ async def orchestrate(
     conversation_summary = "No previous context (Start of conversation)."
     if history:
         conversation_summary = (
-            f"⚠️ CONTINUING CONVERSATION ({len(history)} messages in history).\n"
+            "⚠️ CONTINUING CONVERSATION (see message history).\n"
             "Review the message history passed to you to understand previous actions.\n"
             "Do not introduce yourself again. Focus on the latest user request."
         )
@@ -216,6 +229,11 @@ async def orchestrate(
     # Add actual user query
     messages.append({"role": "user", "content": prompts["user"]})
     
+    # Stable prefix for provider prompt caching (system -> history -> chunks + query)
+    cache_planner = CacheLayoutPlanner(orchestrator_model, label="Orchestrator")
+    cache_planner.mark_prefix(messages, history_len=len(history))
+    remaining_web_searches = tool_usage.get_remaining_web_searches()
+    
     # Track if chunks have been removed (happens after first tool call)
     chunks_removed = False
     
@@ -239,10 +257,8 @@ async def orchestrate(
             # Update available tools based on usage
             available_tools = _get_available_tools(tool_usage)
             
-            # Cache optimization for Claude models
-            is_claude_model_check = orchestrator_model in [cfg.MODEL_OPUS_4_5, cfg.MODEL_SONNET_4_5, cfg.MODEL_SONNET_4_6, cfg.MODEL_OPUS_4_8]
-            if is_claude_model_check:
-                 _optimize_cache_by_size(messages, limit=3)
+            # Cache breakpoints on the stable prefix boundaries + tail
+            cache_planner.apply(messages)
 
             response = await call_llm_with_tools(
                 model=orchestrator_model,
@@ -252,6 +268,7 @@ async def orchestrate(
                 max_tokens=4000,
                 tool_choice="auto",
             )
+            cache_planner.record(response)
             
             content = response.get("content", "")
             tool_calls = response.get("tool_calls", [])
@@ -268,16 +285,15 @@ async def orchestrate(
                 break
             
             # === NEW: Remove chunks message after FIRST tool call ===
-            if not chunks_removed and chunks_message:
+            # (kept when the provider caches the prefix: cached re-reads are cheaper
+            # than invalidating everything after it)
+            if not chunks_removed and chunks_message and not cache_planner.keeps_prefix:
                 messages = _remove_chunks_message_from_history(messages)
                 chunks_removed = True
             
             # Execute tool calls
             logger.info(f"Orchestrator: executing {len(tool_calls)} tool call(s)")
             
-            # Check if Claude model for caching
-            is_claude_model = orchestrator_model in [cfg.MODEL_OPUS_4_5, cfg.MODEL_SONNET_4_5, cfg.MODEL_SONNET_4_6, cfg.MODEL_OPUS_4_8]
-            
             # Capture thinking content before tool calls
             # [UPDATED] Use reasoning_content if available (for DeepSeek), otherwise fallback to content
             current_thinking = reasoning_content if reasoning_content else (content if content else "")
@@ -298,44 +314,43 @@ async def orchestrate(
                     batch_tool_calls[0].thinking = current_thinking
                 
                 all_tool_calls.extend(batch_tool_calls)
-                
-                # Apply Claude cache optimization to results
-                if is_claude_model:
-                    for tr in tool_results:
-                        tool_name = tr.get("name", "")
-                        tool_content = tr.get("content", "")
-                        is_heavy_tool = tool_name in ["read_file", "read_code_chunk"]
-                        
-                        if is_heavy_tool and isinstance(tool_content, str) and len(tool_content) > 100:
-                            tr["content"] = [
-                                {
-                                    "type": "text",
-                                    "text": tool_content,
-                                    "cache_control": {"type": "ephemeral"}
-                                }
-                            ]
-                            logger.debug(f"Orchestrator: Cache control enabled for {tool_name}")
             else:
                 # === Original logic for other models ===
                 assistant_tool_calls = []
                 tool_results = []
                 
-                for i, tc in enumerate(tool_calls):
+                # Pass 1: parse and apply limits in request order
+                parsed_calls = []
+                batch_calls = []
+                for tc in tool_calls:
                     func_name, func_args, tc_id = parse_tool_call(tc)
+                    limit_result = None
                     
                     # Check web_search limit
                     if func_name == "web_search" and not tool_usage.can_use_web_search():
-                        tool_result = _format_web_search_limit_error(tool_usage)
-                        success = False
+                        limit_result = _format_web_search_limit_error(tool_usage)
                         logger.warning(f"Orchestrator: web_search limit reached ({MAX_WEB_SEARCH_CALLS})")
-                    elif func_name == "run_project_tests" and not tool_usage.can_run_tests():
-                        tool_result = _format_test_run_limit_error(tool_usage)
+                    elif func_name in TEST_RUN_TOOLS and not tool_usage.can_run_tests():
+                        limit_result = _format_test_run_limit_error(tool_usage)
+                    else:
+                        tool_usage.increment(func_name)
+                        batch_calls.append((func_name, func_args))
+                    
+                    parsed_calls.append((tc, func_name, func_args, tc_id, limit_result))
+                
+                # Pass 2: execute (independent read-only tools run concurrently)
+                batch_results = iter(await run_tool_batch_async(batch_calls, tool_executor))
+                
+                for i, (tc, func_name, func_args, tc_id, limit_result) in enumerate(parsed_calls):
+                    if limit_result is not None:
+                        tool_result = limit_result
                         success = False
+                        duration_ms = 0.0
                     else:
-                        # Execute tool
-                        tool_result = tool_executor(func_name, func_args)
+                        batch_result = next(batch_results)
+                        tool_result = batch_result.output
                         success = not tool_result.startswith("<!-- ERROR")
-                        tool_usage.increment(func_name)
+                        duration_ms = batch_result.duration_ms
                     
                     # Assign thinking only to the first tool call of the batch
                     tool_thinking = current_thinking if i == 0 else ""
@@ -346,30 +361,17 @@ async def orchestrate(
                         arguments=func_args,
                         output=tool_result,
                         success=success,
-                        thinking=tool_thinking
+                        thinking=tool_thinking,
+                        duration_ms=duration_ms,
                     )
                     all_tool_calls.append(tool_call_record)
                     
                     assistant_tool_calls.append(tc)
 
-                    # === Caching Logic ===
-                    content_payload = tool_result
-                    is_heavy_tool = func_name in ["read_file", "read_code_chunk"]
-                    
-                    if is_claude_model and is_heavy_tool and len(tool_result) > 100:
-                        content_payload = [
-                            {
-                                "type": "text",
-                                "text": tool_result,
-                                "cache_control": {"type": "ephemeral"}
-                            }
-                        ]
-                        logger.debug(f"Orchestrator: Cache control enabled for {func_name}")
-
                     tool_results.append({
                         "tool_call_id": tc_id,
                         "name": func_name,
-                        "content": content_payload,
+                        "content": tool_result,
                     })
             
             # Add assistant message with tool calls
@@ -413,16 +415,24 @@ async def orchestrate(
                 conversation_summary=conversation_summary,
                 prefilter_advice=prefilter_advice,
             )
-            messages[0]["content"] = updated_prompts["system"]
+            if not cache_planner.update_system_prompt(messages, updated_prompts["system"]):
+                # Prefix is cached: report the new web_search budget in the tail instead
+                if tool_usage.get_remaining_web_searches() != remaining_web_searches:
+                    remaining_web_searches = tool_usage.get_remaining_web_searches()
+                    cache_planner.append_status(
+                        messages, f"📊 Remaining web_search calls: {remaining_web_searches}"
+                    )
             
         except Exception as e:
             logger.error(f"Orchestrator LLM error: {e}")
+            cache_planner.log_summary()
             return OrchestratorResult(
                 analysis=f"Error during analysis: {e}",
                 instruction="Unable to generate instruction due to error.",
                 tool_calls=all_tool_calls,
                 raw_response="",
                 tool_usage=tool_usage,
+                cache_usage=cache_planner.usage,
             )
     
     # =========================================================================
@@ -462,6 +472,7 @@ async def orchestrate(
     # =========================================================================
     
     parsed = _parse_orchestrator_response(content)
+    cache_planner.log_summary()
     
     return OrchestratorResult(
         analysis=parsed["analysis"],
@@ -471,6 +482,7 @@ async def orchestrate(
         target_files=parsed.get("target_files", []),
         raw_response=content,
         tool_usage=tool_usage,
+        cache_usage=cache_planner.usage,
     )
 
 
@@ -552,7 +564,7 @@ def _process_file_tools_with_batch_limit(
         if func_name == "web_search" and not tool_usage.can_use_web_search():
             tool_result = _format_web_search_limit_error(tool_usage)
             success = False
-        elif func_name == "run_project_tests" and not tool_usage.can_run_tests():
+        elif func_name in TEST_RUN_TOOLS and not tool_usage.can_run_tests():
             tool_result = _format_test_run_limit_error(tool_usage)
             success = False
         else:
@@ -914,7 +926,7 @@ def _get_available_tools(tool_usage: ToolUsageStats) -> List[Dict[str, Any]]:
             continue
         
         # Check test run limit (NEW)
-        if tool_name == "run_project_tests" and not tool_usage.can_run_tests():
+        if tool_name in TEST_RUN_TOOLS and not tool_usage.can_run_tests():
             continue
         
         available.append(tool)
@@ -961,7 +973,7 @@ def _format_chunks_as_initial_context_message(chunks: List[SelectedChunk]) -> Op
     Format selected chunks as a separate user message for initial context.
     
     This message is added BEFORE the user query and will be REMOVED after 
-    the first tool call to save tokens.
+    the first tool call to save tokens (for providers without prompt caching).
     
     Returns:
         User message dict with chunks, or None if no chunks
@@ -1304,46 +1316,6 @@ def _validate_instruction_format(instruction: str) -> tuple[bool, List[str]]:
     
     return len(issues) == 0, issues
 
-def _optimize_cache_by_size(messages: List[Dict[str, Any]], limit: int = 3):
-    """
-    Экономичная оптимизация кэша:
-    1. Находит все блоки с cache_control.
-    2. Сортирует их по размеру контента (len(text)).
-    3. Оставляет кэш только у топ-N самых больших блоков.
-    4. У остальных (мелких) снимает флаг cache_control, чтобы не занимать слоты зря.
-    """
-    # Список кандидатов: храним (размер, ссылка_на_блок)
-    candidates = []
-    
-    for msg in messages:
-        content = msg.get("content")
-        if isinstance(content, list):
-            for block in content:
-                if isinstance(block, dict) and block.get("cache_control", {}).get("type") == "ephemeral":
-                    text_len = len(block.get("text", ""))
-                    candidates.append({
-                        "size": text_len,
-                        "block": block
-                    })
-    
-    total_candidates = len(candidates)
-    
-    # Если блоков меньше лимита, ничего делать не надо - кэшируем всё
-    if total_candidates <= limit:
-        return
-
-    # Сортируем по размеру (от больших к меньшим)
-    candidates.sort(key=lambda x: x["size"], reverse=True)
-    
-    # Топ-3 "жирных" оставляем, остальных разжалуем
-    losers = candidates[limit:]
-    
-    logger.info(f"Orchestrator: Cache optimization. Keeping {limit} largest blocks. Dropping {len(losers)} smaller ones.")
-    
-    for item in losers:
-        # Удаляем флаг кэширования у мелких блоков
-        del item["block"]["cache_control"]
-
 
 # ============================================================================
 # GENERAL CHAT MODE (для универсальных вопросов, не связанных с кодовой базой)
@@ -1365,6 +1337,7 @@ class GeneralChatResult:
     tool_calls: List[ToolCall] = field(default_factory=list)
     raw_response: str = ""
     tool_usage: Optional[ToolUsageStats] = None
+    cache_usage: Optional[CacheUsageStats] = None
 
 
 class GeneralChatOrchestrator:
@@ -1420,6 +1393,10 @@ class GeneralChatOrchestrator:
         messages.extend(history)
         messages.append({"role": "user", "content": prompts["user"]})
         
+        # Стабильный префикс для prompt caching (system с файлами -> история -> запрос)
+        cache_planner = CacheLayoutPlanner(self.model, label="General Chat")
+        cache_planner.mark_prefix(messages, history_len=len(history))
+        
         # Трекинг вызовов инструментов
         all_tool_calls: List[ToolCall] = []
         content = ""
@@ -1437,10 +1414,8 @@ class GeneralChatOrchestrator:
                 # Обновляем список инструментов (если лимит поиска исчерпан)
                 available_tools = self._get_general_tools(tool_usage)
                 
-                # Оптимизация кэша для Claude (если используется)
-                is_claude = self.model in [cfg.MODEL_OPUS_4_5, cfg.MODEL_SONNET_4_5, cfg.MODEL_SONNET_4_6, cfg.MODEL_OPUS_4_8]
-                if is_claude:
-                    _optimize_cache_by_size(messages, limit=3)
+                # Cache breakpoints на границах стабильного префикса и хвосте
+                cache_planner.apply(messages)
                 
                 # Вызов LLM с инструментами
                 response = await call_llm_with_tools(
@@ -1451,6 +1426,7 @@ class GeneralChatOrchestrator:
                     max_tokens=7000,
                     tool_choice="auto",
                 )
+                cache_planner.record(response)
                 
                 content = response.get("content", "")
                 tool_calls = response.get("tool_calls", [])
@@ -1468,35 +1444,47 @@ class GeneralChatOrchestrator:
                 # Захватываем мысли модели (текст до вызова инструмента)
                 current_thinking = content if content else ""
                 
+                # Проход 1: разбор вызовов и проверка лимитов в порядке запроса
+                parsed_calls = []
+                batch_calls = []
                 for tc in tool_calls:
                     func_name, func_args, tc_id = parse_tool_call(tc)
                     
                     # Проверка лимита для general_web_search с учетом увеличенного лимита
                     # Если используется стандартный метод tool_usage.can_use_web_search(), он проверит на 3.
                     # Поэтому проверяем вручную на наш новый лимит MAX_GENERAL_SEARCHES
-                    search_limit_reached = False
+                    limit_result = None
                     if func_name == "general_web_search":
                         if tool_usage.web_search_count >= MAX_GENERAL_SEARCHES:
-                            search_limit_reached = True
-
-                    if search_limit_reached:
-                        tool_result = _format_web_search_limit_error(tool_usage)
+                            limit_result = _format_web_search_limit_error(tool_usage)
+                            logger.warning(f"General Chat: search limit reached ({MAX_GENERAL_SEARCHES})")
+                        else:
+                            # ПРИМЕЧАНИЕ: Чтобы увеличить кол-во результатов за раз (до 20), 
+                            # нужно убедиться, что _execute_general_tool это поддерживает.
+                            # Можно передать max_results прямо в аргументах, если модель сама не догадалась.
+                            if "max_results" not in func_args:
+                                func_args["max_results"] = 10 # Помогаем модели брать больше
+                            
+                            # Обновляем статистику (general_web_search = web_search в статистике)
+                            tool_usage.increment("web_search")
+                    
+                    if limit_result is None:
+                        batch_calls.append((func_name, func_args))
+                    parsed_calls.append((tc, func_name, func_args, tc_id, limit_result))
+                
+                # Проход 2: независимые поиски выполняются параллельно
+                batch_results = iter(await run_async_tool_batch(batch_calls, self._execute_general_tool))
+                
+                for tc, func_name, func_args, tc_id, limit_result in parsed_calls:
+                    if limit_result is not None:
+                        tool_result = limit_result
                         success = False
-                        logger.warning(f"General Chat: search limit reached ({MAX_GENERAL_SEARCHES})")
+                        duration_ms = 0.0
                     else:
-                        # Выполняем инструмент
-                        # ПРИМЕЧАНИЕ: Чтобы увеличить кол-во результатов за раз (до 20), 
-                        # нужно убедиться, что _execute_general_tool это поддерживает.
-                        # Можно передать max_results прямо в аргументах, если модель сама не догадалась.
-                        if func_name == "general_web_search" and "max_results" not in func_args:
-                             func_args["max_results"] = 10 # Помогаем модели брать больше
-
-                        tool_result = await self._execute_general_tool(func_name, func_args)
+                        batch_result = next(batch_results)
+                        tool_result = batch_result.output
                         success = not tool_result.startswith("<!--ERROR-->")
-                        
-                        # Обновляем статистику (general_web_search = web_search в статистике)
-                        if func_name == "general_web_search":
-                            tool_usage.increment("web_search")
+                        duration_ms = batch_result.duration_ms
                     
                     # Записываем вызов с мыслями
                     tool_call_record = ToolCall(
@@ -1504,7 +1492,8 @@ class GeneralChatOrchestrator:
                         arguments=func_args,
                         output=tool_result,
                         success=success,
-                        thinking=current_thinking
+                        thinking=current_thinking,
+                        duration_ms=duration_ms,
                     )
                     all_tool_calls.append(tool_call_record)
                     
@@ -1515,22 +1504,10 @@ class GeneralChatOrchestrator:
                     # Собираем для следующей итерации
                     assistant_tool_calls.append(tc)
                     
-                    # Формируем результат (с кэшированием для Claude)
-                    # [FIX]: Исправлена ошибка 400 - теперь отправляем СПИСОК (list), а не словарь
-                    content_payload = tool_result
-                    if is_claude and len(tool_result) > 100:
-                        content_payload = [
-                            {
-                                "type": "text",
-                                "text": tool_result,
-                                "cache_control": {"type": "ephemeral"}
-                            }
-                        ]
-                    
                     tool_results.append({
                         "tool_call_id": tc_id,
                         "name": func_name,
-                        "content": content_payload,
+                        "content": tool_result,
                     })
                 
                 # Добавляем сообщения в историю
@@ -1558,23 +1535,34 @@ class GeneralChatOrchestrator:
                     is_legal_mode=self.is_legal_mode,
                     remaining_web_searches=remaining_searches
                 )
-                messages[0]["content"] = prompts["system"]
+                if not cache_planner.update_system_prompt(messages, prompts["system"]) and any(
+                    tr["name"] == "general_web_search" for tr in tool_results
+                ):
+                    # Префикс в кэше: остаток поисков - в хвост, system не трогаем
+                    cache_planner.append_status(
+                        messages, f"📊 Remaining web searches: {remaining_searches}"
+                    )
                 
             except Exception as e:
                 logger.error(f"General Chat LLM error: {e}")
+                cache_planner.log_summary()
                 return GeneralChatResult(
                     response=f"Произошла ошибка при обработке запроса: {e}",
                     raw_response=str(e),
                     tool_calls=all_tool_calls,
                     tool_usage=tool_usage,
+                    cache_usage=cache_planner.usage,
                 )
         
+        cache_planner.log_summary()
+        
         # Возвращаем финальный результат
         return GeneralChatResult(
             response=content,
             tool_calls=all_tool_calls,
             raw_response=content,
             tool_usage=tool_usage,
+            cache_usage=cache_planner.usage,
         )
     
     def _get_general_tools(self, tool_usage: ToolUsageStats) -> List[Dict[str, Any]]:
@@ -1678,7 +1666,7 @@ async def orchestrate_agent(
     conversation_summary = "No previous context (Start of conversation)."
     if history:
         conversation_summary = (
-            f"⚠️ CONTINUING CONVERSATION ({len(history)} messages in history).\n"
+            "⚠️ CONTINUING CONVERSATION (see message history).\n"
             "Review the message history passed to you to understand previous actions.\n"
             "Do not introduce yourself again. Focus on the latest user request."
         )
@@ -1718,6 +1706,11 @@ async def orchestrate_agent(
     # Add actual user query
     messages.append({"role": "user", "content": prompts["user"]})
     
+    # Stable prefix for provider prompt caching (system -> history -> chunks + query)
+    cache_planner = CacheLayoutPlanner(orchestrator_model, label="Agent Mode")
+    cache_planner.mark_prefix(messages, history_len=len(history))
+    remaining_web_searches = tool_usage.get_remaining_web_searches()
+    
     # Track if chunks have been removed
     chunks_removed = False
     
@@ -1742,11 +1735,6 @@ async def orchestrate_agent(
         try:
             available_tools = _get_available_tools(tool_usage)
             
-            # Claude cache optimization
-            is_claude_model = orchestrator_model in [cfg.MODEL_OPUS_4_5, cfg.MODEL_SONNET_4_5, cfg.MODEL_SONNET_4_6, cfg.MODEL_OPUS_4_8]
-            if is_claude_model:
-                _optimize_cache_by_size(messages, limit=3)
-            
             # === AGENT MODE: Check and compress context ===
             messages, compression_result = await compressor.check_and_compress(messages)
             if compression_result:
@@ -1755,6 +1743,10 @@ async def orchestrate_agent(
                     f"{compression_result.compressed_tokens} tokens"
                 )
             
+            # Cache breakpoints on the stable prefix boundaries + tail
+            # (after compression: compressed messages are a new prefix anyway)
+            cache_planner.apply(messages)
+            
             # === LLM call with error handling ===
             try:
                 response = await call_llm_with_tools(
@@ -1771,6 +1763,7 @@ async def orchestrate_agent(
                     logger.warning(f"Context overflow for {orchestrator_model}, applying emergency compression...")
                     messages, emergency_result = await compressor.emergency_compress(messages)
                     logger.info(f"Emergency: {emergency_result.original_tokens} → {emergency_result.compressed_tokens} tokens")
+                    cache_planner.apply(messages)
                     
                     # Retry after compression
                     response = await call_llm_with_tools(
@@ -1783,6 +1776,7 @@ async def orchestrate_agent(
                     )
                 else:
                     raise
+            cache_planner.record(response)
             
             content = response.get("content", "")
             tool_calls = response.get("tool_calls", [])
@@ -1795,7 +1789,8 @@ async def orchestrate_agent(
                 break
             
             # === NEW: Remove chunks message after FIRST tool call ===
-            if not chunks_removed and chunks_message:
+            # (kept when the provider caches the prefix)
+            if not chunks_removed and chunks_message and not cache_planner.keeps_prefix:
                 messages = _remove_chunks_message_from_history(messages)
                 chunks_removed = True
             
@@ -1820,42 +1815,42 @@ async def orchestrate_agent(
                     batch_tool_calls[0].thinking = current_thinking
                 
                 all_tool_calls.extend(batch_tool_calls)
-                
-                # Apply Claude cache optimization to results
-                if is_claude_model:
-                    for tr in tool_results:
-                        tool_name = tr.get("name", "")
-                        tool_content = tr.get("content", "")
-                        is_heavy_tool = tool_name in ["read_file", "read_code_chunk"]
-                        
-                        if is_heavy_tool and isinstance(tool_content, str) and len(tool_content) > 100:
-                            tr["content"] = [
-                                {
-                                    "type": "text",
-                                    "text": tool_content,
-                                    "cache_control": {"type": "ephemeral"}
-                                }
-                            ]
-                            logger.debug(f"Agent Mode: Cache control enabled for {tool_name}")
             else:
                 # === Original logic for other models ===
                 assistant_tool_calls = []
                 tool_results = []
                 
-                for i, tc in enumerate(tool_calls):
+                # Pass 1: parse and apply limits in request order
+                parsed_calls = []
+                batch_calls = []
+                for tc in tool_calls:
                     func_name, func_args, tc_id = parse_tool_call(tc)
+                    limit_result = None
                     
                     if func_name == "web_search" and not tool_usage.can_use_web_search():
-                        tool_result = _format_web_search_limit_error(tool_usage)
-                        success = False
+                        limit_result = _format_web_search_limit_error(tool_usage)
                         logger.warning(f"Agent Mode: web_search limit reached ({MAX_WEB_SEARCH_CALLS})")
-                    elif func_name == "run_project_tests" and not tool_usage.can_run_tests():
-                        tool_result = _format_test_run_limit_error(tool_usage)
+                    elif func_name in TEST_RUN_TOOLS and not tool_usage.can_run_tests():
+                        limit_result = _format_test_run_limit_error(tool_usage)
+                    else:
+                        tool_usage.increment(func_name)
+                        batch_calls.append((func_name, func_args))
+                    
+                    parsed_calls.append((tc, func_name, func_args, tc_id, limit_result))
+                
+                # Pass 2: execute (independent read-only tools run concurrently)
+                batch_results = iter(await run_tool_batch_async(batch_calls, tool_executor))
+                
+                for i, (tc, func_name, func_args, tc_id, limit_result) in enumerate(parsed_calls):
+                    if limit_result is not None:
+                        tool_result = limit_result
                         success = False
+                        duration_ms = 0.0
                     else:
-                        tool_result = tool_executor(func_name, func_args)
+                        batch_result = next(batch_results)
+                        tool_result = batch_result.output
                         success = not tool_result.startswith("<!-- ERROR")
-                        tool_usage.increment(func_name)
+                        duration_ms = batch_result.duration_ms
                     
                     tool_thinking = current_thinking if i == 0 else ""
                     
@@ -1864,29 +1859,16 @@ async def orchestrate_agent(
                         arguments=func_args,
                         output=tool_result,
                         success=success,
-                        thinking=tool_thinking
+                        thinking=tool_thinking,
+                        duration_ms=duration_ms,
                     ))
                     
                     assistant_tool_calls.append(tc)
                     
-                    # Claude cache for heavy tools
-                    content_payload = tool_result
-                    is_heavy_tool = func_name in ["read_file", "read_code_chunk"]
-                    
-                    if is_claude_model and is_heavy_tool and len(tool_result) > 100:
-                        content_payload = [
-                            {
-                                "type": "text",
-                                "text": tool_result,
-                                "cache_control": {"type": "ephemeral"}
-                            }
-                        ]
-                        logger.debug(f"Agent Mode: Cache enabled for {func_name}")
-                    
                     tool_results.append({
                         "tool_call_id": tc_id,
                         "name": func_name,
-                        "content": content_payload,
+                        "content": tool_result,
                     })
             
             # Build assistant message
@@ -1931,16 +1913,24 @@ async def orchestrate_agent(
                     conversation_summary=conversation_summary,
                     prefilter_advice=prefilter_advice,
                 )
-            messages[0]["content"] = updated_prompts["system"]
+            if not cache_planner.update_system_prompt(messages, updated_prompts["system"]):
+                # Prefix is cached: report the new web_search budget in the tail instead
+                if tool_usage.get_remaining_web_searches() != remaining_web_searches:
+                    remaining_web_searches = tool_usage.get_remaining_web_searches()
+                    cache_planner.append_status(
+                        messages, f"📊 Remaining web_search calls: {remaining_web_searches}"
+                    )
             
         except Exception as e:
             logger.error(f"Agent Mode error: {e}")
+            cache_planner.log_summary()
             return OrchestratorResult(
                 analysis=f"Error during analysis: {e}",
                 instruction="Unable to generate instruction due to error.",
                 tool_calls=all_tool_calls,
                 raw_response="",
                 tool_usage=tool_usage,
+                cache_usage=cache_planner.usage,
             )
     
     else:
@@ -1991,6 +1981,7 @@ async def orchestrate_agent(
                 logger.error(f"Agent Mode final response error: {e}")
     
     parsed = _parse_orchestrator_response(content)
+    cache_planner.log_summary()
     
     return OrchestratorResult(
         analysis=parsed["analysis"],
@@ -2000,4 +1991,5 @@ async def orchestrate_agent(
         target_files=parsed.get("target_files", []),
         raw_response=content,
         tool_usage=tool_usage,
+        cache_usage=cache_planner.usage,
     )
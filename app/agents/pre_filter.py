@@ -7,6 +7,8 @@ UPDATED LOGIC:
 - Sends code to DeepSeek for analysis (not just metadata)
 - DeepSeek sees real code and selects best 5 chunks
 - Applies 75k token limit (whole chunks only, no splitting)
+- Local BM25 first stage (app/services/lexical_index.py) narrows the
+  chunks sent to the LLM down to top-K lexical candidates
 - At least 1 chunk must reach Orchestrator
 
 Supports both regular and compressed semantic indexes.
@@ -19,7 +21,7 @@ import re
 import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Callable
+from typing import List, Dict, Any, Optional, Callable, Set
 from enum import Enum
 from app.tools.tool_definitions import ORCHESTRATOR_TOOLS
 from app.tools.tool_executor import ToolExecutor, parse_tool_call
@@ -35,6 +37,8 @@ from app.llm.prompt_templates import (
 from config.settings import cfg
 from app.services.project_map_builder import get_project_map_for_prompt
 from app.utils.token_counter import TokenCounter
+from app.services import lexical_index
+from app.services.chunk_store import ChunkReader, get_chunk_store
 
 logger = logging.getLogger(__name__)
 
@@ -335,10 +339,10 @@ async def _run_advanced_prefilter(
     tool_calls_count = 0
     
     try:
-        # Получить доступные инструменты (исключить run_project_tests)
+        # Получить доступные инструменты (исключить запуск тестов)
         available_tools = [
             tool for tool in ORCHESTRATOR_TOOLS
-            if tool.get("function", {}).get("name") != "run_project_tests"
+            if tool.get("function", {}).get("name") not in ("run_project_tests", "run_affected_tests")
         ]
         
         while tool_calls_count < max_tool_calls:
@@ -498,7 +502,7 @@ async def run_planning_loop(
     try:
         available_tools = [
             tool for tool in ORCHESTRATOR_TOOLS
-            if tool.get("function", {}).get("name") != "run_project_tests"
+            if tool.get("function", {}).get("name") not in ("run_project_tests", "run_affected_tests")
         ]
         
         while tool_calls_count < max_tool_calls:
@@ -678,7 +682,9 @@ async def pre_filter_chunks(
     Selects top N most relevant AST chunks from project index.
     
     NEW ALGORITHM:
-    1. Load ALL chunks with their CODE from semantic index
+    0. Local BM25 first stage: rank chunks by the query, keep top-K candidates
+       (skipped for small projects or when the query has no lexical match)
+    1. Load candidate (or ALL) chunks with their CODE from semantic index
     2. Build context with actual code for LLM
     3. Apply token limit BEFORE sending to LLM (max varies by model)
     4. Send chunks WITH CODE to DeepSeek
@@ -841,8 +847,15 @@ async def pre_filter_chunks(
     is_compressed = index.get("compressed", False)
     logger.info(f"Pre-filter: using {'compressed' if is_compressed else 'regular'} index")
     
-    # STEP 1: Load ALL chunks with CODE
-    all_chunks = _load_all_chunks_with_code(index, project_dir)
+    # STEP 0: Lexical first stage (BM25) - top-K candidates for the LLM
+    lexical_scores = _select_lexical_candidates(user_query, index, project_dir)
+    
+    # STEP 1: Load chunks with CODE (only candidates if lexical stage ran)
+    all_chunks = _load_all_chunks_with_code(
+        index,
+        project_dir,
+        chunk_ids=set(lexical_scores) if lexical_scores else None,
+    )
     
     if not all_chunks:
         logger.warning("Pre-filter: no chunks loaded from index")
@@ -850,11 +863,15 @@ async def pre_filter_chunks(
     
     logger.info(f"Pre-filter: loaded {len(all_chunks)} chunks with code")
     
+    if lexical_scores:
+        all_chunks.sort(key=lambda c: lexical_scores.get(c.chunk_id, 0.0), reverse=True)
+    
     # STEP 2: Build chunks list WITH CODE for LLM
     # Apply token budget for LLM input
     chunks_for_llm, total_input_tokens = _build_chunks_for_llm(
         all_chunks, 
-        max_input_tokens=max_tokens
+        max_input_tokens=max_tokens,
+        keep_order=bool(lexical_scores),
     )
     
     logger.info(
@@ -956,23 +973,29 @@ async def pre_filter_chunks(
 def _load_all_chunks_with_code(
     index: Dict[str, Any],
     project_dir: str,
+    chunk_ids: Optional[Set[str]] = None,
 ) -> List[SelectedChunk]:
     """
     Load ALL chunks with their actual code.
     
     Reads code from:
-    1. Semantic index (if code is stored there)
-    2. Original files (using line numbers from index)
+    1. Chunk store (code + token counts saved with the semantic index)
+    2. Original files (using line numbers from index) - for files that are
+       not in the store or changed after it was updated
+    
+    If chunk_ids is given, only those chunks are loaded (files without
+    candidates are not read at all).
     """
     chunks = []
     token_counter = TokenCounter()
     
     is_compressed = index.get("compressed", False)
     
-    if is_compressed:
-        chunks = _load_from_compressed_index(index, project_dir, token_counter)
-    else:
-        chunks = _load_from_regular_index(index, project_dir, token_counter)
+    with get_chunk_store(project_dir).open_reader() as reader:
+        if is_compressed:
+            chunks = _load_from_compressed_index(index, project_dir, token_counter, chunk_ids, reader)
+        else:
+            chunks = _load_from_regular_index(index, project_dir, token_counter, chunk_ids, reader)
     
     return chunks
 
@@ -981,47 +1004,28 @@ def _load_from_regular_index(
     index: Dict[str, Any],
     project_dir: str,
     token_counter: TokenCounter,
+    chunk_ids: Optional[Set[str]] = None,
+    reader: Optional[ChunkReader] = None,
 ) -> List[SelectedChunk]:
     """Load chunks from regular (non-compressed) semantic index"""
     chunks = []
+    get_file_lines = _file_lines_loader(project_dir)
     
     for file_path, file_data in index.get("files", {}).items():
-        full_path = Path(project_dir) / file_path
-        
-        # Read file content once
-        file_content = _read_file_safe(full_path)
-        if file_content is None:
-            continue
-        
-        file_lines = file_content.splitlines()
-        
-        # Load classes
-        for cls in file_data.get("classes", []):
-            chunk = _extract_chunk_from_lines(
-                file_path=file_path,
-                name=cls.get("name", ""),
-                chunk_type="class",
-                lines_str=cls.get("lines", ""),
-                file_lines=file_lines,
-                token_counter=token_counter,
-                description=cls.get("description", ""),
-            )
-            if chunk:
-                chunks.append(chunk)
-        
-        # Load functions
-        for func in file_data.get("functions", []):
-            chunk = _extract_chunk_from_lines(
-                file_path=file_path,
-                name=func.get("name", ""),
-                chunk_type="function",
-                lines_str=func.get("lines", ""),
-                file_lines=file_lines,
-                token_counter=token_counter,
-                description=func.get("description", ""),
-            )
-            if chunk:
-                chunks.append(chunk)
+        for chunk_type, key in (("class", "classes"), ("function", "functions")):
+            for item in file_data.get(key, []):
+                if chunk_ids is not None and f"{file_path}:{item.get('name', '')}" not in chunk_ids:
+                    continue
+                chunk = _load_chunk(
+                    file_path=file_path,
+                    item=item,
+                    chunk_type=chunk_type,
+                    reader=reader,
+                    get_file_lines=get_file_lines,
+                    token_counter=token_counter,
+                )
+                if chunk:
+                    chunks.append(chunk)
     
     return chunks
 
@@ -1030,62 +1034,88 @@ def _load_from_compressed_index(
     index: Dict[str, Any],
     project_dir: str,
     token_counter: TokenCounter,
+    chunk_ids: Optional[Set[str]] = None,
+    reader: Optional[ChunkReader] = None,
 ) -> List[SelectedChunk]:
     """Load chunks from compressed semantic index"""
     chunks = []
+    get_file_lines = _file_lines_loader(project_dir)
+    
+    for chunk_type, key in (("class", "classes"), ("function", "functions")):
+        for item in index.get(key, []):
+            file_path = item.get("file", "")
+            if chunk_ids is not None and f"{file_path}:{item.get('name', '')}" not in chunk_ids:
+                continue
+            chunk = _load_chunk(
+                file_path=file_path,
+                item=item,
+                chunk_type=chunk_type,
+                reader=reader,
+                get_file_lines=get_file_lines,
+                token_counter=token_counter,
+            )
+            if chunk:
+                chunks.append(chunk)
     
-    # Cache for file contents
-    file_cache: Dict[str, List[str]] = {}
+    return chunks
+
+
+def _file_lines_loader(project_dir: str) -> Callable[[str], Optional[List[str]]]:
+    """Lazy per-file line cache: each source file is read at most once"""
+    file_cache: Dict[str, Optional[List[str]]] = {}
     
     def get_file_lines(file_path: str) -> Optional[List[str]]:
         if file_path not in file_cache:
-            full_path = Path(project_dir) / file_path
-            content = _read_file_safe(full_path)
-            if content is None:
-                file_cache[file_path] = None
-            else:
-                file_cache[file_path] = content.splitlines()
+            content = _read_file_safe(Path(project_dir) / file_path)
+            file_cache[file_path] = None if content is None else content.splitlines()
         return file_cache[file_path]
     
-    # Load classes
-    for cls in index.get("classes", []):
-        file_path = cls.get("file", "")
-        file_lines = get_file_lines(file_path)
-        if file_lines is None:
-            continue
-        
-        chunk = _extract_chunk_from_lines(
+    return get_file_lines
+
+
+def _load_chunk(
+    file_path: str,
+    item: Dict[str, Any],
+    chunk_type: str,
+    reader: Optional[ChunkReader],
+    get_file_lines: Callable[[str], Optional[List[str]]],
+    token_counter: TokenCounter,
+) -> Optional[SelectedChunk]:
+    """Chunk from the chunk store, or sliced from the source file if not stored"""
+    name = item.get("name", "")
+    lines_str = item.get("lines", "")
+    description = item.get("description", "")
+    
+    stored = reader.get(file_path, name, lines_str) if reader is not None else None
+    if stored is not None:
+        code, tokens = stored
+        start_line, end_line = map(int, lines_str.split("-"))
+        return SelectedChunk(
+            chunk_id=f"{file_path}:{name}",
             file_path=file_path,
-            name=cls.get("name", ""),
-            chunk_type="class",
-            lines_str=cls.get("lines", ""),
-            file_lines=file_lines,
-            token_counter=token_counter,
-            description=cls.get("description", ""),
+            chunk_type=chunk_type,
+            name=name,
+            relevance_score=0.0,  # Will be set by LLM
+            reason=description,  # Use description as initial reason
+            tokens=tokens,
+            code=code,
+            start_line=start_line,
+            end_line=end_line,
         )
-        if chunk:
-            chunks.append(chunk)
     
-    # Load functions
-    for func in index.get("functions", []):
-        file_path = func.get("file", "")
-        file_lines = get_file_lines(file_path)
-        if file_lines is None:
-            continue
-        
-        chunk = _extract_chunk_from_lines(
-            file_path=file_path,
-            name=func.get("name", ""),
-            chunk_type="function",
-            lines_str=func.get("lines", ""),
-            file_lines=file_lines,
-            token_counter=token_counter,
-            description=func.get("description", ""),
-        )
-        if chunk:
-            chunks.append(chunk)
+    file_lines = get_file_lines(file_path)
+    if file_lines is None:
+        return None
     
-    return chunks
+    return _extract_chunk_from_lines(
+        file_path=file_path,
+        name=name,
+        chunk_type=chunk_type,
+        lines_str=lines_str,
+        file_lines=file_lines,
+        token_counter=token_counter,
+        description=description,
+    )
 
 
 def _extract_chunk_from_lines(
@@ -1145,6 +1175,54 @@ def _read_file_safe(path: Path) -> Optional[str]:
         return None
 
 
+# ============================================================================
+# LEXICAL FIRST STAGE (BM25)
+# ============================================================================
+
+def _select_lexical_candidates(
+    user_query: str,
+    index: Dict[str, Any],
+    project_dir: str,
+) -> Optional[Dict[str, float]]:
+    """
+    Rank chunks locally with BM25 and return top-K candidates {chunk_id: score}.
+    
+    Returns None when the stage is skipped and ALL chunks should go to the
+    LLM as before:
+    - disabled in settings or NumPy not installed;
+    - project has no more chunks than top-K;
+    - no query term occurs in the project (e.g. a purely Russian query
+      against English code) - lexical ranking would be arbitrary.
+    """
+    if not getattr(cfg, "PRE_FILTER_LEXICAL_ENABLED", True) or not lexical_index.is_available():
+        return None
+    
+    top_k = getattr(cfg, "PRE_FILTER_LEXICAL_TOP_K", 15)
+    
+    try:
+        started = time.perf_counter()
+        lexical = lexical_index.get_lexical_index(index, project_dir)
+        if lexical is None or lexical.size <= top_k:
+            return None
+        
+        matched = lexical.matched_terms(user_query)
+        if not matched:
+            logger.info("Pre-filter: no lexical match for query, sending all chunks")
+            return None
+        
+        ranked = lexical.search(user_query, top_k=top_k)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    except Exception as e:
+        logger.warning(f"Pre-filter: lexical stage failed, sending all chunks: {e}")
+        return None
+    
+    logger.info(
+        f"Pre-filter: BM25 kept {len(ranked)}/{lexical.size} chunks "
+        f"(terms: {', '.join(matched[:10])}) in {elapsed_ms:.0f}ms"
+    )
+    return dict(ranked) or None
+
+
 # ============================================================================
 # BUILD CHUNKS FOR LLM (with token budget)
 # ============================================================================
@@ -1152,6 +1230,7 @@ def _read_file_safe(path: Path) -> Optional[str]:
 def _build_chunks_for_llm(
     all_chunks: List[SelectedChunk],
     max_input_tokens: int,
+    keep_order: bool = False,
 ) -> tuple[List[SelectedChunk], int]:
     """
     Build list of chunks to send to LLM.
@@ -1159,6 +1238,10 @@ def _build_chunks_for_llm(
     Applies token budget - includes as many chunks as possible
     while staying under max_input_tokens limit.
     
+    keep_order=True: chunks are already ranked (BM25) - walk them in
+    rank order and skip the ones that don't fit instead of re-sorting
+    by size.
+    
     Returns: (chunks_list, total_tokens)
     """
     # Reserve tokens for system prompt, user query, etc.
@@ -1169,7 +1252,7 @@ def _build_chunks_for_llm(
     total_tokens = 0
     
     # Sort by tokens (smaller first) to include more chunks
-    sorted_chunks = sorted(all_chunks, key=lambda c: c.tokens)
+    sorted_chunks = all_chunks if keep_order else sorted(all_chunks, key=lambda c: c.tokens)
     
     for chunk in sorted_chunks:
         # Check if adding this chunk exceeds budget
@@ -1179,6 +1262,8 @@ def _build_chunks_for_llm(
         if total_tokens + chunk_total <= available_tokens:
             selected.append(chunk)
             total_tokens += chunk_total
+        elif keep_order:
+            continue
         else:
             # If we have at least some chunks, stop adding
             if selected:
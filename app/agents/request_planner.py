@@ -0,0 +1,107 @@
+# app/agents/request_planner.py
+"""
+Request Planner - подготовка запроса до первого вызова оркестратора.
+
+Роутер, Pre-filter анализ, загрузка истории и контекста (compact index,
+project map) друг от друга почти не зависят, а выполнялись по очереди:
+время до первого вызова оркестратора было суммой нескольких LLM-вызовов
+и чтений с диска. RequestTaskGraph запускает их как граф async-задач:
+каждый узел стартует, как только готовы его зависимости.
+
+Пример:
+    >>> graph = RequestTaskGraph("ask")
+    >>> graph.add("router", route)
+    >>> graph.add("context", load_context)
+    >>> graph.add("prefilter", run_prefilter, deps=("context",))
+    >>> results = await graph.run()
+    >>> graph.timeline()
+    'router 0-820ms | context 0-35ms | prefilter 35-4100ms'
+"""
+
+from __future__ import annotations
+
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+NodeFn = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+@dataclass
+class _Node:
+    name: str
+    fn: NodeFn
+    deps: Sequence[str]
+    started_ms: Optional[float] = None
+    finished_ms: Optional[float] = None
+
+
+class RequestTaskGraph:
+    """
+    Граф async-задач одного запроса.
+
+    Узел - корутина-функция, получающая dict с результатами своих
+    зависимостей. Ошибки узлы обрабатывают сами (как и шаги, которые они
+    заменяют); необработанная ошибка отменяет остальные узлы и
+    пробрасывается из run().
+    """
+
+    def __init__(self, label: str = "request"):
+        self.label = label
+        self._nodes: Dict[str, _Node] = {}
+        self._started: Optional[float] = None
+
+    def add(self, name: str, fn: NodeFn, deps: Sequence[str] = ()) -> "RequestTaskGraph":
+        for dep in deps:
+            if dep not in self._nodes:
+                raise ValueError(f"Unknown dependency '{dep}' for node '{name}'")
+        self._nodes[name] = _Node(name=name, fn=fn, deps=tuple(deps))
+        return self
+
+    async def run(self) -> Dict[str, Any]:
+        """Выполняет граф, возвращает результаты всех узлов по имени"""
+        self._started = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_node(node: _Node) -> Any:
+            inputs = {dep: await tasks[dep] for dep in node.deps}
+            node.started_ms = self._elapsed_ms()
+            try:
+                return await node.fn(inputs)
+            finally:
+                node.finished_ms = self._elapsed_ms()
+
+        # Порядок добавления топологический (add проверяет зависимости)
+        for name, node in self._nodes.items():
+            tasks[name] = asyncio.create_task(run_node(node), name=f"{self.label}:{name}")
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        logger.info(f"Request plan ({self.label}): {self.timeline()}")
+        return {name: task.result() for name, task in tasks.items()}
+
+    def timeline(self) -> str:
+        """Старт/финиш узлов относительно начала графа"""
+        parts = []
+        for node in self._nodes.values():
+            if node.started_ms is None:
+                parts.append(f"{node.name} -")
+            else:
+                finished = node.finished_ms if node.finished_ms is not None else node.started_ms
+                parts.append(f"{node.name} {node.started_ms:.0f}-{finished:.0f}ms")
+        return " | ".join(parts)
+
+    def _elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._started) * 1000
+
@@ -1715,6 +1715,13 @@ class SemanticIndexer:
         with output_path.open("w", encoding="utf-8") as f:
             json.dump(index, f, ensure_ascii=False, indent=2, default=str)
         logger.info(f"Full index saved: {output_path}")
+        
+        # Код чанков (chunk store) и BM25-индекс для pre-filter обновляются
+        # вместе с semantic index
+        from app.services.chunk_store import update_chunk_store
+        from app.services.lexical_index import save_lexical_index
+        update_chunk_store(index, str(self.root_path))
+        save_lexical_index(index, str(self.root_path))
     
     def _save_compact_index(self, compact_index: Dict):
         json_path = self._get_compact_index_path()
@@ -11,10 +11,8 @@ import logging
 import re
 from typing import List, Optional
 from dataclasses import dataclass
-from app.llm.prompt_templates import format_compression_prompt
 from app.history.storage import Message
 from app.utils.token_counter import TokenCounter
-from app.llm.api_client import call_llm
 from config.settings import cfg
 
 logger = logging.getLogger(__name__)
@@ -63,6 +61,23 @@ def _contains_code_block(content: str) -> bool:
     return triple_backticks in content
 
 
+def get_compression_threshold(active_model: Optional[str], threshold: int = DEFAULT_THRESHOLD) -> int:
+    """
+    Порог сжатия истории для модели оркестратора.
+
+    Вынесено отдельно, чтобы история, загруженная спекулятивно под одну
+    модель, могла быть сверена с моделью, выбранной роутером.
+    """
+    # Если явно передана Gemini 3.0 Pro, ставим огромный порог
+    if active_model and active_model == cfg.MODEL_GEMINI_3_PRO:
+        return 200000
+    # Для других моделей используем переданный порог
+    if active_model:
+        return threshold
+    # Если модель не передана, используем более агрессивный порог
+    return 30000
+
+
 async def compress_history_if_needed(
     history: List[Message], 
     threshold: int = DEFAULT_THRESHOLD,
@@ -82,18 +97,13 @@ async def compress_history_if_needed(
     """
     
     # ДИНАМИЧЕСКИЙ ПОРОГ В ЗАВИСИМОСТИ ОТ МОДЕЛИ
-    current_threshold = threshold
+    current_threshold = get_compression_threshold(active_model, threshold)
     
-    # Если явно передана Gemini 3.0 Pro, ставим огромный порог
     if active_model and active_model == cfg.MODEL_GEMINI_3_PRO:
-        current_threshold = 200000 
         logger.info(f"Compressor: Using EXTENDED threshold for Gemini 3.0 Pro ({current_threshold} tokens)")
     elif active_model:
-        # Для других моделей используем переданный порог
         logger.info(f"Compressor: Using threshold {current_threshold} tokens for model {active_model}")
     else:
-        # Если модель не передана, используем более агрессивный порог
-        current_threshold = 30000
         logger.info(f"Compressor: No model specified, using default threshold ({current_threshold} tokens)")
     
     token_counter = TokenCounter()
@@ -186,6 +196,10 @@ async def _compress_message(msg: Message, content_type: str) -> Message:
     if original_tokens < 500:
         return msg
     
+    # Промпты и LLM-клиент нужны только при реальном сжатии
+    from app.llm.prompt_templates import format_compression_prompt
+    from app.llm.api_client import call_llm
+    
     try:
         # Форматируем промпт для сжатия с целевым коэффициентом
         target_tokens = int(original_tokens * 0.6)  # Целевое сжатие до 60%
@@ -8,7 +8,6 @@ import asyncio
 from app.history.storage import HistoryStorage, Message, Thread, AgentChange
 from app.history.compressor import compress_history_if_needed, prune_irrelevant_context, CompressionStats
 from app.history.orchestrator_trace import OrchestratorTraceStorage, TraceStep
-from app.llm.api_client import call_llm
 from config.settings import cfg
 
 
@@ -433,6 +432,7 @@ class HistoryManager:
         # Используем быструю модель (Gemini Flash или что есть в конфиге)
         model_id = getattr(cfg, 'MODEL_GEMINI_2_FLASH', 'gpt-3.5-turbo')
         
+        from app.llm.api_client import call_llm
         response = await call_llm(
             model=model_id,
             messages=[{
@@ -19,7 +19,7 @@ import json
 import asyncio
 import logging
 import time
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 
@@ -77,6 +77,10 @@ class LLMResponse:
     # =========================================================================
     finish_reason: Optional[str] = None
 
+    # Prompt caching: сколько входных токенов прочитано из кэша / записано в кэш
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+
 
 
 @dataclass
@@ -673,6 +677,7 @@ class LLMClient:
         input_tokens = usage.get("prompt_tokens", 0)
         output_tokens = usage.get("completion_tokens", 0)
         total_tokens = usage.get("total_tokens", input_tokens + output_tokens)
+        cache_read_tokens, cache_write_tokens = _extract_cache_usage(usage)
 
         # Calculate cost
         cost_usd = self._estimate_cost(model, input_tokens, output_tokens)
@@ -692,6 +697,8 @@ class LLMClient:
             thought_signature=thought_signature,
             reasoning_details=reasoning_details,
             finish_reason=finish_reason,  # NEW
+            cache_read_tokens=cache_read_tokens,
+            cache_write_tokens=cache_write_tokens,
         )
         
         
@@ -728,6 +735,30 @@ class LLMClient:
 
 
 
+def _extract_cache_usage(usage: Dict[str, Any]) -> Tuple[int, int]:
+    """
+    (cache_read, cache_write) токены из usage ответа.
+
+    Форматы провайдеров:
+    - OpenAI / OpenRouter: prompt_tokens_details.cached_tokens (+ cache_write_tokens)
+    - DeepSeek: prompt_cache_hit_tokens
+    - Anthropic (passthrough): cache_read_input_tokens / cache_creation_input_tokens
+    """
+    details = usage.get("prompt_tokens_details") or {}
+    cache_read = (
+        details.get("cached_tokens")
+        or usage.get("prompt_cache_hit_tokens")
+        or usage.get("cache_read_input_tokens")
+        or 0
+    )
+    cache_write = (
+        details.get("cache_write_tokens")
+        or usage.get("cache_creation_input_tokens")
+        or 0
+    )
+    return int(cache_read), int(cache_write)
+
+
 # ============== CONVENIENCE FUNCTIONS =============
 # Global client instance
 _default_client: Optional[LLMClient] = None
@@ -829,6 +860,13 @@ async def call_llm_with_tools(
         "thought_signature": response.thought_signature,
         "reasoning_details": response.reasoning_details,
         "raw_response": response.raw_response,
+        "usage": {
+            "input_tokens": response.input_tokens,
+            "output_tokens": response.output_tokens,
+            "cache_read_tokens": response.cache_read_tokens,
+            "cache_write_tokens": response.cache_write_tokens,
+            "latency_ms": response.latency_ms,
+        },
     }
 
 
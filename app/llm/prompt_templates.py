@@ -21,6 +21,7 @@ CENTRALIZED PROMPT STORAGE:
 import logging
 import re
 import os
+from functools import lru_cache
 
 from typing import Optional, List, Dict, Any, Set
 from config.settings import Config
@@ -145,6 +146,7 @@ def get_model_cognitive_type(model_id: str) -> str:
 # ============================================================================
 
 
+@lru_cache(maxsize=None)
 def _build_adaptive_block_ask_deep_thinker() -> str:
     """Build adaptive block for deep_thinker models (Claude Opus/Sonnet) in ASK mode"""
     prompt_parts: List[str] = []
@@ -365,6 +367,7 @@ def _build_adaptive_block_ask_deep_thinker() -> str:
     return "\n".join(prompt_parts)
 
 
+@lru_cache(maxsize=None)
 def _build_adaptive_block_ask_reasoner() -> str:
     """Build adaptive block for reasoner models (DeepSeek V3.2) in ASK mode"""
     prompt_parts: List[str] = []
@@ -513,6 +516,7 @@ def _build_adaptive_block_ask_reasoner() -> str:
     return "\n".join(prompt_parts)
 
 
+@lru_cache(maxsize=None)
 def _build_adaptive_block_executor() -> str:
     """Build adaptive block for executor models (GPT-5.1 Codex Max) in ASK mode"""
     prompt_parts: List[str] = []
@@ -585,6 +589,7 @@ def _build_adaptive_block_executor() -> str:
     return "\n".join(prompt_parts)
 
 
+@lru_cache(maxsize=None)
 def _build_adaptive_block_new_project_deep_thinker() -> str:
     """Build adaptive block for deep_thinker models (Claude Opus/Sonnet) in NEW PROJECT mode"""
     prompt_parts: List[str] = []
@@ -725,6 +730,7 @@ def _build_adaptive_block_new_project_deep_thinker() -> str:
     return "\n".join(prompt_parts)
 
 
+@lru_cache(maxsize=None)
 def _build_adaptive_block_new_project_reasoner() -> str:
     """Build adaptive block for reasoner models (DeepSeek V3.2) in NEW PROJECT mode"""
     prompt_parts: List[str] = []
@@ -836,7 +842,7 @@ def _build_adaptive_block_new_project_reasoner() -> str:
     return "\n".join(prompt_parts)
 
 
-
+@lru_cache(maxsize=None)
 def _build_adaptive_block_claude_delegation() -> str:
     """
     Build adaptive block for Claude Opus 4.5 and Sonnet 4.5 models.
@@ -895,6 +901,7 @@ def _build_adaptive_block_claude_delegation() -> str:
     return "\n".join(prompt_parts)
 
     
+@lru_cache(maxsize=None)
 def _build_adaptive_block_gpt5_2_codex() -> str:
     """
     Build adaptive block specifically for GPT-5.2 Codex (Dec 2025).
@@ -949,19 +956,6 @@ def _build_adaptive_block_gpt5_2_codex() -> str:
     return "\n".join(prompt_parts)
 
 
-# Pre-build the Claude delegation block
-_ADAPTIVE_BLOCK_CLAUDE_DELEGATION = _build_adaptive_block_claude_delegation()
-
-_ADAPTIVE_BLOCK_GPT5_2_CODEX = _build_adaptive_block_gpt5_2_codex()
-
-# Pre-build adaptive blocks for efficiency
-_ADAPTIVE_BLOCK_ASK_DEEP_THINKER = _build_adaptive_block_ask_deep_thinker()
-_ADAPTIVE_BLOCK_ASK_REASONER = _build_adaptive_block_ask_reasoner()
-_ADAPTIVE_BLOCK_EXECUTOR = _build_adaptive_block_executor()
-_ADAPTIVE_BLOCK_NEW_PROJECT_DEEP_THINKER = _build_adaptive_block_new_project_deep_thinker()
-_ADAPTIVE_BLOCK_NEW_PROJECT_REASONER = _build_adaptive_block_new_project_reasoner()
-
-
 def _get_adaptive_block_ask(model_id: str) -> str:
     """
     Get adaptive prompt block for ASK mode based on model cognitive type.
@@ -978,17 +972,17 @@ def _get_adaptive_block_ask(model_id: str) -> str:
     cognitive_type = get_model_cognitive_type(model_id)
     
     if cognitive_type == "deep_thinker":
-        return _ADAPTIVE_BLOCK_ASK_DEEP_THINKER
+        return _build_adaptive_block_ask_deep_thinker()
     elif cognitive_type == "reasoner":
-        return _ADAPTIVE_BLOCK_ASK_REASONER
+        return _build_adaptive_block_ask_reasoner()
     
     elif cognitive_type == "executor":
-        return _ADAPTIVE_BLOCK_EXECUTOR
+        return _build_adaptive_block_executor()
     
     # 1. SPECIFIC MODEL OVERRIDES (Priority 1)
     # GPT-5.2 Codex needs special handling for recursive refinement issues
     if model_id == Config.MODEL_GPT_5_2_Codex:
-        return _ADAPTIVE_BLOCK_GPT5_2_CODEX
+        return _build_adaptive_block_gpt5_2_codex()
 
     # для остальных
     return ""
@@ -1010,14 +1004,14 @@ def _get_adaptive_block_new_project(model_id: str) -> str:
     cognitive_type = get_model_cognitive_type(model_id)
     
     if cognitive_type == "deep_thinker":
-        return _ADAPTIVE_BLOCK_NEW_PROJECT_DEEP_THINKER
+        return _build_adaptive_block_new_project_deep_thinker()
     elif cognitive_type == "reasoner":
-        return _ADAPTIVE_BLOCK_NEW_PROJECT_REASONER
+        return _build_adaptive_block_new_project_reasoner()
     
     # 1. SPECIFIC MODEL OVERRIDES (Priority 1)
     # GPT-5.2 Codex needs special handling for recursive refinement issues
     if model_id == Config.MODEL_GPT_5_2_Codex:
-        return _ADAPTIVE_BLOCK_GPT5_2_CODEX
+        return _build_adaptive_block_gpt5_2_codex()
     
     # executor and general - no modifications
     return ""
@@ -1043,25 +1037,25 @@ def _get_adaptive_block_ask_agent(model_id: str) -> str:
     
     # Build base adaptive block based on cognitive type
     if cognitive_type == "deep_thinker":
-        base_block = _ADAPTIVE_BLOCK_ASK_DEEP_THINKER
+        base_block = _build_adaptive_block_ask_deep_thinker()
     elif cognitive_type == "reasoner":
-        base_block = _ADAPTIVE_BLOCK_ASK_REASONER
+        base_block = _build_adaptive_block_ask_reasoner()
     elif cognitive_type == "executor":
-        base_block = _ADAPTIVE_BLOCK_EXECUTOR
+        base_block = _build_adaptive_block_executor()
     else:
         base_block = ""
     
     # 1. SPECIFIC MODEL OVERRIDES (Priority 1)
     # GPT-5.2 Codex needs special handling for recursive refinement issues
     if model_id == Config.MODEL_GPT_5_2_Codex:
-        return _ADAPTIVE_BLOCK_GPT5_2_CODEX
+        return _build_adaptive_block_gpt5_2_codex()
     
     # SPECIAL: Add Claude delegation block ONLY for Opus 4.5 and Sonnet 4.5
     if model_id in (Config.MODEL_OPUS_4_5, Config.MODEL_SONNET_4_5, Config.MODEL_SONNET_4_6, Config.MODEL_OPUS_4_8):
         if base_block:
-            return base_block + "\n" + _ADAPTIVE_BLOCK_CLAUDE_DELEGATION
+            return base_block + "\n" + _build_adaptive_block_claude_delegation()
         else:
-            return _ADAPTIVE_BLOCK_CLAUDE_DELEGATION
+            return _build_adaptive_block_claude_delegation()
     
     return base_block
 
@@ -1086,23 +1080,23 @@ def _get_adaptive_block_new_project_agent(model_id: str) -> str:
     
     # Build base adaptive block based on cognitive type
     if cognitive_type == "deep_thinker":
-        base_block = _ADAPTIVE_BLOCK_NEW_PROJECT_DEEP_THINKER
+        base_block = _build_adaptive_block_new_project_deep_thinker()
     elif cognitive_type == "reasoner":
-        base_block = _ADAPTIVE_BLOCK_NEW_PROJECT_REASONER
+        base_block = _build_adaptive_block_new_project_reasoner()
     else:
         base_block = ""
     
     # 1. SPECIFIC MODEL OVERRIDES (Priority 1)
     # GPT-5.2 Codex needs special handling for recursive refinement issues
     if model_id == Config.MODEL_GPT_5_2_Codex:
-        return _ADAPTIVE_BLOCK_GPT5_2_CODEX
+        return _build_adaptive_block_gpt5_2_codex()
     
     # SPECIAL: Add Claude delegation block ONLY for Opus 4.5 and Sonnet 4.5
     if model_id in (Config.MODEL_OPUS_4_5, Config.MODEL_SONNET_4_5, Config.MODEL_SONNET_4_6, Config.MODEL_OPUS_4_8):
         if base_block:
-            return base_block + "\n" + _ADAPTIVE_BLOCK_CLAUDE_DELEGATION
+            return base_block + "\n" + _build_adaptive_block_claude_delegation()
         else:
-            return _ADAPTIVE_BLOCK_CLAUDE_DELEGATION
+            return _build_adaptive_block_claude_delegation()
     
     return base_block
 
@@ -1110,6 +1104,7 @@ def _get_adaptive_block_new_project_agent(model_id: str) -> str:
 # PRE-FILTER PROMPTS
 # ============================================================================
 
+@lru_cache(maxsize=None)
 def _build_prefilter_system_prompt() -> str:
     """Build Pre-filter system prompt - selects relevant code chunks"""
     prompt_parts: List[str] = []
@@ -1170,6 +1165,7 @@ def _build_prefilter_system_prompt() -> str:
     return "\n".join(prompt_parts)
 
 
+@lru_cache(maxsize=None)
 def _build_prefilter_user_prompt() -> str:
     """Build Pre-filter user prompt template"""
     prompt_parts: List[str] = []
@@ -1192,10 +1188,7 @@ def _build_prefilter_user_prompt() -> str:
     return "\n".join(prompt_parts)
 
 
-PREFILTER_SYSTEM_PROMPT = _build_prefilter_system_prompt()
-PREFILTER_USER_PROMPT = _build_prefilter_user_prompt()
-
-
+@lru_cache(maxsize=None)
 def _build_advanced_prefilter_system_prompt() -> str:
     """Build system prompt for Advanced Pre-filter in Agent Mode. This pre-filter analyzes the user's request using tools, reads relevant files, and produces an advisory report for the Orchestrator."""
     prompt_parts: List[str] = []
@@ -1282,6 +1275,7 @@ def _build_advanced_prefilter_system_prompt() -> str:
     return "\n".join(prompt_parts)
 
 
+@lru_cache(maxsize=None)
 def _build_prefilter_analysis_system_prompt_normal() -> str:
     """Build system prompt for Pre-filter in NORMAL mode (query analysis without tools)."""
     prompt_parts: List[str] = []
@@ -1348,6 +1342,7 @@ def _build_prefilter_analysis_system_prompt_normal() -> str:
     return "\n".join(prompt_parts)
 
 
+@lru_cache(maxsize=None)
 def _build_prefilter_analysis_system_prompt_advanced() -> str:
     """Build system prompt for Pre-filter in ADVANCED mode (with tool access)."""
     prompt_parts: List[str] = []
@@ -1427,6 +1422,7 @@ def _build_prefilter_analysis_system_prompt_advanced() -> str:
     
     return "\n".join(prompt_parts)
 
+@lru_cache(maxsize=None)
 def _build_prefilter_planning_system_prompt() -> str:
     """Build system prompt for Pre-filter in PLANNING mode (Agent Mode Advanced)."""
     prompt_parts: List[str] = []
@@ -1492,6 +1488,7 @@ def _build_prefilter_planning_system_prompt() -> str:
     return "\n".join(prompt_parts)
 
 
+@lru_cache(maxsize=None)
 def _build_prefilter_analysis_user_prompt() -> str:
     """Build user prompt template for Pre-filter analysis."""
     prompt_parts: List[str] = []
@@ -1514,6 +1511,7 @@ def _build_prefilter_analysis_user_prompt() -> str:
     return "\n".join(prompt_parts)
 
 
+@lru_cache(maxsize=None)
 def _build_prefilter_advice_section() -> str:
     """
     Build the Pre-filter Advisory section for Orchestrator prompts.
@@ -1565,6 +1563,7 @@ def _build_prefilter_advice_section() -> str:
     
     return '\n'.join(prompt_parts)
 
+@lru_cache(maxsize=None)
 def _build_prefilter_advice_section_agent() -> str:
     """Build the STRATEGIC ALIGNMENT block for Agent Mode (Existing Project)."""
     prompt_parts: List[str] = []
@@ -1584,6 +1583,7 @@ def _build_prefilter_advice_section_agent() -> str:
     
     return '\n'.join(prompt_parts)
 
+@lru_cache(maxsize=None)
 def _build_prefilter_advice_section_new_project_agent() -> str:
     """Build the BLUEPRINT block for Agent Mode (New Project)."""
     prompt_parts: List[str] = []
@@ -1603,11 +1603,11 @@ def _build_prefilter_advice_section_new_project_agent() -> str:
     return '\n'.join(prompt_parts)
 
 
-
 # ============================================================================
 # ORCHESTRATOR PROMPTS (ASK MODE)
 # ============================================================================
 
+@lru_cache(maxsize=None)
 def _build_orchestrator_system_prompt_ask() -> str:
     """
     Build Orchestrator system prompt for ASK mode.
@@ -2628,6 +2628,7 @@ def _build_orchestrator_system_prompt_ask() -> str:
     return '\n'.join(prompt_parts)
 
 
+@lru_cache(maxsize=None)
 def _build_orchestrator_user_prompt_ask() -> str:
     """Build Orchestrator user prompt template for ASK mode"""
     prompt_parts: List[str] = []
@@ -2650,15 +2651,11 @@ def _build_orchestrator_user_prompt_ask() -> str:
     return '\n'.join(prompt_parts)
 
 
-# Raw templates (for direct use if needed)
-ORCHESTRATOR_SYSTEM_PROMPT_ASK = _build_orchestrator_system_prompt_ask()
-ORCHESTRATOR_USER_PROMPT_ASK = _build_orchestrator_user_prompt_ask()
-
-
 # ============================================================================
 # ORCHESTRATOR PROMPTS (NEW PROJECT MODE)
 # ============================================================================
 
+@lru_cache(maxsize=None)
 def _build_orchestrator_system_prompt_new_project() -> str:
     """
     Build Orchestrator system prompt for NEW PROJECT mode.
@@ -2945,6 +2942,7 @@ def _build_orchestrator_system_prompt_new_project() -> str:
     return '\n'.join(prompt_parts)
 
 
+@lru_cache(maxsize=None)
 def _build_orchestrator_user_prompt_new_project() -> str:
     """Build Orchestrator user prompt template for NEW PROJECT mode"""
     prompt_parts: List[str] = []
@@ -2955,14 +2953,11 @@ def _build_orchestrator_user_prompt_new_project() -> str:
     return '\n'.join(prompt_parts)
 
 
-ORCHESTRATOR_SYSTEM_PROMPT_NEW_PROJECT = _build_orchestrator_system_prompt_new_project()
-ORCHESTRATOR_USER_PROMPT_NEW_PROJECT = _build_orchestrator_user_prompt_new_project()
-
-
 # ============================================================================
 # CODE GENERATOR PROMPTS
 # ============================================================================
 
+@lru_cache(maxsize=None)
 def _build_code_generator_system_prompt() -> str:
     """Build Code Generator system prompt"""
     prompt_parts: List[str] = []
@@ -3421,6 +3416,7 @@ def _build_code_generator_system_prompt() -> str:
     return "\n".join(prompt_parts)
 
 
+@lru_cache(maxsize=None)
 def _build_code_generator_user_prompt() -> str:
     """Build Code Generator user prompt template"""
     prompt_parts: List[str] = []
@@ -3463,6 +3459,7 @@ def _build_code_generator_user_prompt() -> str:
     return "\n".join(prompt_parts)
 
 
+@lru_cache(maxsize=None)
 def _build_code_generator_user_prompt() -> str:
     """Build Code Generator user prompt template"""
     prompt_parts: List[str] = []
@@ -3499,14 +3496,11 @@ def _build_code_generator_user_prompt() -> str:
     return "\n".join(prompt_parts)
 
 
-CODE_GENERATOR_SYSTEM_PROMPT = _build_code_generator_system_prompt()
-CODE_GENERATOR_USER_PROMPT = _build_code_generator_user_prompt()
-
-
 # ============================================================================
 # HISTORY COMPRESSION PROMPTS
 # ============================================================================
 
+@lru_cache(maxsize=None)
 def _build_history_compressor_tool_result_prompt() -> str:
     """Build prompt for compressing tool results"""
     prompt_parts: List[str] = []
@@ -3533,6 +3527,7 @@ def _build_history_compressor_tool_result_prompt() -> str:
     return "\n".join(prompt_parts)
 
 
+@lru_cache(maxsize=None)
 def _build_history_compressor_reasoning_prompt() -> str:
     """Build prompt for compressing AI reasoning"""
     prompt_parts: List[str] = []
@@ -3558,10 +3553,6 @@ def _build_history_compressor_reasoning_prompt() -> str:
     return "\n".join(prompt_parts)
 
 
-HISTORY_COMPRESSOR_TOOL_RESULT_PROMPT = _build_history_compressor_tool_result_prompt()
-HISTORY_COMPRESSOR_REASONING_PROMPT = _build_history_compressor_reasoning_prompt()
-
-
 def _get_language_specific_examples(languages: Set) -> str:
     """Build language-specific examples based on requested languages."""
     parts = []
@@ -3611,8 +3602,8 @@ def format_prefilter_prompt(
 ) -> Dict[str, str]:
     """Format pre-filter prompts with variables."""
     return {
-        "system": PREFILTER_SYSTEM_PROMPT.format(max_chunks=max_chunks),
-        "user": PREFILTER_USER_PROMPT.format(
+        "system": _build_prefilter_system_prompt().format(max_chunks=max_chunks),
+        "user": _build_prefilter_user_prompt().format(
             user_query=user_query,
             project_map=project_map or "Project map not available",
             chunks_list=chunks_list,
@@ -3655,7 +3646,7 @@ def format_orchestrator_prompt_ask(
     # Get adaptive block for this model
     adaptive_block = _get_adaptive_block_ask(orchestrator_model_id)
     
-    system_prompt = ORCHESTRATOR_SYSTEM_PROMPT_ASK.format(
+    system_prompt = _build_orchestrator_system_prompt_ask().format(
         project_map=project_map or "[No project map available]",
         # selected_chunks REMOVED from system prompt - now passed as separate message
         compact_index=compact_index or "[No index available]",
@@ -3666,7 +3657,7 @@ def format_orchestrator_prompt_ask(
         prefilter_advice=prefilter_advice or "[No pre-analysis available]"
     )
     
-    user_prompt = ORCHESTRATOR_USER_PROMPT_ASK.format(
+    user_prompt = _build_orchestrator_user_prompt_ask().format(
         user_query=user_query
     )
     
@@ -3697,13 +3688,13 @@ def format_orchestrator_prompt_new_project(
     # Get adaptive block for this model
     adaptive_block = _get_adaptive_block_new_project(orchestrator_model_id)
     
-    system_prompt = ORCHESTRATOR_SYSTEM_PROMPT_NEW_PROJECT.format(
+    system_prompt = _build_orchestrator_system_prompt_new_project().format(
         max_web_search_calls=MAX_WEB_SEARCH_CALLS,
         remaining_web_searches=remaining_web_searches,
         adaptive_block=adaptive_block,
     )
     
-    user_prompt = ORCHESTRATOR_USER_PROMPT_NEW_PROJECT.format(
+    user_prompt = _build_orchestrator_user_prompt_new_project().format(
         user_query=user_query
     )
     
@@ -3753,8 +3744,8 @@ def format_code_generator_prompt(
 ) -> Dict[str, str]:
     """Format code generator prompts with variables."""
     return {
-        "system": CODE_GENERATOR_SYSTEM_PROMPT,
-        "user": CODE_GENERATOR_USER_PROMPT.format(
+        "system": _build_code_generator_system_prompt(),
+        "user": _build_code_generator_user_prompt().format(
             orchestrator_instruction=orchestrator_instruction,
             file_code=file_code or "[No existing file - creating new]"
         )
@@ -3764,8 +3755,8 @@ def format_code_generator_prompt(
 def format_compression_prompt(content: str, content_type: str = "tool_result") -> str:
     """Format compression prompt based on content type."""
     if content_type == "tool_result":
-        return HISTORY_COMPRESSOR_TOOL_RESULT_PROMPT.format(content=content)
-    return HISTORY_COMPRESSOR_REASONING_PROMPT.format(content=content)
+        return _build_history_compressor_tool_result_prompt().format(content=content)
+    return _build_history_compressor_reasoning_prompt().format(content=content)
 
 
 # ============================================================================
@@ -3778,6 +3769,7 @@ def format_compression_prompt(content: str, content_type: str = "tool_result") -
 # ============================================================================
 
 
+@lru_cache(maxsize=None)
 def _build_ai_validator_system_prompt() -> str:
     """
     Build AI Validator system prompt.
@@ -4056,6 +4048,7 @@ def _build_ai_validator_system_prompt() -> str:
     
     return "\n".join(prompt_parts)
 
+@lru_cache(maxsize=None)
 def _build_ai_validator_user_prompt() -> str:
     """Build AI Validator user prompt template."""
     prompt_parts: List[str] = []
@@ -4091,11 +4084,6 @@ def _build_ai_validator_user_prompt() -> str:
     return "\n".join(prompt_parts)
 
 
-# Pre-build prompts
-AI_VALIDATOR_SYSTEM_PROMPT = _build_ai_validator_system_prompt()
-AI_VALIDATOR_USER_PROMPT = _build_ai_validator_user_prompt()
-
-
 def format_ai_validator_prompt(
     user_request: str,
     orchestrator_instruction: str,
@@ -4117,8 +4105,8 @@ def format_ai_validator_prompt(
         Dict with "system" and "user" prompt strings
     """
     return {
-        "system": AI_VALIDATOR_SYSTEM_PROMPT,
-        "user": AI_VALIDATOR_USER_PROMPT.format(
+        "system": _build_ai_validator_system_prompt(),
+        "user": _build_ai_validator_user_prompt().format(
             user_request=user_request,
             orchestrator_instruction=orchestrator_instruction,
             original_content=original_content or "[NEW FILE]",
@@ -4318,7 +4306,7 @@ def get_messages_for_role(role: str, kwargs) -> List[Dict[str, str]]:
 # ============================================================================
 
 
-
+@lru_cache(maxsize=None)
 def _build_agent_mode_instruction_format() -> str:
     """
     Build the instruction format for Agent Mode.
@@ -4662,6 +4650,7 @@ def _build_agent_mode_instruction_format() -> str:
     return "\n".join(prompt_parts)
 
 
+@lru_cache(maxsize=None)
 def _build_agent_mode_response_format() -> str:
     """
     Build the response format section for Agent Mode.
@@ -4688,15 +4677,12 @@ def _build_agent_mode_response_format() -> str:
     
     return "\n".join(prompt_parts)
 
-# Pre-build agent mode blocks
-_AGENT_MODE_INSTRUCTION_FORMAT = _build_agent_mode_instruction_format()
-_AGENT_MODE_RESPONSE_FORMAT = _build_agent_mode_response_format()
-
 
 # ============================================================================
 # ORCHESTRATOR AGENT MODE - ASK (existing project)
 # ============================================================================
 
+@lru_cache(maxsize=None)
 def _build_orchestrator_system_prompt_ask_agent() -> str:
     """
     Build Orchestrator system prompt for Agent Mode (existing project).
@@ -4807,6 +4793,9 @@ def _build_orchestrator_system_prompt_ask_agent() -> str:
     prompt_parts.append('')
     prompt_parts.append('  Returns: execution output, errors, tracebacks for your analysis.')
     prompt_parts.append('')    
+    prompt_parts.append('- run_affected_tests(changed_files, timeout_sec): Run only the unittest modules affected by staged changes.')
+    prompt_parts.append('  ⚠️ Shares the test run limit with run_project_tests.')
+    prompt_parts.append('')
     
     # === Dependency Management Tools ===
     prompt_parts.append('- list_installed_packages(): Check what Python packages are available')
@@ -4975,10 +4964,10 @@ def _build_orchestrator_system_prompt_ask_agent() -> str:
     
     
     # === AGENT MODE SPECIFIC: Instruction Format ===
-    prompt_parts.append(_AGENT_MODE_INSTRUCTION_FORMAT)
+    prompt_parts.append(_build_agent_mode_instruction_format())
     
     # === AGENT MODE SPECIFIC: Response Format for Feedback ===
-    prompt_parts.append(_AGENT_MODE_RESPONSE_FORMAT)
+    prompt_parts.append(_build_agent_mode_response_format())
     
     # === Adaptive Block Placeholder ===
     prompt_parts.append('{adaptive_block}')
@@ -5004,6 +4993,7 @@ def _build_orchestrator_system_prompt_ask_agent() -> str:
     return '\n'.join(prompt_parts)
 
 
+@lru_cache(maxsize=None)
 def _build_orchestrator_user_prompt_ask_agent() -> str:
     """Build Orchestrator user prompt for Agent Mode (existing project)."""
     prompt_parts: List[str] = []
@@ -5018,14 +5008,11 @@ def _build_orchestrator_user_prompt_ask_agent() -> str:
     return '\n'.join(prompt_parts)
 
 
-ORCHESTRATOR_SYSTEM_PROMPT_ASK_AGENT = _build_orchestrator_system_prompt_ask_agent()
-ORCHESTRATOR_USER_PROMPT_ASK_AGENT = _build_orchestrator_user_prompt_ask_agent()
-
-
 # ============================================================================
 # ORCHESTRATOR AGENT MODE - NEW PROJECT
 # ============================================================================
 
+@lru_cache(maxsize=None)
 def _build_orchestrator_system_prompt_new_project_agent() -> str:
     """
     Build Orchestrator system prompt for Agent Mode (new project).
@@ -5392,7 +5379,7 @@ def _build_orchestrator_system_prompt_new_project_agent() -> str:
     prompt_parts.append('')
     
     # === Instruction Format ===
-    prompt_parts.append(_AGENT_MODE_INSTRUCTION_FORMAT)
+    prompt_parts.append(_build_agent_mode_instruction_format())
     
     # === Adaptive Block ===
     prompt_parts.append('{adaptive_block}')
@@ -5406,6 +5393,7 @@ def _build_orchestrator_system_prompt_new_project_agent() -> str:
     return '\n'.join(prompt_parts)
 
 
+@lru_cache(maxsize=None)
 def _build_orchestrator_user_prompt_new_project_agent() -> str:
     """Build Orchestrator user prompt for Agent Mode (new project)."""
     prompt_parts: List[str] = []
@@ -5420,14 +5408,11 @@ def _build_orchestrator_user_prompt_new_project_agent() -> str:
     return '\n'.join(prompt_parts)
 
 
-ORCHESTRATOR_SYSTEM_PROMPT_NEW_PROJECT_AGENT = _build_orchestrator_system_prompt_new_project_agent()
-ORCHESTRATOR_USER_PROMPT_NEW_PROJECT_AGENT = _build_orchestrator_user_prompt_new_project_agent()
-
-
 # ============================================================================
 # CODE GENERATOR - AGENT MODE
 # ============================================================================
 
+@lru_cache(maxsize=None)
 def _build_code_generator_system_prompt_agent() -> str:
     """
     Build Code Generator system prompt for AGENT MODE.
@@ -5524,6 +5509,7 @@ def _build_code_generator_system_prompt_agent() -> str:
     return "\n".join(prompt_parts)
 
 
+@lru_cache(maxsize=None)
 def _build_code_generator_user_prompt_agent() -> str:
     """Build Code Generator user prompt template for Agent Mode."""
     prompt_parts: List[str] = []
@@ -5543,10 +5529,6 @@ def _build_code_generator_user_prompt_agent() -> str:
     return "\n".join(prompt_parts)
 
 
-# Pre-build Agent Mode prompts
-CODE_GENERATOR_SYSTEM_PROMPT_AGENT = _build_code_generator_system_prompt_agent()
-CODE_GENERATOR_USER_PROMPT_AGENT = _build_code_generator_user_prompt_agent()
-
 def _detect_languages_from_files(file_paths: List[str]) -> Set[str]:
     """Detect non-Python programming languages from a list of file paths. Returns a set of language identifiers: 'javascript', 'go', 'java', 'sql'."""
     ext_to_lang = {
@@ -7069,7 +7051,7 @@ def format_orchestrator_prompt_ask_agent(
     feedback_section = "\n".join(feedback_parts) if feedback_parts else ""
     
     # Format system prompt - selected_chunks REMOVED
-    system_prompt = ORCHESTRATOR_SYSTEM_PROMPT_ASK_AGENT.format(
+    system_prompt = _build_orchestrator_system_prompt_ask_agent().format(
         project_map=project_map or "[No project map available]",
         # selected_chunks REMOVED - now passed as separate message
         compact_index=compact_index or "[No index available]",
@@ -7082,7 +7064,7 @@ def format_orchestrator_prompt_ask_agent(
     )
     
     # Format user prompt
-    user_prompt = ORCHESTRATOR_USER_PROMPT_ASK_AGENT.format(
+    user_prompt = _build_orchestrator_user_prompt_ask_agent().format(
         user_query=user_query,
         feedback_section=feedback_section,
     )
@@ -7093,7 +7075,6 @@ def format_orchestrator_prompt_ask_agent(
     }
 
 
-
 def format_orchestrator_prompt_new_project_agent(
     user_query: str,
     remaining_web_searches: int = MAX_WEB_SEARCH_CALLS,
@@ -7182,7 +7163,7 @@ def format_orchestrator_prompt_new_project_agent(
     feedback_section = "\n".join(feedback_parts) if feedback_parts else ""
     
     # === BUILD SYSTEM PROMPT ===
-    system_prompt = ORCHESTRATOR_SYSTEM_PROMPT_NEW_PROJECT_AGENT.format(
+    system_prompt = _build_orchestrator_system_prompt_new_project_agent().format(
         max_web_search_calls=MAX_WEB_SEARCH_CALLS,
         remaining_web_searches=remaining_web_searches,
         adaptive_block=adaptive_block,
@@ -7196,7 +7177,7 @@ def format_orchestrator_prompt_new_project_agent(
         system_prompt = system_prompt + "\n\n" + feedback_handling_block
     
     # Format user prompt
-    user_prompt = ORCHESTRATOR_USER_PROMPT_NEW_PROJECT_AGENT.format(
+    user_prompt = _build_orchestrator_user_prompt_new_project_agent().format(
         user_query=user_query,
         feedback_section=feedback_section,
     )
@@ -7207,4 +7188,41 @@ def format_orchestrator_prompt_new_project_agent(
     }
 
 
+# ============================================================================
+# LAZY PROMPT CONSTANTS
+# ============================================================================
+# Промпты собираются при первом обращении, а не при импорте модуля:
+# `from app.llm.prompt_templates import CODE_GENERATOR_SYSTEM_PROMPT`
+# по-прежнему работает (PEP 562), но стартап не платит за все промпты сразу.
+
+_LAZY_PROMPTS = {
+    "PREFILTER_SYSTEM_PROMPT": _build_prefilter_system_prompt,
+    "PREFILTER_USER_PROMPT": _build_prefilter_user_prompt,
+    "ORCHESTRATOR_SYSTEM_PROMPT_ASK": _build_orchestrator_system_prompt_ask,
+    "ORCHESTRATOR_USER_PROMPT_ASK": _build_orchestrator_user_prompt_ask,
+    "ORCHESTRATOR_SYSTEM_PROMPT_NEW_PROJECT": _build_orchestrator_system_prompt_new_project,
+    "ORCHESTRATOR_USER_PROMPT_NEW_PROJECT": _build_orchestrator_user_prompt_new_project,
+    "CODE_GENERATOR_SYSTEM_PROMPT": _build_code_generator_system_prompt,
+    "CODE_GENERATOR_USER_PROMPT": _build_code_generator_user_prompt,
+    "HISTORY_COMPRESSOR_TOOL_RESULT_PROMPT": _build_history_compressor_tool_result_prompt,
+    "HISTORY_COMPRESSOR_REASONING_PROMPT": _build_history_compressor_reasoning_prompt,
+    "AI_VALIDATOR_SYSTEM_PROMPT": _build_ai_validator_system_prompt,
+    "AI_VALIDATOR_USER_PROMPT": _build_ai_validator_user_prompt,
+    "ORCHESTRATOR_SYSTEM_PROMPT_ASK_AGENT": _build_orchestrator_system_prompt_ask_agent,
+    "ORCHESTRATOR_USER_PROMPT_ASK_AGENT": _build_orchestrator_user_prompt_ask_agent,
+    "ORCHESTRATOR_SYSTEM_PROMPT_NEW_PROJECT_AGENT": _build_orchestrator_system_prompt_new_project_agent,
+    "ORCHESTRATOR_USER_PROMPT_NEW_PROJECT_AGENT": _build_orchestrator_user_prompt_new_project_agent,
+    "CODE_GENERATOR_SYSTEM_PROMPT_AGENT": _build_code_generator_system_prompt_agent,
+    "CODE_GENERATOR_USER_PROMPT_AGENT": _build_code_generator_user_prompt_agent,
+}
+
+
+def __getattr__(name: str) -> str:
+    builder = _LAZY_PROMPTS.get(name)
+    if builder is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return builder()
+
 
+def __dir__() -> List[str]:
+    return sorted(list(globals()) + list(_LAZY_PROMPTS))
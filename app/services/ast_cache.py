@@ -0,0 +1,298 @@
+# app/services/ast_cache.py
+"""
+AST Cache - общий кэш ast.parse() для Python-кода на всех этапах pipeline.
+
+Одно и то же застейдженное содержимое разбиралось заново на каждом шаге:
+SyntaxChecker.check_python, ChangeValidator (импорты, интеграция),
+VirtualFileSystem._find_dependencies, RuntimeTester/FrameworkDetector,
+FileModifier._validate_structural_integrity. AstCache хранит результат
+разбора по хэшу содержимого (с ограничением по числу записей и объёму
+исходников), а производные факты (импорты, определения верхнего уровня,
+сигнатуры, main guard, бесконечные циклы верхнего уровня) вычисляются
+один раз на содержимое при первом обращении.
+
+Деревья общие между потребителями - их нельзя мутировать.
+
+Пример:
+    >>> parsed = get_ast_cache().parse(content)
+    >>> if parsed.tree is None:
+    ...     print(parsed.error)
+    >>> parsed.imported_modules
+    frozenset({'os', 'requests'})
+"""
+
+from __future__ import annotations
+
+import ast
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# DATA STRUCTURES
+# ============================================================================
+
+@dataclass(frozen=True)
+class ImportFact:
+    """Один импорт (ast.Import / ast.ImportFrom) в любом месте модуля"""
+    module: Optional[str]  # None для `from . import x`
+    names: Tuple[str, ...]
+    level: int
+    lineno: int
+    is_from: bool
+    top_level: bool
+
+
+class ParsedModule:
+    """
+    Результат ast.parse() для одного содержимого и производные факты.
+
+    Факты - cached_property: считаются при первом обращении и живут
+    столько же, сколько запись кэша.
+    """
+
+    def __init__(self, tree: Optional[ast.Module], error: Optional[Exception]):
+        self.tree = tree
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.tree is not None
+
+    @cached_property
+    def imports(self) -> Tuple[ImportFact, ...]:
+        if self.tree is None:
+            return ()
+        top_level = {id(node) for node in self.tree.body}
+        facts = []
+        for node in ast.walk(self.tree):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    facts.append(ImportFact(
+                        module=alias.name, names=(), level=0, lineno=node.lineno,
+                        is_from=False, top_level=id(node) in top_level,
+                    ))
+            elif isinstance(node, ast.ImportFrom):
+                facts.append(ImportFact(
+                    module=node.module,
+                    names=tuple(alias.name for alias in node.names),
+                    level=node.level or 0,
+                    lineno=node.lineno,
+                    is_from=True,
+                    top_level=id(node) in top_level,
+                ))
+        return tuple(facts)
+
+    @cached_property
+    def imported_modules(self) -> FrozenSet[str]:
+        """Базовые имена импортированных модулей в нижнем регистре ('os', 'app')"""
+        modules = set()
+        for fact in self.imports:
+            if fact.module:
+                base = fact.module.split('.')[0].lower()
+                if base:
+                    modules.add(base)
+        return frozenset(modules)
+
+    @cached_property
+    def definitions(self) -> Dict[str, str]:
+        """
+        Определения верхнего уровня: {'func': 'function', 'Cls': 'class',
+        'Cls.method': 'method'}.
+        """
+        defs: Dict[str, str] = {}
+        if self.tree is None:
+            return defs
+        for node in ast.iter_child_nodes(self.tree):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                defs[node.name] = "function"
+            elif isinstance(node, ast.ClassDef):
+                defs[node.name] = "class"
+                for child in ast.iter_child_nodes(node):
+                    if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                        defs[f"{node.name}.{child.name}"] = "method"
+        return defs
+
+    @cached_property
+    def signatures(self) -> Dict[str, Tuple[str, ...]]:
+        """Имена аргументов функций и методов из definitions"""
+        sigs: Dict[str, Tuple[str, ...]] = {}
+        if self.tree is None:
+            return sigs
+
+        def arg_names(func) -> Tuple[str, ...]:
+            args = func.args
+            names = [a.arg for a in args.posonlyargs + args.args]
+            if args.vararg:
+                names.append(f"*{args.vararg.arg}")
+            names.extend(a.arg for a in args.kwonlyargs)
+            if args.kwarg:
+                names.append(f"**{args.kwarg.arg}")
+            return tuple(names)
+
+        for node in ast.iter_child_nodes(self.tree):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                sigs[node.name] = arg_names(node)
+            elif isinstance(node, ast.ClassDef):
+                for child in ast.iter_child_nodes(node):
+                    if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                        sigs[f"{node.name}.{child.name}"] = arg_names(child)
+        return sigs
+
+    @cached_property
+    def has_main_guard(self) -> bool:
+        """Есть ли `if __name__ == "__main__":` на верхнем уровне"""
+        if self.tree is None:
+            return False
+        for node in self.tree.body:
+            if (
+                isinstance(node, ast.If)
+                and isinstance(node.test, ast.Compare)
+                and isinstance(node.test.left, ast.Name)
+                and node.test.left.id == "__name__"
+                and any(
+                    isinstance(c, ast.Constant) and c.value == "__main__"
+                    for c in node.test.comparators
+                )
+            ):
+                return True
+        return False
+
+    @cached_property
+    def has_top_level_loop(self) -> bool:
+        """`while True` на уровне модуля или в теле if верхнего уровня (main guard)"""
+        if self.tree is None:
+            return False
+
+        def is_infinite(node) -> bool:
+            return (
+                isinstance(node, ast.While)
+                and isinstance(node.test, ast.Constant)
+                and node.test.value is True
+            )
+
+        for node in self.tree.body:
+            if is_infinite(node):
+                return True
+            if isinstance(node, ast.If) and any(is_infinite(n) for n in node.body):
+                return True
+        return False
+
+
+@dataclass
+class AstCacheStats:
+    """Счётчики кэша; snapshot()/since() - статистика за интервал (итерацию)"""
+    parses: int = 0
+    hits: int = 0
+    evictions: int = 0
+
+    @property
+    def requests(self) -> int:
+        return self.parses + self.hits
+
+    def snapshot(self) -> "AstCacheStats":
+        return AstCacheStats(self.parses, self.hits, self.evictions)
+
+    def since(self, earlier: "AstCacheStats") -> "AstCacheStats":
+        return AstCacheStats(
+            self.parses - earlier.parses,
+            self.hits - earlier.hits,
+            self.evictions - earlier.evictions,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "parses": self.parses,
+            "parses_avoided": self.hits,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / self.requests, 3) if self.requests else 0.0,
+        }
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+class AstCache:
+    """
+    LRU-кэш ParsedModule по хэшу содержимого.
+
+    Ограничен числом записей и суммарным размером исходников. Потокобезопасен
+    (уровни ChangeValidator выполняются в пуле потоков); разбор идёт вне
+    блокировки - в худшем случае одно содержимое разберётся дважды.
+    """
+
+    def __init__(self, max_entries: int = 512, max_source_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_source_bytes = max_source_bytes
+        self.stats = AstCacheStats()
+        self._entries: "OrderedDict[bytes, Tuple[ParsedModule, int]]" = OrderedDict()
+        self._source_bytes = 0
+        self._lock = threading.Lock()
+
+    def parse(self, content: str) -> ParsedModule:
+        """ParsedModule для content (ошибка разбора - в .error, tree=None)"""
+        source = content.encode("utf-8", errors="surrogatepass")
+        key = hashlib.blake2b(source, digest_size=16).digest()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return entry[0]
+
+        try:
+            parsed = ParsedModule(ast.parse(content), None)
+        except (SyntaxError, ValueError, RecursionError) as e:
+            parsed = ParsedModule(None, e)
+
+        with self._lock:
+            self.stats.parses += 1
+            if key not in self._entries:
+                self._entries[key] = (parsed, len(source))
+                self._source_bytes += len(source)
+                self._evict()
+        return parsed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._source_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self) -> None:
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._source_bytes > self.max_source_bytes
+        ):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._source_bytes -= size
+            self.stats.evictions += 1
+
+
+_ast_cache: Optional[AstCache] = None
+_ast_cache_lock = threading.Lock()
+
+
+def get_ast_cache() -> AstCache:
+    """Общий экземпляр AstCache процесса"""
+    global _ast_cache
+    if _ast_cache is None:
+        with _ast_cache_lock:
+            if _ast_cache is None:
+                _ast_cache = AstCache()
+    return _ast_cache
+
+
+def parse_python(content: str) -> ParsedModule:
+    """Сокращение для get_ast_cache().parse(content)"""
+    return get_ast_cache().parse(content)
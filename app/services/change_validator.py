@@ -20,11 +20,11 @@ import ast
 import sys
 import os
 import re
-import json
 import logging
-import tempfile
-import shutil
+import asyncio
+import threading
 import subprocess
+import concurrent.futures
 from pathlib import Path
 from typing import Dict, List, Optional, Set, Any, Tuple, TYPE_CHECKING
 from dataclasses import dataclass, field
@@ -32,6 +32,10 @@ from enum import Enum
 from app.tools.dependency_manager import IMPORT_TO_PACKAGE, get_import_to_package_mapping, DependencyManager, InstallResult
 from app.services.runtime_tester import RuntimeTester, RuntimeTestSummary, TestStatus, AppType
 from app.services.language_adapter import AdapterManager
+from app.services.vfs_materializer import VFSMaterializer, MaterializedTree, LinkMode, ShadowWorkspace
+from app.services.mypy_backend import MypyBackend, MypyMode
+from app.services.environment_inventory import get_environment_inventory
+from app.services.ast_cache import parse_python
 
 import time
 
@@ -58,6 +62,21 @@ class ValidationLevel(Enum):
     TESTS = "tests"
 
 
+# Зависимости уровней (DAG). SYNTAX и IMPORTS - блокирующие: при их ошибках
+# зависимые уровни не запускаются. Остальные уровни друг от друга не зависят
+# и после IMPORTS могут выполняться параллельно.
+LEVEL_DEPENDENCIES: Dict[ValidationLevel, Tuple[ValidationLevel, ...]] = {
+    ValidationLevel.SYNTAX: (),
+    ValidationLevel.IMPORTS: (ValidationLevel.SYNTAX,),
+    ValidationLevel.TYPES: (ValidationLevel.IMPORTS,),
+    ValidationLevel.INTEGRATION: (ValidationLevel.IMPORTS,),
+    ValidationLevel.RUNTIME: (ValidationLevel.IMPORTS,),
+    ValidationLevel.TESTS: (ValidationLevel.IMPORTS,),
+}
+
+BLOCKING_LEVELS = frozenset({ValidationLevel.SYNTAX, ValidationLevel.IMPORTS})
+
+
 class IssueSeverity(Enum):
     """Серьёзность проблемы"""
     ERROR = "error"
@@ -194,6 +213,11 @@ class ValidationResult:
     runtime_test_summary: Optional[Dict[str, Any]] = None  # RuntimeTestSummary.to_dict()
     
     auto_format_stats: Dict[str, Any] = field(default_factory=dict)
+    
+    # Время по уровням: {level: {"status", "start_ms", "duration_ms", "concurrent"}}
+    # start_ms - смещение от начала validate(); status: passed / failed /
+    # error / cancelled / not_run (заблокирован ошибкой SYNTAX/IMPORTS)
+    level_timings: Dict[str, Dict[str, Any]] = field(default_factory=dict)
 
     
     @property
@@ -252,6 +276,7 @@ class ValidationResult:
             "runtime_files_skipped": self.runtime_files_skipped,  # NEW
             "runtime_test_summary": self.runtime_test_summary,     # NEW
             "auto_format_stats": self.auto_format_stats,
+            "level_timings": self.level_timings,
         }
 
 
@@ -274,6 +299,9 @@ class ValidatorConfig:
     # TYPES (mypy)
     mypy_strict: bool = False
     mypy_ignore_missing_imports: bool = True
+    # DAEMON/CACHED работают только на стабильном дереве (ShadowWorkspace);
+    # без него всегда COLD
+    mypy_mode: MypyMode = MypyMode.DAEMON
     
     # RUNTIME
     runtime_timeout_sec: int = 150
@@ -292,6 +320,65 @@ class ValidatorConfig:
     max_workers: int = 4
     fail_on_warnings: bool = False
     fail_on_test_failure: bool = True
+    
+    # MATERIALIZATION
+    # Одно дерево на весь validate() (TYPES, RUNTIME, TESTS).
+    # REFLINK (reflink -> copy): в дереве выполняется код проекта, поэтому
+    # hardlink (общий inode с оригиналом) по умолчанию не используется.
+    materialize_link_mode: LinkMode = LinkMode.REFLINK
+    
+    # SCHEDULING
+    # Уровни после IMPORTS выполняются параллельно (каждый в своём потоке
+    # со своим event loop - проверки блокируются на subprocess).
+    parallel_levels: bool = True
+    level_cpu_budget: int = 0  # Сколько уровней одновременно; 0 = auto (cpu_count - 1)
+    cancel_on_first_error: bool = False  # Отменять остальные уровни при первой ошибке
+
+
+class _ThreadLevelRun:
+    """
+    Уровень валидации, выполняемый в отдельном потоке со своим event loop.
+    
+    Проверки уровней вызывают subprocess.run() внутри async-функций, поэтому
+    в общем loop они не перекрываются. cancel() отменяет задачу уровня в его
+    loop (сработает на ближайшем await; уже запущенный subprocess дорабатывает
+    до своего таймаута).
+    """
+    
+    def __init__(self, coro):
+        self._coro = coro
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._cancelled = False
+        self._lock = threading.Lock()
+        self.future: Optional[concurrent.futures.Future] = None
+    
+    def start(self, pool: concurrent.futures.ThreadPoolExecutor) -> "asyncio.Future":
+        self.future = pool.submit(self._run)
+        # Отменён до старта потока - корутина так и не запустится
+        self.future.add_done_callback(lambda f: f.cancelled() and self._coro.close())
+        return asyncio.wrap_future(self.future)
+    
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        try:
+            with self._lock:
+                if self._cancelled:
+                    self._coro.close()
+                    raise concurrent.futures.CancelledError()
+                self._loop = loop
+                self._task = loop.create_task(self._coro)
+            return loop.run_until_complete(self._task)
+        finally:
+            with self._lock:
+                self._loop = None
+            loop.close()
+    
+    def cancel(self) -> None:
+        with self._lock:
+            self._cancelled = True
+            if self._loop is not None and self._task is not None:
+                self._loop.call_soon_threadsafe(self._task.cancel)
 
 
 # ============================================================================
@@ -332,13 +419,32 @@ class ChangeValidator:
         self,
         vfs: 'VirtualFileSystem',
         config: Optional[ValidatorConfig] = None,
+        workspace: Optional[ShadowWorkspace] = None,
+        type_checker: Optional[MypyBackend] = None,
     ):
         self.vfs = vfs
         self.config = config or ValidatorConfig()
         
+        # Долгоживущее дерево сессии (если есть) вместо temp-дерева на каждый validate()
+        self.workspace = workspace
+        
+        # Тёплый mypy сессии (dmypy / постоянный cache-dir) на дереве workspace
+        self.type_checker = type_checker
+        
         self._pip_packages_cache: Optional[Set[str]] = None
         self._project_modules_cache: Optional[Set[str]] = None
         self._syntax_checker = None
+        # Ленивые кэши выше заполняются и из уровней в пуле потоков
+        self._cache_lock = threading.Lock()
+        
+        # Материализованное дерево текущего validate() (общее для всех уровней)
+        self._materialized: Optional[MaterializedTree] = None
+        # Свежее дерево для уровней, выполняющих код проекта (RUNTIME, TESTS),
+        # когда основное дерево - долгоживущий ShadowWorkspace
+        self._exec_materialized: Optional[MaterializedTree] = None
+        # Уровни могут запросить дерево одновременно из разных потоков
+        self._materialize_lock = threading.Lock()
+        self._materialize_closed = False
         
         if ChangeValidator._STDLIB_MODULES is None:
             ChangeValidator._STDLIB_MODULES = self._get_stdlib_modules()
@@ -348,10 +454,12 @@ class ChangeValidator:
     @property
     def syntax_checker(self):
         if self._syntax_checker is None:
-            from app.services.syntax_checker import SyntaxChecker
-            # Pass project python path to ensure formatting tools are found in project's venv
-            project_python = self.vfs.get_project_python()
-            self._syntax_checker = SyntaxChecker(project_python_path=project_python)
+            with self._cache_lock:
+                if self._syntax_checker is None:
+                    from app.services.syntax_checker import SyntaxChecker
+                    # Pass project python path to ensure formatting tools are found in project's venv
+                    project_python = self.vfs.get_project_python()
+                    self._syntax_checker = SyntaxChecker(project_python_path=project_python)
         return self._syntax_checker
     
     # ========================================================================
@@ -400,44 +508,12 @@ class ChangeValidator:
         
         logger.info(f"Validating {len(all_files)} files")
         
-        # Проходим по уровням
-        for level in ValidationLevel:
-            if level not in levels_to_check:
-                result.levels_skipped.append(level)
-                continue
-            
-            if level not in self.config.enabled_levels:
-                result.levels_skipped.append(level)
-                continue
-            
-            logger.debug(f"Running {level.value} validation...")
-            
-            try:
-                issues = await self._run_level(level, all_files, result)
-                result.issues.extend(issues)
-                
-                level_errors = [i for i in issues if i.severity == IssueSeverity.ERROR]
-                
-                if level_errors:
-                    result.levels_failed.append(level)
-                    result.success = False
-                    
-                    if level in (ValidationLevel.SYNTAX, ValidationLevel.IMPORTS):
-                        logger.warning(f"Stopping validation due to {level.value} errors")
-                        break
-                else:
-                    result.levels_passed.append(level)
-                    
-            except Exception as e:
-                logger.error(f"Error in {level.value} validation: {e}", exc_info=True)
-                result.issues.append(ValidationIssue(
-                    level=level,
-                    severity=IssueSeverity.ERROR,
-                    file_path="<validator>",
-                    message=f"Validation error: {e}",
-                ))
-                result.levels_failed.append(level)
-                result.success = False
+        self._materialize_closed = False
+        pending_levels: List[concurrent.futures.Future] = []
+        try:
+            pending_levels = await self._run_level_graph(levels_to_check, all_files, result, start_time)
+        finally:
+            self._release_materialized(result, pending_levels)
         
         result.duration_ms = (time.time() - start_time) * 1000
         
@@ -470,6 +546,207 @@ class ChangeValidator:
             ValidationLevel.IMPORTS,
         ])
     
+    # ========================================================================
+    # LEVEL SCHEDULER
+    # ========================================================================
+    
+    async def _run_level_graph(
+        self,
+        levels_to_check: List[ValidationLevel],
+        files: List[str],
+        result: ValidationResult,
+        started: float,
+    ) -> List[concurrent.futures.Future]:
+        """
+        Выполняет уровни по LEVEL_DEPENDENCIES.
+        
+        Блокирующие уровни (SYNTAX, IMPORTS) идут в текущем event loop;
+        остальные - в пуле потоков не более level_cpu_budget одновременно.
+        Issues и списки уровней собираются в порядке ValidationLevel,
+        независимо от порядка завершения. Каждый уровень пишет счётчики и
+        details в свой частичный ValidationResult (_level_scratch), которые
+        сливаются в result в этом же потоке после завершения всех уровней -
+        уровни в потоках не пишут в общий result.
+        
+        Returns:
+            Потоки отменённых уровней, которые ещё не завершились
+            (дерево можно удалить только после них)
+        """
+        selected: List[ValidationLevel] = []
+        for level in ValidationLevel:
+            if level not in levels_to_check or level not in self.config.enabled_levels:
+                result.levels_skipped.append(level)
+            else:
+                selected.append(level)
+        
+        budget = self._level_budget(selected)
+        use_threads = self.config.parallel_levels and budget > 1
+        pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=budget, thread_name_prefix="validation_level",
+        ) if use_threads else None
+        
+        semaphore = asyncio.Semaphore(budget)
+        finished = {level: asyncio.Event() for level in selected}
+        outcomes: Dict[ValidationLevel, Any] = {}
+        partials: Dict[ValidationLevel, ValidationResult] = {}
+        blocked: Set[ValidationLevel] = set()
+        cancel_event = asyncio.Event()
+        thread_runs: Dict[ValidationLevel, _ThreadLevelRun] = {}
+        tasks: Dict[ValidationLevel, asyncio.Task] = {}
+        
+        def elapsed_ms() -> float:
+            return (time.time() - started) * 1000
+        
+        def request_cancel(reason: ValidationLevel) -> None:
+            if cancel_event.is_set():
+                return
+            logger.warning(f"Cancelling remaining validation levels after {reason.value} errors")
+            cancel_event.set()
+            for level, task in tasks.items():
+                if level != reason and not task.done():
+                    task.cancel()
+            for run in thread_runs.values():
+                run.cancel()
+        
+        async def run(level: ValidationLevel) -> None:
+            timing: Dict[str, Any] = {"status": "not_run", "start_ms": None, "duration_ms": 0.0, "concurrent": False}
+            result.level_timings[level.value] = timing
+            try:
+                for dep in LEVEL_DEPENDENCIES[level]:
+                    if dep in finished:
+                        await finished[dep].wait()
+                if any(dep in blocked for dep in LEVEL_DEPENDENCIES[level]):
+                    blocked.add(level)
+                    return
+                
+                async with semaphore:
+                    if cancel_event.is_set():
+                        timing["status"] = "cancelled"
+                        return
+                    
+                    logger.debug(f"Running {level.value} validation...")
+                    timing["start_ms"] = round(elapsed_ms(), 1)
+                    level_started = time.time()
+                    partial = self._level_scratch(result)
+                    partials[level] = partial
+                    try:
+                        if pool is not None and level not in BLOCKING_LEVELS:
+                            timing["concurrent"] = True
+                            thread_run = _ThreadLevelRun(self._run_level(level, files, partial))
+                            thread_runs[level] = thread_run
+                            issues = await thread_run.start(pool)
+                        else:
+                            issues = await self._run_level(level, files, partial)
+                        outcomes[level] = issues
+                    except asyncio.CancelledError:
+                        timing["status"] = "cancelled"
+                        raise
+                    except Exception as e:
+                        outcomes[level] = e
+                    finally:
+                        timing["duration_ms"] = round((time.time() - level_started) * 1000, 1)
+                
+                outcome = outcomes[level]
+                if isinstance(outcome, Exception):
+                    timing["status"] = "error"
+                    failed = True
+                else:
+                    failed = any(i.severity == IssueSeverity.ERROR for i in outcome)
+                    timing["status"] = "failed" if failed else "passed"
+                    if failed and level in BLOCKING_LEVELS:
+                        logger.warning(f"Stopping validation due to {level.value} errors")
+                        blocked.add(level)
+                
+                if failed and self.config.cancel_on_first_error:
+                    request_cancel(level)
+            except asyncio.CancelledError:
+                if timing["status"] == "not_run":
+                    timing["status"] = "cancelled"
+            finally:
+                finished[level].set()
+        
+        for level in selected:
+            tasks[level] = asyncio.create_task(run(level))
+        
+        try:
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+        finally:
+            still_running = [r.future for r in thread_runs.values() if r.future is not None and not r.future.done()]
+            if pool is not None:
+                pool.shutdown(wait=False)
+        
+        # Сборка результата в порядке уровней
+        for level in selected:
+            if level not in outcomes:
+                continue
+            self._merge_level_result(result, partials[level])
+            outcome = outcomes[level]
+            if isinstance(outcome, Exception):
+                logger.error(f"Error in {level.value} validation: {outcome}", exc_info=outcome)
+                result.issues.append(ValidationIssue(
+                    level=level,
+                    severity=IssueSeverity.ERROR,
+                    file_path="<validator>",
+                    message=f"Validation error: {outcome}",
+                ))
+                result.levels_failed.append(level)
+                result.success = False
+                continue
+            
+            result.issues.extend(outcome)
+            if any(i.severity == IssueSeverity.ERROR for i in outcome):
+                result.levels_failed.append(level)
+                result.success = False
+            else:
+                result.levels_passed.append(level)
+        
+        level_sum = sum(t["duration_ms"] for t in result.level_timings.values())
+        result.details["level_schedule"] = {
+            "budget": budget,
+            "concurrent": use_threads,
+            "wall_ms": round(elapsed_ms(), 1),
+            "sum_level_ms": round(level_sum, 1),
+            "cancelled": [l for l, t in result.level_timings.items() if t["status"] == "cancelled"],
+        }
+        
+        return still_running
+    
+    @staticmethod
+    def _level_scratch(result: ValidationResult) -> ValidationResult:
+        """Частичный результат уровня: входные данные result, пустые счётчики"""
+        return ValidationResult(
+            success=True,
+            checked_files=list(result.checked_files),
+            new_files=list(result.new_files),
+            test_files_found=list(result.test_files_found),
+        )
+    
+    @staticmethod
+    def _merge_level_result(result: ValidationResult, partial: ValidationResult) -> None:
+        """Переносит счётчики и details уровня в общий result"""
+        result.tests_run += partial.tests_run
+        result.tests_passed += partial.tests_passed
+        result.tests_failed += partial.tests_failed
+        result.runtime_files_checked += partial.runtime_files_checked
+        result.runtime_files_passed += partial.runtime_files_passed
+        result.runtime_files_failed += partial.runtime_files_failed
+        result.runtime_files_skipped += partial.runtime_files_skipped
+        if partial.runtime_test_summary is not None:
+            result.runtime_test_summary = partial.runtime_test_summary
+        if partial.auto_format_stats:
+            result.auto_format_stats = partial.auto_format_stats
+        result.details.update(partial.details)
+    
+    def _level_budget(self, selected: List[ValidationLevel]) -> int:
+        """Сколько уровней можно выполнять одновременно"""
+        if not self.config.parallel_levels:
+            return 1
+        budget = self.config.level_cpu_budget
+        if budget <= 0:
+            budget = max(1, (os.cpu_count() or 2) - 1)
+        concurrent_levels = len([l for l in selected if l not in BLOCKING_LEVELS])
+        return max(1, min(budget, concurrent_levels))
+    
     # ========================================================================
     # LEVEL DISPATCHER
     # ========================================================================
@@ -486,7 +763,7 @@ class ChangeValidator:
         elif level == ValidationLevel.IMPORTS:
             return await self._check_imports(files)
         elif level == ValidationLevel.TYPES:
-            return await self._check_types(files)
+            return await self._check_types(files, result)
         elif level == ValidationLevel.INTEGRATION:
             return await self._check_integration(files)
         elif level == ValidationLevel.RUNTIME:
@@ -620,8 +897,11 @@ class ChangeValidator:
             logger.info(f"[SYNTAX] Processing {len(non_py_files)} non-Python files with grouped validation")
 
             # ========================================================================
-            # PHASE 1: Auto-fix individual files (formatting, simple fixes)
+            # PHASE 1: Auto-fix files (formatting, simple fixes)
+            # All files of a language go through one linter run over a shared
+            # temp tree; different languages run concurrently
             # ========================================================================
+            fix_batch: List[Tuple[str, str]] = []
             for file_path in non_py_files:
                 if result:
                     result.auto_format_stats["stats"]["checked"] += 1
@@ -630,16 +910,22 @@ class ChangeValidator:
                 if content is None:
                     continue
     
-                file_language = adapter_manager.get_language_for_file(file_path) or "unknown"
-                original_content = content
-    
                 # Skip Java files from Phase 1 auto-fix; defer to Phase 2 check_java
-                if file_language == 'java':
+                if adapter_manager.get_language_for_file(file_path) == 'java':
                     continue
     
-                # Try auto-fix for formatting issues (non-Java only)
+                fix_batch.append((content, file_path))
+    
+            if fix_batch:
                 try:
-                    fixed_code, _ = adapter_manager.lint_file(content, file_path, fix=True)
+                    linted = await asyncio.to_thread(adapter_manager.lint_files, fix_batch, True)
+                except Exception as e:
+                    logger.warning(f"[SYNTAX] Batch auto-fix failed: {e}")
+                    linted = {}
+    
+                for content, file_path in fix_batch:
+                    fixed_code = linted.get(file_path, (content, []))[0]
+                    file_language = adapter_manager.get_language_for_file(file_path) or "unknown"
         
                     # Stage fixed code if it changed (we'll validate it in phase 2)
                     if fixed_code != content and fixed_code.strip():
@@ -651,8 +937,6 @@ class ChangeValidator:
                                 "file": file_path,
                                 "fixes": [f"Auto-format applied ({file_language})"]
                             })
-                except Exception as e:
-                    logger.warning(f"[SYNTAX] Auto-fix failed for {file_path}: {e}")
 
             # ========================================================================
             # PHASE 2: Grouped compilation check (resolves inter-file dependencies)
@@ -961,9 +1245,8 @@ class ChangeValidator:
             if content is None:
                 continue
             
-            try:
-                tree = ast.parse(content)
-            except SyntaxError:
+            tree = parse_python(content).tree
+            if tree is None:
                 continue
             
             imports = self._extract_imports(tree)
@@ -1021,9 +1304,8 @@ class ChangeValidator:
         """Extracts paths added via sys.path.insert() or sys.path.append() patterns. Returns list of relative paths that would be added to sys.path."""
         paths = []
         
-        try:
-            tree = ast.parse(content)
-        except SyntaxError:
+        tree = parse_python(content).tree
+        if tree is None:
             return paths
         
         try:
@@ -1365,7 +1647,9 @@ class ChangeValidator:
                   'googleapiclient' → 'google-api-python-client'
         """
         if self._pip_packages_cache is None:
-            self._pip_packages_cache = self._get_pip_packages()
+            with self._cache_lock:
+                if self._pip_packages_cache is None:
+                    self._pip_packages_cache = self._get_pip_packages()
         
         # Нормализуем имя модуля
         normalized = package.lower().replace('-', '_')
@@ -1408,7 +1692,9 @@ class ChangeValidator:
     
     def _is_project_module(self, module: str) -> bool:
         if self._project_modules_cache is None:
-            self._project_modules_cache = self._scan_project_modules()
+            with self._cache_lock:
+                if self._project_modules_cache is None:
+                    self._project_modules_cache = self._scan_project_modules()
         
         parts = module.split('.')
         for i in range(len(parts), 0, -1):
@@ -1431,7 +1717,9 @@ class ChangeValidator:
                 continue
             
             try:
-                tree = ast.parse(content)
+                tree = parse_python(content).tree
+                if tree is None:
+                    continue
                 
                 for node in ast.walk(tree):
                     if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
@@ -1529,29 +1817,11 @@ class ChangeValidator:
         python_path = self.vfs.get_project_python()
         
         try:
-            result = subprocess.run(
-                [python_path, '-m', 'pip', 'list', '--format=json'],
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='replace',
-                timeout=30,
-            )
-            
-            if result.returncode == 0:
-                pip_list = json.loads(result.stdout)
-                for pkg in pip_list:
-                    name = pkg.get('name', '')
-                    if not name:
-                        continue
-                        
-                    # Добавляем оригинальное имя
-                    packages.add(name.lower())
-                    
-                    # Добавляем нормализованное имя (- → _)
-                    normalized = name.lower().replace('-', '_')
-                    packages.add(normalized)
-                        
+            # Метаданные dist-info напрямую, без `pip list` (кэш по mtime site-packages)
+            inventory = get_environment_inventory(python_path)
+            packages.update(inventory.package_names())
+            # import-имена установленных пакетов (top_level.txt / RECORD)
+            packages.update(name.lower() for name in inventory.import_names())
         except Exception as e:
             logger.warning(f"Failed to get pip packages from project venv: {e}")
         
@@ -1645,8 +1915,8 @@ class ChangeValidator:
     # LEVEL 3: TYPES (mypy)
     # ========================================================================
     
-    async def _check_types(self, files: List[str]) -> List[ValidationIssue]:
-        """Проверяет типы через mypy."""
+    async def _check_types(self, files: List[str], result: Optional[ValidationResult] = None) -> List[ValidationIssue]:
+        """Проверяет типы через mypy (тёплый backend сессии или холодный запуск)."""
         issues = []
         
         py_files = [f for f in files if f.endswith('.py')]
@@ -1660,50 +1930,57 @@ class ChangeValidator:
             logger.warning("mypy not available, skipping type check")
             return issues
         
-        # Материализуем VFS во временную директорию
-        temp_dir = None
+        # Материализованное дерево общее для всех уровней текущего validate()
         try:
-            temp_dir = self._materialize_vfs()
-            
-            # Запускаем mypy
-            cmd = ['mypy', '--no-error-summary']
+            temp_dir = self._get_materialized_dir()
+            backend = self._get_type_backend()
             
-            if self.config.mypy_ignore_missing_imports:
-                cmd.append('--ignore-missing-imports')
-            
-            if self.config.mypy_strict:
-                cmd.append('--strict')
-            
-            # Добавляем файлы
-            for f in py_files:
-                cmd.append(str(Path(temp_dir) / f))
-            
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                encoding='utf-8',  # ✅ Добавить это
-                errors='replace',   # ✅ Опционально: заменять невалидные символы вместо падения
-                timeout=120,
-                cwd=temp_dir,
-            )
+            run = backend.check(temp_dir, py_files)
             
             # Парсим вывод mypy
-            for line in result.stdout.splitlines():
+            for line in run.stdout.splitlines():
                 issue = self._parse_mypy_line(line, py_files)
                 if issue:
                     issues.append(issue)
             
+            if result is not None:
+                result.details["types_backend"] = {**run.to_dict(), "session": backend.stats()}
+            
         except subprocess.TimeoutExpired:
             logger.warning("mypy timed out")
         except Exception as e:
             logger.error(f"mypy check failed: {e}")
-        finally:
-            if temp_dir:
-                shutil.rmtree(temp_dir, ignore_errors=True)
         
         return issues
     
+    def _get_type_backend(self) -> MypyBackend:
+        """
+        Backend для уровня TYPES.
+        
+        Тёплые режимы имеют смысл только на стабильном дереве: временное дерево
+        validate() каждый раз лежит по новому пути, и кэш mypy для него невалиден.
+        Backend сессии используется, только если его флаги (strict,
+        ignore_missing_imports) совпадают с config - иначе диагностика
+        отличалась бы от одноразового запуска mypy.
+        """
+        if (
+            self.workspace is not None
+            and self.type_checker is not None
+            and self.config.mypy_mode != MypyMode.COLD
+        ):
+            if self.type_checker.matches(
+                self.config.mypy_mode,
+                self.config.mypy_strict,
+                self.config.mypy_ignore_missing_imports,
+            ):
+                return self.type_checker
+            logger.warning("Session mypy backend options differ from ValidatorConfig, running mypy cold")
+        return MypyBackend(
+            mode=MypyMode.COLD,
+            strict=self.config.mypy_strict,
+            ignore_missing_imports=self.config.mypy_ignore_missing_imports,
+        )
+    
     def _parse_mypy_line(self, line: str, files: List[str]) -> Optional[ValidationIssue]:
         """Парсит строку вывода mypy."""
         # Формат: file.py:10: error: Message [error-code]
@@ -1743,82 +2020,91 @@ class ChangeValidator:
         )
     
     
-    def _materialize_vfs(self) -> str:
+    def _get_materialized_dir(self, executes_code: bool = False) -> str:
         """
-        Материализует VFS во временную директорию.
+        Возвращает материализованное дерево текущего validate().
+        
+        Дерево строится один раз (лениво, первым уровнем, которому оно нужно)
+        и переиспользуется TYPES, RUNTIME и TESTS. Удаляется в конце validate().
+        
+        Если передан ShadowWorkspace, он инкрементально синхронизируется с VFS
+        и не удаляется - следующий validate() обновит только дельту. Уровни,
+        выполняющие код проекта (executes_code=True: RUNTIME, TESTS), в нём не
+        работают: файлы, __pycache__ и прочие их артефакты остались бы в дереве
+        и повлияли бы на следующие проверки. Для них строится отдельное свежее
+        дерево (одно на validate(), без hardlink), удаляемое в конце validate().
+        """
+        with self._materialize_lock:
+            if self._materialize_closed:
+                # Отменённый уровень проснулся после конца validate()
+                raise RuntimeError("validation already finished")
+            if executes_code and self.workspace is not None:
+                if self._exec_materialized is None:
+                    self._exec_materialized = self._build_materialized_tree(link_mode=LinkMode.REFLINK)
+                return self._exec_materialized.root
+            if self._materialized is None:
+                if self.workspace is not None:
+                    stats = self.workspace.sync()
+                    self._ensure_setup_cfg(self.workspace.root)
+                    self._materialized = MaterializedTree(
+                        root=self.workspace.root,
+                        stats=stats,
+                        owned=False,
+                    )
+                else:
+                    self._materialized = self._build_materialized_tree()
+            return self._materialized.root
+    
+    def _release_materialized(
+        self,
+        result: Optional[ValidationResult] = None,
+        pending: Optional[List[concurrent.futures.Future]] = None,
+    ) -> None:
+        """
+        Удаляет дерево текущего validate() и сохраняет его статистику в result.
+        
+        Если отменённые уровни ещё выполняются в потоках, удаление
+        откладывается до их завершения.
+        """
+        with self._materialize_lock:
+            tree = self._materialized
+            exec_tree = self._exec_materialized
+            self._materialized = None
+            self._exec_materialized = None
+            self._materialize_closed = True
+        trees = [t for t in (tree, exec_tree) if t is not None]
+        if not trees:
+            return
+        if result is not None:
+            if tree is not None:
+                result.details["materialization"] = tree.stats.to_dict()
+            if exec_tree is not None:
+                result.details["materialization_exec"] = exec_tree.stats.to_dict()
+        
+        def cleanup() -> None:
+            for t in trees:
+                t.cleanup()
+        
+        if pending:
+            def cleanup_when_done() -> None:
+                concurrent.futures.wait(pending)
+                cleanup()
+            threading.Thread(target=cleanup_when_done, daemon=True, name="validator_cleanup").start()
+        else:
+            cleanup()
+    
+    def _build_materialized_tree(self, link_mode: Optional[LinkMode] = None) -> MaterializedTree:
+        """
+        Материализует VFS во временную директорию через VFSMaterializer.
         
         CRITICAL: Staged файлы из VFS ВСЕГДА перезаписывают файлы из project_root.
         Это гарантирует, что тестируется актуальная версия кода.
         """
-        temp_dir = tempfile.mkdtemp(prefix='validator_')
-        
-        # Получаем список staged файлов ЗАРАНЕЕ
+        materializer = VFSMaterializer(self.vfs, link_mode=link_mode or self.config.materialize_link_mode)
+        tree = materializer.materialize(prefix='validator_')
+        temp_dir = tree.root
         staged_files = set(self.vfs.get_staged_files())
         
-        logger.debug(f"Materializing VFS to {temp_dir}")
-        logger.debug(f"Staged files ({len(staged_files)}): {list(staged_files)[:10]}{'...' if len(staged_files) > 10 else ''}")
-        
-        # 1. Копируем project_root, ИСКЛЮЧАЯ staged файлы
-        # (они будут записаны из VFS с актуальным содержимым)
-        for item in self.vfs.project_root.iterdir():
-            if item.name.startswith('.') or item.name in ('__pycache__', 'venv', '.venv'):
-                continue
-            
-            dest = Path(temp_dir) / item.name
-            
-            if item.is_dir():
-                # Для директорий используем custom copytree с фильтрацией staged файлов
-                def ignore_staged(directory, files):
-                    ignored = set()
-                    for f in files:
-                        # Строим относительный путь
-                        full_path = Path(directory) / f
-                        try:
-                            rel_path = str(full_path.relative_to(self.vfs.project_root)).replace('\\', '/')
-                        except ValueError:
-                            continue
-                        
-                        # Игнорируем staged файлы и системные директории
-                        if rel_path in staged_files:
-                            ignored.add(f)
-                            logger.debug(f"Skipping staged file from copy: {rel_path}")
-                        elif f in ('__pycache__', '.git', '.venv', 'venv') or f.endswith('.pyc'):
-                            ignored.add(f)
-                    
-                    return ignored
-                
-                shutil.copytree(item, dest, ignore=ignore_staged)
-            else:
-                # Для файлов в корне проверяем, не staged ли они
-                rel_path = item.name
-                if rel_path not in staged_files:
-                    shutil.copy2(item, dest)
-                else:
-                    logger.debug(f"Skipping staged root file from copy: {rel_path}")
-        
-        # 2. Записываем ВСЕ staged файлы из VFS
-        # Это гарантирует, что тестируется актуальная версия
-        files_written = 0
-        for file_path in staged_files:
-            # Читаем содержимое из VFS (это вернёт staged версию)
-            content = self.vfs.read_file(file_path)
-            
-            if content is None:
-                # Проверяем, может это удаление
-                change = self.vfs.get_change(file_path)
-                if change and change.is_deletion:
-                    logger.debug(f"Skipping deleted file: {file_path}")
-                    continue
-                else:
-                    logger.warning(f"Staged file has no content: {file_path}")
-                    continue
-            
-            dest_path = Path(temp_dir) / file_path
-            dest_path.parent.mkdir(parents=True, exist_ok=True)
-            dest_path.write_text(content, encoding='utf-8')
-            files_written += 1
-            logger.debug(f"Wrote staged file: {file_path} ({len(content)} chars)")
-        
         # Log Click-related staged files for debugging
         click_files = []
         for file_path in staged_files:
@@ -1837,7 +2123,17 @@ class ChangeValidator:
         # We now respect the project's original structure (namespace packages support).
         # Imports are handled by proper PYTHONPATH configuration in RuntimeTester.
         
-        # Create setup.cfg to declare namespace packages if needed
+        self._ensure_setup_cfg(temp_dir)
+        
+        logger.info(
+            f"Materialized VFS: {tree.stats.files_written} staged files, {temp_dir} "
+            f"({tree.stats.duration_ms:.0f}ms)"
+        )
+        
+        return tree
+    
+    def _ensure_setup_cfg(self, temp_dir: str) -> None:
+        """Create setup.cfg to declare namespace packages if needed."""
         setup_cfg_path = Path(temp_dir) / 'setup.cfg'
         if not setup_cfg_path.exists():
             setup_cfg_content = """[metadata]
@@ -1857,10 +2153,6 @@ exclude =
     """
             setup_cfg_path.write_text(setup_cfg_content, encoding='utf-8')
             logger.debug(f"Created setup.cfg at {temp_dir}")
-        
-        logger.info(f"Materialized VFS: {files_written} files, {temp_dir}")
-        
-        return temp_dir
 
     
     # ========================================================================
@@ -1908,10 +2200,9 @@ exclude =
         if old_content is None or new_content is None:
             return changes
         
-        try:
-            old_tree = ast.parse(old_content)
-            new_tree = ast.parse(new_content)
-        except SyntaxError:
+        old_tree = parse_python(old_content).tree
+        new_tree = parse_python(new_content).tree
+        if old_tree is None or new_tree is None:
             return changes
         
         # Извлекаем определения
@@ -2000,9 +2291,8 @@ exclude =
         if content is None:
             return issues
         
-        try:
-            tree = ast.parse(content)
-        except SyntaxError:
+        tree = parse_python(content).tree
+        if tree is None:
             return issues
         
         # Ищем использование удалённых функций/классов
@@ -2077,10 +2367,9 @@ exclude =
         
             logger.info(f"RUNTIME: Checking {len(py_files)} Python files and {len(non_py_files)} non-Python files")
         
-            temp_dir = None
             try:
-                # Materialize VFS to temp directory - this is used by BOTH Python and non-Python checks
-                temp_dir = self._materialize_vfs()
+                # Shared materialized tree - used by BOTH Python and non-Python checks
+                temp_dir = self._get_materialized_dir(executes_code=True)
             
                 # ========================================================================
                 # PYTHON FILE VALIDATION
@@ -2215,6 +2504,22 @@ exclude =
                     
                         files_by_language[language].append((content, file_path))
                 
+                    # Compile all language groups in one call: each language is
+                    # compiled as a group, different languages concurrently
+                    batched_compile: Dict[str, Any] = {}
+                    try:
+                        batched_compile = await asyncio.to_thread(
+                            adapter_manager.compile_check_with_deps,
+                            [
+                                (code, fp, language)
+                                for language, language_files in files_by_language.items()
+                                for code, fp in language_files
+                            ],
+                            Path(temp_dir),
+                        )
+                    except Exception as e:
+                        logger.warning(f"RUNTIME: Concurrent batch compilation failed, compiling per language: {e}")
+                
                     # Compile each language group together using compile_check_with_deps
                     for language, language_files in files_by_language.items():
                         if not language_files:
@@ -2225,10 +2530,12 @@ exclude =
                         try:
                             # Use compile_check_with_deps for grouped compilation
                             # This allows files to see each other's dependencies
-                            compile_result = adapter_manager.compile_check_with_deps(
-                                [(code, fp, language) for code, fp in language_files],
-                                project_root=Path(temp_dir)
-                            )
+                            compile_result = AdapterManager.language_view(batched_compile, language)
+                            if compile_result is None:
+                                compile_result = adapter_manager.compile_check_with_deps(
+                                    [(code, fp, language) for code, fp in language_files],
+                                    project_root=Path(temp_dir)
+                                )
                         
                             if compile_result.get('success', False):
                                 logger.info(f"RUNTIME PASSED ({language}): All {len(language_files)} files compiled successfully")
@@ -2360,9 +2667,6 @@ exclude =
                     message=f"Runtime validation error: {e}",
                     language="python",
                 ))
-            finally:
-                if temp_dir:
-                    shutil.rmtree(temp_dir, ignore_errors=True)
         
             return issues
     
@@ -2384,7 +2688,7 @@ exclude =
         
         temp_dir = None
         try:
-            temp_dir = self._materialize_vfs()
+            temp_dir = self._get_materialized_dir(executes_code=True)
             
             for test_info in result.test_files_found:
                 test_path = Path(temp_dir) / test_info.path
@@ -2435,9 +2739,6 @@ exclude =
             ))
         except Exception as e:
             logger.error(f"Test execution failed: {e}")
-        finally:
-            if temp_dir:
-                shutil.rmtree(temp_dir, ignore_errors=True)
         
         return issues
     
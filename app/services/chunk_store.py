@@ -0,0 +1,371 @@
+# app/services/chunk_store.py
+"""
+Chunk Store - сохранённый код чанков semantic index с подсчётом токенов.
+
+Pre-filter на каждый запрос заново открывал все проиндексированные файлы,
+резал их на строки, вырезал код чанков по `lines` и считал токены
+tiktoken-ом. Chunk store делает это один раз - при сохранении semantic
+index - и хранит результат на диске:
+
+    .ai-agent/chunk_store/blobs.dat      - код чанков подряд (UTF-8)
+    .ai-agent/chunk_store/manifest.json  - blobs: sha256 -> [offset, length, tokens]
+                                           files: path -> mtime/size + чанки
+
+- content-addressed: одинаковый код хранится один раз, неизменённые
+  чанки при обновлении не переписываются и не пересчитываются;
+- инкрементально: обновляются только файлы, у которых изменились
+  mtime/size (или набор чанков в индексе); blobs.dat только дописывается,
+  компакция - когда мёртвых байт больше, чем живых;
+- чтение через mmap: ChunkReader отдаёт код и токены по (file, name,
+  lines) без открытия исходников. Файл, изменённый после обновления
+  store (stat не совпал), считается устаревшим - вызывающая сторона
+  читает его по-старому.
+
+Пример:
+    >>> update_chunk_store(index, project_dir)          # при сохранении индекса
+    >>> with get_chunk_store(project_dir).open_reader() as reader:
+    ...     reader.get("app/main.py", "main", "10-42")
+    ('def main():\\n    ...', 215)
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import mmap
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.lexical_index import iter_index_entries
+
+logger = logging.getLogger(__name__)
+
+
+CHUNK_STORE_DIRNAME = "chunk_store"
+BLOBS_FILENAME = "blobs.dat"
+MANIFEST_FILENAME = "manifest.json"
+CHUNK_STORE_VERSION = 1
+
+
+def chunk_key(name: str, lines: str) -> str:
+    """Ключ чанка внутри файла (имя может повторяться - добавляем строки)"""
+    return f"{name}|{lines}"
+
+
+def slice_chunk_code(file_lines: List[str], lines: str) -> Optional[str]:
+    """Код чанка по диапазону `start-end` (1-based, включительно), как в pre_filter"""
+    if not lines or "-" not in lines:
+        return None
+    try:
+        start_line, end_line = map(int, lines.split("-"))
+    except ValueError:
+        return None
+    return "\n".join(file_lines[start_line - 1:end_line])
+
+
+def read_source_text(path: Path) -> Optional[str]:
+    """Чтение исходника с fallback на latin-1 (как _read_file_safe в pre_filter)"""
+    try:
+        return path.read_text(encoding="utf-8")
+    except UnicodeDecodeError:
+        try:
+            return path.read_text(encoding="latin-1")
+        except Exception:
+            return None
+    except Exception:
+        return None
+
+
+# ============================================================================
+# STORE
+# ============================================================================
+
+class ChunkStore:
+    """Манифест + файл блобов одного проекта"""
+
+    def __init__(self, project_dir: str):
+        self.project_dir = Path(project_dir).resolve()
+        self.store_dir = self.project_dir / ".ai-agent" / CHUNK_STORE_DIRNAME
+        self.blobs_path = self.store_dir / BLOBS_FILENAME
+        self.manifest_path = self.store_dir / MANIFEST_FILENAME
+
+        self.blobs: Dict[str, List[int]] = {}
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self._manifest_mtime: Optional[int] = None
+        self._lock = threading.Lock()
+        self.load()
+
+    # ========================================================================
+    # PUBLIC API
+    # ========================================================================
+
+    def load(self) -> None:
+        """Загружает манифест (пустой store, если его нет или версия другая)"""
+        self.blobs, self.files = {}, {}
+        self._manifest_mtime = None
+        try:
+            stat = self.manifest_path.stat()
+            with self.manifest_path.open("r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return
+        if manifest.get("version") != CHUNK_STORE_VERSION:
+            return
+        self.blobs = manifest.get("blobs", {})
+        self.files = manifest.get("files", {})
+        self._manifest_mtime = stat.st_mtime_ns
+
+    def is_stale(self) -> bool:
+        """Манифест на диске изменился (обновление из другого процесса)"""
+        try:
+            return self.manifest_path.stat().st_mtime_ns != self._manifest_mtime
+        except OSError:
+            return self._manifest_mtime is not None
+
+    def open_reader(self) -> "ChunkReader":
+        return ChunkReader(self)
+
+    def update(self, index: Dict[str, Any], token_counter=None) -> Dict[str, int]:
+        """
+        Приводит store в соответствие с semantic index.
+
+        Перечитываются только файлы, у которых изменились stat или набор
+        чанков; код, уже лежащий в store (тот же sha256), не дописывается
+        и токены для него не пересчитываются.
+
+        Returns:
+            Статистика: files_updated, files_removed, blobs_added
+        """
+        if token_counter is None:
+            from app.utils.token_counter import TokenCounter
+            token_counter = TokenCounter()
+
+        wanted: Dict[str, List[Tuple[str, str]]] = {}
+        for entry in iter_index_entries(index):
+            wanted.setdefault(entry["file_path"], []).append((entry["name"], entry["lines"]))
+
+        stats = {"files_updated": 0, "files_removed": 0, "blobs_added": 0}
+
+        with self._lock:
+            self.store_dir.mkdir(parents=True, exist_ok=True)
+            for file_path in list(self.files):
+                if file_path not in wanted:
+                    del self.files[file_path]
+                    stats["files_removed"] += 1
+
+            with open(self.blobs_path, "ab") as blobs_file:
+                offset = blobs_file.tell()
+                for file_path, entries in wanted.items():
+                    keys = {chunk_key(name, lines) for name, lines in entries}
+                    full_path = self.project_dir / file_path
+                    stat = _stat(full_path)
+                    record = self.files.get(file_path)
+                    if (
+                        record is not None
+                        and stat is not None
+                        and record.get("mtime_ns") == stat[0]
+                        and record.get("size") == stat[1]
+                        and set(record.get("chunks", {})) == keys
+                    ):
+                        continue
+
+                    content = read_source_text(full_path) if stat is not None else None
+                    if content is None:
+                        self.files.pop(file_path, None)
+                        continue
+
+                    file_lines = content.splitlines()
+                    chunks: Dict[str, str] = {}
+                    for name, lines in entries:
+                        code = slice_chunk_code(file_lines, lines)
+                        if not code or not code.strip():
+                            # Пустой чанк тоже запоминаем, чтобы файл не считался изменённым
+                            chunks[chunk_key(name, lines)] = ""
+                            continue
+                        data = code.encode("utf-8", errors="surrogatepass")
+                        digest = hashlib.sha256(data).hexdigest()
+                        if digest not in self.blobs:
+                            blobs_file.write(data)
+                            self.blobs[digest] = [offset, len(data), token_counter.count(code)]
+                            offset += len(data)
+                            stats["blobs_added"] += 1
+                        chunks[chunk_key(name, lines)] = digest
+
+                    self.files[file_path] = {"mtime_ns": stat[0], "size": stat[1], "chunks": chunks}
+                    stats["files_updated"] += 1
+
+            if self._garbage_ratio() > 0.5:
+                self._compact()
+            self._save_manifest()
+
+        return stats
+
+    def stats(self) -> Dict[str, Any]:
+        live = self._live_digests()
+        return {
+            "files": len(self.files),
+            "blobs": len(self.blobs),
+            "live_blobs": len(live),
+            "bytes": _size(self.blobs_path),
+        }
+
+    # ========================================================================
+    # INTERNAL
+    # ========================================================================
+
+    def _live_digests(self) -> set:
+        # Пустые чанки записаны с digest "" - блоба у них нет
+        return {d for record in self.files.values() for d in record.get("chunks", {}).values() if d}
+
+    def _garbage_ratio(self) -> float:
+        total = _size(self.blobs_path)
+        if not total:
+            return 0.0
+        live = sum(self.blobs[d][1] for d in self._live_digests() if d in self.blobs)
+        return 1.0 - live / total
+
+    def _compact(self) -> None:
+        """Переписывает blobs.dat только с живыми блобами"""
+        live = self._live_digests()
+        tmp_path = self.blobs_path.with_name(BLOBS_FILENAME + ".tmp")
+        new_blobs: Dict[str, List[int]] = {}
+        with open(self.blobs_path, "rb") as src, open(tmp_path, "wb") as dst:
+            for digest in sorted(live, key=lambda d: self.blobs[d][0]):
+                offset, length, tokens = self.blobs[digest]
+                src.seek(offset)
+                new_blobs[digest] = [dst.tell(), length, tokens]
+                dst.write(src.read(length))
+        os.replace(tmp_path, self.blobs_path)
+        self.blobs = new_blobs
+        logger.debug(f"Chunk store compacted: {len(new_blobs)} blobs")
+
+    def _save_manifest(self) -> None:
+        manifest = {"version": CHUNK_STORE_VERSION, "blobs": self.blobs, "files": self.files}
+        tmp_path = self.manifest_path.with_name(MANIFEST_FILENAME + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.manifest_path)
+        self._manifest_mtime = self.manifest_path.stat().st_mtime_ns
+
+
+class ChunkReader:
+    """
+    Один проход чтения: mmap blobs.dat и memo проверок stat файлов.
+
+    Используется как context manager, чтобы mmap не держался между
+    запросами (и не мешал компакции).
+    """
+
+    def __init__(self, store: ChunkStore):
+        self._store = store
+        self._file_ok: Dict[str, bool] = {}
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+
+    def __enter__(self) -> "ChunkReader":
+        try:
+            self._file = open(self._store.blobs_path, "rb")
+            if os.fstat(self._file.fileno()).st_size:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self.close()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def get(self, file_path: str, name: str, lines: str) -> Optional[Tuple[str, int]]:
+        """
+        (code, tokens) чанка или None, если файла/чанка нет в store
+        или файл изменился после обновления store.
+        """
+        if self._map is None or not self.is_current(file_path):
+            return None
+        digest = self._store.files[file_path]["chunks"].get(chunk_key(name, lines))
+        blob = self._store.blobs.get(digest) if digest else None
+        if blob is None:
+            return None
+        offset, length, tokens = blob
+        if offset + length > len(self._map):
+            return None
+        code = self._map[offset:offset + length].decode("utf-8", errors="surrogatepass")
+        return code, tokens
+
+    def is_current(self, file_path: str) -> bool:
+        ok = self._file_ok.get(file_path)
+        if ok is None:
+            record = self._store.files.get(file_path)
+            stat = _stat(self._store.project_dir / file_path) if record else None
+            ok = bool(
+                record
+                and stat is not None
+                and record.get("mtime_ns") == stat[0]
+                and record.get("size") == stat[1]
+            )
+            self._file_ok[file_path] = ok
+        return ok
+
+
+# ============================================================================
+# MODULE HELPERS
+# ============================================================================
+
+_stores: Dict[str, ChunkStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_chunk_store(project_dir: str) -> ChunkStore:
+    """Общий ChunkStore проекта (манифест перечитывается, если изменился на диске)"""
+    key = str(Path(project_dir).resolve())
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = ChunkStore(key)
+        elif store.is_stale():
+            store.load()
+        return store
+
+
+def update_chunk_store(index: Dict[str, Any], project_dir: str) -> Optional[ChunkStore]:
+    """
+    Обновляет chunk store проекта по semantic index.
+
+    Вызывается при сохранении semantic index; ошибки не прерывают индексацию.
+    """
+    try:
+        store = get_chunk_store(project_dir)
+        stats = store.update(index)
+        logger.info(
+            f"Chunk store updated: {stats['files_updated']} files, "
+            f"+{stats['blobs_added']} blobs, -{stats['files_removed']} files"
+        )
+        return store
+    except Exception as e:
+        logger.warning(f"Chunk store update failed: {e}")
+        return None
+
+
+def _stat(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
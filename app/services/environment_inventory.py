@@ -0,0 +1,426 @@
+# app/services/environment_inventory.py
+"""
+Environment Inventory - список установленных пакетов окружения проекта без pip.
+
+`python -m pip list --format=json` занимает секунды и раньше вызывался
+независимо валидатором, DependencyManager и VFS. Здесь инвентарь строится
+напрямую по метаданным `*.dist-info` / `*.egg-info` в site-packages
+интерпретатора проекта:
+
+- имя и версия - из METADATA / PKG-INFO (только заголовки);
+- import-имена - из top_level.txt, иначе из RECORD;
+- кэш в памяти и на диске, ключ - mtime каталогов site-packages и
+  каждой dist-info директории. Установка/удаление пакета меняет mtime,
+  и инвентарь пересобирается.
+
+Пример:
+    >>> inventory = get_environment_inventory(vfs.get_project_python())
+    >>> inventory.is_installed("python-docx")
+    True
+    >>> inventory.package_for_import("docx")
+    'python-docx'
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import json
+import glob
+import hashlib
+import logging
+import tempfile
+import threading
+import subprocess
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# Дисковый кэш инвентарей (по одному файлу на интерпретатор)
+CACHE_ROOT = Path(tempfile.gettempdir()) / "ai_agent_env_inventory"
+
+# Версия формата кэша - увеличить при изменении структуры
+CACHE_VERSION = 1
+
+_METADATA_SUFFIXES = (".dist-info", ".egg-info")
+
+
+def normalize_package_name(name: str) -> str:
+    """'Python-Docx' -> 'python_docx' (как сравнивают валидатор и DependencyManager)"""
+    return name.lower().replace("-", "_").replace(".", "_")
+
+
+@dataclass
+class InstalledDistribution:
+    """Один установленный дистрибутив"""
+    name: str
+    version: str
+    location: str
+    top_level: List[str] = field(default_factory=list)
+
+
+@dataclass
+class EnvironmentInventory:
+    """
+    Снимок установленных пакетов одного интерпретатора.
+
+    Attributes:
+        python_path: Интерпретатор проекта
+        site_dirs: Просканированные каталоги site-packages
+        distributions: normalize_package_name(name) -> InstalledDistribution
+        fingerprint: mtime site-packages и dist-info каталогов на момент сборки
+    """
+    python_path: str
+    site_dirs: List[str]
+    distributions: Dict[str, InstalledDistribution]
+    fingerprint: str
+    _imports: Optional[Dict[str, str]] = field(default=None, repr=False)
+
+    def package_names(self) -> Set[str]:
+        """Имена пакетов в lowercase и нормализованном виде (- → _)"""
+        names: Set[str] = set()
+        for dist in self.distributions.values():
+            names.add(dist.name.lower())
+            names.add(dist.name.lower().replace("-", "_"))
+        return names
+
+    def import_names(self) -> Set[str]:
+        """Top-level модули, предоставляемые установленными пакетами"""
+        return set(self.import_to_package())
+
+    def import_to_package(self) -> Dict[str, str]:
+        """import-имя -> имя дистрибутива (аналог packages_distributions())"""
+        if self._imports is None:
+            mapping: Dict[str, str] = {}
+            for dist in self.distributions.values():
+                for module in dist.top_level:
+                    mapping.setdefault(module, dist.name)
+            self._imports = mapping
+        return self._imports
+
+    def package_for_import(self, import_name: str) -> Optional[str]:
+        return self.import_to_package().get(import_name.split(".")[0])
+
+    def get(self, package_name: str) -> Optional[InstalledDistribution]:
+        return self.distributions.get(normalize_package_name(package_name))
+
+    def is_installed(self, package_name: str) -> bool:
+        return self.get(package_name) is not None
+
+    def version(self, package_name: str) -> Optional[str]:
+        dist = self.get(package_name)
+        return dist.version if dist else None
+
+
+# ============================================================================
+# PUBLIC API
+# ============================================================================
+
+_inventories: Dict[str, EnvironmentInventory] = {}
+_lock = threading.Lock()
+
+
+def get_environment_inventory(
+    python_path: Optional[str] = None,
+    refresh: bool = False,
+) -> EnvironmentInventory:
+    """
+    Возвращает инвентарь окружения python_path (по умолчанию - текущий
+    интерпретатор).
+
+    Каждый вызов пересчитывает fingerprint (stat каталогов, без чтения
+    метаданных); при совпадении возвращается кэш из памяти или с диска.
+    """
+    python_path = python_path or sys.executable
+
+    with _lock:
+        site_dirs = _site_dirs(python_path)
+        fingerprint = _fingerprint(site_dirs)
+
+        cached = _inventories.get(python_path)
+        if not refresh and cached is not None and cached.fingerprint == fingerprint:
+            return cached
+
+        inventory = None if refresh else _load_from_disk(python_path, fingerprint)
+        if inventory is None:
+            inventory = _build(python_path, site_dirs, fingerprint)
+            _save_to_disk(inventory)
+
+        _inventories[python_path] = inventory
+        return inventory
+
+
+def invalidate_environment_inventory(python_path: Optional[str] = None) -> None:
+    """Сбрасывает кэш в памяти (после pip install/uninstall)"""
+    with _lock:
+        if python_path is None:
+            _inventories.clear()
+        else:
+            _inventories.pop(python_path, None)
+
+
+# ============================================================================
+# SITE-PACKAGES DISCOVERY
+# ============================================================================
+
+_site_dirs_cache: Dict[str, List[str]] = {}
+
+
+def _site_dirs(python_path: str) -> List[str]:
+    """
+    Каталоги site-packages интерпретатора.
+
+    Для venv каталоги находятся по структуре (без запуска Python),
+    для других интерпретаторов sys.path запрашивается один раз.
+    """
+    cached = _site_dirs_cache.get(python_path)
+    if cached is not None:
+        return cached
+
+    dirs: Optional[List[str]] = None
+    if _same_interpreter(python_path, sys.executable):
+        dirs = _filter_site_dirs(sys.path)
+    else:
+        dirs = _venv_site_dirs(python_path)
+        if dirs is None:
+            dirs = _query_site_dirs(python_path)
+
+    _site_dirs_cache[python_path] = dirs
+    return dirs
+
+
+def _venv_site_dirs(python_path: str) -> Optional[List[str]]:
+    exe = Path(python_path)
+    prefix = exe.parent.parent
+    cfg = prefix / "pyvenv.cfg"
+    if not cfg.is_file():
+        return None
+
+    try:
+        cfg_text = cfg.read_text(encoding="utf-8", errors="replace").lower()
+    except OSError:
+        return None
+    # Системные пакеты видны из venv - нужен реальный sys.path
+    if "include-system-site-packages = true" in cfg_text:
+        return None
+
+    found = glob.glob(str(prefix / "lib" / "python*" / "site-packages"))
+    found += glob.glob(str(prefix / "Lib" / "site-packages"))
+    return sorted(set(found))
+
+
+def _query_site_dirs(python_path: str) -> List[str]:
+    try:
+        result = subprocess.run(
+            [python_path, "-c", "import json, sys; print(json.dumps(sys.path))"],
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            timeout=15,
+        )
+        if result.returncode == 0:
+            return _filter_site_dirs(json.loads(result.stdout))
+    except Exception as e:
+        logger.warning(f"Failed to query sys.path of {python_path}: {e}")
+    return []
+
+
+def _filter_site_dirs(paths: List[str]) -> List[str]:
+    dirs = []
+    for path in paths:
+        if not path or not os.path.isdir(path):
+            continue
+        base = os.path.basename(path.rstrip("/\\"))
+        if base in ("site-packages", "dist-packages") and path not in dirs:
+            dirs.append(path)
+    return dirs
+
+
+def _same_interpreter(a: str, b: str) -> bool:
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return os.path.abspath(a) == os.path.abspath(b)
+
+
+# ============================================================================
+# FINGERPRINT & DISK CACHE
+# ============================================================================
+
+def _fingerprint(site_dirs: List[str]) -> str:
+    digest = hashlib.sha1(str(CACHE_VERSION).encode())
+    for site_dir in site_dirs:
+        try:
+            digest.update(f"{site_dir}:{os.stat(site_dir).st_mtime_ns}".encode())
+            with os.scandir(site_dir) as entries:
+                names = sorted(
+                    (entry.name, entry.stat().st_mtime_ns)
+                    for entry in entries
+                    if entry.name.endswith(_METADATA_SUFFIXES)
+                )
+        except OSError:
+            continue
+        for name, mtime in names:
+            digest.update(f"{name}:{mtime}".encode())
+    return digest.hexdigest()
+
+
+def _cache_file(python_path: str) -> Path:
+    digest = hashlib.sha1(os.path.abspath(python_path).encode("utf-8")).hexdigest()[:16]
+    return CACHE_ROOT / f"{digest}.json"
+
+
+def _load_from_disk(python_path: str, fingerprint: str) -> Optional[EnvironmentInventory]:
+    path = _cache_file(python_path)
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if data.get("fingerprint") != fingerprint or data.get("python_path") != python_path:
+        return None
+    try:
+        distributions = {
+            key: InstalledDistribution(**value)
+            for key, value in data["distributions"].items()
+        }
+    except (KeyError, TypeError):
+        return None
+    logger.debug(f"Environment inventory for {python_path} loaded from disk cache")
+    return EnvironmentInventory(
+        python_path=python_path,
+        site_dirs=data.get("site_dirs", []),
+        distributions=distributions,
+        fingerprint=fingerprint,
+    )
+
+
+def _save_to_disk(inventory: EnvironmentInventory) -> None:
+    path = _cache_file(inventory.python_path)
+    data = {
+        "python_path": inventory.python_path,
+        "site_dirs": inventory.site_dirs,
+        "fingerprint": inventory.fingerprint,
+        "distributions": {key: asdict(dist) for key, dist in inventory.distributions.items()},
+    }
+    try:
+        CACHE_ROOT.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.debug(f"Could not write environment inventory cache: {e}")
+
+
+# ============================================================================
+# METADATA PARSING
+# ============================================================================
+
+def _build(python_path: str, site_dirs: List[str], fingerprint: str) -> EnvironmentInventory:
+    distributions: Dict[str, InstalledDistribution] = {}
+
+    for site_dir in site_dirs:
+        try:
+            entries = sorted(os.listdir(site_dir))
+        except OSError:
+            continue
+        for entry in entries:
+            if not entry.endswith(_METADATA_SUFFIXES):
+                continue
+            dist = _read_distribution(os.path.join(site_dir, entry), site_dir)
+            if dist is None:
+                continue
+            # Первый каталог в sys.path побеждает (как при импорте)
+            distributions.setdefault(normalize_package_name(dist.name), dist)
+
+    logger.info(
+        f"Environment inventory for {python_path}: {len(distributions)} distributions "
+        f"in {len(site_dirs)} site dirs"
+    )
+    return EnvironmentInventory(
+        python_path=python_path,
+        site_dirs=list(site_dirs),
+        distributions=distributions,
+        fingerprint=fingerprint,
+    )
+
+
+def _read_distribution(meta_dir: str, site_dir: str) -> Optional[InstalledDistribution]:
+    if meta_dir.endswith(".dist-info"):
+        metadata_file = os.path.join(meta_dir, "METADATA")
+    elif os.path.isdir(meta_dir):
+        metadata_file = os.path.join(meta_dir, "PKG-INFO")
+    else:
+        # Однофайловый *.egg-info
+        metadata_file = meta_dir
+
+    name, version = _read_name_version(metadata_file)
+    if not name:
+        return None
+
+    return InstalledDistribution(
+        name=name,
+        version=version or "",
+        location=site_dir,
+        top_level=_read_top_level(meta_dir),
+    )
+
+
+def _read_name_version(metadata_file: str) -> Tuple[Optional[str], Optional[str]]:
+    name = version = None
+    try:
+        with open(metadata_file, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if not line.strip():
+                    break  # Конец заголовков, дальше описание
+                if line.startswith("Name:"):
+                    name = line[5:].strip()
+                elif line.startswith("Version:"):
+                    version = line[8:].strip()
+                if name and version:
+                    break
+    except OSError:
+        pass
+    return name, version
+
+
+def _read_top_level(meta_dir: str) -> List[str]:
+    if not os.path.isdir(meta_dir):
+        return []
+
+    top_level_file = os.path.join(meta_dir, "top_level.txt")
+    if os.path.isfile(top_level_file):
+        try:
+            with open(top_level_file, encoding="utf-8", errors="replace") as f:
+                return [line.strip().replace("/", ".") for line in f if line.strip()]
+        except OSError:
+            pass
+
+    # Нет top_level.txt (flit, hatch, poetry) - берём из RECORD
+    modules: Set[str] = set()
+    try:
+        with open(os.path.join(meta_dir, "RECORD"), encoding="utf-8", errors="replace") as f:
+            for line in f:
+                path = line.split(",", 1)[0].strip()
+                if not path or path.startswith(".."):
+                    continue
+                first = path.split("/", 1)[0]
+                if "/" not in path:
+                    # Модуль верхнего уровня: foo.py или расширение foo.cpython-311.so
+                    if first.endswith(".py"):
+                        first = first[:-3]
+                    elif first.endswith((".so", ".pyd")):
+                        first = first.split(".", 1)[0]
+                    else:
+                        continue
+                elif first.endswith(_METADATA_SUFFIXES) or first in ("__pycache__", "bin", "Scripts"):
+                    continue
+                # Служебные модули editable-установок
+                if first.isidentifier() and not first.startswith("__editable__"):
+                    modules.add(first)
+    except OSError:
+        pass
+    return sorted(modules)
@@ -20,7 +20,7 @@ from pathlib import Path
 from typing import Optional, List, Dict, Any, Tuple, TYPE_CHECKING
 from dataclasses import dataclass, field
 from enum import Enum
-from app.services.tree_sitter_parser import MultiLanguageParser
+from app.services.tree_sitter_parser import MultiLanguageParser, get_multi_language_parser, parse_tree
 import ast
 import textwrap
 from app.services.syntax_fixer_agent import attempt_ai_syntax_fix, extract_surrounding_context
@@ -1489,8 +1489,7 @@ class FileModifier:
                 )
             
             # === INITIALIZATION ===
-            from app.services.tree_sitter_parser import MultiLanguageParser
-            parser = MultiLanguageParser() if is_code_file else None
+            parser = get_multi_language_parser() if is_code_file else None
             source_bytes = existing_content.encode('utf-8')
             lines = existing_content.split('\n')
             
@@ -1926,7 +1925,7 @@ class FileModifier:
             try:
                 # Get parser for language
                 ts_parser, _ = parser._get_parser_for_language(language)
-                tree = ts_parser.parse(source_bytes)
+                tree = parse_tree(ts_parser, source_bytes, language)
         
                 # Get language config
                 lang_config = parser.LANGUAGE_CONFIGS.get(language, {})
@@ -2203,9 +2202,9 @@ class FileModifier:
     def _validate_multilang_syntax(self, content: str, language: str) -> Tuple[bool, List[str]]:
             """Validate syntax of non-Python code using tree-sitter. Returns (is_valid, error_messages)."""
             try:
-                parser = MultiLanguageParser()
+                parser = get_multi_language_parser()
                 ts_parser, _ = parser._get_parser_for_language(language)
-                tree = ts_parser.parse(content.encode('utf-8'))
+                tree = parse_tree(ts_parser, content.encode('utf-8'), language)
             
                 errors = []
             
@@ -2236,9 +2235,9 @@ class FileModifier:
         Detects both ERROR and MISSING tree-sitter nodes.
         """
         try:
-            parser = MultiLanguageParser()
+            parser = get_multi_language_parser()
             ts_parser, _ = parser._get_parser_for_language(language)
-            tree = ts_parser.parse(content.encode('utf-8'))
+            tree = parse_tree(ts_parser, content.encode('utf-8'), language)
             
             has_error = False
             
@@ -3947,35 +3946,21 @@ class FileModifier:
         Returns True if structural integrity is preserved or if the check cannot be
         performed. Never raises."""
         try:
+            from app.services.ast_cache import parse_python
+
             # Baseline: parse original
-            try:
-                orig_tree = ast.parse(original_content)
-            except Exception:
+            orig_parsed = parse_python(original_content)
+            if not orig_parsed.ok:
                 # Cannot establish baseline — allow the change
                 return True
 
             # Parse new content; syntax failure = structural break
-            try:
-                new_tree = ast.parse(new_content)
-            except Exception:
+            new_parsed = parse_python(new_content)
+            if not new_parsed.ok:
                 return False
 
-            def _collect_names(tree) -> set:
-                """Collect module-level def/class names and class.method names."""
-                names = set()
-                for node in ast.iter_child_nodes(tree):
-                    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                        names.add(node.name)
-                    elif isinstance(node, ast.ClassDef):
-                        names.add(node.name)
-                        for child in ast.iter_child_nodes(node):
-                            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                                names.add(f"{node.name}.{child.name}")
-                return names
-
-            orig_names = _collect_names(orig_tree)
-            new_names = _collect_names(new_tree)
-            missing = orig_names - new_names
+            # Module-level def/class names and class.method names
+            missing = set(orig_parsed.definitions) - set(new_parsed.definitions)
 
             if missing:
                 logger.debug(
@@ -5823,8 +5808,7 @@ class FileModifier:
                 match_start = anchor_res['line_number']
                 match_end = anchor_res['match_end']
             else:
-                from app.services.tree_sitter_parser import MultiLanguageParser
-                parser = MultiLanguageParser()
+                parser = get_multi_language_parser()
                 source_bytes = existing_content.encode('utf-8')
                 target_info = self._find_multilang_target(
                     parser,
@@ -0,0 +1,616 @@
+# app/services/formatter_service.py
+"""
+Formatter Service - прогретые процессы форматтеров для auto-fix.
+
+Каждая попытка авто-исправления запускала форматтер заново:
+`python -m black -`, `python -m isort -`, `java -jar google-java-format.jar`,
+`prettier --stdin-filepath`. В try-revert цикле SyntaxChecker.check_python
+это несколько стартов интерпретатора на одну ошибку, а для Java - старт JVM
+(~1s) на каждый format_code.
+
+Здесь форматтеры живут в долгоживущих процессах (daemon) с простым протоколом
+через stdin/stdout:
+
+- python: воркер на интерпретаторе проекта импортирует black / isort / yapf /
+  autopep8 один раз и вызывает их библиотечный API (format_str, isort.code,
+  FormatCode, fix_code);
+- java: небольшой класс-обёртка над com.google.googlejavaformat.java.Formatter
+  компилируется один раз в кэш и держит JVM (и её JIT) прогретой;
+- prettier: node-процесс с require("prettier") из установленного CLI.
+
+Кадр протокола: `<len>\\n<utf-8 payload>` в обе стороны, ответ начинается
+со статуса: `OK <len>\\n...` или `ERR <len>\\n...`. Первым кадром daemon
+сообщает о готовности.
+
+Если daemon недоступен (нет инструмента, не стартовал, упал на старте),
+методы возвращают None и вызывающая сторона запускает старый subprocess.
+Таймаут запроса убивает daemon; он перезапускается при следующем вызове.
+
+Пример:
+    >>> service = get_formatter_service()
+    >>> result = service.format_python("black", code, python_path, line_length=120)
+    >>> if result is None:
+    ...     pass  # fallback: subprocess.run([python, "-m", "black", "-"], ...)
+    >>> elif result.success:
+    ...     code = result.output
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+import subprocess
+import weakref
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# Глобальный выключатель (для отладки - вернуть поведение "subprocess на вызов")
+USE_FORMATTER_DAEMONS = True
+
+# Ожидание кадра готовности (старт JVM / импорт форматтеров)
+STARTUP_TIMEOUT_SEC = 60
+
+# Инструменты, которые обслуживает python-воркер
+PYTHON_FORMATTERS = ("black", "isort", "yapf", "autopep8")
+
+# Флаги JVM для google-java-format на JDK 16+: при запуске через -cp
+# Add-Exports из манифеста jar не применяются
+_GJF_JVM_EXPORTS = [
+    f"--add-exports=jdk.compiler/com.sun.tools.javac.{pkg}=ALL-UNNAMED"
+    for pkg in ("api", "code", "file", "parser", "tree", "util")
+]
+
+
+class FormatterDaemonError(Exception):
+    """Daemon не запустился или упал"""
+    pass
+
+
+@dataclass
+class FormatResult:
+    """Результат форматирования через daemon"""
+    success: bool
+    output: str = ""
+    error: str = ""
+    timed_out: bool = False
+    elapsed_ms: float = 0.0
+
+
+# ============================================================================
+# DAEMON SOURCES
+# ============================================================================
+
+_PYTHON_WORKER_SOURCE = r'''
+import sys, json
+
+_in = sys.stdin.buffer
+_out = sys.stdout.buffer
+# print() внутри форматтеров не должен ломать протокол
+sys.stdout = sys.stderr
+
+
+def send(status, body):
+    data = body.encode("utf-8")
+    _out.write(("%s %d\n" % (status, len(data))).encode("ascii") + data)
+    _out.flush()
+
+
+def recv():
+    header = _in.readline()
+    if not header:
+        return None
+    return _in.read(int(header)).decode("utf-8")
+
+
+def run_black(code, o):
+    import black
+    return black.format_str(code, mode=black.Mode(line_length=int(o.get("line_length", 88))))
+
+
+def run_isort(code, o):
+    import isort
+    return isort.code(code, profile=o.get("profile", "black"))
+
+
+def run_yapf(code, o):
+    from yapf.yapflib.yapf_api import FormatCode
+    formatted = FormatCode(code, style_config=o.get("style", "pep8"))
+    return formatted[0] if isinstance(formatted, tuple) else formatted
+
+
+def run_autopep8(code, o):
+    import autopep8
+    options = {}
+    if o.get("select"):
+        options["select"] = [c for c in o["select"].split(",") if c]
+    if o.get("max_line_length"):
+        options["max_line_length"] = int(o["max_line_length"])
+    return autopep8.fix_code(code, options=options or None)
+
+
+RUNNERS = {"black": run_black, "isort": run_isort, "yapf": run_yapf, "autopep8": run_autopep8}
+IMPORTS = {"black": "black", "isort": "isort", "yapf": "yapf.yapflib.yapf_api", "autopep8": "autopep8"}
+
+available = []
+for tool, module in IMPORTS.items():
+    try:
+        __import__(module)
+        available.append(tool)
+    except Exception:
+        pass
+send("OK", json.dumps({"tools": available}))
+
+while True:
+    payload = recv()
+    if payload is None:
+        break
+    try:
+        request = json.loads(payload)
+        send("OK", RUNNERS[request["tool"]](request["code"], request.get("options") or {}))
+    except Exception as e:
+        send("ERR", "%s: %s" % (type(e).__name__, e))
+'''
+
+_GJF_DAEMON_CLASS = "GjfFormatterDaemon"
+
+_GJF_DAEMON_SOURCE = r'''
+import com.google.googlejavaformat.java.Formatter;
+import java.io.*;
+import java.nio.charset.StandardCharsets;
+
+public class GjfFormatterDaemon {
+    private static String readHeader(InputStream in) throws IOException {
+        ByteArrayOutputStream line = new ByteArrayOutputStream();
+        int b;
+        while ((b = in.read()) != -1) {
+            if (b == '\n') return line.toString("US-ASCII");
+            line.write(b);
+        }
+        return line.size() == 0 ? null : line.toString("US-ASCII");
+    }
+
+    private static void send(OutputStream out, String status, String body) throws IOException {
+        byte[] data = body.getBytes(StandardCharsets.UTF_8);
+        out.write((status + " " + data.length + "\n").getBytes(StandardCharsets.US_ASCII));
+        out.write(data);
+        out.flush();
+    }
+
+    public static void main(String[] args) throws Exception {
+        DataInputStream in = new DataInputStream(new BufferedInputStream(System.in));
+        OutputStream out = new BufferedOutputStream(new FileOutputStream(FileDescriptor.out));
+        System.setOut(System.err);
+
+        Formatter formatter = new Formatter();
+        formatter.formatSourceAndFixImports("class Warmup {}\n");
+        send(out, "OK", "{}");
+
+        String header;
+        while ((header = readHeader(in)) != null) {
+            byte[] buf = new byte[Integer.parseInt(header.trim())];
+            in.readFully(buf);
+            String source = new String(buf, StandardCharsets.UTF_8);
+            try {
+                send(out, "OK", formatter.formatSourceAndFixImports(source));
+            } catch (Throwable e) {
+                send(out, "ERR", String.valueOf(e.getMessage()));
+            }
+        }
+    }
+}
+'''
+
+_PRETTIER_DAEMON_SOURCE = r'''
+const prettier = require(process.argv[1]);
+
+let buffer = Buffer.alloc(0);
+let chain = Promise.resolve();
+
+function send(status, body) {
+  const data = Buffer.from(body, "utf8");
+  process.stdout.write(Buffer.concat([Buffer.from(`${status} ${data.length}\n`, "ascii"), data]));
+}
+
+async function handle(payload) {
+  try {
+    const request = JSON.parse(payload);
+    const config = (await prettier.resolveConfig(request.filepath)) || {};
+    const output = await prettier.format(request.code, { ...config, filepath: request.filepath });
+    send("OK", output);
+  } catch (e) {
+    send("ERR", String(e && e.message ? e.message : e));
+  }
+}
+
+process.stdin.on("data", (chunk) => {
+  buffer = Buffer.concat([buffer, chunk]);
+  for (;;) {
+    const newline = buffer.indexOf(10);
+    if (newline < 0) return;
+    const length = parseInt(buffer.slice(0, newline).toString("ascii"), 10);
+    if (buffer.length < newline + 1 + length) return;
+    const payload = buffer.slice(newline + 1, newline + 1 + length).toString("utf8");
+    buffer = buffer.slice(newline + 1 + length);
+    chain = chain.then(() => handle(payload));
+  }
+});
+process.stdin.on("end", () => chain.then(() => process.exit(0)));
+
+send("OK", JSON.stringify({ version: prettier.version || "" }));
+'''
+
+
+# ============================================================================
+# DAEMON PROCESS
+# ============================================================================
+
+class FormatterDaemon:
+    """
+    Один долгоживущий процесс форматтера.
+
+    Запросы обрабатываются последовательно (под lock): форматирование одного
+    файла занимает миллисекунды, а протокол остаётся тривиальным.
+    """
+
+    def __init__(self, name: str, cmd: List[str], cwd: Optional[str] = None):
+        self.name = name
+        self.cmd = cmd
+        self.cwd = cwd
+        self.info: Dict[str, Any] = {}
+
+        self._proc: Optional[subprocess.Popen] = None
+        self._responses: "queue.Queue[Optional[Tuple[str, str]]]" = queue.Queue()
+        self._lock = threading.Lock()
+
+        self.startup_ms: float = 0.0
+        self.request_times_ms: List[float] = []
+
+        self._finalizer = weakref.finalize(self, _shutdown, None)
+        _LIVE_DAEMONS.add(self)
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def start(self) -> None:
+        """Запускает процесс и ждёт кадр готовности"""
+        if self.alive:
+            return
+
+        started = time.perf_counter()
+        try:
+            proc = subprocess.Popen(
+                self.cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                cwd=self.cwd,
+            )
+        except OSError as e:
+            raise FormatterDaemonError(f"cannot start {self.name}: {e}")
+
+        self._proc = proc
+        self._responses = queue.Queue()
+        threading.Thread(
+            target=_read_frames,
+            args=(proc, self._responses),
+            name=f"formatter-{self.name}-reader",
+            daemon=True,
+        ).start()
+        self._finalizer.detach()
+        self._finalizer = weakref.finalize(self, _shutdown, proc)
+
+        frame = self._wait_frame(STARTUP_TIMEOUT_SEC)
+        if frame is None or frame[0] != "OK":
+            self.close()
+            raise FormatterDaemonError(f"{self.name} did not become ready")
+        try:
+            self.info = json.loads(frame[1] or "{}")
+        except ValueError:
+            self.info = {}
+
+        self.startup_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"Formatter daemon '{self.name}' ready in {self.startup_ms:.0f}ms")
+
+    def request(self, payload: str, timeout: float) -> FormatResult:
+        """
+        Отправляет один запрос и ждёт ответ.
+
+        Raises:
+            FormatterDaemonError: процесс не запущен или упал во время запроса
+        """
+        with self._lock:
+            if not self.alive:
+                self.start()
+
+            proc = self._proc
+            data = payload.encode("utf-8")
+            started = time.perf_counter()
+            try:
+                proc.stdin.write(f"{len(data)}\n".encode("ascii") + data)
+                proc.stdin.flush()
+            except (BrokenPipeError, OSError) as e:
+                self.close()
+                raise FormatterDaemonError(f"write to {self.name} failed: {e}")
+
+            frame = self._wait_frame(timeout)
+            elapsed = (time.perf_counter() - started) * 1000
+            if frame is None:
+                timed_out = self.alive
+                self.close()
+                if timed_out:
+                    return FormatResult(
+                        False, error=f"{self.name} timed out", timed_out=True, elapsed_ms=elapsed
+                    )
+                raise FormatterDaemonError(f"{self.name} exited during request")
+
+            self.request_times_ms.append(elapsed)
+            status, body = frame
+            if status == "OK":
+                return FormatResult(True, output=body, elapsed_ms=elapsed)
+            return FormatResult(False, error=body, elapsed_ms=elapsed)
+
+    def close(self) -> None:
+        proc = self._proc
+        self._proc = None
+        self._finalizer.detach()
+        _shutdown(proc)
+
+    def stats(self) -> Dict[str, Any]:
+        times = self.request_times_ms
+        return {
+            "alive": self.alive,
+            "startup_ms": round(self.startup_ms, 1),
+            "requests": len(times),
+            "avg_request_ms": round(sum(times) / len(times), 1) if times else None,
+        }
+
+    def _wait_frame(self, timeout: float) -> Optional[Tuple[str, str]]:
+        try:
+            return self._responses.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+# ============================================================================
+# SERVICE
+# ============================================================================
+
+class FormatterService:
+    """
+    Реестр daemon-ов: python-воркер на интерпретатор, JVM на jar
+    google-java-format, node-процесс на установку prettier.
+
+    Daemon, который не смог стартовать, запоминается как недоступный,
+    чтобы не платить за неудачный старт на каждом вызове.
+    """
+
+    def __init__(self):
+        self._daemons: Dict[str, FormatterDaemon] = {}
+        self._unavailable: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    # ========================================================================
+    # PUBLIC API
+    # ========================================================================
+
+    def format_python(
+        self,
+        tool: str,
+        code: str,
+        python_path: Optional[str] = None,
+        timeout: float = 10,
+        **options: Any,
+    ) -> Optional[FormatResult]:
+        """
+        Форматирует Python-код black / isort / yapf / autopep8 в воркере.
+
+        Args:
+            tool: Имя форматтера из PYTHON_FORMATTERS
+            python_path: Интерпретатор проекта (None - интерпретатор агента)
+            options: line_length (black), profile (isort), style (yapf),
+                select / max_line_length (autopep8)
+
+        Returns:
+            FormatResult или None, если инструмент в воркере недоступен
+        """
+        if tool not in PYTHON_FORMATTERS:
+            return None
+        python = python_path or sys.executable
+        daemon = self._get_daemon(
+            f"python:{python}",
+            lambda: FormatterDaemon("python-formatters", [python, "-c", _PYTHON_WORKER_SOURCE]),
+        )
+        if daemon is None or tool not in daemon.info.get("tools", ()):
+            return None
+        payload = json.dumps({"tool": tool, "code": code, "options": options})
+        return self._request(daemon, payload, timeout)
+
+    def format_java(self, code: str, jar_path: Path, timeout: float = 30) -> Optional[FormatResult]:
+        """Форматирует Java-код google-java-format (с сортировкой импортов, как CLI)"""
+        jar = str(Path(jar_path).resolve())
+        daemon = self._get_daemon(f"java:{jar}", lambda: _start_gjf_daemon(jar))
+        if daemon is None:
+            return None
+        return self._request(daemon, code, timeout)
+
+    def format_prettier(self, code: str, file_path: str, timeout: float = 30) -> Optional[FormatResult]:
+        """Форматирует код prettier; конфиг ищется от file_path, как у --stdin-filepath"""
+        module_dir = _find_prettier_module()
+        if module_dir is None:
+            return None
+        daemon = self._get_daemon(
+            f"prettier:{module_dir}",
+            lambda: FormatterDaemon(
+                "prettier",
+                [shutil.which("node") or "node", "-e", _PRETTIER_DAEMON_SOURCE, module_dir],
+            ),
+        )
+        if daemon is None:
+            return None
+        payload = json.dumps({"code": code, "filepath": str(Path(file_path).absolute())})
+        return self._request(daemon, payload, timeout)
+
+    def close(self) -> None:
+        with self._lock:
+            daemons = list(self._daemons.values())
+            self._daemons.clear()
+        for daemon in daemons:
+            daemon.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "daemons": {key: d.stats() for key, d in self._daemons.items()},
+                "unavailable": dict(self._unavailable),
+            }
+
+    # ========================================================================
+    # INTERNAL
+    # ========================================================================
+
+    def _get_daemon(self, key: str, factory) -> Optional[FormatterDaemon]:
+        if not USE_FORMATTER_DAEMONS:
+            return None
+        with self._lock:
+            if key in self._unavailable:
+                return None
+            daemon = self._daemons.get(key)
+            if daemon is not None:
+                return daemon
+            try:
+                daemon = factory()
+                daemon.start()
+            except FormatterDaemonError as e:
+                logger.debug(f"Formatter daemon {key} unavailable: {e}")
+                self._unavailable[key] = str(e)
+                return None
+            self._daemons[key] = daemon
+            return daemon
+
+    def _request(self, daemon: FormatterDaemon, payload: str, timeout: float) -> Optional[FormatResult]:
+        try:
+            return daemon.request(payload, timeout)
+        except FormatterDaemonError as e:
+            # Упал посреди запроса - один перезапуск, дальше subprocess
+            logger.debug(f"Formatter daemon {daemon.name} failed: {e}, restarting")
+            try:
+                return daemon.request(payload, timeout)
+            except FormatterDaemonError:
+                return None
+
+
+# ============================================================================
+# MODULE HELPERS
+# ============================================================================
+
+_LIVE_DAEMONS: "weakref.WeakSet[FormatterDaemon]" = weakref.WeakSet()
+_service: Optional[FormatterService] = None
+_service_lock = threading.Lock()
+
+
+def get_formatter_service() -> FormatterService:
+    """Общий FormatterService процесса"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = FormatterService()
+        return _service
+
+
+def _read_frames(proc: subprocess.Popen, responses: "queue.Queue") -> None:
+    stream = proc.stdout
+    try:
+        while True:
+            header = stream.readline()
+            if not header:
+                break
+            status, _, length = header.decode("ascii", errors="replace").strip().partition(" ")
+            body = stream.read(int(length or 0))
+            responses.put((status, body.decode("utf-8", errors="replace")))
+    except Exception as e:
+        logger.debug(f"Formatter daemon reader stopped: {e}")
+    finally:
+        # Процесс завершился - разбудить ожидающего
+        responses.put(None)
+
+
+def _start_gjf_daemon(jar: str) -> FormatterDaemon:
+    """Компилирует обёртку над google-java-format (один раз) и создаёт daemon"""
+    java = shutil.which("java")
+    javac = shutil.which("javac")
+    if not java or not javac:
+        raise FormatterDaemonError("java/javac not available")
+
+    digest = hashlib.sha256((jar + _GJF_DAEMON_SOURCE).encode("utf-8")).hexdigest()[:16]
+    classes_dir = Path(tempfile.gettempdir()) / "ai_agent_formatters" / f"gjf_{digest}"
+    class_file = classes_dir / f"{_GJF_DAEMON_CLASS}.class"
+
+    if not class_file.exists():
+        classes_dir.mkdir(parents=True, exist_ok=True)
+        source_file = classes_dir / f"{_GJF_DAEMON_CLASS}.java"
+        source_file.write_text(_GJF_DAEMON_SOURCE, encoding="utf-8")
+        result = subprocess.run(
+            [javac, "-encoding", "UTF-8", "-cp", jar, "-d", str(classes_dir), str(source_file)],
+            capture_output=True,
+            text=True,
+            timeout=120,
+        )
+        if result.returncode != 0:
+            raise FormatterDaemonError(f"cannot compile formatter wrapper: {result.stderr.strip()[:500]}")
+
+    classpath = os.pathsep.join([jar, str(classes_dir)])
+    daemon = FormatterDaemon("google-java-format", [java, *_GJF_JVM_EXPORTS, "-cp", classpath, _GJF_DAEMON_CLASS])
+    try:
+        daemon.start()
+    except FormatterDaemonError:
+        # JDK 8 не знает --add-exports
+        daemon = FormatterDaemon("google-java-format", [java, "-cp", classpath, _GJF_DAEMON_CLASS])
+    return daemon
+
+
+def _find_prettier_module() -> Optional[str]:
+    """Каталог пакета prettier установленного CLI (для require в node)"""
+    prettier = shutil.which("prettier")
+    if not prettier or not shutil.which("node"):
+        return None
+    path = Path(prettier).resolve()
+    for parent in path.parents:
+        if (parent / "package.json").exists() and parent.name == "prettier":
+            return str(parent)
+    # Windows-шим или обёртка: ищем рядом node_modules/prettier
+    candidate = Path(prettier).parent / "node_modules" / "prettier"
+    if (candidate / "package.json").exists():
+        return str(candidate)
+    return None
+
+
+def _shutdown(proc: Optional[subprocess.Popen]) -> None:
+    if proc is not None and proc.poll() is None:
+        try:
+            proc.stdin.close()
+            proc.wait(timeout=5)
+        except Exception:
+            proc.kill()
+
+
+@atexit.register
+def _close_all_daemons() -> None:
+    for daemon in list(_LIVE_DAEMONS):
+        try:
+            daemon.close()
+        except Exception:
+            pass
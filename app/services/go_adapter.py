@@ -13,7 +13,7 @@ from typing import Optional, List, Dict, Tuple
 
 
 
-from app.services.language_adapter import LanguageAdapter
+from app.services.language_adapter import LanguageAdapter, write_batch_tree, split_output_by_file, lines_to_issues
 
 from typing import TYPE_CHECKING
 
@@ -518,6 +518,145 @@ class GoAdapter(LanguageAdapter):
         
         return fixed_code, issues
     
+    def lint_batch(
+        self,
+        files: List[Tuple[str, str]],
+        fix: bool = False,
+        work_dir: Optional[Path] = None,
+    ) -> Dict[str, Tuple[str, List[Dict]]]:
+        """
+        Lint several Go files with one goimports call and one go vet /
+        golangci-lint call per package directory.
+        
+        Files are written to one temp tree keeping their relative paths
+        (go vet requires named files to share a directory and package).
+        Diagnostics are mapped back to files by path.
+        
+        Returns:
+            Dict mapping file_path to (fixed_code, issues_list), same as lint()
+        """
+        if len(files) < 2 or not self._go_available:
+            return super().lint_batch(files, fix=fix, work_dir=work_dir)
+        
+        owns_dir = work_dir is None
+        root = Path(tempfile.mkdtemp(prefix='go_lint_batch_')) if owns_dir else Path(work_dir)
+        try:
+            paths = write_batch_tree(root, files)
+            fixed: Dict[str, str] = {file_path: code for code, file_path in files}
+            issues: Dict[str, List[Dict]] = {file_path: [] for _, file_path in files}
+            
+            if fix and self._goimports_available:
+                try:
+                    subprocess.run(
+                        ['goimports', '-w', *[str(p) for p in paths.values()]],
+                        capture_output=True,
+                        text=True,
+                        timeout=60,
+                        cwd=str(root),
+                    )
+                    for file_path, path in paths.items():
+                        fixed[file_path] = path.read_text(encoding='utf-8')
+                except Exception as e:
+                    logger.warning(f"goimports failed: {e}")
+            
+            # One linter run per (directory, package clause)
+            packages: Dict[Tuple[Path, str], Dict[str, Path]] = {}
+            for file_path, path in paths.items():
+                package = self._extract_package_from_code(fixed[file_path]) or ''
+                packages.setdefault((path.parent, package), {})[file_path] = path
+            
+            for (directory, _package), group in packages.items():
+                if self._golangci_lint_available:
+                    self._golangci_lint_group(directory, group, issues)
+                else:
+                    self._go_vet_group(directory, group, issues)
+            
+            return {file_path: (fixed[file_path], issues[file_path]) for _, file_path in files}
+        
+        finally:
+            if owns_dir:
+                shutil.rmtree(root, ignore_errors=True)
+    
+    def _golangci_lint_group(self, directory: Path, group: Dict[str, Path], issues: Dict[str, List[Dict]]) -> None:
+        by_name = {path.name: file_path for file_path, path in group.items()}
+        try:
+            result = subprocess.run(
+                ['golangci-lint', 'run', '--out-format=json', '--no-config', *[p.name for p in group.values()]],
+                capture_output=True,
+                text=True,
+                timeout=60,
+                cwd=str(directory),
+            )
+        except subprocess.TimeoutExpired:
+            for file_path in group:
+                issues[file_path].append({'line': None, 'column': None, 'message': 'golangci-lint timed out', 'severity': 'error'})
+            return
+        except Exception as e:
+            logger.warning(f"golangci-lint check failed: {e}")
+            for file_path in group:
+                issues[file_path].append({'line': None, 'column': None, 'message': f'golangci-lint error: {e}', 'severity': 'warning'})
+            return
+        
+        if not result.stdout.strip():
+            return
+        try:
+            lint_output = json.loads(result.stdout)
+        except json.JSONDecodeError:
+            logger.warning("Failed to parse golangci-lint JSON output")
+            stderr_lines = [l.strip() for l in result.stderr.split('\n') if l.strip()]
+            for file_path in group:
+                issues[file_path].extend(lines_to_issues(stderr_lines))
+            return
+        
+        for issue in lint_output.get('Issues') or []:
+            pos = issue.get('Pos') or {}
+            file_path = by_name.get(Path(pos.get('Filename', '')).name)
+            targets = [file_path] if file_path else list(group)
+            for target in targets:
+                issues[target].append({
+                    'line': pos.get('Line', issue.get('Line')),
+                    'column': pos.get('Column', issue.get('Column')),
+                    'message': issue.get('Text', ''),
+                    'severity': 'error',
+                })
+    
+    def _go_vet_group(self, directory: Path, group: Dict[str, Path], issues: Dict[str, List[Dict]]) -> None:
+        try:
+            result = subprocess.run(
+                ['go', 'vet', *[p.name for p in group.values()]],
+                capture_output=True,
+                text=True,
+                timeout=60,
+                cwd=str(directory),
+            )
+        except subprocess.TimeoutExpired:
+            for file_path in group:
+                issues[file_path].append({'line': None, 'column': None, 'message': 'go vet timed out', 'severity': 'error'})
+            return
+        except Exception as e:
+            logger.warning(f"go vet check failed: {e}")
+            for file_path in group:
+                issues[file_path].append({'line': None, 'column': None, 'message': f'go vet error: {e}', 'severity': 'error'})
+            return
+        
+        by_file, unmatched = split_output_by_file(
+            result.stderr,
+            {file_path: [path.name, str(path)] for file_path, path in group.items()},
+        )
+        matched_any = any(by_file.values())
+        for file_path in group:
+            # "# pkg" headers precede per-file lines; without any per-file
+            # line the failure concerns the whole package
+            file_lines = by_file[file_path] if matched_any else unmatched
+            issues[file_path].extend(lines_to_issues(file_lines))
+            if result.returncode != 0 and not file_lines and not matched_any:
+                issues[file_path].append({
+                    'line': None,
+                    'column': None,
+                    'message': f'go vet failed with exit code {result.returncode}',
+                    'severity': 'error',
+                })
+    
     
     def format_code(self, code: str, file_path: str) -> str:
         """
@@ -0,0 +1,539 @@
+# app/services/interpreter_pool.py
+"""
+Interpreter Pool - прогретые интерпретаторы проекта для runtime/import проверок.
+
+Каждая проверка RuntimeTester (`python -c <wrapper>`) платит за старт
+интерпретатора и повторный импорт тяжёлых зависимостей. Здесь один раз
+запускается "zygote" на Python проекта:
+
+- zygote импортирует общие сторонние зависимости проекта (preload);
+- на каждый тест zygote делает fork(): ребёнок получает уже импортированные
+  модули (copy-on-write), свою группу процессов, cwd, stdout/stderr в файлы
+  и выполняет скрипт как `python -c`;
+- zygote сам тестов не выполняет, поэтому каждый fork стартует с чистого
+  состояния (изоляция fork-per-test, как у multiprocessing forkserver,
+  но на интерпретаторе проекта, а не агента).
+
+run() повторяет контракт subprocess.run(capture_output=True, text=True):
+возвращает CompletedProcess и бросает subprocess.TimeoutExpired. Если пул
+недоступен (не POSIX, zygote упал), бросается InterpreterPoolError и
+вызывающая сторона запускает обычный subprocess.
+
+Пример:
+    >>> with lease_interpreter_pool(python_path, preload={"requests", "yaml"}) as pool:
+    ...     result = pool.run("import yaml; print('ok')", cwd=temp_dir, timeout=30)
+    >>> result.returncode, result.stdout
+    (0, 'ok\\n')
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import time
+import atexit
+import shutil
+import signal
+import logging
+import tempfile
+import threading
+import subprocess
+import weakref
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# Ожидание готовности zygote (включает импорт preload-модулей)
+STARTUP_TIMEOUT_SEC = 60
+
+# Модули, которые нельзя импортировать до fork: инициализация зависит от
+# переменных окружения теста (headless-драйверы) или ломается после fork
+FORK_UNSAFE_MODULES = frozenset({
+    "tkinter", "customtkinter", "turtle", "pygame", "kivy", "arcade", "pyglet",
+    "PyQt5", "PyQt6", "PySide2", "PySide6", "pyqtgraph", "wx", "matplotlib",
+    "torch", "tensorflow", "jax", "grpc", "multiprocessing", "curses",
+    "textual", "asyncpg", "psycopg2", "psycopg", "sqlalchemy",
+})
+
+
+class InterpreterPoolError(Exception):
+    """Пул недоступен - нужен обычный subprocess"""
+    pass
+
+
+# ============================================================================
+# ZYGOTE (выполняется интерпретатором проекта)
+# ============================================================================
+
+_ZYGOTE_SOURCE = r'''
+import os, sys, json, select, io, traceback, atexit, signal
+
+# Протокол идёт через копию stdout; сам fd 1 уводим в stderr, чтобы
+# print() при импорте preload-модулей не ломал протокол
+_proto = os.fdopen(os.dup(1), "w", buffering=1)
+os.dup2(2, 1)
+
+loaded = []
+for name in json.loads(sys.argv[1]):
+    try:
+        __import__(name)
+        loaded.append(name)
+    except BaseException:
+        pass
+
+BASE_PATH = list(sys.path)
+BASE_ENV = dict(os.environ)
+children = {}
+
+
+def exit_code(status):
+    if hasattr(os, "waitstatus_to_exitcode"):
+        return os.waitstatus_to_exitcode(status)
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def send(msg):
+    _proto.write(json.dumps(msg) + "\n")
+    _proto.flush()
+
+
+def run_child(req):
+    code = 1
+    try:
+        os.setpgid(0, 0)
+        signal.set_wakeup_fd(-1)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        os.close(wake_r)
+        os.close(wake_w)
+        _proto.close()
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+        os.dup2(os.open(req["stdout"], flags, 0o600), 1)
+        os.dup2(os.open(req["stderr"], flags, 0o600), 2)
+        sys.stdin = io.TextIOWrapper(io.FileIO(0, "r", closefd=False), encoding="utf-8")
+        sys.stdout = io.TextIOWrapper(io.FileIO(1, "w", closefd=False), encoding="utf-8", errors="backslashreplace")
+        sys.stderr = io.TextIOWrapper(io.FileIO(2, "w", closefd=False), encoding="utf-8", errors="backslashreplace", line_buffering=True)
+
+        os.chdir(req["cwd"])
+        env = dict(BASE_ENV)
+        env.update(req.get("env") or {})
+        os.environ.clear()
+        os.environ.update(env)
+        sys.path[:] = BASE_PATH
+        sys.argv = ["-c"]
+
+        code = 0
+        try:
+            exec(compile(req["script"], "<string>", "exec"), {"__name__": "__main__", "__builtins__": __builtins__})
+        except SystemExit as e:
+            if e.code is None:
+                code = 0
+            elif isinstance(e.code, int):
+                code = e.code
+            else:
+                print(e.code, file=sys.stderr)
+                code = 1
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        try:
+            atexit._run_exitfuncs()
+        except BaseException:
+            pass
+    finally:
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except BaseException:
+                pass
+        os._exit(code)
+
+
+def reap():
+    while children:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
+        req_id = children.pop(pid, None)
+        if req_id is not None:
+            send({"id": req_id, "returncode": exit_code(status)})
+
+
+# Завершение ребёнка будит select через wakeup fd (без опроса по таймеру)
+wake_r, wake_w = os.pipe()
+os.set_blocking(wake_w, False)
+os.set_blocking(wake_r, False)
+signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+signal.set_wakeup_fd(wake_w)
+
+send({"ready": True, "pid": os.getpid(), "preloaded": loaded})
+
+stdin_fd = sys.stdin.fileno()
+buf = b""
+while True:
+    try:
+        ready, _, _ = select.select([stdin_fd, wake_r], [], [], 1.0)
+    except InterruptedError:
+        ready = []
+    if wake_r in ready:
+        try:
+            while os.read(wake_r, 4096):
+                pass
+        except BlockingIOError:
+            pass
+    if stdin_fd in ready:
+        chunk = os.read(stdin_fd, 65536)
+        if not chunk:
+            break
+        buf += chunk
+        while b"\n" in buf:
+            line, buf = buf.split(b"\n", 1)
+            if not line.strip():
+                continue
+            req = json.loads(line)
+            _proto.flush()
+            sys.stderr.flush()
+            pid = os.fork()
+            if pid == 0:
+                run_child(req)
+            children[pid] = req["id"]
+            send({"id": req["id"], "pid": pid})
+    reap()
+'''
+
+
+# ============================================================================
+# POOL (сторона агента)
+# ============================================================================
+
+@dataclass
+class _PendingRun:
+    """Ожидание одного запуска в zygote"""
+    started: threading.Event = field(default_factory=threading.Event)
+    finished: threading.Event = field(default_factory=threading.Event)
+    pid: Optional[int] = None
+    returncode: Optional[int] = None
+
+
+class WarmInterpreterPool:
+    """
+    Zygote-процесс на Python проекта, выполняющий скрипты в fork-ах.
+
+    Потокобезопасен: run() можно вызывать из нескольких потоков
+    (параллельные runtime-тесты), каждый запуск - отдельный fork.
+    """
+
+    def __init__(self, python_path: str, preload: Iterable[str] = ()):
+        self.python_path = python_path
+        self.preload: FrozenSet[str] = frozenset(m for m in preload if m not in FORK_UNSAFE_MODULES)
+        self.preloaded: List[str] = []
+
+        self._proc: Optional[subprocess.Popen] = None
+        self._write_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._pending: Dict[int, _PendingRun] = {}
+        self._next_id = 0
+        self._ready = threading.Event()
+        self._capture_dir = tempfile.mkdtemp(prefix="ai_agent_pool_")
+
+        self.startup_ms: float = 0.0
+        self.run_times_ms: List[float] = []
+
+        # Открытые lease_interpreter_pool() и признак замены пула (под _pools_lock)
+        self._leases = 0
+        self._retired = False
+
+        self._finalizer = weakref.finalize(self, _shutdown, None, self._capture_dir)
+        _LIVE_POOLS.add(self)
+
+    # ========================================================================
+    # PUBLIC API
+    # ========================================================================
+
+    @staticmethod
+    def is_supported() -> bool:
+        return os.name == "posix" and hasattr(os, "fork")
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def start(self) -> None:
+        """Запускает zygote и ждёт импорта preload-модулей"""
+        if self.alive:
+            return
+        if not self.is_supported():
+            raise InterpreterPoolError("fork is not available on this platform")
+
+        started = time.perf_counter()
+        os.makedirs(self._capture_dir, exist_ok=True)
+        try:
+            self._proc = subprocess.Popen(
+                [self.python_path, "-c", _ZYGOTE_SOURCE, json.dumps(sorted(self.preload))],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                cwd=self._capture_dir,
+            )
+        except OSError as e:
+            raise InterpreterPoolError(f"cannot start zygote: {e}")
+
+        self._ready.clear()
+        threading.Thread(
+            target=self._read_loop,
+            args=(self._proc,),
+            name="interpreter-pool-reader",
+            daemon=True,
+        ).start()
+
+        if not self._ready.wait(STARTUP_TIMEOUT_SEC) or not self.alive:
+            self.close()
+            raise InterpreterPoolError("zygote did not become ready")
+
+        self.startup_ms = (time.perf_counter() - started) * 1000
+        self._finalizer.detach()
+        self._finalizer = weakref.finalize(self, _shutdown, self._proc, self._capture_dir)
+        logger.info(
+            f"Interpreter pool ready in {self.startup_ms:.0f}ms "
+            f"(preloaded: {', '.join(self.preloaded) or 'none'})"
+        )
+
+    def run(
+        self,
+        script: str,
+        cwd: str,
+        timeout: float,
+        env: Optional[Dict[str, str]] = None,
+    ) -> subprocess.CompletedProcess:
+        """
+        Выполняет script как `python -c script` в fork-е zygote.
+
+        Raises:
+            subprocess.TimeoutExpired: скрипт не завершился за timeout
+            InterpreterPoolError: zygote недоступен
+        """
+        if not self.alive:
+            self.start()
+
+        with self._state_lock:
+            self._next_id += 1
+            run_id = self._next_id
+            pending = _PendingRun()
+            self._pending[run_id] = pending
+
+        stdout_path = os.path.join(self._capture_dir, f"{run_id}.out")
+        stderr_path = os.path.join(self._capture_dir, f"{run_id}.err")
+        args = [self.python_path, "-c", script]
+        started = time.perf_counter()
+
+        try:
+            self._send({
+                "id": run_id,
+                "script": script,
+                "cwd": cwd,
+                "env": env,
+                "stdout": stdout_path,
+                "stderr": stderr_path,
+            })
+
+            deadline = time.monotonic() + timeout
+            if not pending.started.wait(max(0.0, min(timeout, 10.0))) or pending.pid is None:
+                raise InterpreterPoolError("zygote did not fork the test")
+
+            if not pending.finished.wait(max(0.0, deadline - time.monotonic())):
+                _kill_group(pending.pid)
+                pending.finished.wait(5)
+                stdout, stderr = _read_capture(stdout_path), _read_capture(stderr_path)
+                raise subprocess.TimeoutExpired(args, timeout, output=stdout, stderr=stderr)
+
+            if pending.returncode is None:
+                raise InterpreterPoolError("zygote exited during the test")
+
+            self.run_times_ms.append((time.perf_counter() - started) * 1000)
+            return subprocess.CompletedProcess(
+                args=args,
+                returncode=pending.returncode,
+                stdout=_read_capture(stdout_path),
+                stderr=_read_capture(stderr_path),
+            )
+        finally:
+            with self._state_lock:
+                self._pending.pop(run_id, None)
+            for path in (stdout_path, stderr_path):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+    def close(self) -> None:
+        proc = self._proc
+        self._proc = None
+        self._finalizer.detach()
+        _shutdown(proc, self._capture_dir)
+
+    def stats(self) -> Dict[str, Any]:
+        times = self.run_times_ms
+        return {
+            "alive": self.alive,
+            "preloaded": list(self.preloaded),
+            "startup_ms": round(self.startup_ms, 1),
+            "runs": len(times),
+            "avg_run_ms": round(sum(times) / len(times), 1) if times else None,
+        }
+
+    # ========================================================================
+    # INTERNAL
+    # ========================================================================
+
+    def _send(self, message: Dict[str, Any]) -> None:
+        proc = self._proc
+        if proc is None or proc.stdin is None:
+            raise InterpreterPoolError("zygote is not running")
+        data = (json.dumps(message) + "\n").encode("utf-8")
+        try:
+            with self._write_lock:
+                proc.stdin.write(data)
+                proc.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise InterpreterPoolError(f"write to zygote failed: {e}")
+
+    def _read_loop(self, proc: subprocess.Popen) -> None:
+        try:
+            for raw in proc.stdout:
+                try:
+                    message = json.loads(raw)
+                except ValueError:
+                    continue
+                if message.get("ready"):
+                    self.preloaded = message.get("preloaded", [])
+                    self._ready.set()
+                    continue
+                with self._state_lock:
+                    pending = self._pending.get(message.get("id"))
+                if pending is None:
+                    continue
+                if "pid" in message:
+                    pending.pid = message["pid"]
+                    pending.started.set()
+                elif "returncode" in message:
+                    pending.returncode = message["returncode"]
+                    pending.finished.set()
+        except Exception as e:
+            logger.debug(f"Interpreter pool reader stopped: {e}")
+        finally:
+            # Zygote завершился - разбудить всех ожидающих
+            with self._state_lock:
+                pendings = list(self._pending.values())
+            for pending in pendings:
+                pending.started.set()
+                pending.finished.set()
+
+
+# ============================================================================
+# MODULE HELPERS
+# ============================================================================
+
+_LIVE_POOLS: "weakref.WeakSet[WarmInterpreterPool]" = weakref.WeakSet()
+_pools: Dict[str, WarmInterpreterPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_interpreter_pool(python_path: str, preload: Iterable[str] = ()) -> WarmInterpreterPool:
+    """
+    Общий пул для интерпретатора python_path.
+
+    Если запрошены модули, которых нет в preload текущего пула, запускается
+    новый пул с объединённым набором. Старый пул закрывается сразу, если у
+    него нет открытых lease, иначе - после закрытия последнего; запуски,
+    идущие через lease_interpreter_pool(), замену не замечают.
+    """
+    with _pools_lock:
+        return _current_pool(python_path, preload)
+
+
+@contextmanager
+def lease_interpreter_pool(python_path: str, preload: Iterable[str] = ()) -> Iterator[WarmInterpreterPool]:
+    """
+    get_interpreter_pool() для одного или нескольких run(): пока lease
+    открыт, пул не закрывается, даже если его заменили пулом с большим
+    preload (параллельный тест добавил модули).
+    """
+    with _pools_lock:
+        pool = _current_pool(python_path, preload)
+        pool._leases += 1
+    try:
+        yield pool
+    finally:
+        with _pools_lock:
+            pool._leases -= 1
+            if pool._retired and pool._leases == 0:
+                pool.close()
+
+
+def _current_pool(python_path: str, preload: Iterable[str]) -> WarmInterpreterPool:
+    """Текущий пул python_path, покрывающий preload (вызывать под _pools_lock)"""
+    requested = frozenset(m for m in preload if m not in FORK_UNSAFE_MODULES)
+    pool = _pools.get(python_path)
+    if pool is not None and pool.alive and requested <= pool.preload:
+        return pool
+    if pool is not None:
+        requested |= pool.preload
+        pool._retired = True
+        if pool._leases == 0:
+            pool.close()
+        del _pools[python_path]
+    pool = WarmInterpreterPool(python_path, preload=requested)
+    pool.start()
+    _pools[python_path] = pool
+    return pool
+
+
+def _read_capture(path: str) -> str:
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return f.read()
+    except OSError:
+        return ""
+
+
+def _kill_group(pid: Optional[int]) -> None:
+    if pid is None:
+        return
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+    except OSError:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def _shutdown(proc: Optional[subprocess.Popen], capture_dir: Optional[str]) -> None:
+    if proc is not None and proc.poll() is None:
+        try:
+            proc.stdin.close()
+            proc.wait(timeout=5)
+        except Exception:
+            proc.kill()
+    if capture_dir:
+        shutil.rmtree(capture_dir, ignore_errors=True)
+
+
+@atexit.register
+def _close_all_pools() -> None:
+    for pool in list(_LIVE_POOLS):
+        try:
+            pool.close()
+        except Exception:
+            pass
@@ -12,7 +12,8 @@ from pathlib import Path
 from typing import Optional, List, Dict, Tuple
 
 
-from app.services.language_adapter import LanguageAdapter
+from app.services.language_adapter import LanguageAdapter, write_batch_tree, split_output_by_file, lines_to_issues
+from app.services.formatter_service import get_formatter_service
 
 from typing import TYPE_CHECKING
 
@@ -336,6 +337,138 @@ class JavaAdapter(LanguageAdapter):
         
         return fixed_code, issues
     
+    def lint_batch(
+        self,
+        files: List[Tuple[str, str]],
+        fix: bool = False,
+        work_dir: Optional[Path] = None,
+    ) -> Dict[str, Tuple[str, List[Dict]]]:
+        """
+        Lint several Java files with one JVM per tool instead of one per file.
+        
+        google-java-format, checkstyle and javac all accept many files; they
+        run once over a shared temp tree and their output is mapped back by
+        path (javac also resolves references between the batched files).
+        
+        Returns:
+            Dict mapping file_path to (fixed_code, issues_list), same as lint()
+        """
+        if len(files) < 2 or not self._java_available:
+            return super().lint_batch(files, fix=fix, work_dir=work_dir)
+        
+        owns_dir = work_dir is None
+        root = Path(tempfile.mkdtemp(prefix='java_lint_batch_')) if owns_dir else Path(work_dir)
+        try:
+            paths = write_batch_tree(root / 'src', files)
+            fixed: Dict[str, str] = {file_path: code for code, file_path in files}
+            issues: Dict[str, List[Dict]] = {file_path: [] for _, file_path in files}
+            
+            if fix and self._google_java_format_jar:
+                try:
+                    subprocess.run(
+                        ['java', '-jar', str(self._google_java_format_jar), '-i', *[str(p) for p in paths.values()]],
+                        capture_output=True,
+                        text=True,
+                        timeout=60,
+                    )
+                    for file_path, path in paths.items():
+                        fixed[file_path] = path.read_text(encoding='utf-8')
+                except Exception as e:
+                    logger.warning(f"google-java-format failed: {e}")
+            
+            if self._checkstyle_jar:
+                self._checkstyle_batch(paths, issues)
+            elif self._javac_available:
+                self._javac_batch(root, paths, issues)
+            
+            return {file_path: (fixed[file_path], issues[file_path]) for _, file_path in files}
+        
+        finally:
+            if owns_dir:
+                shutil.rmtree(root, ignore_errors=True)
+    
+    def _checkstyle_batch(self, paths: Dict[str, Path], issues: Dict[str, List[Dict]]) -> None:
+        by_path = {str(path.resolve()): file_path for file_path, path in paths.items()}
+        try:
+            result = subprocess.run(
+                ['java', '-jar', str(self._checkstyle_jar), '-f', 'xml', *[str(p) for p in paths.values()]],
+                capture_output=True,
+                text=True,
+                timeout=60,
+            )
+        except subprocess.TimeoutExpired:
+            for file_path in paths:
+                issues[file_path].append({'line': None, 'column': None, 'message': 'checkstyle timed out', 'severity': 'error'})
+            return
+        except Exception as e:
+            logger.warning(f"checkstyle check failed: {e}")
+            for file_path in paths:
+                issues[file_path].append({'line': None, 'column': None, 'message': f'checkstyle error: {e}', 'severity': 'warning'})
+            return
+        
+        if not result.stdout.strip():
+            return
+        try:
+            root = ET.fromstring(result.stdout)
+        except Exception as e:
+            logger.warning(f"Failed to parse checkstyle XML output: {e}")
+            stderr_lines = [l.strip() for l in result.stderr.split('\n') if l.strip()]
+            for file_path in paths:
+                issues[file_path].extend(lines_to_issues(stderr_lines))
+            return
+        
+        for file_elem in root.findall('file'):
+            file_path = by_path.get(str(Path(file_elem.get('name', '')).resolve()))
+            if file_path is None:
+                continue
+            for error_elem in file_elem.findall('error'):
+                issues[file_path].append({
+                    'line': int(error_elem.get('line', 0)),
+                    'column': int(error_elem.get('column', 0)),
+                    'message': error_elem.get('message', ''),
+                    'severity': 'error' if error_elem.get('severity') == 'error' else 'warning',
+                })
+    
+    def _javac_batch(self, root: Path, paths: Dict[str, Path], issues: Dict[str, List[Dict]]) -> None:
+        out_dir = root / 'classes'
+        out_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            result = subprocess.run(
+                ['javac', '-d', str(out_dir), *[str(p) for p in paths.values()]],
+                capture_output=True,
+                text=True,
+                timeout=60,
+                cwd=str(root),
+            )
+        except subprocess.TimeoutExpired:
+            for file_path in paths:
+                issues[file_path].append({'line': None, 'column': None, 'message': 'javac timed out', 'severity': 'error'})
+            return
+        except Exception as e:
+            logger.warning(f"javac check failed: {e}")
+            for file_path in paths:
+                issues[file_path].append({'line': None, 'column': None, 'message': f'javac error: {e}', 'severity': 'error'})
+            return
+        
+        by_file, unmatched = split_output_by_file(
+            result.stderr,
+            {file_path: [str(path)] for file_path, path in paths.items()},
+        )
+        # Trailing "N errors" lines are attached to the last file block;
+        # leading lines without a file (option errors) concern every file
+        for file_path in paths:
+            file_lines = [l for l in by_file[file_path] if not re.match(r'^\d+ (errors?|warnings?)$', l)]
+            issues[file_path].extend(lines_to_issues(unmatched + file_lines))
+        
+        if result.returncode != 0 and not unmatched and not any(by_file.values()):
+            for file_path in paths:
+                issues[file_path].append({
+                    'line': None,
+                    'column': None,
+                    'message': f'javac failed with exit code {result.returncode}',
+                    'severity': 'error',
+                })
+    
     def format_code(self, code: str, file_path: str) -> str:
         """
         Format code using google-java-format.
@@ -351,9 +484,17 @@ class JavaAdapter(LanguageAdapter):
             logger.warning("google-java-format not available, skipping format")
             return code
         
+        # Warm JVM (formatter_service); starting a JVM per call costs ~1s
+        served = get_formatter_service().format_java(code, self._google_java_format_jar, timeout=30)
+        if served is not None:
+            if served.success:
+                return served.output
+            logger.warning(f"google-java-format failed: {served.error}")
+            return code
+        
         try:
             result = subprocess.run(
-                ['java', '-jar', str(self._google_java_format_jar)],
+                ['java', '-jar', str(self._google_java_format_jar), '-'],
                 input=code,
                 capture_output=True,
                 text=True,
@@ -12,7 +12,8 @@ from pathlib import Path
 from typing import Optional, List, Dict, Tuple
 
 
-from app.services.language_adapter import LanguageAdapter
+from app.services.language_adapter import LanguageAdapter, write_batch_tree, split_output_by_file, lines_to_issues
+from app.services.formatter_service import get_formatter_service
 
 from typing import TYPE_CHECKING
 
@@ -444,6 +445,224 @@ class JsTsAdapter(LanguageAdapter):
         
         return fixed_code, issues
 
+    def lint_batch(
+        self,
+        files: List[Tuple[str, str]],
+        fix: bool = False,
+        work_dir: Optional[Path] = None,
+    ) -> Dict[str, Tuple[str, List[Dict]]]:
+        """
+        Lint several JS/TS files with one eslint (or tsc) process.
+        
+        Files are written to one temp tree keeping their relative paths;
+        eslint JSON results and tsc diagnostics are mapped back by path.
+        node --check only accepts a single file, so without eslint JS files
+        are checked by parallel node processes.
+        
+        Returns:
+            Dict mapping file_path to (fixed_code, issues_list), same as lint()
+        """
+        if len(files) < 2 or not self._node_available:
+            return super().lint_batch(files, fix=fix, work_dir=work_dir)
+        
+        owns_dir = work_dir is None
+        root = Path(tempfile.mkdtemp(prefix='js_lint_batch_')) if owns_dir else Path(work_dir)
+        try:
+            paths = write_batch_tree(root, files)
+            fixed: Dict[str, str] = {file_path: code for code, file_path in files}
+            issues: Dict[str, List[Dict]] = {file_path: [] for _, file_path in files}
+            
+            if not self._eslint_available:
+                for file_path in issues:
+                    issues[file_path].append({
+                        'line': None,
+                        'column': None,
+                        'message': 'ESLint not available. Install eslint for detailed linting. Basic syntax check will be performed with node --check.',
+                        'severity': 'warning',
+                    })
+            
+            # Apply fixes for the whole batch at once
+            if fix and self._eslint_available:
+                try:
+                    subprocess.run(
+                        ['eslint', '--fix', *[str(p) for p in paths.values()]],
+                        capture_output=True,
+                        text=True,
+                        timeout=60,
+                        cwd=str(root),
+                    )
+                    for file_path, path in paths.items():
+                        fixed[file_path] = path.read_text(encoding='utf-8')
+                except subprocess.TimeoutExpired:
+                    for file_path in issues:
+                        issues[file_path].append({
+                            'line': None,
+                            'column': None,
+                            'message': 'eslint --fix timed out',
+                            'severity': 'warning',
+                        })
+                except Exception as e:
+                    logger.warning(f"eslint --fix failed: {e}")
+            
+            if self._eslint_available:
+                self._eslint_batch(root, paths, issues)
+            else:
+                js_paths = {fp: p for fp, p in paths.items() if not fp.endswith(('.ts', '.tsx'))}
+                ts_paths = {fp: p for fp, p in paths.items() if fp.endswith(('.ts', '.tsx'))}
+                
+                if js_paths:
+                    self._node_check_parallel(js_paths, issues)
+                if ts_paths and self._tsc_available:
+                    self._tsc_batch(root, ts_paths, issues)
+                elif ts_paths:
+                    for file_path in ts_paths:
+                        issues[file_path].append({
+                            'line': 1,
+                            'column': 1,
+                            'message': 'TypeScript compiler (tsc) not available. Please install TypeScript to validate .ts/.tsx files.',
+                            'severity': 'error',
+                        })
+            
+            return {file_path: (fixed[file_path], issues[file_path]) for _, file_path in files}
+        
+        finally:
+            if owns_dir:
+                shutil.rmtree(root, ignore_errors=True)
+    
+    def _eslint_batch(self, root: Path, paths: Dict[str, Path], issues: Dict[str, List[Dict]]) -> None:
+        """One `eslint --format json` over all files; results mapped by filePath."""
+        by_path = {str(path.resolve()): file_path for file_path, path in paths.items()}
+        try:
+            result = subprocess.run(
+                ['eslint', '--format', 'json', *[str(p) for p in paths.values()]],
+                capture_output=True,
+                text=True,
+                timeout=60,
+                cwd=str(root),
+            )
+        except subprocess.TimeoutExpired:
+            for file_path in paths:
+                issues[file_path].append({
+                    'line': None,
+                    'column': None,
+                    'message': 'eslint timed out',
+                    'severity': 'error',
+                })
+            return
+        except Exception as e:
+            logger.warning(f"eslint check failed: {e}")
+            for file_path in paths:
+                issues[file_path].append({
+                    'line': None,
+                    'column': None,
+                    'message': f'eslint error: {e}',
+                    'severity': 'warning',
+                })
+            return
+        
+        parsed = False
+        if result.stdout.strip():
+            try:
+                for file_results in json.loads(result.stdout):
+                    file_path = by_path.get(str(Path(file_results.get('filePath', '')).resolve()))
+                    if file_path is None:
+                        continue
+                    for msg in file_results.get('messages', []):
+                        issues[file_path].append({
+                            'line': msg.get('line'),
+                            'column': msg.get('column'),
+                            'message': msg.get('message', ''),
+                            'severity': 'error' if msg.get('severity', 2) == 2 else 'warning',
+                        })
+                parsed = True
+            except (json.JSONDecodeError, AttributeError, TypeError):
+                logger.warning("Failed to parse eslint JSON output")
+        
+        # eslint failed without per-file results (config error, crash) - affects every file
+        if result.returncode != 0 and not parsed and result.stderr:
+            for file_path in paths:
+                issues[file_path].append({
+                    'line': None,
+                    'column': None,
+                    'message': f'eslint error: {result.stderr[:200]}',
+                    'severity': 'error',
+                })
+    
+    def _node_check_parallel(self, paths: Dict[str, Path], issues: Dict[str, List[Dict]]) -> None:
+        """`node --check` per file (it takes one file), run concurrently."""
+        import concurrent.futures
+        
+        def check(item):
+            file_path, path = item
+            try:
+                result = subprocess.run(
+                    ['node', '--check', str(path)],
+                    capture_output=True,
+                    text=True,
+                    timeout=30,
+                )
+            except subprocess.TimeoutExpired:
+                return file_path, [{'line': None, 'column': None, 'message': 'node --check timed out', 'severity': 'error'}]
+            except Exception as e:
+                logger.warning(f"node --check failed: {e}")
+                return file_path, [{'line': None, 'column': None, 'message': f'node --check error: {e}', 'severity': 'error'}]
+            
+            if result.returncode == 0:
+                return file_path, []
+            error_output = result.stderr or result.stdout
+            if error_output:
+                return file_path, lines_to_issues([l for l in error_output.split('\n') if l.strip()])
+            return file_path, [{
+                'line': None,
+                'column': None,
+                'message': f'node --check failed with exit code {result.returncode}',
+                'severity': 'error',
+            }]
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, len(paths))) as pool:
+            for file_path, file_issues in pool.map(check, paths.items()):
+                issues[file_path].extend(file_issues)
+    
+    def _tsc_batch(self, root: Path, paths: Dict[str, Path], issues: Dict[str, List[Dict]]) -> None:
+        """One `tsc --noEmit` over all TypeScript files; diagnostics split by file."""
+        rel = {file_path: path.relative_to(root).as_posix() for file_path, path in paths.items()}
+        try:
+            result = subprocess.run(
+                ['tsc', '--noEmit', '--skipLibCheck', *rel.values()],
+                capture_output=True,
+                text=True,
+                timeout=60,
+                cwd=str(root),
+            )
+        except subprocess.TimeoutExpired:
+            for file_path in paths:
+                issues[file_path].append({'line': None, 'column': None, 'message': 'tsc timed out', 'severity': 'error'})
+            return
+        except Exception as e:
+            logger.warning(f"tsc check failed: {e}")
+            for file_path in paths:
+                issues[file_path].append({'line': None, 'column': None, 'message': f'tsc error: {e}', 'severity': 'error'})
+            return
+        
+        if result.returncode == 0:
+            return
+        
+        error_output = result.stderr or result.stdout
+        by_file, unmatched = split_output_by_file(
+            error_output,
+            {file_path: [rel[file_path], str(path)] for file_path, path in paths.items()},
+        )
+        # Lines before any file reference are global (config/option errors)
+        for file_path in paths:
+            issues[file_path].extend(lines_to_issues(unmatched + by_file[file_path]))
+        if not unmatched and not any(by_file.values()):
+            for file_path in paths:
+                issues[file_path].append({
+                    'line': None,
+                    'column': None,
+                    'message': f'tsc failed with exit code {result.returncode}',
+                    'severity': 'error',
+                })
     
     def format_code(self, code: str, file_path: str) -> str:
         """
@@ -460,6 +679,14 @@ class JsTsAdapter(LanguageAdapter):
             logger.warning("prettier not available, skipping format")
             return code
         
+        # Warm node process with prettier loaded (formatter_service)
+        served = get_formatter_service().format_prettier(code, file_path, timeout=30)
+        if served is not None:
+            if served.success:
+                return served.output
+            logger.warning(f"prettier failed: {served.error}")
+            return code
+        
         try:
             result = subprocess.run(
                 ['prettier', '--stdin-filepath', file_path],
@@ -1,15 +1,92 @@
 from __future__ import annotations
 
+import re
 import logging
 import shutil
 import tempfile
-from pathlib import Path
+import concurrent.futures
+from pathlib import Path, PurePosixPath
 from typing import List, Dict, Any, Tuple, Optional
 from abc import ABC, abstractmethod
 
 logger = logging.getLogger(__name__)
 
 
+# ============================================================================
+# BATCH HELPERS (shared temp tree for multi-file lint runs)
+# ============================================================================
+
+def write_batch_tree(root: Path, files: List[Tuple[str, str]]) -> Dict[str, Path]:
+    """
+    Write (code, file_path) pairs under root, keeping project-relative paths
+    so tools see the same layout (and distinct files with the same name
+    don't collide).
+    
+    Returns:
+        Mapping file_path -> written path
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    written: Dict[str, Path] = {}
+    for code, file_path in files:
+        parts = [
+            part for part in PurePosixPath(file_path.replace('\\', '/')).parts
+            if part not in ('/', '', '.', '..') and not part.endswith(':')
+        ]
+        target = root.joinpath(*parts) if parts else root / Path(file_path).name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(code, encoding='utf-8')
+        written[file_path] = target
+    return written
+
+
+def split_output_by_file(output: str, markers: Dict[str, List[str]]) -> Tuple[Dict[str, List[str]], List[str]]:
+    """
+    Assign lines of a multi-file tool output to the files they refer to.
+    
+    A line belongs to a file when it contains one of the file's markers
+    (path as the tool prints it) followed by ':' or '('. Lines without a
+    marker (code excerpts, carets) continue the previous file's block.
+    
+    Args:
+        output: Combined tool output
+        markers: file_path -> path spellings the tool may print
+    
+    Returns:
+        (lines per file_path, lines that precede any file reference)
+    """
+    patterns = [
+        (file_path, re.compile(r'(?<![\w.\-])' + re.escape(marker) + r'[:(]'))
+        for file_path, spellings in markers.items()
+        # Longest spellings first so "src/a.go" wins over "a.go"
+        for marker in sorted(set(spellings), key=len, reverse=True)
+        if marker
+    ]
+    by_file: Dict[str, List[str]] = {file_path: [] for file_path in markers}
+    unmatched: List[str] = []
+    current: Optional[str] = None
+    
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        owner = next((file_path for file_path, pattern in patterns if pattern.search(line)), None)
+        if owner is not None:
+            current = owner
+        if current is None:
+            unmatched.append(line.strip())
+        else:
+            by_file[current].append(line.strip())
+    
+    return by_file, unmatched
+
+
+def lines_to_issues(lines: List[str], severity: str = 'error') -> List[Dict[str, Any]]:
+    """Tool output lines -> lint issue dicts (same shape as lint())."""
+    return [
+        {'line': None, 'column': None, 'message': line, 'severity': severity}
+        for line in lines
+    ]
+
+
 class LanguageAdapter(ABC):
     """Abstract base class for language-specific adapters."""
     
@@ -65,6 +142,28 @@ class LanguageAdapter(ABC):
         """Format code using language-specific formatter."""
         pass
 
+    def lint_batch(
+        self,
+        files: List[Tuple[str, str]],
+        fix: bool = False,
+        work_dir: Optional[Path] = None,
+    ) -> Dict[str, Tuple[str, List[Dict[str, Any]]]]:
+        """
+        Lint several files of this language in one go.
+        Default implementation lints each file separately.
+        Subclasses override it to run one tool process per batch.
+        
+        Args:
+            files: List of (code, file_path) tuples
+            fix: Whether to apply auto-fixes
+            work_dir: Directory to write the batch tree into (a temporary
+                      one is created and removed if None)
+            
+        Returns:
+            Dict mapping file_path to (fixed_content, lint_issues), same as lint()
+        """
+        return {file_path: self.lint(code, file_path, fix=fix) for code, file_path in files}
+    
     @abstractmethod
     def compile_check_with_deps(self, files: List[Tuple[str, str]], project_root: Optional[Path] = None) -> Dict[str, Any]:
         """
@@ -308,6 +407,106 @@ class AdapterManager:
             logger.error(f"Linting failed for {file_path}: {e}", exc_info=True)
             return original_code, []
     
+    def lint_files(self, files: List[Tuple[str, str]], fix: bool = False) -> Dict[str, Tuple[str, List[Dict]]]:
+        """
+        Lint many files at once.
+        
+        Files are grouped per adapter and each group is linted with one
+        lint_batch() call over a shared temp tree; groups run concurrently.
+        Per-file results follow lint_file(): empty output reverts to the
+        original, and a fix that increases the issue count is rolled back.
+        
+        Args:
+            files: List of (code, file_path) tuples
+            fix: Whether to apply auto-fixes
+            
+        Returns:
+            Dict mapping file_path to (fixed_code, issues_list)
+        """
+        results: Dict[str, Tuple[str, List[Dict]]] = {}
+        groups: Dict[int, Tuple[LanguageAdapter, List[Tuple[str, str]]]] = {}
+        
+        for code, file_path in files:
+            adapter = self.get_adapter_for_file(file_path)
+            if adapter is None:
+                language = self.get_language_for_file(file_path)
+                logger.warning(f"No adapter available for {file_path} (language: {language})")
+                results[file_path] = (code, [])
+                continue
+            groups.setdefault(id(adapter), (adapter, []))[1].append((code, file_path))
+        
+        if not groups:
+            return results
+        
+        work_dir = Path(tempfile.mkdtemp(prefix='lint_batch_'))
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=len(groups)) as pool:
+                futures = [
+                    pool.submit(self._lint_adapter_batch, adapter, group_files, fix, work_dir / f"g{index}")
+                    for index, (adapter, group_files) in enumerate(groups.values())
+                ]
+                for future in concurrent.futures.as_completed(futures):
+                    results.update(future.result())
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        
+        return results
+    
+    def _lint_adapter_batch(
+        self,
+        adapter: LanguageAdapter,
+        files: List[Tuple[str, str]],
+        fix: bool,
+        work_dir: Path,
+    ) -> Dict[str, Tuple[str, List[Dict]]]:
+        """One adapter's part of lint_files()."""
+        originals = {file_path: code for code, file_path in files}
+        language = adapter.get_language_name()
+        
+        try:
+            linted = adapter.lint_batch(files, fix=fix, work_dir=work_dir / 'check')
+        except Exception as e:
+            logger.error(f"Batch linting failed for {len(files)} {language} files: {e}", exc_info=True)
+            return {file_path: (code, []) for code, file_path in files}
+        
+        results: Dict[str, Tuple[str, List[Dict]]] = {}
+        changed: List[str] = []
+        for code, file_path in files:
+            fixed_code, issues = linted.get(file_path, (code, []))
+            if not fixed_code or not fixed_code.strip():
+                logger.warning(f"Adapter returned empty code for {file_path}, reverting to original")
+                fixed_code = code
+            results[file_path] = (fixed_code, issues)
+            if fix and fixed_code != code:
+                changed.append(file_path)
+        
+        if not changed:
+            return results
+        
+        # Rollback if code quality worsened (both versions re-checked as batches)
+        try:
+            new_lint = adapter.lint_batch(
+                [(results[fp][0], fp) for fp in changed], fix=False, work_dir=work_dir / 'fixed'
+            )
+            original_lint = adapter.lint_batch(
+                [(originals[fp], fp) for fp in changed], fix=False, work_dir=work_dir / 'original'
+            )
+        except Exception as e:
+            logger.warning(f"Re-check after {language} auto-fix failed, keeping originals: {e}")
+            return {**results, **{fp: (originals[fp], []) for fp in changed}}
+        
+        for file_path in changed:
+            new_issues = new_lint.get(file_path, ('', []))[1]
+            original_issues = original_lint.get(file_path, ('', []))[1]
+            if len(new_issues) > len(original_issues):
+                logger.warning(
+                    f"Code quality worsened after fix ({len(new_issues)} vs {len(original_issues)} issues), "
+                    f"rolling back for {file_path}"
+                )
+                results[file_path] = (originals[file_path], original_issues)
+        
+        return results
+    
     def format_file(self, code: str, file_path: str) -> str:
         """Format a file using the appropriate adapter."""
         adapter = self.get_adapter_for_file(file_path)
@@ -414,13 +613,19 @@ class AdapterManager:
         # Use provided project_root or fallback to instance default
         effective_root = project_root or self.project_root
 
+        # Different languages use different toolchains - compile them concurrently
+        # (results are still collected in the original language order)
+        compiled = self._compile_languages_concurrently(files_by_language, effective_root)
+
         for language, language_files in files_by_language.items():
             try:
                 adapter = self.get_adapter(language)
         
                 if adapter:
                     # Use multi-file compilation if available
-                    result = adapter.compile_check_with_deps(language_files, effective_root)
+                    result = compiled[language]
+                    if isinstance(result, Exception):
+                        raise result
                     all_results[language] = result
             
                     if not result.get('success', False):
@@ -452,4 +657,68 @@ class AdapterManager:
             'by_language': all_results,
             'stderr': '\n'.join(all_stderr),
             'failed_files': failed_files,
-        }
\ No newline at end of file
+        }
+
+    @staticmethod
+    def language_view(result: Optional[Dict[str, Any]], language: str) -> Optional[Dict[str, Any]]:
+        """
+        Slice of a multi-language compile_check_with_deps() result for one
+        language, in the same shape as a call with only that language's files.
+        
+        Returns:
+            Result dict, or None if the language wasn't compiled
+        """
+        lang_result = (result or {}).get('by_language', {}).get(language)
+        if lang_result is None:
+            return None
+        stderr = lang_result.get('stderr', '')
+        return {
+            'success': lang_result.get('success', False),
+            'by_language': {language: lang_result},
+            'stderr': f"[{language}]\n{stderr}" if stderr else '',
+            'failed_files': [
+                r.get('file_path', 'unknown')
+                for r in lang_result.get('results', [])
+                if not r.get('success', False)
+            ],
+        }
+
+    def _compile_languages_concurrently(
+        self,
+        files_by_language: Dict[str, List[Tuple[str, str]]],
+        project_root: Optional[Path],
+    ) -> Dict[str, Any]:
+        """
+        Run adapter.compile_check_with_deps for each language group in parallel.
+        
+        Returns:
+            language -> result dict, or the exception the adapter raised
+        """
+        jobs = {
+            language: adapter
+            for language, adapter in (
+                (language, self.get_adapter(language)) for language in files_by_language
+            )
+            if adapter is not None
+        }
+        if len(jobs) <= 1:
+            results: Dict[str, Any] = {}
+            for language, adapter in jobs.items():
+                try:
+                    results[language] = adapter.compile_check_with_deps(files_by_language[language], project_root)
+                except Exception as e:
+                    results[language] = e
+            return results
+        
+        results = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+            futures = {
+                language: pool.submit(adapter.compile_check_with_deps, files_by_language[language], project_root)
+                for language, adapter in jobs.items()
+            }
+            for language, future in futures.items():
+                try:
+                    results[language] = future.result()
+                except Exception as e:
+                    results[language] = e
+        return results
\ No newline at end of file
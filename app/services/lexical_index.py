@@ -0,0 +1,445 @@
+# app/services/lexical_index.py
+"""
+Lexical Index - BM25 по чанкам semantic index.
+
+Первый этап pre-filter: вместо того чтобы отправлять в LLM все чанки
+проекта (обрезанные по лимиту токенов почти произвольно), локально
+ранжируем чанки по запросу и отправляем только top-K кандидатов.
+
+Документ = чанк (класс/функция) с id `file_path:name`, как в pre_filter.
+Поля документа и их веса:
+- name (подтокены идентификатора) и путь файла - сильный сигнал;
+- description из semantic index;
+- код чанка.
+
+Идентификаторы разбиваются на подтокены: `parseToolCall` ->
+parse, tool, call, parsetoolcall; `pre_filter_chunks` -> pre, filter,
+chunks, pre_filter_chunks. Кириллица сохраняется (русские докстринги
+и описания).
+
+Хранение - CSR-подобные массивы NumPy (postings по термам), скоринг -
+векторный BM25 (np.add.at по postings термов запроса). Индекс строится
+вместе с semantic index и лежит в .ai-agent/lexical_index.npz; если
+сохранённый индекс устарел (digest по хешам чанков не совпал), он
+перестраивается при первом запросе.
+
+NumPy - опциональная зависимость: без неё is_available() == False и
+pre-filter работает по-старому.
+
+Пример:
+    >>> lexical = get_lexical_index(index, project_dir)
+    >>> lexical.search("where is the tool call parsed", top_k=15)
+    [('app/tools/tool_executor.py:parse_tool_call', 12.4), ...]
+"""
+
+from __future__ import annotations
+
+import re
+import json
+import hashlib
+import logging
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - зависит от окружения
+    np = None
+
+logger = logging.getLogger(__name__)
+
+
+LEXICAL_INDEX_FILENAME = "lexical_index.npz"
+LEXICAL_INDEX_VERSION = 1
+
+# Параметры BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Веса полей (умножают частоту терма в поле)
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "path": 2.0,
+    "description": 2.0,
+    "code": 1.0,
+}
+
+_WORD_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|[А-Яа-яЁё]+|\d+")
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+_STOPWORDS = frozenset("""
+a an the and or not of to in on at by for with from as is are be was were
+it its this that these those if else elif then than so do does did can
+def class return import self cls none true false null nil let var const
+function func fn new public private protected static void int str bool
+pass try except finally raise while break continue lambda yield async await
+и в во на с со по к ко из за для от до не ни но а же ли что как это
+""".split())
+
+
+def is_available() -> bool:
+    """NumPy установлен - лексический этап доступен"""
+    return np is not None
+
+
+# ============================================================================
+# TOKENIZATION
+# ============================================================================
+
+def tokenize(text: str) -> List[str]:
+    """
+    Разбивает текст на термы: слова и подтокены идентификаторов (lowercase).
+
+    Составной идентификатор даёт и части, и сам идентификатор целиком,
+    чтобы точное имя в запросе ранжировалось выше частичных совпадений.
+    """
+    terms: List[str] = []
+    for word in _WORD_RE.findall(text):
+        parts: List[str] = []
+        for piece in word.split("_"):
+            if piece:
+                parts.extend(_CAMEL_RE.findall(piece) or [piece])
+        lowered = [p.lower() for p in parts]
+        for part in lowered:
+            if len(part) > 1 and part not in _STOPWORDS:
+                terms.append(part)
+        if len(lowered) > 1:
+            whole = word.lower().strip("_")
+            if whole not in _STOPWORDS:
+                terms.append(whole)
+    return terms
+
+
+# ============================================================================
+# INDEX ENTRIES
+# ============================================================================
+
+def iter_index_entries(index: Dict[str, Any]) -> Iterator[Dict[str, str]]:
+    """
+    Чанки semantic index (обычного или сжатого) в едином виде:
+    chunk_id, file_path, name, lines, description, hash.
+    """
+    if index.get("compressed", False):
+        for kind in ("classes", "functions"):
+            for item in index.get(kind, []):
+                file_path = item.get("file", "")
+                name = item.get("name", "")
+                yield {
+                    "chunk_id": f"{file_path}:{name}",
+                    "file_path": file_path,
+                    "name": name,
+                    "lines": item.get("lines", ""),
+                    "description": item.get("description", ""),
+                    "hash": item.get("hash", ""),
+                }
+        return
+
+    for file_path, file_data in index.get("files", {}).items():
+        for kind in ("classes", "functions"):
+            for item in file_data.get(kind, []):
+                name = item.get("name", "")
+                yield {
+                    "chunk_id": f"{file_path}:{name}",
+                    "file_path": file_path,
+                    "name": name,
+                    "lines": item.get("lines", ""),
+                    "description": item.get("description", ""),
+                    "hash": item.get("content_hash", ""),
+                }
+
+
+def index_digest(index: Dict[str, Any]) -> str:
+    """Отпечаток набора чанков: меняется при изменении любого чанка"""
+    signatures = sorted(
+        f"{e['chunk_id']}|{e['lines']}|{e['hash']}|{e['description']}"
+        for e in iter_index_entries(index)
+    )
+    digest = hashlib.sha256()
+    for signature in signatures:
+        digest.update(signature.encode("utf-8", errors="replace"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+# ============================================================================
+# BM25 INDEX
+# ============================================================================
+
+class LexicalIndex:
+    """
+    BM25-индекс в CSR-раскладке.
+
+    Postings терма t: post_docs[indptr[t]:indptr[t+1]] (номера документов)
+    и post_tf[...] (взвешенная по полям частота).
+    """
+
+    def __init__(
+        self,
+        doc_ids: List[str],
+        doc_len: "np.ndarray",
+        vocab: Dict[str, int],
+        indptr: "np.ndarray",
+        post_docs: "np.ndarray",
+        post_tf: "np.ndarray",
+        digest: str = "",
+    ):
+        self.doc_ids = doc_ids
+        self.doc_len = doc_len
+        self.vocab = vocab
+        self.indptr = indptr
+        self.post_docs = post_docs
+        self.post_tf = post_tf
+        self.digest = digest
+
+        n_docs = len(doc_ids)
+        self.avg_len = float(doc_len.mean()) if n_docs else 0.0
+        df = np.diff(indptr).astype(np.float64)
+        # idf как в Lucene: всегда > 0, даже для очень частых термов
+        self.idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+
+    @property
+    def size(self) -> int:
+        return len(self.doc_ids)
+
+    @classmethod
+    def build(
+        cls,
+        documents: Iterable[Tuple[str, Dict[str, str]]],
+        digest: str = "",
+    ) -> "LexicalIndex":
+        """
+        Args:
+            documents: (doc_id, {field: text}) - поля из FIELD_WEIGHTS.
+                Повторяющиеся doc_id объединяются в один документ.
+        """
+        position: Dict[str, int] = {}
+        doc_terms: List[Counter] = []
+        for doc_id, fields in documents:
+            counts = Counter()
+            for field_name, text in fields.items():
+                weight = FIELD_WEIGHTS.get(field_name, 1.0)
+                for term in tokenize(text or ""):
+                    counts[term] += weight
+            if doc_id in position:
+                doc_terms[position[doc_id]].update(counts)
+            else:
+                position[doc_id] = len(doc_terms)
+                doc_terms.append(counts)
+
+        doc_ids = list(position)
+        vocab: Dict[str, int] = {}
+        postings: List[List[Tuple[int, float]]] = []
+        for doc_no, counts in enumerate(doc_terms):
+            for term, tf in counts.items():
+                term_id = vocab.get(term)
+                if term_id is None:
+                    term_id = vocab[term] = len(postings)
+                    postings.append([])
+                postings[term_id].append((doc_no, tf))
+
+        indptr = np.zeros(len(postings) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(p) for p in postings])
+        post_docs = np.fromiter(
+            (doc for plist in postings for doc, _ in plist), dtype=np.int32, count=int(indptr[-1])
+        )
+        post_tf = np.fromiter(
+            (tf for plist in postings for _, tf in plist), dtype=np.float32, count=int(indptr[-1])
+        )
+        doc_len = np.array([sum(c.values()) for c in doc_terms], dtype=np.float32)
+
+        return cls(doc_ids, doc_len, vocab, indptr, post_docs, post_tf, digest)
+
+    def search(self, query: str, top_k: int) -> List[Tuple[str, float]]:
+        """top_k документов по BM25 (только с положительным score)"""
+        term_ids = self._query_terms(query)
+        if not term_ids or not self.doc_ids:
+            return []
+
+        scores = np.zeros(len(self.doc_ids), dtype=np.float64)
+        norm = BM25_K1 * (1.0 - BM25_B + BM25_B * self.doc_len / max(self.avg_len, 1e-9))
+        for term_id, query_tf in term_ids.items():
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            docs = self.post_docs[start:end]
+            tf = self.post_tf[start:end]
+            contrib = self.idf[term_id] * tf * (BM25_K1 + 1.0) / (tf + norm[docs])
+            np.add.at(scores, docs, query_tf * contrib)
+
+        k = min(top_k, int(np.count_nonzero(scores)))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.doc_ids[i], float(scores[i])) for i in top]
+
+    def matched_terms(self, query: str) -> List[str]:
+        """Термы запроса, которые встречаются в индексе"""
+        return [t for t in dict.fromkeys(tokenize(query)) if t in self.vocab]
+
+    def _query_terms(self, query: str) -> Dict[int, int]:
+        counts: Dict[int, int] = {}
+        for term in tokenize(query):
+            term_id = self.vocab.get(term)
+            if term_id is not None:
+                counts[term_id] = counts.get(term_id, 0) + 1
+        return counts
+
+    # ========================================================================
+    # PERSISTENCE
+    # ========================================================================
+
+    def save(self, path: Path) -> None:
+        meta = {
+            "version": LEXICAL_INDEX_VERSION,
+            "digest": self.digest,
+            "doc_ids": self.doc_ids,
+            "terms": sorted(self.vocab, key=self.vocab.__getitem__),
+        }
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(
+                f,
+                meta=np.array(json.dumps(meta, ensure_ascii=False)),
+                doc_len=self.doc_len,
+                indptr=self.indptr,
+                post_docs=self.post_docs,
+                post_tf=self.post_tf,
+            )
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["LexicalIndex"]:
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                meta = json.loads(str(data["meta"]))
+                if meta.get("version") != LEXICAL_INDEX_VERSION:
+                    return None
+                return cls(
+                    doc_ids=meta["doc_ids"],
+                    doc_len=data["doc_len"],
+                    vocab={term: i for i, term in enumerate(meta["terms"])},
+                    indptr=data["indptr"],
+                    post_docs=data["post_docs"],
+                    post_tf=data["post_tf"],
+                    digest=meta.get("digest", ""),
+                )
+        except Exception as e:
+            logger.debug(f"Lexical index {path} not loaded: {e}")
+            return None
+
+
+# ============================================================================
+# BUILD / LOAD FOR PROJECT
+# ============================================================================
+
+_cache: Dict[str, LexicalIndex] = {}
+_cache_lock = threading.Lock()
+
+
+def build_lexical_index(index: Dict[str, Any], project_dir: str, digest: Optional[str] = None) -> LexicalIndex:
+    """
+    Строит BM25-индекс по чанкам semantic index.
+
+    Код чанков берётся из chunk store проекта; файлы, которых там нет
+    (или изменённые после его обновления), читаются с диска.
+    """
+    from app.services.chunk_store import get_chunk_store
+
+    root = Path(project_dir)
+    file_lines: Dict[str, Optional[List[str]]] = {}
+
+    def documents(reader) -> Iterator[Tuple[str, Dict[str, str]]]:
+        for entry in iter_index_entries(index):
+            file_path = entry["file_path"]
+            stored = reader.get(file_path, entry["name"], entry["lines"])
+            if stored is not None:
+                code = stored[0]
+            else:
+                if file_path not in file_lines:
+                    file_lines[file_path] = _read_lines(root / file_path)
+                lines = file_lines[file_path]
+                if lines is None:
+                    continue
+                code = _slice_lines(lines, entry["lines"])
+            yield entry["chunk_id"], {
+                "name": entry["name"],
+                "path": file_path,
+                "description": entry["description"],
+                "code": code,
+            }
+
+    with get_chunk_store(project_dir).open_reader() as reader:
+        return LexicalIndex.build(documents(reader), digest=digest or index_digest(index))
+
+
+def save_lexical_index(index: Dict[str, Any], project_dir: str) -> Optional[LexicalIndex]:
+    """
+    Строит и сохраняет лексический индекс рядом с semantic index.
+
+    Вызывается при сохранении semantic index; ошибки не прерывают индексацию.
+    """
+    if not is_available():
+        return None
+    try:
+        lexical = build_lexical_index(index, project_dir)
+        path = _index_path(project_dir)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        lexical.save(path)
+        with _cache_lock:
+            _cache[str(Path(project_dir).resolve())] = lexical
+        logger.info(f"Lexical index saved: {path} ({lexical.size} chunks, {len(lexical.vocab)} terms)")
+        return lexical
+    except Exception as e:
+        logger.warning(f"Lexical index build failed: {e}")
+        return None
+
+
+def get_lexical_index(index: Dict[str, Any], project_dir: str) -> Optional[LexicalIndex]:
+    """
+    Актуальный лексический индекс для index: из памяти, с диска или
+    перестроенный (и сохранённый), если чанки изменились.
+    """
+    if not is_available():
+        return None
+
+    key = str(Path(project_dir).resolve())
+    digest = index_digest(index)
+
+    with _cache_lock:
+        cached = _cache.get(key)
+    if cached is not None and cached.digest == digest:
+        return cached
+
+    path = _index_path(project_dir)
+    lexical = LexicalIndex.load(path) if path.exists() else None
+    if lexical is None or lexical.digest != digest:
+        lexical = build_lexical_index(index, project_dir, digest=digest)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            lexical.save(path)
+        except OSError as e:
+            logger.debug(f"Lexical index not saved: {e}")
+
+    with _cache_lock:
+        _cache[key] = lexical
+    return lexical
+
+
+def _index_path(project_dir: str) -> Path:
+    return Path(project_dir) / ".ai-agent" / LEXICAL_INDEX_FILENAME
+
+
+def _read_lines(path: Path) -> Optional[List[str]]:
+    try:
+        return path.read_text(encoding="utf-8", errors="replace").splitlines()
+    except OSError:
+        return None
+
+
+def _slice_lines(lines: List[str], lines_str: str) -> str:
+    try:
+        start, end = map(int, lines_str.split("-"))
+    except ValueError:
+        return ""
+    return "\n".join(lines[max(start - 1, 0):end])
@@ -0,0 +1,354 @@
+# app/services/mypy_backend.py
+"""
+Mypy Backend - тёплая проверка типов для уровня TYPES.
+
+Холодный запуск mypy на свежем дереве каждый раз заново анализирует всё
+замыкание импортов. Этот модуль держит на сессию проекта:
+
+- DAEMON: dmypy, запущенный на стабильном дереве (ShadowWorkspace).
+  `dmypy run` перепроверяет только изменившиеся файлы (fine-grained).
+- CACHED: обычный mypy с постоянным --cache-dir вне дерева (incremental).
+- COLD: прежний запуск mypy без сохранения состояния.
+
+Если режим недоступен (нет dmypy, демон упал, таймаут), проверка
+переходит к следующему: DAEMON -> CACHED -> COLD.
+
+Пример:
+    >>> backend = MypyBackend(mode=MypyMode.DAEMON)
+    >>> run = backend.check(workspace.root, ["app/main.py"])
+    >>> run.mode, run.warm, run.duration_ms
+    (<MypyMode.DAEMON: 'daemon'>, True, 412.0)
+    >>> backend.stats()
+"""
+
+from __future__ import annotations
+
+import os
+import time
+import atexit
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+import subprocess
+import weakref
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# Состояние (status file демона, кэш) хранится вне материализованного дерева
+STATE_ROOT = Path(tempfile.gettempdir()) / "ai_agent_mypy"
+
+# Время простоя, после которого dmypy завершится сам
+DAEMON_IDLE_TIMEOUT_SEC = 1800
+
+
+class MypyMode(Enum):
+    """Способ запуска mypy"""
+    DAEMON = "daemon"
+    CACHED = "cached"
+    COLD = "cold"
+
+
+@dataclass
+class MypyRun:
+    """Результат одного запуска проверки типов"""
+    mode: MypyMode
+    stdout: str
+    returncode: int
+    duration_ms: float
+    warm: bool  # Демон/кэш уже был прогрет на этом дереве
+    files_checked: int = 0
+    fallback_reason: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode.value,
+            "returncode": self.returncode,
+            "duration_ms": round(self.duration_ms, 1),
+            "warm": self.warm,
+            "files_checked": self.files_checked,
+            "fallback_reason": self.fallback_reason,
+        }
+
+
+class MypyBackend:
+    """
+    Долгоживущий backend проверки типов для одной сессии проекта.
+
+    Потокобезопасен: запуски сериализуются (уровень TYPES может
+    выполняться в отдельном потоке).
+    """
+
+    def __init__(
+        self,
+        mode: MypyMode = MypyMode.DAEMON,
+        strict: bool = False,
+        ignore_missing_imports: bool = True,
+        timeout: int = 120,
+    ):
+        self.mode = mode
+        self.strict = strict
+        self.ignore_missing_imports = ignore_missing_imports
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._daemon_root: Optional[str] = None
+        self._status_file: Optional[str] = None
+        self._warm_roots: set = set()
+        self._daemon_broken = False
+
+        self.runs: List[MypyRun] = []
+
+        self._finalizer = weakref.finalize(self, _stop_daemon, None)
+        _LIVE_BACKENDS.add(self)
+
+    # ========================================================================
+    # PUBLIC API
+    # ========================================================================
+
+    def check(self, root: str, files: List[str]) -> MypyRun:
+        """
+        Проверяет files (пути относительно root) в дереве root.
+
+        Raises:
+            FileNotFoundError: mypy не установлен
+            subprocess.TimeoutExpired: холодный запуск не уложился в timeout
+        """
+        with self._lock:
+            run = None
+            reason = None
+
+            if self.mode == MypyMode.DAEMON and not self._daemon_broken:
+                run, reason = self._run_daemon(root, files)
+
+            if run is None and self.mode in (MypyMode.DAEMON, MypyMode.CACHED):
+                run, cached_reason = self._run_cached(root, files)
+                reason = reason or cached_reason
+
+            if run is None:
+                run = self._run_cold(root, files)
+
+            run.fallback_reason = reason
+            run.files_checked = len(files)
+            self.runs.append(run)
+
+            logger.info(
+                f"mypy ({run.mode.value}, {'warm' if run.warm else 'cold'}): "
+                f"{len(files)} files in {run.duration_ms:.0f}ms"
+                + (f" [fallback: {reason}]" if reason else "")
+            )
+            return run
+
+    def matches(self, mode: MypyMode, strict: bool, ignore_missing_imports: bool) -> bool:
+        """Совпадают ли настройки backend с настройками уровня TYPES"""
+        return (
+            self.mode == mode
+            and self.strict == strict
+            and self.ignore_missing_imports == ignore_missing_imports
+        )
+
+    def stop(self) -> None:
+        """Останавливает демон (если запущен)"""
+        with self._lock:
+            self._stop_current_daemon()
+
+    def stats(self) -> Dict[str, Any]:
+        """Сравнение холодных и тёплых запусков за сессию"""
+        cold = [r.duration_ms for r in self.runs if not r.warm]
+        warm = [r.duration_ms for r in self.runs if r.warm]
+        return {
+            "mode": self.mode.value,
+            "runs": len(self.runs),
+            "cold_runs": len(cold),
+            "warm_runs": len(warm),
+            "cold_avg_ms": round(sum(cold) / len(cold), 1) if cold else None,
+            "warm_avg_ms": round(sum(warm) / len(warm), 1) if warm else None,
+            "last_ms": round(self.runs[-1].duration_ms, 1) if self.runs else None,
+            "fallbacks": len([r for r in self.runs if r.fallback_reason]),
+        }
+
+    # ========================================================================
+    # MODES
+    # ========================================================================
+
+    def _run_daemon(self, root: str, files: List[str]):
+        dmypy = _find_dmypy()
+        if dmypy is None:
+            self._daemon_broken = True
+            return None, "dmypy not available"
+
+        # Дерево пересобрано в другой директории - старый демон бесполезен
+        if self._daemon_root is not None and self._daemon_root != root:
+            self._stop_current_daemon()
+
+        state_dir = _state_dir(root)
+        status_file = str(state_dir / "dmypy.json")
+        warm = self._daemon_root == root and os.path.exists(status_file)
+
+        cmd = dmypy + [
+            "--status-file", status_file,
+            "run",
+            "--timeout", str(DAEMON_IDLE_TIMEOUT_SEC),
+            "--",
+            *self._flags(),
+            "--cache-dir", str(state_dir / "cache"),
+            *files,
+        ]
+
+        started = time.perf_counter()
+        try:
+            proc = _run(cmd, root, self.timeout)
+        except subprocess.TimeoutExpired:
+            self._stop_daemon_at(dmypy, status_file)
+            self._daemon_root = None
+            return None, "dmypy timed out"
+        duration = (time.perf_counter() - started) * 1000
+
+        # 0 - нет ошибок, 1 - найдены ошибки типов, 2 - сбой демона
+        if proc.returncode not in (0, 1):
+            logger.warning(f"dmypy failed (rc={proc.returncode}): {proc.stderr.strip()[:300]}")
+            self._stop_daemon_at(dmypy, status_file)
+            self._daemon_root = None
+            self._daemon_broken = True
+            return None, f"dmypy exited with {proc.returncode}"
+
+        self._daemon_root = root
+        self._status_file = status_file
+        self._finalizer.detach()
+        self._finalizer = weakref.finalize(self, _stop_daemon, (dmypy, status_file))
+
+        return MypyRun(
+            mode=MypyMode.DAEMON,
+            stdout=proc.stdout,
+            returncode=proc.returncode,
+            duration_ms=duration,
+            warm=warm,
+        ), None
+
+    def _run_cached(self, root: str, files: List[str]):
+        state_dir = _state_dir(root)
+        cache_dir = state_dir / "cache"
+        warm = root in self._warm_roots
+
+        cmd = ["mypy", *self._flags(), "--cache-dir", str(cache_dir), *files]
+
+        started = time.perf_counter()
+        try:
+            proc = _run(cmd, root, self.timeout)
+        except subprocess.TimeoutExpired:
+            return None, "cached mypy timed out"
+        duration = (time.perf_counter() - started) * 1000
+
+        if proc.returncode not in (0, 1):
+            return None, f"cached mypy exited with {proc.returncode}"
+
+        self._warm_roots.add(root)
+        return MypyRun(
+            mode=MypyMode.CACHED,
+            stdout=proc.stdout,
+            returncode=proc.returncode,
+            duration_ms=duration,
+            warm=warm,
+        ), None
+
+    def _run_cold(self, root: str, files: List[str]) -> MypyRun:
+        cmd = ["mypy", *self._flags(), *[str(Path(root) / f) for f in files]]
+        started = time.perf_counter()
+        proc = _run(cmd, root, self.timeout)
+        return MypyRun(
+            mode=MypyMode.COLD,
+            stdout=proc.stdout,
+            returncode=proc.returncode,
+            duration_ms=(time.perf_counter() - started) * 1000,
+            warm=False,
+        )
+
+    # ========================================================================
+    # HELPERS
+    # ========================================================================
+
+    def _flags(self) -> List[str]:
+        flags = ["--no-error-summary"]
+        if self.ignore_missing_imports:
+            flags.append("--ignore-missing-imports")
+        if self.strict:
+            flags.append("--strict")
+        return flags
+
+    def _stop_current_daemon(self) -> None:
+        if self._status_file is not None:
+            dmypy = _find_dmypy()
+            if dmypy is not None:
+                self._stop_daemon_at(dmypy, self._status_file)
+        self._daemon_root = None
+        self._status_file = None
+        self._finalizer.detach()
+
+    @staticmethod
+    def _stop_daemon_at(dmypy: List[str], status_file: str) -> None:
+        _stop_daemon((dmypy, status_file))
+
+
+# ============================================================================
+# MODULE HELPERS
+# ============================================================================
+
+_LIVE_BACKENDS: "weakref.WeakSet[MypyBackend]" = weakref.WeakSet()
+
+
+def _find_dmypy() -> Optional[List[str]]:
+    path = shutil.which("dmypy")
+    if path:
+        return [path]
+    return None
+
+
+def _state_dir(root: str) -> Path:
+    """Отдельная директория состояния для каждого дерева"""
+    digest = hashlib.sha1(os.path.abspath(root).encode("utf-8")).hexdigest()[:16]
+    path = STATE_ROOT / digest
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _run(cmd: List[str], cwd: str, timeout: int) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        cmd,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        timeout=timeout,
+        cwd=cwd,
+    )
+
+
+def _stop_daemon(target) -> None:
+    if not target:
+        return
+    dmypy, status_file = target
+    if not os.path.exists(status_file):
+        return
+    try:
+        subprocess.run(
+            dmypy + ["--status-file", status_file, "stop"],
+            capture_output=True,
+            timeout=10,
+        )
+    except Exception as e:
+        logger.debug(f"dmypy stop failed: {e}")
+
+
+@atexit.register
+def _stop_all_daemons() -> None:
+    for backend in list(_LIVE_BACKENDS):
+        try:
+            backend.stop()
+        except Exception:
+            pass
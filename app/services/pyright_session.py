@@ -0,0 +1,438 @@
+# app/services/pyright_session.py
+"""
+Pyright Session - долгоживущий pyright language server для структурных проверок.
+
+Каждый запуск `pyright --outputjson` заново разбирает весь проект и typeshed.
+Этот модуль держит на сессию пайплайна один процесс `pyright-langserver --stdio`
+с корнем в реальном проекте:
+
+- staged-содержимое VFS передаётся как открытые документы (didOpen/didChange),
+  поэтому материализовать дерево не нужно;
+- проверяемый файл открывается с проверяемым текстом, диагностика приходит
+  через textDocument/publishDiagnostics для нужной версии документа;
+- между вызовами пересылается только разница в наборе документов.
+
+Результат check() имеет ту же форму, что JSON `pyright --outputjson`
+(generalDiagnostics с severity/rule/message/range), поэтому разбор в
+AgentPipeline общий для обоих путей. При любой ошибке протокола вызывающая
+сторона возвращается к CLI.
+
+Пример:
+    >>> session = PyrightSession("/project")
+    >>> data = session.check("app/main.py", new_text, overlays={"app/util.py": staged})
+    >>> data["generalDiagnostics"]
+    >>> session.stats()
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import time
+import atexit
+import shutil
+import logging
+import threading
+import subprocess
+import weakref
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+from urllib.request import url2pathname
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# LSP DiagnosticSeverity -> severity в формате pyright CLI
+_SEVERITY_NAMES = {1: "error", 2: "warning", 3: "information", 4: "information"}
+
+# Ожидание ответа на initialize (первый старт включает загрузку typeshed)
+INITIALIZE_TIMEOUT_SEC = 30
+
+
+class PyrightSessionError(Exception):
+    """Language server недоступен, упал или не ответил вовремя"""
+    pass
+
+
+class PyrightSession:
+    """
+    Один процесс pyright-langserver на корень проекта.
+
+    Потокобезопасен: check() сериализуются, чтение stdout сервера идёт
+    в отдельном потоке.
+    """
+
+    def __init__(self, root: str, timeout: float = 120.0):
+        self.root = os.path.abspath(root)
+        self.timeout = timeout
+
+        self._proc: Optional[subprocess.Popen] = None
+        self._reader: Optional[threading.Thread] = None
+        self._write_lock = threading.Lock()
+        self._check_lock = threading.Lock()
+        self._cond = threading.Condition()
+
+        self._next_id = 0
+        self._responses: Dict[int, Dict[str, Any]] = {}
+        # Нормализованный путь -> (версия документа, диагностика)
+        self._diagnostics: Dict[str, Tuple[int, List[Dict[str, Any]]]] = {}
+        # Открытые документы: относительный путь -> (версия, текст)
+        self._documents: Dict[str, Tuple[int, str]] = {}
+        self._closed = False
+
+        self.check_times_ms: List[float] = []
+        self.starts = 0
+
+        self._finalizer = weakref.finalize(self, _terminate, None)
+        _LIVE_SESSIONS.add(self)
+
+    # ========================================================================
+    # PUBLIC API
+    # ========================================================================
+
+    @staticmethod
+    def is_available() -> bool:
+        return _find_langserver() is not None
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def check(
+        self,
+        rel_path: str,
+        content: str,
+        overlays: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Проверяет content как файл rel_path поверх overlays (staged-файлы).
+
+        Returns:
+            Dict в формате `pyright --outputjson` (только диагностика rel_path)
+
+        Raises:
+            PyrightSessionError: сервер недоступен, упал или не уложился в timeout
+        """
+        with self._check_lock:
+            started = time.perf_counter()
+            self._ensure_started()
+
+            desired = dict(overlays or {})
+            desired[rel_path] = content
+            self._sync_documents(desired)
+
+            version = self._documents[rel_path][0]
+            key = _normalize(os.path.join(self.root, rel_path))
+            diagnostics = self._wait_for_diagnostics(key, version)
+
+            duration = (time.perf_counter() - started) * 1000
+            self.check_times_ms.append(duration)
+            logger.info(
+                f"pyright session: {rel_path} checked in {duration:.0f}ms "
+                f"({len(self._documents)} open documents)"
+            )
+
+            errors = len([d for d in diagnostics if d["severity"] == "error"])
+            return {
+                "generalDiagnostics": diagnostics,
+                "summary": {
+                    "errorCount": errors,
+                    "warningCount": len([d for d in diagnostics if d["severity"] == "warning"]),
+                },
+            }
+
+    def close(self) -> None:
+        """Останавливает сервер (shutdown/exit, затем kill)"""
+        with self._check_lock:
+            self._closed = True
+            self._stop()
+
+    def stats(self) -> Dict[str, Any]:
+        times = self.check_times_ms
+        return {
+            "checks": len(times),
+            "starts": self.starts,
+            "first_ms": round(times[0], 1) if times else None,
+            "warm_avg_ms": round(sum(times[1:]) / (len(times) - 1), 1) if len(times) > 1 else None,
+            "open_documents": len(self._documents),
+        }
+
+    # ========================================================================
+    # LIFECYCLE
+    # ========================================================================
+
+    def _ensure_started(self) -> None:
+        if self._closed:
+            raise PyrightSessionError("session is closed")
+        if self.alive:
+            return
+        if self._proc is not None:
+            logger.warning("pyright-langserver exited, restarting")
+            self._stop()
+
+        cmd = _find_langserver()
+        if cmd is None:
+            raise PyrightSessionError("pyright-langserver not found")
+
+        try:
+            self._proc = subprocess.Popen(
+                cmd + ["--stdio"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                cwd=self.root,
+            )
+        except OSError as e:
+            self._proc = None
+            raise PyrightSessionError(f"cannot start pyright-langserver: {e}")
+
+        self.starts += 1
+        self._finalizer.detach()
+        self._finalizer = weakref.finalize(self, _terminate, self._proc)
+
+        self._reader = threading.Thread(
+            target=self._read_loop,
+            args=(self._proc,),
+            name="pyright-langserver-reader",
+            daemon=True,
+        )
+        self._reader.start()
+
+        root_uri = Path(self.root).as_uri()
+        self._request("initialize", {
+            "processId": os.getpid(),
+            "rootUri": root_uri,
+            "workspaceFolders": [{"uri": root_uri, "name": os.path.basename(self.root)}],
+            "capabilities": {
+                "textDocument": {
+                    "publishDiagnostics": {"versionSupport": True},
+                    "synchronization": {"didSave": False},
+                },
+                "workspace": {
+                    "configuration": True,
+                    "workspaceFolders": True,
+                },
+            },
+        }, timeout=INITIALIZE_TIMEOUT_SEC)
+        self._notify("initialized", {})
+
+    def _stop(self) -> None:
+        proc = self._proc
+        self._proc = None
+        self._documents.clear()
+        with self._cond:
+            self._diagnostics.clear()
+            self._responses.clear()
+        self._finalizer.detach()
+        if proc is not None:
+            _terminate(proc)
+
+    # ========================================================================
+    # DOCUMENTS
+    # ========================================================================
+
+    def _sync_documents(self, desired: Dict[str, str]) -> None:
+        """Приводит набор открытых документов к desired (только разница)"""
+        for rel_path in list(self._documents):
+            if rel_path not in desired:
+                del self._documents[rel_path]
+                self._notify("textDocument/didClose", {
+                    "textDocument": {"uri": self._uri(rel_path)},
+                })
+
+        for rel_path, text in desired.items():
+            current = self._documents.get(rel_path)
+            if current is None:
+                self._documents[rel_path] = (1, text)
+                self._notify("textDocument/didOpen", {
+                    "textDocument": {
+                        "uri": self._uri(rel_path),
+                        "languageId": "python",
+                        "version": 1,
+                        "text": text,
+                    },
+                })
+            elif current[1] != text:
+                version = current[0] + 1
+                self._documents[rel_path] = (version, text)
+                self._notify("textDocument/didChange", {
+                    "textDocument": {"uri": self._uri(rel_path), "version": version},
+                    "contentChanges": [{"text": text}],
+                })
+
+    def _wait_for_diagnostics(self, key: str, version: int) -> List[Dict[str, Any]]:
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                entry = self._diagnostics.get(key)
+                if entry is not None and entry[0] >= version:
+                    return [_to_cli_diagnostic(d, key) for d in entry[1]]
+                if not self.alive:
+                    raise PyrightSessionError("pyright-langserver exited during check")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PyrightSessionError(f"no diagnostics within {self.timeout}s")
+                self._cond.wait(min(remaining, 1.0))
+
+    def _uri(self, rel_path: str) -> str:
+        return Path(self.root, rel_path).as_uri()
+
+    # ========================================================================
+    # JSON-RPC
+    # ========================================================================
+
+    def _request(self, method: str, params: Any, timeout: Optional[float] = None) -> Any:
+        with self._cond:
+            self._next_id += 1
+            request_id = self._next_id
+        self._send({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+
+        deadline = time.monotonic() + (timeout or self.timeout)
+        with self._cond:
+            while request_id not in self._responses:
+                if not self.alive:
+                    raise PyrightSessionError(f"pyright-langserver exited during {method}")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PyrightSessionError(f"{method} timed out")
+                self._cond.wait(min(remaining, 1.0))
+            response = self._responses.pop(request_id)
+
+        if "error" in response:
+            raise PyrightSessionError(f"{method} failed: {response['error']}")
+        return response.get("result")
+
+    def _notify(self, method: str, params: Any) -> None:
+        self._send({"jsonrpc": "2.0", "method": method, "params": params})
+
+    def _send(self, message: Dict[str, Any]) -> None:
+        proc = self._proc
+        if proc is None or proc.stdin is None:
+            raise PyrightSessionError("pyright-langserver is not running")
+        body = json.dumps(message, ensure_ascii=False).encode("utf-8")
+        header = f"Content-Length: {len(body)}\r\n\r\n".encode("ascii")
+        try:
+            with self._write_lock:
+                proc.stdin.write(header + body)
+                proc.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise PyrightSessionError(f"write to pyright-langserver failed: {e}")
+
+    def _read_loop(self, proc: subprocess.Popen) -> None:
+        stream = proc.stdout
+        try:
+            while True:
+                length = None
+                while True:
+                    line = stream.readline()
+                    if not line:
+                        return
+                    line = line.strip()
+                    if not line:
+                        break
+                    name, _, value = line.partition(b":")
+                    if name.strip().lower() == b"content-length":
+                        length = int(value.strip())
+                if length is None:
+                    continue
+                message = json.loads(stream.read(length).decode("utf-8", errors="replace"))
+                self._dispatch(message)
+        except Exception as e:
+            logger.debug(f"pyright-langserver reader stopped: {e}")
+        finally:
+            with self._cond:
+                self._cond.notify_all()
+
+    def _dispatch(self, message: Dict[str, Any]) -> None:
+        method = message.get("method")
+
+        # Запрос сервера к клиенту - отвечаем минимально
+        if method is not None and "id" in message:
+            result: Any = None
+            if method == "workspace/configuration":
+                items = (message.get("params") or {}).get("items", [])
+                result = [None] * len(items)
+            try:
+                self._send({"jsonrpc": "2.0", "id": message["id"], "result": result})
+            except PyrightSessionError:
+                pass
+            return
+
+        if method == "textDocument/publishDiagnostics":
+            params = message.get("params") or {}
+            key = _normalize(_uri_to_path(params.get("uri", "")))
+            version = params.get("version")
+            if version is None:
+                # Сервер без versionSupport: считаем, что это текущая версия
+                rel_path = os.path.relpath(key, _normalize(self.root)).replace("\\", "/")
+                version = self._documents.get(rel_path, (0, ""))[0]
+            with self._cond:
+                self._diagnostics[key] = (version, params.get("diagnostics", []))
+                self._cond.notify_all()
+            return
+
+        if method is None and "id" in message:
+            with self._cond:
+                self._responses[message["id"]] = message
+                self._cond.notify_all()
+
+
+# ============================================================================
+# MODULE HELPERS
+# ============================================================================
+
+_LIVE_SESSIONS: "weakref.WeakSet[PyrightSession]" = weakref.WeakSet()
+
+
+def _find_langserver() -> Optional[List[str]]:
+    path = shutil.which("pyright-langserver")
+    if path:
+        return [path]
+    return None
+
+
+def _normalize(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _uri_to_path(uri: str) -> str:
+    parsed = urlparse(uri)
+    return url2pathname(unquote(parsed.path))
+
+
+def _to_cli_diagnostic(diag: Dict[str, Any], file_path: str) -> Dict[str, Any]:
+    """LSP Diagnostic -> элемент generalDiagnostics pyright CLI"""
+    code = diag.get("code")
+    return {
+        "file": file_path,
+        "severity": _SEVERITY_NAMES.get(diag.get("severity", 1), "error"),
+        "message": diag.get("message", ""),
+        "rule": code if isinstance(code, str) else None,
+        "range": diag.get("range", {}),
+    }
+
+
+def _terminate(proc: Optional[subprocess.Popen]) -> None:
+    if proc is None or proc.poll() is not None:
+        return
+    try:
+        for message in (
+            {"jsonrpc": "2.0", "id": 0, "method": "shutdown", "params": None},
+            {"jsonrpc": "2.0", "method": "exit", "params": None},
+        ):
+            body = json.dumps(message).encode("utf-8")
+            proc.stdin.write(f"Content-Length: {len(body)}\r\n\r\n".encode("ascii") + body)
+        proc.stdin.flush()
+        proc.wait(timeout=5)
+    except Exception:
+        proc.kill()
+
+
+@atexit.register
+def _close_all_sessions() -> None:
+    for session in list(_LIVE_SESSIONS):
+        try:
+            session.close()
+        except Exception:
+            pass
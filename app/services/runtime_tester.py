@@ -38,6 +38,13 @@ from collections import defaultdict
 from typing import Pattern
 from enum import Enum
 from app.services.language_adapter import AdapterManager
+from app.services.environment_inventory import get_environment_inventory
+from app.services.ast_cache import parse_python
+from app.services.interpreter_pool import (
+    WarmInterpreterPool,
+    InterpreterPoolError,
+    lease_interpreter_pool,
+)
 
 
 FRAMEWORK_REGISTRY_PATH = "config/framework_registry.json"
@@ -246,6 +253,15 @@ class RuntimeTestSummary:
     results: List[TestResult] = field(default_factory=list)
     analysis: Optional[ProjectAnalysis] = None
     total_duration_ms: float = 0.0
+    # Parallel scheduling stats (run_all_tests)
+    max_parallel: int = 1           # Configured worker slots
+    peak_parallel: int = 0          # Max tests actually running at once
+    sum_test_duration_ms: float = 0.0  # Sum of per-file wall times
+    
+    @property
+    def time_saved_ms(self) -> float:
+        """Wall time saved versus running the same tests one after another."""
+        return max(0.0, self.sum_test_duration_ms - self.total_duration_ms)
     
     def add_result(self, result: TestResult):
         self.results.append(result)
@@ -279,6 +295,12 @@ class RuntimeTestSummary:
             "results": [r.to_dict() for r in self.results],
             "analysis": self.analysis.to_dict() if self.analysis else None,
             "total_duration_ms": self.total_duration_ms,
+            "parallelism": {
+                "max_parallel": self.max_parallel,
+                "peak_parallel": self.peak_parallel,
+                "sum_test_duration_ms": round(self.sum_test_duration_ms, 1),
+                "time_saved_ms": round(self.time_saved_ms, 1),
+            },
         }
 
 
@@ -346,6 +368,32 @@ class TimeoutCalculator:
     def get_timeout_for_type(cls, app_type: AppType) -> int:
         """Get timeout for specific app type."""
         return cls.PER_FILE_TIMEOUTS.get(app_type, 60)
+    
+    @classmethod
+    def estimate_cost(cls, app_type: AppType, history_key: Optional[Tuple[str, str, str]] = None) -> float:
+        """
+        Estimated run time (seconds) of one file test, used for scheduling order.
+        
+        Uses the historical duration of this file/type when known; otherwise a
+        fraction of the type's timeout (timeouts are upper bounds, most tests
+        finish well before them).
+        """
+        if history_key is not None and history_key in _TEST_DURATION_HISTORY:
+            return _TEST_DURATION_HISTORY[history_key]
+        return cls.get_timeout_for_type(app_type) * 0.25
+    
+    @staticmethod
+    def record_duration(history_key: Tuple[str, str, str], duration_s: float) -> None:
+        """Update the historical duration (exponential moving average)."""
+        previous = _TEST_DURATION_HISTORY.get(history_key)
+        if previous is None:
+            _TEST_DURATION_HISTORY[history_key] = duration_s
+        else:
+            _TEST_DURATION_HISTORY[history_key] = 0.5 * previous + 0.5 * duration_s
+
+
+# (project_root, file_path, app_type) -> seconds; lives for the process
+_TEST_DURATION_HISTORY: Dict[Tuple[str, str, str], float] = {}
 
 
 
@@ -369,6 +417,7 @@ class FrameworkDetector:
         self.project_root = project_root
         self.source_roots = source_roots if source_roots is not None else ['']
         self._stdlib_modules: Optional[Set[str]] = None
+        self._third_party_modules: Optional[Set[str]] = None
     
     
     
@@ -619,12 +668,12 @@ class FrameworkDetector:
         """
         local_imports: Set[str] = set()
         
-        # Get stdlib modules
+        # Get stdlib and installed third-party modules
         stdlib = self._get_stdlib_modules()
+        third_party = self._get_third_party_modules()
         
-        try:
-            tree = ast.parse(content)
-        except SyntaxError:
+        tree = parse_python(content).tree
+        if tree is None:
             return local_imports
         
         # Calculate context directory for relative imports
@@ -641,7 +690,7 @@ class FrameworkDetector:
                 if isinstance(node, ast.Import):
                     for alias in node.names:
                         base_module = alias.name.split('.')[0].lower()
-                        if base_module not in stdlib and base_module not in self.import_to_framework:
+                        if base_module not in stdlib and base_module not in self.import_to_framework and base_module not in third_party:
                             local_imports.add(alias.name)
                 
                 elif isinstance(node, ast.ImportFrom):
@@ -678,7 +727,7 @@ class FrameworkDetector:
                         # Absolute import
                         if node.module:
                             base_module = node.module.split('.')[0].lower()
-                            if base_module not in stdlib and base_module not in self.import_to_framework:
+                            if base_module not in stdlib and base_module not in self.import_to_framework and base_module not in third_party:
                                 local_imports.add(node.module)
                                 # Add module.alias combinations to find submodules
                                 for alias in node.names:
@@ -701,7 +750,7 @@ class FrameworkDetector:
                     
                     if module_name:
                         base_module = module_name.split('.')[0].lower()
-                        if base_module not in stdlib and base_module not in self.import_to_framework:
+                        if base_module not in stdlib and base_module not in self.import_to_framework and base_module not in third_party:
                             local_imports.add(module_name)
         except Exception:
             pass
@@ -768,6 +817,63 @@ class FrameworkDetector:
         return None
     
     
+    def _get_third_party_modules(self) -> Set[str]:
+        """
+        Get top-level modules of packages installed in the project environment (cached).
+        
+        Uses the shared dist-info inventory (no pip subprocess). Names that
+        also exist in the project's source roots (e.g. an editable install of
+        the project itself) or are staged in the VFS stay local.
+        """
+        if self._third_party_modules is None:
+            self._third_party_modules = self._load_third_party_modules()
+        # Staged files change between calls, so they are not part of the cache
+        return self._third_party_modules - self._staged_top_level_names()
+    
+    def _load_third_party_modules(self) -> Set[str]:
+        """Installed top-level modules minus names present in the source roots on disk."""
+        modules: Set[str] = set()
+        try:
+            python_path = self.vfs.get_project_python() if self.vfs is not None else None
+            modules = {name.lower() for name in get_environment_inventory(python_path).import_names()}
+        except Exception as e:
+            self.logger.debug(f"Environment inventory unavailable: {e}")
+        
+        root = self.project_root or (self.vfs.project_root if self.vfs is not None else None)
+        if root is not None and modules:
+            for source_root in self.source_roots:
+                try:
+                    entries = list((Path(root) / source_root).iterdir())
+                except OSError:
+                    continue
+                modules -= {(p.stem if p.suffix == '.py' else p.name).lower() for p in entries}
+        
+        return modules
+    
+    def _staged_top_level_names(self) -> Set[str]:
+        """Top-level module/package names of files staged in the VFS (per source root)."""
+        if self.vfs is None:
+            return set()
+        names: Set[str] = set()
+        for staged_path in self.vfs.get_staged_files():
+            path = staged_path.replace('\\', '/')
+            for source_root in self.source_roots:
+                prefix = source_root.strip('/')
+                if prefix:
+                    if not path.startswith(prefix + '/'):
+                        continue
+                    relative = path[len(prefix) + 1:]
+                else:
+                    relative = path
+                top = relative.split('/', 1)[0]
+                if '/' not in relative:
+                    if not top.endswith('.py'):
+                        continue
+                    top = top[:-3]
+                if top:
+                    names.add(top.lower())
+        return names
+    
     def _get_stdlib_modules(self) -> Set[str]:
         """Get a set of Python standard library module names (cached)."""
         if self._stdlib_modules is not None:
@@ -817,14 +923,11 @@ class FrameworkDetector:
         """
         imports = set()
         
-        try:
-            tree = ast.parse(content)
-        except SyntaxError:
-            self.logger.debug("AST parsing failed, falling back to string detection")
-            return imports
-        except Exception as e:
-            self.logger.debug(f"AST parsing error: {e}")
+        parsed = parse_python(content)
+        if parsed.tree is None:
+            self.logger.debug(f"AST parsing failed ({parsed.error}), falling back to string detection")
             return imports
+        tree = parsed.tree
         
         try:
             for node in ast.walk(tree):
@@ -945,8 +1048,8 @@ class FrameworkDetector:
         
         # Check for top-level infinite loop
         try:
-            tree = ast.parse(content)
-            for node in tree.body:
+            tree = parse_python(content).tree
+            for node in (tree.body if tree is not None else ()):
                 if isinstance(node, ast.While):
                     if isinstance(node.test, ast.Constant) and node.test.value is True:
                         daemon_weights['infinite_loop'] = daemon_weights.get('infinite_loop', 0) + 0.8
@@ -1030,6 +1133,13 @@ class RuntimeTester:
     - Web: skip with INFO
     """
     
+    # Concurrent file tests in run_all_tests (further bounded by CPU count)
+    MAX_PARALLEL_TESTS = 4
+    
+    # Run standard/import-only/utility checks in forks of a pre-warmed
+    # interpreter (see interpreter_pool); other strategies use subprocess
+    USE_INTERPRETER_POOL = True
+    
     def __init__(self, vfs: 'VirtualFileSystem'):
         """
         Initialize RuntimeTester.
@@ -1040,6 +1150,8 @@ class RuntimeTester:
         self.vfs = vfs
         self._network_available = None
         self._project_python: Optional[str] = None
+        self._pool_preload: Set[str] = set()
+        self._pool_disabled = not (self.USE_INTERPRETER_POOL and WarmInterpreterPool.is_supported())
         self.token_counter = TokenCounter()
         self._framework_registry: Dict[str, Dict[str, str]] = {}
         self._framework_patterns: Dict[str, Tuple[AppType, str]] = {}
@@ -1231,71 +1343,17 @@ class RuntimeTester:
         Returns:
             Set of imported module names (e.g., {'os', 'sys', 'tkinter'})
         """
-        imports = set()
-        
-        try:
-            tree = ast.parse(content)
-        except SyntaxError:
-            logger.debug("AST parsing failed for file, falling back to string detection")
-            return imports
-        except Exception as e:
-            logger.debug(f"AST parsing error: {e}, falling back to string detection")
-            return imports
+        parsed = parse_python(content)
+        if parsed.tree is None:
+            logger.debug(f"AST parsing failed ({parsed.error}), falling back to string detection")
+            return set()
         
-        try:
-            for node in ast.walk(tree):
-                if isinstance(node, ast.Import):
-                    # Handle: import module, import module as alias
-                    for alias in node.names:
-                        if alias.name:
-                            # Take first part of dotted import
-                            base_module = alias.name.split('.')[0].lower()
-                            if base_module:
-                                imports.add(base_module)
-                
-                elif isinstance(node, ast.ImportFrom):
-                    # Handle: from module import name
-                    if node.module:
-                        base_module = node.module.split('.')[0].lower()
-                        if base_module:
-                            imports.add(base_module)
-        except Exception as e:
-            logger.debug(f"Error walking AST: {e}")
-            return imports
-        
-        return imports
+        # Импорты считаются один раз на содержимое (общий кэш разбора)
+        return set(parsed.imported_modules)
     
     def _has_top_level_loop(self, content: str) -> bool:
         """Check if file contains a top-level infinite loop (module level or in main block)."""
-        try:
-            tree = ast.parse(content)
-        except Exception:
-            return False
-        
-        # Check top-level nodes
-        for node in tree.body:
-            # Check for while True at module level
-            if isinstance(node, ast.While):
-                # Check if test is constant True
-                if isinstance(node.test, ast.Constant) and node.test.value is True:
-                    return True
-                # Support ast.NameConstant for older Python versions
-                elif isinstance(node.test, ast.NameConstant) and node.test.value is True:
-                    return True
-            
-            # Check for if __name__ == "__main__" block
-            elif isinstance(node, ast.If):
-                # Iterate through body of if statement
-                for body_node in node.body:
-                    if isinstance(body_node, ast.While):
-                        # Check if test is constant True
-                        if isinstance(body_node.test, ast.Constant) and body_node.test.value is True:
-                            return True
-                        # Support ast.NameConstant for older Python versions
-                        elif isinstance(body_node.test, ast.NameConstant) and body_node.test.value is True:
-                            return True
-        
-        return False
+        return parse_python(content).has_top_level_loop
     
     
     
@@ -1312,6 +1370,67 @@ class RuntimeTester:
         return self._project_python
     
     
+    # ========================================================================
+    # WARM INTERPRETER POOL
+    # ========================================================================
+    
+    def _prepare_interpreter_pool(self, py_files: List[str]) -> None:
+        """
+        Collect third-party modules imported by the tested files as preload
+        candidates for the interpreter pool (project modules are never
+        preloaded - they change between validations).
+        """
+        if self._pool_disabled or not py_files:
+            return
+        
+        imported: Set[str] = set()
+        for file_path in py_files:
+            try:
+                content = self.vfs.read_file(file_path)
+            except Exception:
+                content = None
+            if content:
+                imported |= self._extract_imports_ast(content)
+        
+        third_party = self.framework_detector._get_third_party_modules()
+        wanted = {name for name in imported if name in third_party}
+        if not wanted:
+            return
+        
+        try:
+            # Import names are case-sensitive (PIL, yaml) - take them from the inventory
+            inventory = get_environment_inventory(self._get_project_python())
+            self._pool_preload |= {name for name in inventory.import_names() if name.lower() in wanted}
+        except Exception as e:
+            logger.debug(f"Could not resolve preload modules: {e}")
+    
+    def _run_python_script(self, script: str, cwd: str, timeout: float) -> subprocess.CompletedProcess:
+        """
+        Run `python -c script` in the project interpreter.
+        
+        Uses a fork of the pre-warmed interpreter pool when possible and falls
+        back to a fresh subprocess if the pool is unavailable. Same contract as
+        subprocess.run(capture_output=True, text=True): raises
+        subprocess.TimeoutExpired on timeout.
+        """
+        if not self._pool_disabled:
+            try:
+                with lease_interpreter_pool(self._get_project_python(), self._pool_preload) as pool:
+                    return pool.run(script, cwd=cwd, timeout=timeout)
+            except InterpreterPoolError as e:
+                logger.warning(f"Interpreter pool unavailable, using subprocess: {e}")
+                self._pool_disabled = True
+        
+        return subprocess.run(
+            [self._get_project_python(), '-c', script],
+            capture_output=True,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            timeout=timeout,
+            cwd=cwd,
+        )
+    
     def _setup_test_environment(self, file_path: str, temp_dir: str) -> Tuple[Dict[str, str], List[str]]:
         """
         Подготавливает окружение для тестирования файла.
@@ -1662,18 +1781,25 @@ except Exception as e:
         temp_dir: str,
         total_timeout: int,
         analysis: Optional[ProjectAnalysis] = None,
+        max_parallel: Optional[int] = None,
     ) -> RuntimeTestSummary:
         """
         Run tests for all files with appropriate strategies.
         
+        Files are independent subprocess tests against the read-only
+        materialized dir, so up to `max_parallel` of them run at once.
+        Expensive files (by historical duration, else by type timeout) start
+        first, and each file gets a fair share of the remaining budget.
+        
         Args:
             files: List of file paths to test
             temp_dir: Materialized VFS directory
-            total_timeout: Total timeout budget
+            total_timeout: Total timeout budget (wall clock)
             analysis: Pre-computed analysis (optional)
+            max_parallel: Concurrent tests (default: MAX_PARALLEL_TESTS bounded by CPUs)
             
         Returns:
-            RuntimeTestSummary with all results
+            RuntimeTestSummary with all results (in input order)
         """
         import time
         start_time = time.time()
@@ -1687,8 +1813,10 @@ except Exception as e:
         
         # Define supported non-Python extensions
         non_python_extensions = {'.js', '.jsx', '.mjs', '.ts', '.tsx', '.go', '.java'}
+        project_root = str(getattr(self.vfs, 'project_root', ''))
         
-        # Group files by type
+        # Build jobs: (file_path, app_type, is_non_python, estimated_cost)
+        jobs: List[Tuple[str, AppType, bool, float]] = []
         for file_path in files:
             # Determine file type
             file_ext = Path(file_path).suffix.lower()
@@ -1699,69 +1827,120 @@ except Exception as e:
             if not is_python and not is_non_python:
                 continue
             
-            # Check if we've exceeded total timeout
-            elapsed = time.time() - start_time
-            if elapsed > total_timeout:
-                app_type = AppType.NON_PYTHON if is_non_python else AppType.STANDARD
-                summary.add_result(TestResult(
-                    file_path=file_path,
-                    app_type=app_type,
-                    status=TestStatus.SKIPPED,
-                    message=f"Skipped: total timeout budget ({total_timeout}s) exceeded",
-                ))
-                continue
-            
-            # Handle non-Python files
             if is_non_python:
-                file_timeout = TimeoutCalculator.get_timeout_for_type(AppType.NON_PYTHON)
+                app_type = AppType.NON_PYTHON
+            else:
+                # Determine app type (with transitive detection)
+                app_type = self._detect_transitive_frameworks(file_path, analysis)
+            
+            cost = TimeoutCalculator.estimate_cost(app_type, (project_root, file_path, app_type.value))
+            jobs.append((file_path, app_type, is_non_python, cost))
+        
+        self._prepare_interpreter_pool([job[0] for job in jobs if not job[2]])
+        
+        if max_parallel is None:
+            # Tests mostly wait on child processes - at least two slots even on one CPU
+            max_parallel = min(self.MAX_PARALLEL_TESTS, max(2, os.cpu_count() or 2))
+        max_parallel = max(1, min(max_parallel, len(jobs) or 1))
+        summary.max_parallel = max_parallel
+        
+        # Longest first: a long test started last would stretch the whole run
+        schedule = sorted(jobs, key=lambda job: job[3], reverse=True)
+        
+        results: Dict[str, TestResult] = {}
+        semaphore = asyncio.Semaphore(max_parallel)
+        pending = len(schedule)
+        running = 0
+        
+        async def run_job(job: Tuple[str, AppType, bool, float]) -> None:
+            nonlocal pending, running
+            file_path, app_type, is_non_python, _cost = job
+            
+            async with semaphore:
+                pending -= 1
+                elapsed = time.time() - start_time
                 remaining = total_timeout - elapsed
-                actual_timeout = min(file_timeout, int(remaining))
+                min_timeout = 5 if is_non_python else 10
                 
-                if actual_timeout < 5:  # Less than 5 seconds left
-                    summary.add_result(TestResult(
+                # Check if we've exceeded total timeout
+                if elapsed > total_timeout:
+                    results[file_path] = TestResult(
                         file_path=file_path,
-                        app_type=AppType.NON_PYTHON,
+                        app_type=app_type,
+                        status=TestStatus.SKIPPED,
+                        message=f"Skipped: total timeout budget ({total_timeout}s) exceeded",
+                    )
+                    return
+                
+                # Fair share: the slots' remaining time split over this file
+                # and the files still waiting for a slot
+                fair_share = remaining * max_parallel / (pending + 1)
+                file_timeout = TimeoutCalculator.get_timeout_for_type(app_type)
+                actual_timeout = min(file_timeout, int(remaining), max(int(fair_share), min_timeout))
+                
+                if actual_timeout < min_timeout:  # Not enough time left
+                    results[file_path] = TestResult(
+                        file_path=file_path,
+                        app_type=app_type,
                         status=TestStatus.SKIPPED,
                         message="Skipped: insufficient time remaining",
-                    ))
-                    continue
+                    )
+                    return
                 
-                result = await self._test_non_python_file(file_path, temp_dir, actual_timeout)
-                summary.add_result(result)
-                continue
-            
-            # Handle Python files (existing logic)
-            # Determine app type (with transitive detection)
-            app_type = self._detect_transitive_frameworks(file_path, analysis)
-            
-            # Get appropriate timeout for this file type
-            file_timeout = TimeoutCalculator.get_timeout_for_type(app_type)
-            remaining = total_timeout - elapsed
-            actual_timeout = min(file_timeout, int(remaining))
-            
-            if actual_timeout < 10:  # Less than 10 seconds left
-                summary.add_result(TestResult(
-                    file_path=file_path,
-                    app_type=app_type,
-                    status=TestStatus.SKIPPED,
-                    message="Skipped: insufficient time remaining",
-                ))
-                continue
-            
-            # Run appropriate test
-            result = await self._test_file(file_path, temp_dir, app_type, actual_timeout)
-            summary.add_result(result)
+                running += 1
+                summary.peak_parallel = max(summary.peak_parallel, running)
+                job_start = time.time()
+                try:
+                    if max_parallel == 1:
+                        result = await self._run_single_test(file_path, temp_dir, app_type, is_non_python, actual_timeout)
+                    else:
+                        # Tests call blocking subprocess.run - give each its own thread and loop
+                        result = await asyncio.to_thread(
+                            asyncio.run,
+                            self._run_single_test(file_path, temp_dir, app_type, is_non_python, actual_timeout),
+                        )
+                finally:
+                    running -= 1
+                
+                duration = time.time() - job_start
+                summary.sum_test_duration_ms += duration * 1000
+                if not result.duration_ms:
+                    result.duration_ms = duration * 1000
+                if result.status != TestStatus.SKIPPED:
+                    TimeoutCalculator.record_duration((project_root, file_path, app_type.value), duration)
+                results[file_path] = result
+        
+        await asyncio.gather(*(run_job(job) for job in schedule))
+        
+        # Report in input order
+        for file_path, _app_type, _is_non_python, _cost in jobs:
+            summary.add_result(results[file_path])
         
         summary.total_duration_ms = (time.time() - start_time) * 1000
         
         logger.info(
             f"Runtime tests complete: {summary.passed}/{summary.total_files} passed, "
             f"{summary.failed} failed, {summary.skipped} skipped, "
-            f"{summary.total_duration_ms:.0f}ms total"
+            f"{summary.total_duration_ms:.0f}ms total "
+            f"(parallel {summary.peak_parallel}/{summary.max_parallel}, "
+            f"saved {summary.time_saved_ms:.0f}ms)"
         )
         
         return summary
     
+    async def _run_single_test(
+        self,
+        file_path: str,
+        temp_dir: str,
+        app_type: AppType,
+        is_non_python: bool,
+        timeout: int,
+    ) -> TestResult:
+        """Run the test strategy matching one file."""
+        if is_non_python:
+            return await self._test_non_python_file(file_path, temp_dir, timeout)
+        return await self._test_file(file_path, temp_dir, app_type, timeout)
+    
     # ========================================================================
     # FRAMEWORK DETECTION
     # ========================================================================
@@ -2361,15 +2540,7 @@ except Exception as e:
         # Run the script
         start_time = time.time()
         try:
-            result = subprocess.run(
-                [self._get_project_python(), '-c', command_script],
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='replace',
-                timeout=timeout,
-                cwd=temp_dir,
-            )
+            result = self._run_python_script(command_script, temp_dir, timeout)
             
             duration_ms = (time.time() - start_time) * 1000
             
@@ -2640,15 +2811,7 @@ except Exception as e:
     '''
         
         try:
-            result = subprocess.run(
-                [self._get_project_python(), '-c', test_script],
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='replace',
-                timeout=min(timeout, 15),
-                cwd=temp_dir,
-            )
+            result = self._run_python_script(test_script, temp_dir, min(timeout, 15))
             
             output = result.stdout + result.stderr
             
@@ -2978,9 +3141,8 @@ except Exception as e:
             is_utility_name = any(file_name.startswith(prefix) for prefix in utility_names)
             
             # 3. Parse AST to detect module-level execution patterns
-            try:
-                tree = ast.parse(content)
-            except SyntaxError:
+            tree = parse_python(content).tree
+            if tree is None:
                 return False
             
             has_module_level_execution = False
@@ -4416,15 +4578,7 @@ except Exception as e:
     '''
         
         try:
-            result = subprocess.run(
-                [self._get_project_python(), '-c', test_script],
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='replace',
-                timeout=timeout,
-                cwd=temp_dir,
-            )
+            result = self._run_python_script(test_script, temp_dir, timeout)
             
             if 'IMPORT_SUCCESS' in result.stdout:
                 return TestResult(
@@ -189,14 +189,16 @@ class SyntaxChecker:
         Returns:
             SyntaxCheckResult с результатами проверки и попытками исправления
         """
-        # 1. Попытка парсить исходный код
-        try:
-            ast.parse(code)
+        # 1. Попытка парсить исходный код (разбор общий с остальными этапами)
+        from app.services.ast_cache import parse_python
+        parsed = parse_python(code)
+        if parsed.ok:
             logger.info("[SYNTAX] Code is valid")
             return SyntaxCheckResult(is_valid=True, original_content=code)
-        except SyntaxError as e:
-            initial_error = e
-            logger.warning(f"[SYNTAX] Syntax error at line {e.lineno}: {e.msg}")
+        if not isinstance(parsed.error, SyntaxError):
+            raise parsed.error
+        initial_error = parsed.error
+        logger.warning(f"[SYNTAX] Syntax error at line {initial_error.lineno}: {initial_error.msg}")
         
         # Если auto_fix отключен, возвращаем ошибку
         if not auto_fix:
@@ -1283,12 +1285,11 @@ class SyntaxChecker:
             else:
                 cmd = ['autopep8', '--select=' + indent_codes, '-']
             
-            result = subprocess.run(
+            result = self._run_formatter(
+                'autopep8',
                 cmd,
-                input=original_block_code,
-                capture_output=True,
-                text=True,
-                timeout=10
+                original_block_code,
+                select=indent_codes,
             )
             
             if result.returncode != 0 or not result.stdout:
@@ -1359,12 +1360,11 @@ class SyntaxChecker:
             else:
                 cmd = ['yapf', '--style=pep8']
             
-            result = subprocess.run(
+            result = self._run_formatter(
+                'yapf',
                 cmd,
-                input=original_block_code,
-                capture_output=True,
-                text=True,
-                timeout=10
+                original_block_code,
+                style='pep8',
             )
             
             if result.returncode != 0 or not result.stdout:
@@ -1536,12 +1536,11 @@ class SyntaxChecker:
             else:
                 cmd = ['autopep8', '--select=' + indent_codes, '-']
             
-            result = subprocess.run(
+            result = self._run_formatter(
+                'autopep8',
                 cmd,
-                input=stripped_code,
-                capture_output=True,
-                text=True,
-                timeout=10
+                stripped_code,
+                select=indent_codes,
             )
             
             if result.returncode != 0 or not result.stdout:
@@ -1628,12 +1627,11 @@ class SyntaxChecker:
             else:
                 cmd = ['autopep8', '--select=' + indent_codes, '-']
             
-            result = subprocess.run(
+            result = self._run_formatter(
+                'autopep8',
                 cmd,
-                input=stripped_code,
-                capture_output=True,
-                text=True,
-                timeout=10
+                stripped_code,
+                select=indent_codes,
             )
             
             if result.returncode != 0 or not result.stdout:
@@ -1713,12 +1711,11 @@ class SyntaxChecker:
             )
         
             try:
-                result = subprocess.run(
+                result = self._run_formatter(
+                    'autopep8',
                     base_args + ['--select=' + indent_codes, '-'],
-                    input=code,
-                    capture_output=True,
-                    text=True,
-                    timeout=10
+                    code,
+                    select=indent_codes, max_line_length=self.max_line_length,
                 )
             
                 if result.returncode == 0 and result.stdout:
@@ -1759,12 +1756,11 @@ class SyntaxChecker:
             cmd = ['black', '--quiet', '--line-length', str(self.max_line_length), '-']
         
         try:
-            result = subprocess.run(
+            result = self._run_formatter(
+                'black',
                 cmd,
-                input=code,
-                capture_output=True,
-                text=True,
-                timeout=10
+                code,
+                line_length=self.max_line_length,
             )
             
             if result.returncode == 0:
@@ -1795,12 +1791,11 @@ class SyntaxChecker:
             cmd = ['isort', '-', '--profile', 'black']
         
         try:
-            result = subprocess.run(
+            result = self._run_formatter(
+                'isort',
                 cmd,
-                input=code,
-                capture_output=True,
-                text=True,
-                timeout=10
+                code,
+                profile='black',
             )
             
             if result.returncode == 0:
@@ -1827,12 +1822,11 @@ class SyntaxChecker:
             cmd = ['yapf', '--style', 'pep8']
         
         try:
-            result = subprocess.run(
+            result = self._run_formatter(
+                'yapf',
                 cmd,
-                input=code,
-                capture_output=True,
-                text=True,
-                timeout=10
+                code,
+                style='pep8',
             )
             
             if result.returncode == 0:
@@ -1895,6 +1889,34 @@ class SyntaxChecker:
     # UTILITIES
     # ========================================================================
     
+    def _run_formatter(self, tool: str, cmd: List[str], code: str, timeout: int = 10, **options: Any) -> subprocess.CompletedProcess:
+        """
+        Run a Python formatter on code, like subprocess.run(cmd, input=code, text=True).
+
+        The formatter is served by a warm daemon (formatter_service) when the
+        tool can be imported by the project interpreter; otherwise cmd is
+        started as before. options are the library-call equivalents of the
+        cmd flags (line_length, profile, style, select, max_line_length).
+
+        Raises:
+            subprocess.TimeoutExpired: formatter did not finish in timeout
+        """
+        from app.services.formatter_service import get_formatter_service
+
+        served = get_formatter_service().format_python(
+            tool, code, self._project_python_path, timeout=timeout, **options
+        )
+        if served is None:
+            return subprocess.run(cmd, input=code, capture_output=True, text=True, timeout=timeout)
+        if served.timed_out:
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        return subprocess.CompletedProcess(
+            args=cmd,
+            returncode=0 if served.success else 1,
+            stdout=served.output,
+            stderr=served.error,
+        )
+
     def _check_tool_available(self, tool: str) -> bool:
         """Check if a formatting tool is available."""
         import subprocess
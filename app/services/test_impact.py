@@ -0,0 +1,500 @@
+# app/services/test_impact.py
+"""
+Test Impact - выбор затронутых тестов и кэш успешных прогонов.
+
+Для каждого тестового модуля строится транзитивное замыкание импортов
+по проектным файлам (через VFS, т.е. с учётом staged изменений):
+
+- select_affected(): тесты, в замыкание которых входит хотя бы один
+  изменённый/новый/удалённый файл;
+- cache_key(): хэш содержимого замыкания + интерпретатора и окружения.
+  Если ни тест, ни что-либо из его замыкания не изменились с последнего
+  успешного прогона, результат берётся из TestResultCache.
+
+Замыкание строится по статическим импортам (ast). Динамические импорты
+(importlib, __import__ по строке) и чтение файлов данных не
+отслеживаются - поэтому кэшируются только полностью успешные прогоны,
+а падения всегда перезапускаются.
+
+Пример:
+    >>> engine = TestImpactEngine(vfs)
+    >>> selection = engine.select_affected()
+    >>> selection.affected
+    ['tests/test_auth.py']
+    >>> key = engine.cache_key("tests/test_auth.py", "tests.test_auth")
+    >>> engine.lookup(key)  # None или dict сохранённого результата
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, TYPE_CHECKING
+
+from app.services.ast_cache import parse_python
+
+if TYPE_CHECKING:
+    from app.services.virtual_fs import VirtualFileSystem
+
+logger = logging.getLogger(__name__)
+
+
+# Кэш результатов хранится вне проекта, по директории на проект
+STATE_ROOT = Path(tempfile.gettempdir()) / "ai_agent_test_results"
+
+# Сколько записей держать на проект (старые удаляются по mtime)
+MAX_CACHE_ENTRIES = 500
+
+# Версия формата ключа: меняется при изменении правил построения замыкания
+_KEY_VERSION = "1"
+
+# Длительности тестов проекта - рядом с результатами; не *.json, чтобы
+# не попадать под _prune()/clear() кэша результатов
+DURATIONS_FILENAME = "test_durations.dat"
+
+# Вес нового замера в EWMA длительности теста
+DURATION_ALPHA = 0.5
+
+
+def is_test_file(path: str) -> bool:
+    """test_*.py / *_test.py (соглашения unittest discovery)"""
+    name = path.replace('\\', '/').rsplit('/', 1)[-1]
+    return name.endswith('.py') and (name.startswith('test_') or name.endswith('_test.py'))
+
+
+# ============================================================================
+# IMPORT GRAPH
+# ============================================================================
+
+# (module, level, names) для одного оператора импорта
+_ImportSpec = Tuple[str, int, Tuple[str, ...]]
+
+def _content_hash(content: str) -> str:
+    return hashlib.sha1(content.encode('utf-8', errors='replace')).hexdigest()
+
+
+def _parse_imports(content: str) -> Tuple[_ImportSpec, ...]:
+    """Импорты модуля через общий AST-кэш (разбор не зависит от пути файла)"""
+    return tuple(
+        (fact.module or '', fact.level, tuple(name for name in fact.names if name != '*'))
+        for fact in parse_python(content).imports
+    )
+
+
+class ImportGraph:
+    """
+    Граф импортов между проектными Python файлами.
+
+    Рёбра ведут от файла к проектным файлам, которые он импортирует
+    (включая __init__.py родительских пакетов - они исполняются при
+    импорте подмодуля). Внешние модули в граф не попадают.
+    """
+
+    def __init__(self, files: Dict[str, str]):
+        """
+        Args:
+            files: относительный путь -> содержимое (текущее состояние VFS)
+        """
+        self.files = files
+        self.hashes: Dict[str, str] = {path: _content_hash(content) for path, content in files.items()}
+        self.edges: Dict[str, Set[str]] = {}
+        self._closures: Dict[str, Set[str]] = {}
+
+        for path, content in files.items():
+            self.edges[path] = self._resolve_imports(path, _parse_imports(content))
+
+    # ------------------------------------------------------------------
+    # Resolution
+    # ------------------------------------------------------------------
+
+    def _module_path(self, module: str, base_dir: str = '') -> Optional[str]:
+        if not module:
+            return None
+        rel = module.replace('.', '/')
+        prefix = f"{base_dir}/" if base_dir else ''
+        for candidate in (f"{prefix}{rel}.py", f"{prefix}{rel}/__init__.py"):
+            if candidate in self.files:
+                return candidate
+        return None
+
+    def _with_parents(self, module: str, base_dir: str = '') -> Set[str]:
+        """Файл модуля и __init__.py всех его родительских пакетов"""
+        found: Set[str] = set()
+        parts = module.split('.')
+        for i in range(1, len(parts) + 1):
+            path = self._module_path('.'.join(parts[:i]), base_dir)
+            if path:
+                found.add(path)
+        return found
+
+    def _resolve_imports(self, path: str, specs: Iterable[_ImportSpec]) -> Set[str]:
+        file_dir = path.rsplit('/', 1)[0] if '/' in path else ''
+        package_parts = file_dir.split('/') if file_dir else []
+
+        deps: Set[str] = set()
+        for module, level, names in specs:
+            if level:
+                # Относительный импорт: от пакета текущего файла
+                if level - 1 > len(package_parts):
+                    continue
+                base_parts = package_parts[:len(package_parts) - (level - 1)]
+                base = '.'.join(base_parts)
+                full = '.'.join(p for p in (base, module) if p)
+                candidates = [full] + [f"{full}.{name}" if full else name for name in names]
+                for candidate in candidates:
+                    deps |= self._with_parents(candidate)
+                continue
+
+            candidates = [module] + [f"{module}.{name}" for name in names]
+            for candidate in candidates:
+                # От корня проекта (PYTHONPATH), затем от директории файла
+                # (sys.path[0] скрипта / соседние хелперы тестов)
+                resolved = self._with_parents(candidate)
+                if not resolved and file_dir:
+                    resolved = self._with_parents(candidate, file_dir)
+                deps |= resolved
+
+        deps.discard(path)
+        return deps
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def closure(self, path: str) -> Set[str]:
+        """Транзитивное замыкание импортов файла (включая сам файл)"""
+        cached = self._closures.get(path)
+        if cached is not None:
+            return cached
+
+        seen: Set[str] = set()
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            if current in seen or current not in self.files:
+                continue
+            seen.add(current)
+            stack.extend(self.edges.get(current, ()))
+
+        self._closures[path] = seen
+        return seen
+
+    def closure_hash(self, path: str) -> str:
+        """Хэш путей и содержимого всех файлов замыкания"""
+        digest = hashlib.sha256()
+        for dep in sorted(self.closure(path)):
+            digest.update(dep.encode('utf-8'))
+            digest.update(b'\0')
+            digest.update(self.hashes[dep].encode('ascii'))
+            digest.update(b'\n')
+        return digest.hexdigest()
+
+
+# ============================================================================
+# RESULT CACHE
+# ============================================================================
+
+class TestResultCache:
+    """
+    Дисковый кэш успешных прогонов тестов одного проекта.
+
+    Ключ - cache_key() из TestImpactEngine, значение - dict результата
+    (поля TestResult инструмента run_project_tests).
+    """
+
+    __test__ = False  # не собирать как тест-класс
+
+    def __init__(self, project_root: str, state_root: Path = STATE_ROOT):
+        digest = hashlib.sha1(os.path.abspath(project_root).encode('utf-8')).hexdigest()[:16]
+        self.directory = state_root / digest
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.directory / f"{key}.json"
+        try:
+            with open(entry, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(entry)  # для вытеснения по давности использования
+        except OSError:
+            pass
+        return data.get('result') if isinstance(data, dict) else None
+
+    def put(self, key: str, result: Dict[str, Any], meta: Optional[Dict[str, Any]] = None) -> None:
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            entry = self.directory / f"{key}.json"
+            tmp = entry.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'result': result, 'meta': meta or {}, 'stored_at': time.time()}, f)
+            os.replace(tmp, entry)
+            self._prune()
+        except OSError as e:
+            logger.debug(f"Could not store test result: {e}")
+
+    def clear(self) -> int:
+        removed = 0
+        for entry in self.directory.glob('*.json'):
+            try:
+                entry.unlink()
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def _prune(self) -> None:
+        entries = list(self.directory.glob('*.json'))
+        if len(entries) <= MAX_CACHE_ENTRIES:
+            return
+
+        def _mtime(p: Path) -> float:
+            try:
+                return p.stat().st_mtime
+            except OSError:
+                return 0.0
+
+        entries.sort(key=_mtime)
+        for entry in entries[:len(entries) - MAX_CACHE_ENTRIES]:
+            try:
+                entry.unlink()
+            except OSError:
+                pass
+
+
+class TestDurationStore:
+    """
+    EWMA длительностей тестов одного проекта: test id -> секунды.
+
+    Хранится в директории TestResultCache проекта, поэтому проекты с
+    одинаковыми test id не смешиваются и замеры переживают перезапуск.
+    """
+
+    __test__ = False  # не собирать как тест-класс
+
+    def __init__(self, project_root: str, state_root: Path = STATE_ROOT):
+        self.path = TestResultCache(project_root, state_root).directory / DURATIONS_FILENAME
+        self._lock = threading.Lock()
+        self._durations: Dict[str, float] = {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self._durations = {k: float(v) for k, v in data.items()}
+        except (OSError, ValueError, TypeError):
+            pass
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._durations)
+
+    def record(self, measured: Dict[str, float]) -> None:
+        """Обновляет EWMA по замерам одного прогона и сохраняет на диск"""
+        if not measured:
+            return
+        with self._lock:
+            for test_id, seconds in measured.items():
+                previous = self._durations.get(test_id)
+                self._durations[test_id] = (
+                    seconds if previous is None
+                    else DURATION_ALPHA * seconds + (1 - DURATION_ALPHA) * previous
+                )
+            data = dict(self._durations)
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.debug(f"Could not store test durations: {e}")
+
+
+# ============================================================================
+# ENGINE
+# ============================================================================
+
+@dataclass
+class ImpactSelection:
+    """Результат выбора тестов для текущего diff"""
+    changed: List[str]
+    affected: List[str]
+    unaffected: List[str]
+    # тест -> изменённые файлы из его замыкания (почему выбран)
+    reasons: Dict[str, List[str]] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "changed": self.changed,
+            "affected": self.affected,
+            "unaffected": len(self.unaffected),
+            "reasons": self.reasons,
+        }
+
+
+class TestImpactEngine:
+    """
+    Связывает тесты с проектными модулями, которые они импортируют.
+
+    Граф строится один раз на экземпляр по текущему состоянию VFS;
+    после изменения staging нужен новый экземпляр (или refresh()).
+    """
+
+    __test__ = False
+
+    def __init__(self, vfs: 'VirtualFileSystem', python_path: Optional[str] = None):
+        self.vfs = vfs
+        self.python_path = python_path
+        self.cache = TestResultCache(str(vfs.project_root))
+        self._graph: Optional[ImportGraph] = None
+        self._environment_key: Optional[str] = None
+
+    @property
+    def graph(self) -> ImportGraph:
+        if self._graph is None:
+            started = time.perf_counter()
+            files: Dict[str, str] = {}
+            for path in self.vfs.get_all_python_files():
+                try:
+                    content = self.vfs.read_file(path)
+                except Exception:
+                    content = None
+                if content is not None:
+                    files[path] = content
+            self._graph = ImportGraph(files)
+            logger.debug(
+                f"Import graph: {len(files)} files in {(time.perf_counter() - started) * 1000:.0f}ms"
+            )
+        return self._graph
+
+    def refresh(self) -> None:
+        self._graph = None
+
+    # ------------------------------------------------------------------
+    # Selection
+    # ------------------------------------------------------------------
+
+    def discover_tests(self) -> List[str]:
+        return sorted(path for path in self.graph.files if is_test_file(path))
+
+    def changed_files(self) -> List[str]:
+        return sorted(p for p in self.vfs.get_staged_files() if p.endswith('.py'))
+
+    def select_affected(
+        self,
+        changed: Optional[Iterable[str]] = None,
+        tests: Optional[Iterable[str]] = None,
+    ) -> ImpactSelection:
+        """
+        Тесты, на которые может повлиять diff.
+
+        Args:
+            changed: изменённые файлы (по умолчанию - staged .py файлы VFS)
+            tests: кандидаты (по умолчанию - все test_*.py / *_test.py)
+        """
+        changed_list = sorted(set(changed)) if changed is not None else self.changed_files()
+        changed_set = set(changed_list)
+        candidates = sorted(set(tests)) if tests is not None else self.discover_tests()
+
+        # Удалённого файла в графе уже нет, и в замыкания он не попадает:
+        # затронутыми считаем тесты, которые импортируют его модуль по имени
+        deleted_modules = {
+            _path_to_module(path) for path in changed_list if path not in self.graph.files
+        }
+        deleted_modules.discard(None)
+
+        affected: List[str] = []
+        unaffected: List[str] = []
+        reasons: Dict[str, List[str]] = {}
+
+        for test in candidates:
+            hits = sorted(self.graph.closure(test) & changed_set)
+            if not hits and deleted_modules:
+                hits = sorted(
+                    f"{module} (deleted)"
+                    for module in deleted_modules
+                    if self._imports_module_by_name(test, module)
+                )
+            if hits:
+                affected.append(test)
+                reasons[test] = hits
+            else:
+                unaffected.append(test)
+
+        return ImpactSelection(
+            changed=changed_list,
+            affected=affected,
+            unaffected=unaffected,
+            reasons=reasons,
+        )
+
+    def _imports_module_by_name(self, test: str, module: str) -> bool:
+        for path in self.graph.closure(test):
+            content = self.graph.files[path]
+            for imported, level, names in _parse_imports(content):
+                if level:
+                    continue
+                full_names = [imported] + [f"{imported}.{n}" for n in names]
+                if any(n == module or n.startswith(module + '.') for n in full_names):
+                    return True
+        return False
+
+    # ------------------------------------------------------------------
+    # Caching
+    # ------------------------------------------------------------------
+
+    def cache_key(self, test_path: str, test_target: str) -> Optional[str]:
+        """
+        Ключ кэша для прогона test_target из файла test_path.
+
+        None - если файла теста нет в графе (кэширование невозможно).
+        """
+        if test_path not in self.graph.files:
+            return None
+        digest = hashlib.sha256()
+        for part in (_KEY_VERSION, test_target, self.graph.closure_hash(test_path), self._environment()):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()[:40]
+
+    def lookup(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        if key is None:
+            return None
+        return self.cache.get(key)
+
+    def record(self, key: Optional[str], result: Dict[str, Any], test_path: str = '') -> None:
+        if key is None:
+            return
+        meta = {'test_path': test_path}
+        if test_path in self.graph.files:
+            meta['closure_size'] = len(self.graph.closure(test_path))
+        self.cache.put(key, result, meta)
+
+    def _environment(self) -> str:
+        """Интерпретатор и состав установленных пакетов"""
+        if self._environment_key is None:
+            fingerprint = ''
+            try:
+                from app.services.environment_inventory import get_environment_inventory
+                fingerprint = get_environment_inventory(self.python_path).fingerprint
+            except Exception as e:
+                logger.debug(f"Environment fingerprint unavailable: {e}")
+            self._environment_key = f"{self.python_path or ''}|{fingerprint}"
+        return self._environment_key
+
+
+def _path_to_module(path: str) -> Optional[str]:
+    if not path.endswith('.py'):
+        return None
+    module = path.replace('\\', '/')[:-3]
+    if module.endswith('/__init__'):
+        module = module[:-9]
+    module = module.replace('/', '.').strip('.')
+    return module or None
@@ -15,6 +15,8 @@ Fault-tolerant Python parser based on Tree-sitter.
 from __future__ import annotations
 
 import logging
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from typing import Optional, List, Tuple, Iterator, Any, Dict
 from enum import Enum
@@ -66,6 +68,148 @@ def _get_parser():
     return _parser, _language
 
 
+# ============================================================================
+# INCREMENTAL TREE CACHE
+# ============================================================================
+
+class IncrementalTreeCache:
+    """
+    Последние деревья Tree-sitter по языку для инкрементального репарсинга.
+    
+    При стейджинге один и тот же файл парсится заново на каждый блок и на
+    каждую проверку (модификатор, поиск цели, валидация синтаксиса,
+    структурные проверки), хотя между парсами меняется лишь малая часть.
+    Кэш находит среди недавних деревьев языка ближайшее к новому тексту
+    (общий префикс + суффикс), копирует его, применяет tree.edit() для
+    изменённого участка и вызывает parser.parse(new, old_tree) - Tree-sitter
+    переиспользует неизменённые поддеревья. Точное совпадение текста
+    возвращает дерево без парсинга.
+    
+    Возвращаемые деревья общие - вызывающий код их не редактирует.
+    """
+    
+    # Мелкие фрагменты (код блока, тело метода) парсятся напрямую
+    MIN_SOURCE_BYTES = 4096
+    # Инкрементальный парс, только если неизменённая часть не меньше этой доли
+    MIN_SHARED_RATIO = 0.5
+    
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max_entries
+        # (language, source_bytes) -> Tree
+        self._entries: "OrderedDict[Tuple[str, bytes], Any]" = OrderedDict()
+        # Парсеры Tree-sitter не потокобезопасны и уже общие между вызовами
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "incremental": 0, "full": 0}
+    
+    def parse(self, parser, source_bytes: bytes, language: str):
+        """Дерево для source_bytes (из кэша, инкрементально или полным парсом)"""
+        if len(source_bytes) < self.MIN_SOURCE_BYTES:
+            # Без кэша, но под той же блокировкой: стейджинг применяет
+            # блоки разных файлов в пуле потоков через общие парсеры
+            with self._lock:
+                return parser.parse(source_bytes)
+        
+        key = (language, source_bytes)
+        with self._lock:
+            tree = self._entries.get(key)
+            if tree is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return tree
+            
+            base = self._closest(language, source_bytes)
+            if base is None:
+                tree = parser.parse(source_bytes)
+                self.stats["full"] += 1
+            else:
+                old_bytes, old_tree, prefix, suffix = base
+                edited = old_tree.copy()
+                edited.edit(**_edit_args(old_bytes, source_bytes, prefix, suffix))
+                tree = parser.parse(source_bytes, edited)
+                self.stats["incremental"] += 1
+            
+            self._entries[key] = tree
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return tree
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def _closest(self, language: str, source_bytes: bytes) -> Optional[Tuple[bytes, Any, int, int]]:
+        """Дерево с наибольшей общей частью (префикс + суффикс) с source_bytes"""
+        best = None
+        best_shared = int(len(source_bytes) * self.MIN_SHARED_RATIO)
+        for (entry_language, old_bytes), tree in reversed(self._entries.items()):
+            if entry_language != language:
+                continue
+            prefix = _common_prefix_len(old_bytes, source_bytes)
+            limit = min(len(old_bytes), len(source_bytes)) - prefix
+            suffix = _common_suffix_len(old_bytes, source_bytes, limit)
+            if prefix + suffix > best_shared:
+                best = (old_bytes, tree, prefix, suffix)
+                best_shared = prefix + suffix
+        return best
+
+
+def _common_prefix_len(a: bytes, b: bytes) -> int:
+    """Длина общего префикса (двоичный поиск по сравнениям срезов)"""
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _common_suffix_len(a: bytes, b: bytes, limit: int) -> int:
+    """Длина общего суффикса, не больше limit (не перекрывает префикс)"""
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[len(a) - mid:] == b[len(b) - mid:]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _point(source_bytes: bytes, offset: int) -> Tuple[int, int]:
+    """(row, column) байтового смещения, column тоже в байтах"""
+    row = source_bytes.count(b"\n", 0, offset)
+    line_start = source_bytes.rfind(b"\n", 0, offset) + 1
+    return (row, offset - line_start)
+
+
+def _edit_args(old_bytes: bytes, new_bytes: bytes, prefix: int, suffix: int) -> Dict[str, Any]:
+    """Аргументы Tree.edit() для замены old[prefix:-suffix] на new[prefix:-suffix]"""
+    old_end = len(old_bytes) - suffix
+    new_end = len(new_bytes) - suffix
+    return {
+        "start_byte": prefix,
+        "old_end_byte": old_end,
+        "new_end_byte": new_end,
+        "start_point": _point(new_bytes, prefix),
+        "old_end_point": _point(old_bytes, old_end),
+        "new_end_point": _point(new_bytes, new_end),
+    }
+
+
+_tree_cache = IncrementalTreeCache()
+
+
+def parse_tree(parser, source_bytes: bytes, language: str = "python"):
+    """Tree-sitter дерево через общий IncrementalTreeCache"""
+    return _tree_cache.parse(parser, source_bytes, language)
+
+
+def get_tree_cache() -> IncrementalTreeCache:
+    return _tree_cache
+
+
 # ============================================================================
 # DATA STRUCTURES
 # ============================================================================
@@ -230,7 +374,7 @@ class FaultTolerantParser:
         
         try:
             source_bytes = source_code.encode('utf-8')
-            tree = self._parser.parse(source_bytes)
+            tree = parse_tree(self._parser, source_bytes, "python")
             result.root_node = tree.root_node
             
             # Парсим дерево — используем существующий метод _parse_node
@@ -281,8 +425,11 @@ class FaultTolerantParser:
             message = f"Syntax error: unexpected '{error_text}'" if error_text.strip() else "Syntax error"
             result.errors.append((line, col, message))
         
+        # has_error - флаг Tree-sitter "узел или потомки с ошибкой": целые
+        # корректные поддеревья не обходим
         for child in node.children:
-            self._collect_errors(child, source_bytes, result)
+            if child.has_error or child.is_missing:
+                self._collect_errors(child, source_bytes, result)
     
     def _parse_node(
         self, 
@@ -473,14 +620,8 @@ class FaultTolerantParser:
     
     def _has_errors_inside(self, node) -> bool:
         """Проверяет, есть ли ERROR узлы внутри."""
-        if node.type == "ERROR" or node.is_missing:
-            return True
-        
-        for child in node.children:
-            if self._has_errors_inside(child):
-                return True
-        
-        return False
+        # has_error учитывает и ERROR, и MISSING узлы во всём поддереве
+        return node.has_error or node.is_missing
     
     # ========================================================================
     # CONVENIENCE METHODS
@@ -592,7 +733,7 @@ class FaultTolerantParser:
         """Extract identifiers from Python code using tree-sitter."""
         try:
             ts_parser, _ = _get_parser()
-            tree = ts_parser.parse(source_code.encode('utf-8'))
+            tree = parse_tree(ts_parser, source_code.encode('utf-8'), "python")
             identifiers = set()
             
             # Simple walk to collect all identifiers
@@ -1023,7 +1164,7 @@ class MultiLanguageParser:
                 # Get parser
                 ts_parser, _ = self._get_parser_for_language(language)
                 source_bytes = source_code.encode('utf-8')
-                tree = ts_parser.parse(source_bytes)
+                tree = parse_tree(ts_parser, source_bytes, language)
         
                 # Get config
                 config = self.LANGUAGE_CONFIGS[language]
@@ -1086,7 +1227,7 @@ class MultiLanguageParser:
                 # Get parser
                 parser_info = self._get_parser_for_language(language)
                 ts_parser = parser_info[0]
-                tree = ts_parser.parse(source_code.encode('utf-8'))
+                tree = parse_tree(ts_parser, source_code.encode('utf-8'), language)
         
                 errors = []
         
@@ -1175,7 +1316,7 @@ class MultiLanguageParser:
                 return (source_code, False)
         
             source_bytes = source_code.encode('utf-8')
-            tree = parser.parse(source_bytes)
+            tree = parse_tree(parser, source_bytes, language)
         
             # === STEP 1: Find missing semicolons ===
             missing_semicolon_lines = set()
@@ -1270,7 +1411,7 @@ class MultiLanguageParser:
             # Get parser
             ts_parser, _ = self._get_parser_for_language(language)
             source_bytes = source_code.encode('utf-8')
-            tree = ts_parser.parse(source_bytes)
+            tree = parse_tree(ts_parser, source_bytes, language)
             
             config = self.LANGUAGE_CONFIGS.get(language, {})
             class_types = config.get("class_types", [])
@@ -1315,7 +1456,7 @@ class MultiLanguageParser:
             # Get parser
             ts_parser, _ = self._get_parser_for_language(language)
             source_bytes = source_code.encode('utf-8')
-            tree = ts_parser.parse(source_bytes)
+            tree = parse_tree(ts_parser, source_bytes, language)
             
             identifiers = set()
             
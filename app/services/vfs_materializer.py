@@ -0,0 +1,592 @@
+# app/services/vfs_materializer.py
+"""
+VFS Materializer - единый движок материализации VirtualFileSystem на диск.
+
+Валидаторы (mypy, pyright, RuntimeTester, run_project_tests) работают с
+реальной директорией, поэтому VFS нужно "развернуть" во временное дерево:
+весь проект + staged изменения. Раньше каждое место копировало проект
+целиком через shutil.copytree, что на больших репозиториях стоит секунды
+и минуты на каждую итерацию.
+
+Движок строит дерево без копирования содержимого неизменённых файлов:
+- reflink (copy-on-write клон, Linux FICLONE: btrfs/xfs) - безопасно и быстро
+- hardlink (тот же inode) - быстро, но файл разделяется с проектом
+- copy (shutil.copy2) - fallback, если ссылки не поддерживаются
+
+Staged файлы всегда пишутся отдельным inode (unlink + write), поэтому
+запись в материализованное дерево через write_file() никогда не меняет
+файлы проекта, даже если на их месте был hardlink.
+
+ShadowWorkspace - долгоживущее дерево сессии пайплайна, которое между
+итерациями обновляется инкрементально (только изменившиеся staged файлы).
+
+Example:
+    >>> materializer = VFSMaterializer(vfs)
+    >>> with materializer.materialize(prefix="validator_") as tree:
+    ...     run_mypy(tree.root)
+    >>> print(tree.stats.to_dict())
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import shutil
+import hashlib
+import logging
+import tempfile
+import time
+import weakref
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Any, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from app.services.virtual_fs import VirtualFileSystem
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# CONSTANTS
+# ============================================================================
+
+# Директории, которые никогда не материализуются (кроме правила "начинается с точки")
+DEFAULT_SKIP_DIRS: Set[str] = {'__pycache__', 'venv', '.venv'}
+
+# Расширения файлов, которые не переносятся в дерево
+SKIP_FILE_SUFFIXES = ('.pyc', '.pyo')
+
+# ioctl FICLONE (linux/fs.h) - reflink целого файла
+_FICLONE = 0x40049409 if sys.platform.startswith('linux') else None
+
+
+# ============================================================================
+# DATA STRUCTURES
+# ============================================================================
+
+class LinkMode(Enum):
+    """Способ переноса неизменённых файлов в материализованное дерево"""
+    AUTO = "auto"          # reflink -> hardlink -> copy
+    REFLINK = "reflink"    # reflink -> copy
+    HARDLINK = "hardlink"  # hardlink -> copy
+    COPY = "copy"          # только копирование
+
+
+@dataclass
+class MaterializeStats:
+    """Статистика одной материализации (или синхронизации)"""
+    mode: str
+    files_reflinked: int = 0
+    files_hardlinked: int = 0
+    files_copied: int = 0
+    files_written: int = 0
+    files_deleted: int = 0
+    bytes_written: int = 0
+    duration_ms: float = 0.0
+
+    @property
+    def files_linked(self) -> int:
+        return self.files_reflinked + self.files_hardlinked
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "files_reflinked": self.files_reflinked,
+            "files_hardlinked": self.files_hardlinked,
+            "files_copied": self.files_copied,
+            "files_written": self.files_written,
+            "files_deleted": self.files_deleted,
+            "bytes_written": self.bytes_written,
+            "duration_ms": round(self.duration_ms, 1),
+        }
+
+
+@dataclass
+class MaterializedTree:
+    """
+    Материализованное дерево проекта.
+
+    Attributes:
+        root: Абсолютный путь к корню дерева
+        stats: Статистика построения
+        written_files: Staged файлы, записанные из VFS
+        owned: True если дерево создано движком и удаляется в cleanup()
+    """
+    root: str
+    stats: MaterializeStats
+    written_files: List[str] = field(default_factory=list)
+    owned: bool = True
+
+    def cleanup(self) -> None:
+        """Удаляет дерево (только если оно принадлежит движку)"""
+        if self.owned and self.root and os.path.isdir(self.root):
+            shutil.rmtree(self.root, ignore_errors=True)
+
+    def __enter__(self) -> "MaterializedTree":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.cleanup()
+        return False
+
+
+# ============================================================================
+# MAIN CLASS
+# ============================================================================
+
+class VFSMaterializer:
+    """
+    Строит дерево "проект + staged изменения" без копирования содержимого
+    неизменённых файлов.
+
+    Доступность reflink/hardlink проверяется на первом файле: если способ
+    не поддерживается (другая ФС, EXDEV, EOPNOTSUPP), он отключается для
+    оставшихся файлов этого экземпляра.
+
+    ВАЖНО: при hardlink файл разделяет inode с проектом. Любая запись в
+    дерево должна идти через write_file()/remove_file(), которые сначала
+    разрывают связь (unlink), иначе изменится оригинальный файл.
+    """
+
+    def __init__(
+        self,
+        vfs: 'VirtualFileSystem',
+        link_mode: LinkMode = LinkMode.AUTO,
+        skip_dirs: Optional[Set[str]] = None,
+    ):
+        """
+        Args:
+            vfs: VirtualFileSystem с staged изменениями
+            link_mode: Способ переноса неизменённых файлов
+            skip_dirs: Дополнительные директории для пропуска
+        """
+        self.vfs = vfs
+        self.link_mode = link_mode
+        self.skip_dirs = DEFAULT_SKIP_DIRS | set(skip_dirs or ())
+
+        self._reflink_ok = _FICLONE is not None and link_mode in (LinkMode.AUTO, LinkMode.REFLINK)
+        self._hardlink_ok = hasattr(os, 'link') and link_mode in (LinkMode.AUTO, LinkMode.HARDLINK)
+        # Пары (устройство источника, устройство назначения), где reflink не удался:
+        # ошибка на одной ФС (например, cross-device) не отключает reflink для других
+        self._reflink_failed: Set[Tuple[int, int]] = set()
+
+    # ========================================================================
+    # PUBLIC API
+    # ========================================================================
+
+    def materialize(
+        self,
+        target_dir: Optional[str] = None,
+        prefix: str = "vfs_",
+    ) -> MaterializedTree:
+        """
+        Материализует VFS в директорию.
+
+        Args:
+            target_dir: Существующая/новая директория (None = новая temp-директория)
+            prefix: Префикс temp-директории
+
+        Returns:
+            MaterializedTree (owned=True только для созданной temp-директории)
+        """
+        start = time.perf_counter()
+        owned = target_dir is None
+        root = tempfile.mkdtemp(prefix=prefix) if owned else str(Path(target_dir))
+        os.makedirs(root, exist_ok=True)
+
+        stats = MaterializeStats(mode=self.link_mode.value)
+        staged_files = set(self.vfs.get_staged_files())
+
+        # 1. Неизменённые файлы проекта - ссылками
+        for rel_path in self.iter_project_files():
+            if rel_path in staged_files:
+                continue
+            self.place_file(rel_path, root, stats)
+
+        # 2. Staged файлы - отдельными inode с содержимым из VFS
+        written_files = []
+        for rel_path in staged_files:
+            change = self.vfs.get_change(rel_path)
+            if change is not None and change.is_deletion:
+                continue
+            content = self.vfs.read_file(rel_path)
+            if content is None:
+                logger.warning(f"Staged file has no content: {rel_path}")
+                continue
+            stats.bytes_written += self.write_file(os.path.join(root, rel_path), content)
+            stats.files_written += 1
+            written_files.append(rel_path)
+
+        stats.duration_ms = (time.perf_counter() - start) * 1000
+        logger.info(
+            f"Materialized VFS to {root} in {stats.duration_ms:.0f}ms: "
+            f"{stats.files_linked} linked ({stats.files_reflinked} reflink, "
+            f"{stats.files_hardlinked} hardlink), {stats.files_copied} copied, "
+            f"{stats.files_written} staged written"
+        )
+
+        return MaterializedTree(root=root, stats=stats, written_files=written_files, owned=owned)
+
+    def iter_project_files(self) -> List[str]:
+        """
+        Возвращает относительные пути всех материализуемых файлов проекта
+        (реальная ФС, без учёта staging).
+        """
+        project_root = str(self.vfs.project_root)
+        files = []
+
+        for dirpath, dirnames, filenames in os.walk(project_root):
+            dirnames[:] = [
+                d for d in dirnames
+                if not d.startswith('.') and d not in self.skip_dirs
+            ]
+
+            rel_dir = os.path.relpath(dirpath, project_root)
+            for fn in filenames:
+                if fn.startswith('.') and rel_dir == '.':
+                    # Скрытые файлы в корне (.env, .gitignore) не нужны валидаторам
+                    continue
+                if fn.endswith(SKIP_FILE_SUFFIXES):
+                    continue
+                rel_path = fn if rel_dir == '.' else os.path.join(rel_dir, fn)
+                files.append(rel_path.replace('\\', '/'))
+
+        return files
+
+    def place_file(self, rel_path: str, root: str, stats: Optional[MaterializeStats] = None) -> str:
+        """
+        Переносит неизменённый файл проекта в дерево (reflink/hardlink/copy).
+
+        Returns:
+            Использованный способ: "reflink", "hardlink", "copy" или "" при ошибке
+        """
+        src = os.path.join(str(self.vfs.project_root), rel_path)
+        dst = os.path.join(root, rel_path)
+
+        try:
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            if os.path.lexists(dst):
+                os.unlink(dst)
+        except OSError as e:
+            logger.debug(f"Could not prepare {dst}: {e}")
+            return ""
+
+        method = ""
+        if self._reflink_ok:
+            devices = self._device_pair(src, dst)
+            if devices not in self._reflink_failed:
+                if self._try_reflink(src, dst):
+                    method = "reflink"
+                else:
+                    logger.debug(f"Reflink unavailable for devices {devices}, falling back")
+                    self._reflink_failed.add(devices)
+
+        if not method and self._hardlink_ok:
+            try:
+                os.link(src, dst)
+                method = "hardlink"
+            except OSError as e:
+                logger.debug(f"Hardlinks unavailable ({e}), falling back to copy")
+                self._hardlink_ok = False
+
+        if not method:
+            try:
+                shutil.copy2(src, dst)
+                method = "copy"
+            except (OSError, shutil.SameFileError) as e:
+                # Best effort: нечитаемые файлы пропускаем
+                logger.debug(f"Could not copy {rel_path}: {e}")
+                return ""
+
+        if stats is not None:
+            if method == "reflink":
+                stats.files_reflinked += 1
+            elif method == "hardlink":
+                stats.files_hardlinked += 1
+            else:
+                stats.files_copied += 1
+
+        return method
+
+    @staticmethod
+    def write_file(dst: str, content: str) -> int:
+        """
+        Записывает содержимое в дерево, предварительно разрывая hardlink.
+
+        Returns:
+            Количество записанных байт
+        """
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        if os.path.lexists(dst):
+            os.unlink(dst)
+        data = content.encode('utf-8')
+        with open(dst, 'wb') as f:
+            f.write(data)
+        return len(data)
+
+    @staticmethod
+    def remove_file(dst: str) -> bool:
+        """Удаляет файл из дерева (не затрагивая inode проекта)"""
+        try:
+            if os.path.lexists(dst):
+                os.unlink(dst)
+                return True
+        except OSError as e:
+            logger.debug(f"Could not remove {dst}: {e}")
+        return False
+
+    # ========================================================================
+    # INTERNAL
+    # ========================================================================
+
+    @staticmethod
+    def _device_pair(src: str, dst: str) -> Tuple[int, int]:
+        """(st_dev источника, st_dev директории назначения); -1 если stat не удался"""
+        try:
+            src_dev = os.stat(src).st_dev
+        except OSError:
+            src_dev = -1
+        try:
+            dst_dev = os.stat(os.path.dirname(dst) or ".").st_dev
+        except OSError:
+            dst_dev = -1
+        return src_dev, dst_dev
+
+    @staticmethod
+    def _try_reflink(src: str, dst: str) -> bool:
+        """Пытается создать reflink (copy-on-write клон) через ioctl FICLONE"""
+        if _FICLONE is None:
+            return False
+
+        import fcntl
+
+        try:
+            with open(src, 'rb') as s, open(dst, 'wb') as d:
+                fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+            shutil.copystat(src, dst)
+            return True
+        except OSError:
+            try:
+                if os.path.lexists(dst):
+                    os.unlink(dst)
+            except OSError:
+                pass
+            return False
+
+
+# ============================================================================
+# PERSISTENT WORKSPACE
+# ============================================================================
+
+class ShadowWorkspace:
+    """
+    Долгоживущее материализованное дерево для сессии пайплайна.
+
+    Первый sync() строит дерево целиком через VFSMaterializer. Последующие
+    вызовы сравнивают staged набор VFS с тем, что было записано в прошлый
+    раз (по sha1 содержимого), и обновляют только разницу:
+    - изменённые staged файлы перезаписываются
+    - staged удаления удаляются из дерева
+    - файлы, убранные из staging, восстанавливаются из проекта
+
+    Поэтому вторая и последующие итерации feedback loop стоят пропорционально
+    дельте, а не размеру проекта. Изменения проекта на диске в обход VFS
+    (правки пользователя) не отслеживаются - для этого invalidate().
+
+    Example:
+        >>> workspace = ShadowWorkspace(vfs)
+        >>> workspace.sync()                      # полная сборка
+        >>> vfs.stage_change("app/x.py", code)
+        >>> workspace.sync()                      # записан только app/x.py
+        >>> with workspace.overlay("app/x.py", candidate) as path:
+        ...     run_pyright(path)                 # после выхода - снова staged версия
+        >>> workspace.close()
+    """
+
+    def __init__(
+        self,
+        vfs: 'VirtualFileSystem',
+        link_mode: LinkMode = LinkMode.REFLINK,
+        skip_dirs: Optional[Set[str]] = None,
+        prefix: str = "shadow_ws_",
+    ):
+        """
+        Args:
+            vfs: VirtualFileSystem сессии
+            link_mode: Способ переноса неизменённых файлов. По умолчанию
+                REFLINK: в workspace выполняется код проекта (runtime, тесты)
+            skip_dirs: Дополнительные директории для пропуска
+            prefix: Префикс temp-директории
+        """
+        self.vfs = vfs
+        self.prefix = prefix
+        self._materializer = VFSMaterializer(vfs, link_mode=link_mode, skip_dirs=skip_dirs)
+
+        self.root: Optional[str] = None
+        self._synced: Dict[str, Optional[str]] = {}  # rel_path -> sha1 (None = удалён)
+        # VFS, состояние которой сейчас в дереве (self.vfs или её fork())
+        self._source: 'VirtualFileSystem' = vfs
+        self._finalizer = None
+
+        self.sync_count = 0
+        self.full_builds = 0
+        self.last_stats: Optional[MaterializeStats] = None
+
+    # ========================================================================
+    # PUBLIC API
+    # ========================================================================
+
+    def sync(self, vfs: Optional['VirtualFileSystem'] = None) -> MaterializeStats:
+        """
+        Приводит дерево в соответствие с текущим состоянием VFS.
+
+        Args:
+            vfs: Другая VFS того же проекта (например, fork() кандидата) -
+                дерево приводится к её состоянию той же дельтой; следующий
+                sync() без аргумента вернёт состояние сессии
+
+        Returns:
+            Статистика синхронизации (полной сборки или дельты)
+        """
+        source = vfs or self.vfs
+        if self.root is None or not os.path.isdir(self.root):
+            stats = self._full_build()
+            if source is self.vfs:
+                return stats
+
+        start = time.perf_counter()
+        stats = MaterializeStats(mode=f"{self._materializer.link_mode.value}+incremental")
+        self._source = source
+        desired = self._staged_digests(source)
+
+        for rel_path, digest in desired.items():
+            if rel_path in self._synced and self._synced[rel_path] == digest:
+                continue
+            if digest is None:
+                if self._materializer.remove_file(os.path.join(self.root, rel_path)):
+                    stats.files_deleted += 1
+            else:
+                self._write_staged(rel_path, stats)
+
+        for rel_path in set(self._synced) - set(desired):
+            self._restore_base(rel_path, stats)
+
+        self._synced = desired
+        stats.duration_ms = (time.perf_counter() - start) * 1000
+        self._finish_sync(stats)
+        return stats
+
+    def apply_overlay(self, rel_path: str, content: str) -> str:
+        """
+        Временно подменяет файл в дереве (например, проверяемый кандидат).
+
+        Подмена действует до discard_overlay() или следующего sync().
+
+        Returns:
+            Абсолютный путь к файлу в дереве
+        """
+        if self.root is None:
+            self.sync()
+
+        target = os.path.join(self.root, rel_path.replace('\\', '/'))
+        VFSMaterializer.write_file(target, content)
+        return target
+
+    def discard_overlay(self, rel_path: str) -> None:
+        """Возвращает файл к синхронизированному состоянию (staged версия или оригинал)"""
+        if self.root is None:
+            return
+
+        rel_path = rel_path.replace('\\', '/')
+        if rel_path not in self._synced:
+            self._restore_base(rel_path)
+        elif self._synced[rel_path] is None:
+            self._materializer.remove_file(os.path.join(self.root, rel_path))
+        else:
+            self._write_staged(rel_path)
+
+    @contextmanager
+    def overlay(self, rel_path: str, content: str):
+        """
+        Контекстная версия apply_overlay()/discard_overlay().
+
+        Yields:
+            Абсолютный путь к файлу в дереве
+        """
+        target = self.apply_overlay(rel_path, content)
+        try:
+            yield target
+        finally:
+            self.discard_overlay(rel_path)
+
+    def invalidate(self) -> None:
+        """Помечает дерево устаревшим: следующий sync() пересоберёт его целиком"""
+        self._drop_tree()
+
+    def close(self) -> None:
+        """Удаляет дерево"""
+        self._drop_tree()
+
+    # ========================================================================
+    # INTERNAL
+    # ========================================================================
+
+    def _full_build(self) -> MaterializeStats:
+        self._drop_tree()
+        tree = self._materializer.materialize(prefix=self.prefix)
+        self.root = tree.root
+        self._source = self.vfs
+        self._synced = self._staged_digests(self.vfs)
+        # Дерево удаляется при сборке мусора / выходе из процесса
+        self._finalizer = weakref.finalize(self, shutil.rmtree, tree.root, True)
+        self.full_builds += 1
+        self._finish_sync(tree.stats)
+        return tree.stats
+
+    def _finish_sync(self, stats: MaterializeStats) -> None:
+        self.sync_count += 1
+        self.last_stats = stats
+        logger.info(
+            f"ShadowWorkspace sync #{self.sync_count} ({stats.mode}) in {stats.duration_ms:.0f}ms: "
+            f"{stats.files_written} written, {stats.files_deleted} deleted, "
+            f"{stats.files_linked + stats.files_copied} placed from project"
+        )
+
+    def _drop_tree(self) -> None:
+        if self._finalizer is not None:
+            self._finalizer()
+            self._finalizer = None
+        elif self.root and os.path.isdir(self.root):
+            shutil.rmtree(self.root, ignore_errors=True)
+        self.root = None
+        self._synced = {}
+
+    def _staged_digests(self, vfs: 'VirtualFileSystem') -> Dict[str, Optional[str]]:
+        digests: Dict[str, Optional[str]] = {}
+        for rel_path in vfs.get_staged_files():
+            change = vfs.get_change(rel_path)
+            if change is None or change.is_deletion:
+                digests[rel_path] = None
+            else:
+                digests[rel_path] = hashlib.sha1(change.new_content.encode('utf-8')).hexdigest()
+        return digests
+
+    def _write_staged(self, rel_path: str, stats: Optional[MaterializeStats] = None) -> None:
+        content = self._source.read_file(rel_path)
+        if content is None:
+            self._materializer.remove_file(os.path.join(self.root, rel_path))
+            return
+        written = VFSMaterializer.write_file(os.path.join(self.root, rel_path), content)
+        if stats is not None:
+            stats.files_written += 1
+            stats.bytes_written += written
+
+    def _restore_base(self, rel_path: str, stats: Optional[MaterializeStats] = None) -> None:
+        """Возвращает файл проекта (или удаляет, если его нет на диске)"""
+        if (self.vfs.project_root / rel_path).is_file():
+            self._materializer.place_file(rel_path, self.root, stats)
+        elif self._materializer.remove_file(os.path.join(self.root, rel_path)) and stats is not None:
+            stats.files_deleted += 1
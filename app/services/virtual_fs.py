@@ -16,12 +16,13 @@ Virtual File System Layer для Agent Mode.
 
 from __future__ import annotations
 
-import ast
+import os
 import re
 import logging
 import asyncio
 from pathlib import Path
-from typing import Dict, Set, Optional, List, Any, TYPE_CHECKING
+from collections.abc import MutableMapping
+from typing import Dict, Set, Optional, List, Any, Iterator, TYPE_CHECKING
 from dataclasses import dataclass, field
 from datetime import datetime
 from app.services.language_adapter import AdapterManager
@@ -182,6 +183,59 @@ class CommitResult:
 # MAIN CLASS
 # ============================================================================
 
+class ChangeOverlay(MutableMapping):
+    """
+    Copy-on-write слой pending changes поверх родительского словаря.
+    
+    Чтение проваливается в родителя, запись и удаление остаются в слое
+    (удаление родительского ключа - tombstone в removed). Родитель не
+    копируется: создание слоя O(1), слои вкладываются друг в друга.
+    Ключи, которые слой не трогал, отражают текущее состояние родителя.
+    """
+    
+    def __init__(self, parent: MutableMapping):
+        self.parent = parent
+        self.local: Dict[str, PendingChange] = {}
+        self.removed: Set[str] = set()
+    
+    def __getitem__(self, key: str) -> PendingChange:
+        if key in self.local:
+            return self.local[key]
+        if key in self.removed:
+            raise KeyError(key)
+        return self.parent[key]
+    
+    def __setitem__(self, key: str, value: PendingChange) -> None:
+        self.local[key] = value
+        self.removed.discard(key)
+    
+    def __delitem__(self, key: str) -> None:
+        in_parent = key not in self.removed and key in self.parent
+        if key not in self.local and not in_parent:
+            raise KeyError(key)
+        self.local.pop(key, None)
+        if in_parent:
+            self.removed.add(key)
+    
+    def __iter__(self) -> Iterator[str]:
+        yield from self.local
+        for key in self.parent:
+            if key not in self.local and key not in self.removed:
+                yield key
+    
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+    
+    def clear(self) -> None:
+        self.local.clear()
+        self.removed = set(self.parent)
+    
+    @property
+    def touched(self) -> Set[str]:
+        """Пути, изменённые или удалённые в этом слое"""
+        return set(self.local) | self.removed
+
+
 class VirtualFileSystem:
     """
     Виртуальная файловая система с поддержкой pending changes.
@@ -231,6 +285,9 @@ class VirtualFileSystem:
         # Cache for Python files list
         self._python_files_cache: Optional[List[str]] = None
         
+        # Родительская VFS, если это overlay из fork()
+        self._parent: Optional["VirtualFileSystem"] = None
+        
         logger.info(f"VirtualFileSystem initialized: {self.project_root}")
     
     # ========================================================================
@@ -432,9 +489,71 @@ class VirtualFileSystem:
         
         return len(to_remove)
 
+    # ========================================================================
+    # COPY-ON-WRITE OVERLAYS
+    # ========================================================================
+    
+    def fork(self) -> "VirtualFileSystem":
+        """
+        Copy-on-write overlay поверх этой VFS (O(1), без копирования staging).
+        
+        Стейджинг в overlay не виден родителю, пока не вызван commit_overlay();
+        discard_overlay() отбрасывает слой. Overlay можно форкать дальше.
+        Используется, чтобы "попробовать" изменения (кандидаты генератора)
+        без мутации и отката общего состояния.
+        
+        Example:
+            >>> trial = vfs.fork()
+            >>> trial.stage_change("app/main.py", candidate_code)
+            >>> if ok: trial.commit_overlay()   # иначе просто отбросить trial
+        """
+        clone = VirtualFileSystem.__new__(VirtualFileSystem)
+        clone.project_root = self.project_root
+        clone._pending_changes = ChangeOverlay(self._pending_changes)
+        clone._affected_cache = None
+        clone._python_files_cache = self._python_files_cache
+        clone._parent = self
+        return clone
+    
+    @property
+    def is_overlay(self) -> bool:
+        return self._parent is not None
     
- 
+    def commit_overlay(self) -> List[str]:
+        """
+        Переносит изменения overlay в родительскую VFS, слой становится пустым.
+        
+        Returns:
+            Пути, изменённые в родителе (застейдженные или снятые)
+        """
+        if self._parent is None:
+            raise ValueError("commit_overlay() called on a root VirtualFileSystem")
+        layer: ChangeOverlay = self._pending_changes
+        parent_changes = self._parent._pending_changes
+        for path in layer.removed:
+            parent_changes.pop(path, None)
+        parent_changes.update(layer.local)
+        touched = sorted(layer.touched)
+        
+        self._pending_changes = ChangeOverlay(parent_changes)
+        self._parent.invalidate_cache()
+        self.invalidate_cache()
+        logger.info(f"Committed overlay to parent VFS ({len(touched)} files)")
+        return touched
     
+    def discard_overlay(self) -> int:
+        """Отбрасывает изменения overlay. Returns: количество отброшенных путей"""
+        if self._parent is None:
+            raise ValueError("discard_overlay() called on a root VirtualFileSystem")
+        count = len(self._pending_changes.touched)
+        self._pending_changes = ChangeOverlay(self._parent._pending_changes)
+        self.invalidate_cache()
+        return count
+    
+    # ========================================================================
+    # STAGING QUERIES
+    # ========================================================================
+
     def get_staged_files(self) -> List[str]:
         """Возвращает список файлов в staging"""
         return list(self._pending_changes.keys())
@@ -1044,32 +1163,15 @@ class VirtualFileSystem:
         Returns:
             Set нормализованных имён пакетов (lowercase, - → _)
         """
-        import subprocess
-        import json
         import logging
+        from app.services.environment_inventory import get_environment_inventory
 
         packages = set()
         python_path = self.get_project_python()
         
         try:
-            result = subprocess.run(
-                [python_path, "-m", "pip", "list", "--format=json"],
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='replace',
-                timeout=30
-            )
-            
-            if result.returncode == 0:
-                pip_list = json.loads(result.stdout)
-                for pkg in pip_list:
-                    name = pkg.get('name', '')
-                    if name:
-                        name_lower = name.lower()
-                        packages.add(name_lower)
-                        packages.add(name_lower.replace('-', '_'))
-                        
+            # dist-info метаданные site-packages проекта, без `pip list`
+            packages = get_environment_inventory(python_path).package_names()
         except Exception as e:
             logging.getLogger(__name__).warning(f"Failed to get project pip packages: {e}")
             
@@ -1120,7 +1222,9 @@ class VirtualFileSystem:
         """
         Материализует VFS в целевую директорию.
         
-        Копирует все файлы проекта в target_dir, включая staged изменения.
+        Переносит все файлы проекта в target_dir через VFSMaterializer
+        (reflink вместо копирования, где ФС это поддерживает), включая
+        staged изменения.
         Staged файлы перезаписывают файлы из project_root.
         
         Args:
@@ -1130,61 +1234,14 @@ class VirtualFileSystem:
             Список записанных файлов
         """
         import subprocess
-        import site
+        from app.services.vfs_materializer import VFSMaterializer, LinkMode
         
-        target_path = Path(target_dir)
-        target_path.mkdir(parents=True, exist_ok=True)
-        
-        written_files = []
-        
-        # 1. Copy project_root, excluding staged files
-        staged_files = set(self.get_staged_files())
-        
-        for item in self.project_root.iterdir():
-            if item.name.startswith('.') or item.name in ('__pycache__', 'venv', '.venv'):
-                continue
-            
-            dest = target_path / item.name
-            
-            if item.is_dir():
-                def ignore_staged(directory, files):
-                    ignored = set()
-                    for f in files:
-                        full_path = Path(directory) / f
-                        try:
-                            rel_path = str(full_path.relative_to(self.project_root)).replace('\\', '/')
-                        except ValueError:
-                            continue
-                        
-                        if rel_path in staged_files:
-                            ignored.add(f)
-                        elif f in ('__pycache__', '.git', '.venv', 'venv') or f.endswith('.pyc'):
-                            ignored.add(f)
-                    
-                    return ignored
-                
-                shutil.copytree(item, dest, ignore=ignore_staged)
-            else:
-                rel_path = item.name
-                if rel_path not in staged_files:
-                    shutil.copy2(item, dest)
-        
-        # 2. Write all staged files
-        for file_path in staged_files:
-            content = self.read_file(file_path)
-            
-            if content is None:
-                change = self.get_change(file_path)
-                if change and change.is_deletion:
-                    continue
-                else:
-                    logger.warning(f"Staged file has no content: {file_path}")
-                    continue
-            
-            dest_path = target_path / file_path
-            dest_path.parent.mkdir(parents=True, exist_ok=True)
-            dest_path.write_text(content, encoding='utf-8')
-            written_files.append(file_path)
+        # 1-2. Неизменённые файлы переносятся reflink-ом (или копией),
+        # staged файлы записываются из VFS. Hardlink не используется:
+        # в этой директории выполняется код проекта (тесты), и запись
+        # в файл по месту изменила бы оригинал.
+        tree = VFSMaterializer(self, link_mode=LinkMode.REFLINK).materialize(target_dir=target_dir)
+        written_files = tree.written_files
         
         # 3. Create .pth file to ensure proper import resolution in the temp directory
         # This helps Python find modules when testing nested package structures
@@ -1446,26 +1503,21 @@ else:
             content = self.read_file(file_path)
         except FileNotFoundError:
             return dependencies
+        if content is None:
+            return dependencies
         
-        # Парсим AST для извлечения импортов
-        try:
-            tree = ast.parse(content)
-        except SyntaxError:
+        # Импорты из общего кэша разбора (AST + факты по хэшу содержимого)
+        from app.services.ast_cache import parse_python
+        parsed = parse_python(content)
+        if not parsed.ok:
             # Если синтаксис неверный — пробуем regex fallback
             return self._find_dependencies_regex(content)
         
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Import):
-                for alias in node.names:
-                    dep_path = self._module_to_path(alias.name)
-                    if dep_path:
-                        dependencies.add(dep_path)
-            
-            elif isinstance(node, ast.ImportFrom):
-                if node.module:
-                    dep_path = self._module_to_path(node.module)
-                    if dep_path:
-                        dependencies.add(dep_path)
+        for fact in parsed.imports:
+            if fact.module:
+                dep_path = self._module_to_path(fact.module)
+                if dep_path:
+                    dependencies.add(dep_path)
         
         return dependencies
     
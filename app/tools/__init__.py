@@ -14,7 +14,7 @@ from app.tools.tool_definitions import (
     SEARCH_CODE_TOOL,
     WEB_SEARCH_TOOL,
 )
-from app.tools.tool_executor import execute_tool, ToolExecutor
+from app.tools.tool_executor import execute_tool, ToolExecutor, run_tool_batch
 from app.tools.read_file import read_file_tool
 from app.tools.search_code import search_code_tool
 from app.tools.web_search import web_search_tool
@@ -28,6 +28,7 @@ __all__ = [
     # Executor
     "execute_tool",
     "ToolExecutor",
+    "run_tool_batch",
     # Individual tools
     "read_file_tool",
     "search_code_tool",
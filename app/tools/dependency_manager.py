@@ -1071,31 +1071,24 @@ class DependencyManager:
         if self._installed_cache is not None and not refresh:
             return self._installed_cache
         
+        from app.services.environment_inventory import get_environment_inventory
+        
         packages = {}
         
         try:
-            result = subprocess.run(
-                [self._python_path, "-m", "pip", "list", "--format=json"],
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='replace',
-                timeout=30,
-            )
-            
-            if result.returncode == 0:
-                pip_list = json.loads(result.stdout)
-                for pkg in pip_list:
-                    name = pkg.get("name", "")
-                    version = pkg.get("version", "")
-                    # Нормализуем имя
-                    normalized = name.lower().replace("-", "_")
-                    packages[normalized] = PackageInfo(
-                        name=name,
-                        version=version,
-                    )
-                    # Также добавляем оригинальное имя
-                    packages[name.lower()] = packages[normalized]
+            # dist-info метаданные окружения (общий с валидатором кэш, без pip)
+            inventory = get_environment_inventory(self._python_path, refresh=refresh)
+            for dist in inventory.distributions.values():
+                name = dist.name
+                # Нормализуем имя
+                normalized = name.lower().replace("-", "_")
+                packages[normalized] = PackageInfo(
+                    name=name,
+                    version=dist.version,
+                    location=dist.location,
+                )
+                # Также добавляем оригинальное имя
+                packages[name.lower()] = packages[normalized]
                     
         except Exception as e:
             logger.error(f"Failed to list packages: {e}")
@@ -2592,24 +2585,16 @@ def list_installed_packages_tool(
         xml_lines.append(f'  <language name="{lang}">')
 
         if lang == "python":
-            # --- Python: use pip list ---
+            # --- Python: dist-info inventory of the environment (no pip subprocess) ---
+            from app.services.environment_inventory import get_environment_inventory
             packages = []
             effective_python = python_path or sys.executable
             try:
-                result = subprocess.run(
-                    [effective_python, "-m", "pip", "list", "--format=json"],
-                    capture_output=True,
-                    text=True,
-                    encoding='utf-8',
-                    errors='replace',
-                    timeout=30
-                )
-                if result.returncode == 0:
-                    pip_list = json.loads(result.stdout)
-                    packages = [
-                        {"name": pkg.get("name", ""), "version": pkg.get("version", "")}
-                        for pkg in pip_list
-                    ]
+                inventory = get_environment_inventory(effective_python)
+                packages = [
+                    {"name": dist.name, "version": dist.version}
+                    for dist in sorted(inventory.distributions.values(), key=lambda d: d.name.lower())
+                ]
             except Exception as e:
                 logger.warning(f"Failed to list Python packages: {e}")
             for pkg in packages:
@@ -6,7 +6,7 @@ Features:
 - Full file content with metadata
 - Optional line numbers
 - XML wrapper for proper formatting
-- Token counting
+- Token counting (only on the returned window for large files)
 - File type detection
 """
 
@@ -14,15 +14,19 @@ from __future__ import annotations
 import os
 import logging
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
 from app.services.tree_sitter_parser import MultiLanguageParser
 from app.utils.xml_wrapper import XMLWrapper, FileContent
 from app.utils.token_counter import TokenCounter
 from app.utils.file_types import FileTypeDetector
+from app.utils.file_range_reader import get_file_range_reader
 
 logger = logging.getLogger(__name__)
 
+# Lines per range read when a file may exceed the token budget
+_READ_BATCH_LINES = 500
+
 
 @dataclass
 class ReadFileResult:
@@ -88,31 +92,19 @@ def read_file_tool(
     if not full_path.is_file():
         return _format_error(f"Not a file: {file_path}")
     
-    # Read file
-    try:
-        content = full_path.read_text(encoding="utf-8")
-    except UnicodeDecodeError:
-        # Try with latin-1 fallback
-        try:
-            content = full_path.read_text(encoding="latin-1")
-        except Exception as e:
-            return _format_error(f"Cannot read file (encoding error): {e}")
-    except Exception as e:
-        return _format_error(f"Error reading file: {e}")
-    
     # Detect file type
     detector = FileTypeDetector()
     file_type = detector.detect(str(full_path))
     
-    # Count tokens
+    # Read file (token-budgeted: tokens are counted on the returned window only)
     counter = TokenCounter()
-    tokens = counter.count(content)
+    try:
+        content, tokens, truncated = _read_within_token_budget(full_path, max_tokens, counter)
+    except Exception as e:
+        return _format_error(f"Error reading file: {e}")
     
-    # Check token limit
-    if tokens > max_tokens:
-        logger.warning(f"File {file_path} exceeds token limit ({tokens} > {max_tokens}), truncating")
-        content = _truncate_to_tokens(content, max_tokens, counter)
-        tokens = max_tokens
+    if truncated:
+        logger.warning(f"File {file_path} exceeds token limit ({max_tokens}), truncating")
     
     # Count lines
     lines = content.count('\n') + 1
@@ -263,6 +255,7 @@ def read_code_chunk_tool(file_path: str, chunk_name: str, project_dir: str, inde
     try:
         if file_type == "python":
             # Use existing SmartPythonChunker for Python files
+            from app.services.python_chunker import SmartPythonChunker
             chunker = SmartPythonChunker(TokenCounter())
             tree = chunker.chunk_file_to_tree(str(full_path))
             
@@ -343,6 +336,63 @@ def _add_line_numbers(content: str) -> str:
     return '\n'.join(numbered)
 
 
+def _read_within_token_budget(
+    full_path: Path,
+    max_tokens: int,
+    counter: TokenCounter,
+) -> Tuple[str, int, bool]:
+    """
+    Read file content up to max_tokens without loading/counting the whole file.
+    
+    Small files (byte size <= max_tokens, i.e. can't exceed the budget since
+    every BPE token covers at least one byte) are read as before. Larger files
+    are read in line batches via the range reader, and tokens are counted
+    only for the lines that end up in the result.
+    
+    Returns:
+        (content, tokens, truncated)
+    """
+    if full_path.stat().st_size <= max_tokens:
+        try:
+            content = full_path.read_text(encoding="utf-8")
+        except UnicodeDecodeError:
+            content = full_path.read_text(encoding="latin-1")
+        return content, counter.count(content), False
+    
+    reader = get_file_range_reader()
+    total_lines = reader.line_count(str(full_path))
+    
+    result_lines: List[str] = []
+    current_tokens = 0
+    line_no = 1
+    truncated = False
+    
+    while line_no <= total_lines:
+        batch = reader.read_lines(str(full_path), line_no, line_no + _READ_BATCH_LINES - 1)
+        batch_tokens = counter.count('\n'.join(batch))
+        
+        if current_tokens + batch_tokens <= max_tokens:
+            result_lines.extend(batch)
+            current_tokens += batch_tokens
+            line_no += len(batch)
+            continue
+        
+        # Batch overflows the budget - add line by line (as _truncate_to_tokens)
+        for line in batch:
+            line_tokens = counter.count(line)
+            if current_tokens + line_tokens > max_tokens:
+                break
+            result_lines.append(line)
+            current_tokens += line_tokens
+        truncated = True
+        break
+    
+    if truncated:
+        result_lines.append("... [truncated due to token limit] ...")
+    
+    return '\n'.join(result_lines), current_tokens, truncated
+
+
 def _truncate_to_tokens(content: str, max_tokens: int, counter: TokenCounter) -> str:
     """Truncate content to approximately max_tokens"""
     lines = content.split('\n')
@@ -6,6 +6,8 @@ from pathlib import Path
 from typing import Optional, Any
 import logging
 
+from app.utils.file_range_reader import get_file_range_reader
+
 logger = logging.getLogger(__name__)
 
 def _escape_xml(text: str) -> str:
@@ -41,7 +43,8 @@ def read_line_context_tool(
 ) -> str:
     """
     Shows context lines around a specific line number or text pattern in a file.
-    Resolves content through VFS first, then disk.
+    Resolves content through VFS first, then disk. Disk files are read by
+    line range via the cached line-offset index, so only the window is loaded.
     """
     # Security check: prevent path traversal
     if ".." in file_path or file_path.startswith("/"):
@@ -50,53 +53,64 @@ def read_line_context_tool(
   <message>Invalid file path: {file_path}. Path must be relative to project root and cannot contain '..'.</message>
 </error>"""
 
-    # VFS-first resolution
+    # Validation
+    if line_number is None and pattern is None:
+        return f"""<!-- ERROR -->
+<error>
+  <message>Either 'line_number' or 'pattern' must be provided.</message>
+</error>"""
+
+    # VFS-first resolution: staged content is already in memory,
+    # unstaged files are read by line range from disk
     content = None
     source = "disk"
     if virtual_fs is not None:
-        content = virtual_fs.read_file(file_path)
-        if content is not None:
-            source = "VFS"
-
-    if content is None:
+        if hasattr(virtual_fs, "get_change"):
+            change = virtual_fs.get_change(file_path)
+            if change is not None:
+                if change.is_deletion:
+                    return f"""<!-- ERROR -->
+<error>
+  <message>File not found: {file_path}. Check the path and try again.</message>
+</error>"""
+                content = change.new_content
+                source = "VFS"
+            if not project_dir:
+                project_dir = str(getattr(virtual_fs, "project_root", ""))
+        else:
+            content = virtual_fs.read_file(file_path)
+            if content is not None:
+                source = "VFS"
+
+    if content is not None:
+        lines = content.splitlines()
+        total_lines = len(lines)
+        fetch = lambda lo, hi: lines[lo:hi]
+        find = lambda: next((i for i, line in enumerate(lines) if pattern in line), -1)
+    else:
         full_path = Path(project_dir) / file_path
-        if not full_path.exists():
+        if not full_path.is_file():
             return f"""<!-- ERROR -->
 <error>
   <message>File not found: {file_path}. Check the path and try again.</message>
 </error>"""
+        reader = get_file_range_reader()
         try:
-            content = full_path.read_text(encoding='utf-8')
-        except UnicodeDecodeError:
-            try:
-                content = full_path.read_text(encoding='latin-1')
-            except Exception as e:
-                return f"""<!-- ERROR -->
-<error>
-  <message>Failed to read file {file_path}: {str(e)}</message>
-</error>"""
+            total_lines = reader.line_count(str(full_path))
         except Exception as e:
             return f"""<!-- ERROR -->
 <error>
   <message>Failed to read file {file_path}: {str(e)}</message>
 </error>"""
+        fetch = lambda lo, hi: reader.read_lines(str(full_path), lo + 1, hi)
+        find = lambda: (reader.find_line(str(full_path), pattern) or 0) - 1
 
-    if not content:
+    if total_lines == 0:
         return f"""<!-- ERROR -->
 <error>
   <message>File is empty: {file_path}</message>
 </error>"""
 
-    lines = content.splitlines()
-    total_lines = len(lines)
-
-    # Validation
-    if line_number is None and pattern is None:
-        return f"""<!-- ERROR -->
-<error>
-  <message>Either 'line_number' or 'pattern' must be provided.</message>
-</error>"""
-
     # Target line determination
     target_idx = -1
     if line_number is not None:
@@ -107,10 +121,7 @@ def read_line_context_tool(
 </error>"""
         target_idx = line_number - 1
     elif pattern is not None:
-        for i, line in enumerate(lines):
-            if pattern in line:
-                target_idx = i
-                break
+        target_idx = find()
         if target_idx == -1:
             return f"""<!-- ERROR -->
 <error>
@@ -123,17 +134,22 @@ def read_line_context_tool(
         note = f"<!-- Note: Invalid direction '{direction}' provided. Falling back to 'after'. -->\n"
         direction = "after"
 
-    # Extract context
-    before_indices = []
-    after_indices = []
+    # Extract context (only the window is read)
+    window_start = target_idx
+    window_end = target_idx + 1
 
     if direction in ["before", "both"]:
-        start = max(0, target_idx - context_lines)
-        before_indices = list(range(start, target_idx))
+        window_start = max(0, target_idx - context_lines)
 
     if direction in ["after", "both"]:
-        end = min(total_lines, target_idx + context_lines + 1)
-        after_indices = list(range(target_idx + 1, end))
+        window_end = min(total_lines, target_idx + context_lines + 1)
+
+    window = fetch(window_start, window_end)
+    before_indices = list(range(window_start, target_idx))
+    after_indices = list(range(target_idx + 1, window_start + len(window)))
+
+    def line_at(idx: int) -> str:
+        return window[idx - window_start]
 
     # Build XML
     source_label = "VFS (staged)" if source == "VFS" else "disk"
@@ -142,14 +158,14 @@ def read_line_context_tool(
 
     # Before context
     for idx in before_indices:
-        xml_output.append(f'  <context line="{idx + 1}">{_escape_xml(lines[idx])}</context>')
+        xml_output.append(f'  <context line="{idx + 1}">{_escape_xml(line_at(idx))}</context>')
 
     # Target
-    xml_output.append(f'  <target line="{target_idx + 1}">{_escape_xml(lines[target_idx])}</target>')
+    xml_output.append(f'  <target line="{target_idx + 1}">{_escape_xml(line_at(target_idx))}</target>')
 
     # After context
     for idx in after_indices:
-        xml_output.append(f'  <context line="{idx + 1}">{_escape_xml(lines[idx])}</context>')
+        xml_output.append(f'  <context line="{idx + 1}">{_escape_xml(line_at(idx))}</context>')
 
     xml_output.append('</line_context>')
 
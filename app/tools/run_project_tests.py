@@ -12,6 +12,10 @@ Features:
 - Timeout protection (default 30 sec, max 60 sec)
 - Output limited to 2000 chars
 - Returns structured XML result for Orchestrator parsing
+- Reuses passing results while the test's import closure is unchanged
+- run_affected_tests(): runs only tests whose import closure touches the diff
+- Shards test cases across worker processes (one per core, balanced by
+  recorded per-test durations) and merges them into one TestResult
 
 Integration with VirtualFileSystem:
 - Uses VFS.read_file() for automatic overlay of staged changes
@@ -34,6 +38,14 @@ Usage Example:
         timeout_sec=30
     )
     # result is XML string with test results
+    
+    # Only tests whose imports reach the staged changes
+    result = run_affected_tests(project_dir, vfs)
+
+Result caching (see app/services/test_impact.py):
+- Cache key = test target + hash of the test file's transitive import
+  closure (project files, staged content) + interpreter/installed packages
+- Only fully passing runs are cached; failures always re-run
 """
 
 from __future__ import annotations
@@ -45,12 +57,15 @@ import logging
 import os
 import re
 import sys
+import json
+import threading
 from pathlib import Path
-from typing import Optional, Dict, Any, List, Set, TYPE_CHECKING
-from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Set, Union, TYPE_CHECKING
+from dataclasses import dataclass, asdict
 
 if TYPE_CHECKING:
     from app.services.virtual_fs import VirtualFileSystem
+    from app.services.test_impact import TestImpactEngine, TestDurationStore
 
 logger = logging.getLogger(__name__)
 
@@ -72,6 +87,13 @@ MAX_TIMEOUT_SEC = 60
 # Maximum characters in test output (truncated if exceeded)
 MAX_OUTPUT_CHARS = 2000
 
+# Upper bound on parallel unittest worker processes (shards)
+MAX_TEST_SHARDS = 8
+
+# Don't shard until recorded durations say the whole target takes this long:
+# discovery and extra interpreter start-ups would cost more than they save
+MIN_SHARDED_DURATION_SEC = 2.0
+
 # Directories to skip when copying project files to temp environment
 # These are typically generated files, caches, or virtual environments
 SKIP_DIRS = {
@@ -152,6 +174,8 @@ def run_project_tests(
     virtual_fs: Optional['VirtualFileSystem'] = None,
     chunk_name: Optional[str] = None,
     timeout_sec: int = DEFAULT_TIMEOUT_SEC,
+    use_cache: bool = True,
+    shards: Optional[int] = None,
 ) -> str:
     """
     Run unittest tests for analysis purposes.
@@ -162,6 +186,14 @@ def run_project_tests(
     
     Tests are executed on VirtualFileSystem staged files, NOT real files.
     This allows testing code changes before committing them to disk.
+    
+    With a VFS and use_cache=True, a passing result is returned from the
+    result cache (no subprocess) when neither the test file nor anything
+    in its import closure changed since the last passing run.
+    
+    shards: number of parallel unittest workers (None = one per CPU core,
+    up to MAX_TEST_SHARDS; 1 = single process). A class/method target
+    (chunk_name) always runs in a single process.
     """
     import time
     start_time = time.time()
@@ -180,15 +212,28 @@ def run_project_tests(
             )
         
         # Get Python interpreter from project's venv
-        python_path = None
-        if virtual_fs is not None:
-            try:
-                python_path = virtual_fs.get_project_python()
-            except Exception as e:
-                logger.warning("Could not get project Python: %s", e)
-                python_path = sys.executable
+        python_path = _get_project_python(virtual_fs)
+        
+        # Convert file path to module name
+        # e.g., "tests/test_module.py" -> "tests.test_module"
+        module_name = _path_to_module(test_path)
+        
+        # Build test target
+        if chunk_name:
+            test_target = f"{module_name}.{chunk_name}"
         else:
-            python_path = sys.executable
+            test_target = module_name
+        
+        # Reuse a passing result if the import closure is unchanged
+        impact: Optional['TestImpactEngine'] = None
+        cache_key: Optional[str] = None
+        if use_cache and virtual_fs is not None:
+            impact, cache_key = _get_cache_key(virtual_fs, python_path, test_path, test_target)
+            cached = impact.lookup(cache_key) if impact is not None else None
+            if cached is not None:
+                result = _result_from_cache(cached, (time.time() - start_time) * 1000)
+                logger.info("Test result cache hit: %s (import closure unchanged)", test_target)
+                return _format_result_xml(result, test_path, chunk_name, cached=True)
         
         # Create temporary directory for test execution
         with tempfile.TemporaryDirectory(prefix='test_') as temp_dir:
@@ -222,16 +267,6 @@ def run_project_tests(
                     f"Test file not found: {test_path} (in {temp_dir})"
                 )
             
-            # Convert file path to module name
-            # e.g., "tests/test_module.py" -> "tests.test_module"
-            module_name = test_path[:-3].replace('/', '.').replace('\\', '.')
-            
-            # Build test target
-            if chunk_name:
-                test_target = f"{module_name}.{chunk_name}"
-            else:
-                test_target = module_name
-            
             logger.info("Test target: %s", test_target)
             
             # Execute unittest with project's Python interpreter
@@ -240,6 +275,9 @@ def run_project_tests(
                 test_target=test_target,
                 timeout_sec=timeout_sec,
                 python_path=python_path,
+                # Один класс/метод делить не на что
+                shards=1 if chunk_name else shards,
+                project_dir=project_dir,
             )
             
             # Add execution metadata
@@ -258,13 +296,267 @@ def run_project_tests(
                 result.execution_time_ms,
             )
             
+            if impact is not None and _is_cacheable(result):
+                impact.record(cache_key, _result_to_cache(result), test_path)
+            
             # Format and return result
-            return _format_result(result)
+            return _format_result_xml(result, test_path, chunk_name)
     
     except Exception as e:
         logger.error("Unexpected error in run_project_tests: %s", e, exc_info=True)
         return _format_error(f"Unexpected error: {e}")
 
+
+def run_affected_tests(
+    project_dir: str,
+    virtual_fs: 'VirtualFileSystem',
+    timeout_sec: int = DEFAULT_TIMEOUT_SEC,
+    changed_files: Optional[List[str]] = None,
+    use_cache: bool = True,
+    shards: Optional[int] = None,
+) -> str:
+    """
+    Run only the test modules a VFS diff can affect.
+    
+    Test files (test_*.py / *_test.py) are mapped to the project modules
+    they import transitively. A test module is selected when its import
+    closure contains a changed file. Selected modules with a cached passing
+    result for the current closure are not re-run; the rest run in one
+    unittest invocation.
+    
+    Args:
+        project_dir: Path to the project root
+        virtual_fs: VirtualFileSystem with staged changes
+        timeout_sec: Timeout for the unittest run (capped at MAX_TIMEOUT_SEC)
+        changed_files: Files to treat as changed (default: staged .py files)
+        use_cache: Reuse/store passing results by import-closure hash
+        shards: Parallel unittest workers (None = one per CPU core)
+    
+    Returns:
+        XML string in the same format as run_project_tests(), with an
+        additional <impact> section listing selected/cached/skipped modules
+    """
+    import time
+    start_time = time.time()
+    
+    timeout_sec = min(timeout_sec, MAX_TIMEOUT_SEC)
+    
+    try:
+        from app.services.test_impact import TestImpactEngine
+        
+        python_path = _get_project_python(virtual_fs)
+        impact = TestImpactEngine(virtual_fs, python_path)
+        selection = impact.select_affected(changed_files)
+        
+        # Split selected modules into cached passes and modules to run
+        to_run: List[str] = []
+        keys: Dict[str, Optional[str]] = {}
+        cached: Dict[str, Dict[str, Any]] = {}
+        for test_path in selection.affected:
+            module_name = _path_to_module(test_path)
+            key = impact.cache_key(test_path, module_name) if use_cache else None
+            hit = impact.lookup(key)
+            if hit is not None:
+                cached[test_path] = hit
+            else:
+                to_run.append(test_path)
+                keys[test_path] = key
+        
+        logger.info(
+            "Test impact: %d changed files -> %d of %d test modules affected "
+            "(%d cached, %d to run)",
+            len(selection.changed), len(selection.affected),
+            len(selection.affected) + len(selection.unaffected),
+            len(cached), len(to_run),
+        )
+        
+        if to_run:
+            with tempfile.TemporaryDirectory(prefix='test_') as temp_dir:
+                try:
+                    virtual_fs.materialize_to_directory(temp_dir)
+                except Exception as e:
+                    logger.error("Failed to materialize VFS: %s", e, exc_info=True)
+                    return _format_error(f"Failed to materialize project files: {e}")
+                
+                result = _execute_unittest(
+                    temp_dir=temp_dir,
+                    test_target=[_path_to_module(p) for p in to_run],
+                    timeout_sec=timeout_sec,
+                    python_path=python_path,
+                    shards=shards,
+                    project_dir=project_dir,
+                )
+            
+            if use_cache:
+                _record_module_passes(impact, result, to_run, keys)
+        else:
+            result = TestResult(
+                success=True,
+                tests_run=0,
+                tests_passed=0,
+                tests_failed=0,
+                tests_errors=0,
+                test_output=(
+                    "No affected tests to run."
+                    if not cached else
+                    "All affected test modules have cached passing results."
+                ),
+                failed_tests=[],
+                execution_time_ms=0,
+            )
+        
+        result.execution_time_ms = (time.time() - start_time) * 1000
+        
+        return _format_result_xml(
+            result,
+            test_path="<affected tests>",
+            chunk_name=f"{len(to_run)} of {len(selection.affected)} affected modules",
+            extra_xml=_format_impact_xml(selection, to_run, cached),
+        )
+    
+    except Exception as e:
+        logger.error("Unexpected error in run_affected_tests: %s", e, exc_info=True)
+        return _format_error(f"Unexpected error: {e}")
+
+
+# ============================================================================
+# TEST IMPACT AND RESULT CACHE
+# ============================================================================
+
+def _get_project_python(virtual_fs: Optional['VirtualFileSystem']) -> str:
+    """Project venv interpreter, or the current one without VFS."""
+    if virtual_fs is None:
+        return sys.executable
+    try:
+        return virtual_fs.get_project_python()
+    except Exception as e:
+        logger.warning("Could not get project Python: %s", e)
+        return sys.executable
+
+
+def _get_cache_key(
+    virtual_fs: 'VirtualFileSystem',
+    python_path: str,
+    test_path: str,
+    test_target: str,
+):
+    """
+    Build the impact engine and cache key for one test target.
+    
+    Returns:
+        (engine, key) - (None, None) if the import graph can't be built
+    """
+    try:
+        from app.services.test_impact import TestImpactEngine
+        impact = TestImpactEngine(virtual_fs, python_path)
+        return impact, impact.cache_key(test_path, test_target)
+    except Exception as e:
+        logger.debug("Test result cache unavailable: %s", e)
+        return None, None
+
+
+def _is_cacheable(result: TestResult) -> bool:
+    """Only clean passing runs are cached - failures must always re-run."""
+    return result.success and result.tests_run > 0 and not result.error_message
+
+
+def _result_to_cache(result: TestResult) -> Dict[str, Any]:
+    return asdict(result)
+
+
+def _result_from_cache(data: Dict[str, Any], elapsed_ms: float) -> TestResult:
+    fields = {name: data.get(name) for name in TestResult.__dataclass_fields__}
+    original_ms = fields.get('execution_time_ms') or 0
+    fields['failed_tests'] = fields.get('failed_tests') or []
+    fields['test_output'] = (
+        "[cached result: test and its imports unchanged since the last passing run "
+        "(" + str(int(original_ms)) + "ms)]\n" + (fields.get('test_output') or "")
+    )
+    fields['execution_time_ms'] = elapsed_ms
+    return TestResult(**fields)
+
+
+# "test_name (module.Class[.test_name])" [+ docstring line] " ... status"
+_VERBOSE_STATUS_RE = re.compile(
+    r'^\w+ \(([\w.]+)\)\n?(?:[^\n]*?) \.\.\. (ok|skipped|expected failure|FAIL|ERROR|unexpected success)',
+    re.MULTILINE,
+)
+
+
+def _record_module_passes(
+    impact: 'TestImpactEngine',
+    result: TestResult,
+    test_paths: List[str],
+    keys: Dict[str, Optional[str]],
+) -> None:
+    """
+    Cache each test module of a combined run that passed on its own.
+    
+    A module counts as passed when it has at least one passing test and
+    no failed/errored test in the verbose output.
+    """
+    if result.error_message:
+        return
+    
+    passed: Dict[str, int] = {}
+    broken: Set[str] = set()
+    for match in _VERBOSE_STATUS_RE.finditer(result.test_output):
+        test_id, status = match.group(1), match.group(2)
+        for test_path in test_paths:
+            module_name = _path_to_module(test_path)
+            if test_id == module_name or test_id.startswith(module_name + '.'):
+                if status in ('FAIL', 'ERROR', 'unexpected success'):
+                    broken.add(test_path)
+                else:
+                    passed[test_path] = passed.get(test_path, 0) + 1
+                break
+    
+    for failed in result.failed_tests:
+        for test_path in test_paths:
+            if failed['name'].startswith(_path_to_module(test_path) + '.'):
+                broken.add(test_path)
+    
+    # Truncated output may hide some statuses - trust only complete output
+    if '[truncated' in result.test_output and not result.success:
+        return
+    
+    for test_path, count in passed.items():
+        if test_path in broken:
+            continue
+        impact.record(
+            keys.get(test_path),
+            asdict(TestResult(
+                success=True,
+                tests_run=count,
+                tests_passed=count,
+                tests_failed=0,
+                tests_errors=0,
+                test_output="",
+                failed_tests=[],
+                execution_time_ms=result.execution_time_ms,
+            )),
+            test_path,
+        )
+
+
+def _format_impact_xml(selection, to_run: List[str], cached: Dict[str, Dict[str, Any]]) -> str:
+    """<impact> section for run_affected_tests."""
+    def items(tag: str, paths: List[str]) -> str:
+        if not paths:
+            return '    <' + tag + '/>\n'
+        inner = ''.join('      <module>' + _escape_xml(p) + '</module>\n' for p in paths)
+        return '    <' + tag + '>\n' + inner + '    </' + tag + '>\n'
+    
+    return (
+        '\n  <impact>\n'
+        '    <changed_files>' + str(len(selection.changed)) + '</changed_files>\n'
+        + items('executed', to_run)
+        + items('cached', sorted(cached))
+        + '    <unaffected>' + str(len(selection.unaffected)) + '</unaffected>\n'
+        '  </impact>'
+    )
+
+
 # ============================================================================
 # TEST ENVIRONMENT MANAGEMENT
 # ============================================================================
@@ -342,8 +634,15 @@ def _create_test_environment(
     temp_dir = tempfile.mkdtemp(prefix="ai_test_")
     
     try:
-        if virtual_fs is not None and hasattr(virtual_fs, 'read_file'):
-            # VFS is available - use it for overlay
+        if virtual_fs is not None and hasattr(virtual_fs, 'get_staged_files'):
+            # VFS is available - link unmodified files, write staged overlay
+            # Tests execute project code, so no hardlinks (reflink or copy only)
+            from app.services.vfs_materializer import VFSMaterializer, LinkMode
+            VFSMaterializer(
+                virtual_fs, link_mode=LinkMode.REFLINK, skip_dirs=SKIP_DIRS
+            ).materialize(target_dir=temp_dir)
+        elif virtual_fs is not None and hasattr(virtual_fs, 'read_file'):
+            # VFS-like object without staging API - copy via read_file overlay
             _copy_from_vfs(virtual_fs, project_dir, temp_dir)
         else:
             # No VFS - copy real files only (fallback mode)
@@ -605,9 +904,11 @@ def _path_to_module(test_path: str) -> str:
 
 def _execute_unittest(
     temp_dir: str,
-    test_target: str,
+    test_target: Union[str, List[str]],
     timeout_sec: int,
     python_path: Optional[str] = None,
+    shards: Optional[int] = None,
+    project_dir: Optional[str] = None,
 ) -> TestResult:
     """
     Execute unittest in subprocess.
@@ -618,11 +919,21 @@ def _execute_unittest(
     - Timeout protection
     - Output capture (stdout + stderr)
     
+    With more than one shard, test cases are split across parallel worker
+    processes (see _execute_sharded) once durations recorded by earlier
+    runs show the targets are worth splitting; otherwise, or if discovery
+    fails, the targets run in a single process. Both paths record per-test
+    durations for the next decision, per project (see TestDurationStore).
+    
     Args:
         temp_dir: Temporary directory with project files
-        test_target: Test specification (module, class, or method)
+        test_target: Test specification (module, class, or method),
+                     or a list of them to run in one process
         timeout_sec: Maximum execution time in seconds
         python_path: Path to Python interpreter (defaults to sys.executable)
+        shards: Number of worker processes (None = one per CPU core)
+        project_dir: Project whose recorded durations drive sharding
+                     (None = no history: always a single process)
     
     Returns:
         TestResult with parsed output
@@ -631,32 +942,46 @@ def _execute_unittest(
     if python_path is None:
         python_path = sys.executable
     
-    # Build command
-    cmd = [
-        python_path, '-m', 'unittest',
-        test_target,
-        '-v',  # Verbose output for better parsing
-    ]
+    targets = [test_target] if isinstance(test_target, str) else list(test_target)
+    store = _get_duration_store(project_dir) if project_dir else None
+    
+    shard_count = _resolve_shard_count(shards)
+    if shard_count > 1 and store is not None and _sharding_worthwhile(targets, store.snapshot()):
+        import time
+        started = time.monotonic()
+        sharded = _execute_sharded(temp_dir, targets, timeout_sec, python_path, shard_count, store)
+        if sharded is not None:
+            return sharded
+        # Discovery already spent part of the budget
+        timeout_sec = max(1, int(timeout_sec - (time.monotonic() - started)))
     
-    logger.info("Running: %s in %s", ' '.join(cmd), temp_dir)
+    # Same verbose output as `python -m unittest -v`, plus per-test timings
+    cmd = [python_path, '-c', _SHARD_RUNNER_SCRIPT]
+    
+    logger.info("Running: unittest %s in %s", ' '.join(targets), temp_dir)
     
     try:
         # Set up environment
-        env = os.environ.copy()
-        env['PYTHONPATH'] = temp_dir  # Allow imports from temp dir
-        env['PYTHONDONTWRITEBYTECODE'] = '1'  # Don't create __pycache__
+        env = _unittest_env(temp_dir)
         
-        # Run in subprocess with timeout
-        result = subprocess.run(
-            cmd,
-            cwd=temp_dir,
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='replace',
-            timeout=timeout_sec,
-            env=env,
-        )
+        with tempfile.TemporaryDirectory(prefix='test_timing_') as work_dir:
+            ids_file = os.path.join(work_dir, "ids.json")
+            with open(ids_file, 'w', encoding='utf-8') as f:
+                json.dump(targets, f)
+            durations_file = os.path.join(work_dir, "durations.json")
+            
+            # Run in subprocess with timeout
+            result = subprocess.run(
+                [*cmd, ids_file, durations_file],
+                cwd=temp_dir,
+                capture_output=True,
+                text=True,
+                encoding='utf-8',
+                errors='replace',
+                timeout=timeout_sec,
+                env=env,
+            )
+            _record_durations(durations_file, store)
         
         # unittest writes to stderr, combine with stdout
         output = result.stdout + result.stderr
@@ -712,6 +1037,329 @@ def _execute_unittest(
         )
 
 
+def _unittest_env(temp_dir: str) -> Dict[str, str]:
+    """Environment for unittest subprocesses."""
+    env = os.environ.copy()
+    env['PYTHONPATH'] = temp_dir  # Allow imports from temp dir
+    env['PYTHONDONTWRITEBYTECODE'] = '1'  # Don't create __pycache__
+    return env
+
+
+# ============================================================================
+# SHARDED EXECUTION
+# ============================================================================
+
+# Lists test ids of the targets as JSON; load_errors=True when a module
+# failed to import (the regular run reports that better than shards would)
+_DISCOVER_SCRIPT = r'''
+import sys, json, unittest
+
+def _walk(suite):
+    for item in suite:
+        if isinstance(item, unittest.TestSuite):
+            yield from _walk(item)
+        else:
+            yield item
+
+suite = unittest.defaultTestLoader.loadTestsFromNames(sys.argv[1:])
+ids, load_errors = [], False
+for test in _walk(suite):
+    if type(test).__name__ in ("_FailedTest", "ModuleImportFailure", "_ErrorHolder"):
+        load_errors = True
+    ids.append(test.id())
+print("__SHARD_IDS__" + json.dumps({"ids": ids, "load_errors": load_errors}))
+'''
+
+# Runs the names from argv[1] (JSON file: test ids or module/class targets)
+# with the same verbose output as `python -m unittest -v` and writes
+# per-test durations to argv[2]
+_SHARD_RUNNER_SCRIPT = r'''
+import sys, json, time, unittest
+
+with open(sys.argv[1], encoding="utf-8") as f:
+    ids = json.load(f)
+durations = {}
+
+class _TimedResult(unittest.TextTestResult):
+    def startTest(self, test):
+        self._started = time.perf_counter()
+        super().startTest(test)
+
+    def stopTest(self, test):
+        super().stopTest(test)
+        durations[test.id()] = time.perf_counter() - self._started
+
+suite = unittest.defaultTestLoader.loadTestsFromNames(ids)
+result = unittest.TextTestRunner(verbosity=2, resultclass=_TimedResult).run(suite)
+with open(sys.argv[2], "w", encoding="utf-8") as f:
+    json.dump(durations, f)
+sys.exit(0 if result.wasSuccessful() else 1)
+'''
+
+# project dir -> its TestDurationStore (loaded once per process)
+_DURATION_STORES: Dict[str, 'TestDurationStore'] = {}
+_DURATION_STORES_LOCK = threading.Lock()
+
+
+def _get_duration_store(project_dir: str) -> 'TestDurationStore':
+    from app.services.test_impact import TestDurationStore
+    key = os.path.abspath(project_dir)
+    with _DURATION_STORES_LOCK:
+        store = _DURATION_STORES.get(key)
+        if store is None:
+            store = _DURATION_STORES[key] = TestDurationStore(key)
+        return store
+
+
+def _resolve_shard_count(shards: Optional[int]) -> int:
+    if shards is None:
+        shards = os.cpu_count() or 1
+    return max(1, min(shards, MAX_TEST_SHARDS))
+
+
+def _sharding_worthwhile(targets: List[str], durations: Dict[str, float]) -> bool:
+    """
+    True when recorded durations cover every target and show at least two
+    test classes and enough total time to split. Targets without a record
+    run unsharded first (which records them), so an unknown or single-class
+    target never pays for discovery.
+    """
+    known: Dict[str, float] = {}
+    for target in targets:
+        prefix = target + '.'
+        matched = {
+            test_id: seconds for test_id, seconds in durations.items()
+            if test_id == target or test_id.startswith(prefix)
+        }
+        if not matched:
+            return False
+        known.update(matched)
+    
+    classes = {test_id.rsplit('.', 1)[0] for test_id in known}
+    return len(classes) >= 2 and sum(known.values()) >= MIN_SHARDED_DURATION_SEC
+
+
+def _discover_test_ids(
+    temp_dir: str,
+    targets: List[str],
+    python_path: str,
+    timeout_sec: int,
+) -> Optional[List[str]]:
+    """Test ids of the targets, or None if they can't be loaded cleanly."""
+    try:
+        proc = subprocess.run(
+            [python_path, '-c', _DISCOVER_SCRIPT, *targets],
+            cwd=temp_dir,
+            capture_output=True,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            timeout=timeout_sec,
+            env=_unittest_env(temp_dir),
+        )
+    except (subprocess.TimeoutExpired, OSError) as e:
+        logger.debug("Test discovery failed: %s", e)
+        return None
+    
+    marker = proc.stdout.rfind('__SHARD_IDS__')
+    if proc.returncode != 0 or marker < 0:
+        return None
+    try:
+        data = json.loads(proc.stdout[marker + len('__SHARD_IDS__'):].strip())
+    except ValueError:
+        return None
+    if data.get('load_errors'):
+        return None
+    return data.get('ids') or None
+
+
+def _plan_shards(
+    test_ids: List[str],
+    shard_count: int,
+    durations: Dict[str, float],
+) -> List[List[str]]:
+    """
+    Split test ids into balanced shards.
+    
+    Tests of one TestCase class stay together (setUpClass runs once per
+    class). Classes are assigned longest-first to the least loaded shard
+    using recorded durations; unknown tests get the median known duration.
+    """
+    groups: Dict[str, List[str]] = {}
+    for test_id in test_ids:
+        groups.setdefault(test_id.rsplit('.', 1)[0], []).append(test_id)
+    
+    known = sorted(durations[t] for t in test_ids if t in durations)
+    default = known[len(known) // 2] if known else 1.0
+    
+    def cost(ids: List[str]) -> float:
+        return sum(durations.get(t, default) for t in ids)
+    
+    shard_count = min(shard_count, len(groups))
+    shards: List[List[str]] = [[] for _ in range(shard_count)]
+    loads = [0.0] * shard_count
+    for group in sorted(groups.values(), key=cost, reverse=True):
+        target = loads.index(min(loads))
+        shards[target].extend(group)
+        loads[target] += cost(group)
+    
+    return [shard for shard in shards if shard]
+
+
+def _execute_sharded(
+    temp_dir: str,
+    targets: List[str],
+    timeout_sec: int,
+    python_path: str,
+    shard_count: int,
+    store: 'TestDurationStore',
+) -> Optional[TestResult]:
+    """
+    Run the targets split across shard_count parallel unittest processes.
+    
+    Returns:
+        Merged TestResult, or None when the caller should run unsharded
+        (discovery failed or the discovered tests form fewer than two
+        test classes)
+    """
+    import time
+    started = time.monotonic()
+    
+    test_ids = _discover_test_ids(temp_dir, targets, python_path, timeout_sec)
+    if not test_ids:
+        return None
+    
+    plan = _plan_shards(test_ids, shard_count, store.snapshot())
+    if len(plan) < 2:
+        return None
+    
+    logger.info(
+        "Running %d tests in %d shards (%s)",
+        len(test_ids), len(plan), ', '.join(str(len(s)) for s in plan),
+    )
+    
+    env = _unittest_env(temp_dir)
+    with tempfile.TemporaryDirectory(prefix='test_shards_') as work_dir:
+        procs = []
+        try:
+            for index, ids in enumerate(plan):
+                ids_file = os.path.join(work_dir, f"ids_{index}.json")
+                with open(ids_file, 'w', encoding='utf-8') as f:
+                    json.dump(ids, f)
+                durations_file = os.path.join(work_dir, f"durations_{index}.json")
+                out_file = open(os.path.join(work_dir, f"out_{index}.txt"), 'wb')
+                try:
+                    proc = subprocess.Popen(
+                        [python_path, '-c', _SHARD_RUNNER_SCRIPT, ids_file, durations_file],
+                        cwd=temp_dir,
+                        stdout=out_file,
+                        stderr=subprocess.STDOUT,
+                        env=env,
+                    )
+                except OSError:
+                    out_file.close()
+                    raise
+                procs.append((index, ids, proc, out_file, durations_file))
+        except OSError as e:
+            logger.warning("Could not start test shard: %s", e)
+            for _index, _ids, proc, out_file, _durations in procs:
+                proc.kill()
+                proc.wait()
+                out_file.close()
+            return None
+        
+        # All shards share one wall-clock deadline
+        deadline = started + timeout_sec
+        shard_results = []
+        for index, ids, proc, out_file, durations_file in procs:
+            timed_out = False
+            try:
+                proc.wait(timeout=max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+                timed_out = True
+            out_file.close()
+            
+            with open(out_file.name, encoding='utf-8', errors='replace') as f:
+                output = f.read()
+            _record_durations(durations_file, store)
+            shard_results.append((index, ids, proc.returncode, output, timed_out))
+    
+    return _merge_shard_results(shard_results, timeout_sec)
+
+
+def _record_durations(durations_file: str, store: Optional['TestDurationStore']) -> None:
+    if store is None:
+        return
+    try:
+        with open(durations_file, encoding='utf-8') as f:
+            durations = json.load(f)
+    except (OSError, ValueError):
+        return
+    if isinstance(durations, dict):
+        store.record(durations)
+
+
+def _merge_shard_results(shard_results, timeout_sec: int) -> TestResult:
+    """
+    Merge per-shard unittest outputs into a single TestResult.
+    
+    Counts and failed tests are summed; the output keeps failing shards
+    first so failures survive MAX_OUTPUT_CHARS truncation.
+    """
+    tests_run = tests_passed = tests_failed = tests_errors = 0
+    failed_tests: List[Dict[str, str]] = []
+    errors: List[str] = []
+    sections = []
+    
+    for index, ids, return_code, output, timed_out in shard_results:
+        parsed = _parse_unittest_output(output, return_code)
+        tests_run += parsed.tests_run
+        tests_passed += parsed.tests_passed
+        tests_failed += parsed.tests_failed
+        tests_errors += parsed.tests_errors
+        failed_tests.extend(parsed.failed_tests)
+        
+        if timed_out:
+            errors.append(
+                "Shard " + str(index + 1) + " (" + str(len(ids)) + " tests) timed out after "
+                + str(timeout_sec) + " seconds."
+            )
+        elif parsed.error_message:
+            errors.append("Shard " + str(index + 1) + ": " + parsed.error_message)
+        
+        failed = timed_out or return_code != 0
+        header = (
+            "=== shard " + str(index + 1) + "/" + str(len(shard_results))
+            + " (" + str(len(ids)) + " tests)" + (" TIMED OUT" if timed_out else "") + " ===\n"
+        )
+        sections.append((not failed, index, header + output.strip() + "\n"))
+    
+    sections.sort(key=lambda item: (item[0], item[1]))
+    output = "".join(text for _ok, _index, text in sections)
+    
+    if len(output) > MAX_OUTPUT_CHARS:
+        output = (
+            output[:MAX_OUTPUT_CHARS]
+            + "\n\n... [truncated, " + str(len(output) - MAX_OUTPUT_CHARS) + " chars omitted]"
+        )
+    
+    all_ok = all(rc == 0 and not timed_out for _i, _ids, rc, _out, timed_out in shard_results)
+    
+    return TestResult(
+        success=(all_ok and tests_failed == 0 and tests_errors == 0),
+        tests_run=tests_run,
+        tests_passed=tests_passed,
+        tests_failed=tests_failed,
+        tests_errors=tests_errors,
+        test_output=output,
+        failed_tests=failed_tests,
+        execution_time_ms=0,  # Will be set by caller
+        error_message=" ".join(errors) or None,
+    )
+
+
 def _parse_unittest_output(output: str, return_code: int) -> TestResult:
     """
     Parse unittest verbose output into structured result.
@@ -938,6 +1586,8 @@ def _format_result_xml(
     result: TestResult,
     test_path: str,
     chunk_name: Optional[str],
+    cached: bool = False,
+    extra_xml: str = "",
 ) -> str:
     """
     Format test result as XML for Orchestrator.
@@ -949,6 +1599,8 @@ def _format_result_xml(
         result: TestResult object with all test data
         test_path: Original test file path (for reference)
         chunk_name: Test class/method name if specified (for reference)
+        cached: Result was taken from the test result cache
+        extra_xml: Additional sections appended after the summary
     
     Returns:
         XML-formatted string with test results
@@ -1006,7 +1658,8 @@ def _format_result_xml(
         '    <tests_failed>' + str(result.tests_failed) + '</tests_failed>\n'
         '    <tests_errors>' + str(result.tests_errors) + '</tests_errors>\n'
         '    <execution_time_ms>' + str(int(result.execution_time_ms)) + '</execution_time_ms>\n'
-        '  </summary>' + failed_xml + error_xml + '\n'
+        + ('    <cached>true</cached>\n' if cached else '')
+        + '  </summary>' + failed_xml + error_xml + extra_xml + '\n'
         '  <output><![CDATA[' + output + ']]></output>\n'
         '</test_result>'
     )
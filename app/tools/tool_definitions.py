@@ -686,6 +686,41 @@ READ_LINE_CONTEXT_TOOL: Dict[str, Any] = {
     }
 }
 
+# ============================================================================
+# RUN AFFECTED TESTS TOOL
+# ============================================================================
+
+RUN_AFFECTED_TESTS_TOOL: Dict[str, Any] = {
+    "type": "function",
+    "function": {
+        "name": "run_affected_tests",
+        "description": (
+            "Run only the project's unittest modules that can be affected by the staged changes. "
+            "A test module is selected when it imports (directly or transitively) a changed file; "
+            "modules with a cached passing result for the same code are not re-run. "
+            "Returns XML with test counts, failures/tracebacks and an <impact> section "
+            "listing selected, cached and skipped modules. Counts toward the test run limit."
+        ),
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "changed_files": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Files to treat as changed, relative to project root. Default: all staged .py files."
+                },
+                "timeout_sec": {
+                    "type": "integer",
+                    "description": "Timeout for the test run in seconds. Default: 30, max: 60.",
+                    "default": 30,
+                    "minimum": 1
+                }
+            },
+            "required": []
+        }
+    }
+}
+
 # ============================================================================
 # EXTRACT MEDIA TOOL
 # ============================================================================
@@ -791,6 +826,7 @@ ORCHESTRATOR_TOOLS: List[Dict[str, Any]] = [
     CHECK_SECURITY_TOOL,
     EXTRACT_MEDIA_TOOL,
     READ_LINE_CONTEXT_TOOL,
+    RUN_AFFECTED_TESTS_TOOL,
 ]
 
 
@@ -7,8 +7,12 @@ Routes tool calls to appropriate implementations and handles errors.
 
 from __future__ import annotations
 import json
+import time
+import asyncio
 import logging
-from typing import Dict, Any, Optional, Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Callable, Tuple, FrozenSet, Awaitable
 from pathlib import Path
 from app.advice.advice_loader import execute_get_advice
 from app.tools.read_line_context import read_line_context_tool
@@ -19,6 +23,8 @@ from app.tools.search_code import search_code_tool
 from app.tools.web_search import web_search_tool
 from app.tools.grep_search import grep_search_tool
 from app.tools.file_relations import show_file_relations_tool
+from app.tools.run_project_tests import run_affected_tests
+from app.tools.tool_memo import ToolResultMemo
 from app.services.python_chunker import SmartPythonChunker
 
 from app.tools.dependency_manager import (
@@ -37,6 +43,42 @@ from app.tools.web_tools import (
 logger = logging.getLogger(__name__)
 
 
+# Tools that only read project/web state: safe to run concurrently.
+# Everything else (install_dependency, run_project_tests, custom tools...)
+# is treated as mutating and runs alone, in request order.
+READ_ONLY_TOOLS: FrozenSet[str] = frozenset({
+    "read_file",
+    "read_code_chunk",
+    "read_line_context",
+    "list_files",
+    "search_code",
+    "grep_search",
+    "show_file_relations",
+    "web_search",
+    "general_web_search",
+    "search_pypi",
+    "fetch_webpage",
+    "analyze_webpage",
+    "check_security",
+    "extract_media",
+    "get_advice",
+    "list_installed_packages",
+})
+
+MAX_BATCH_WORKERS = 8
+
+
+@dataclass
+class BatchToolResult:
+    """Result of one tool call inside a batch"""
+    index: int  # Position in the original call list
+    tool_name: str
+    arguments: Dict[str, Any]
+    output: str
+    duration_ms: float  # Wall time of this call
+    parallel: bool = False  # Ran concurrently with other calls
+
+
 class ToolExecutor:
     """
     Executes tools by name with provided arguments.
@@ -54,6 +96,7 @@ class ToolExecutor:
         project_dir: str,
         index: Optional[Dict[str, Any]] = None,
         virtual_fs: Optional[Any] = None,  # NEW: VirtualFileSystem instance
+        memo: Optional[ToolResultMemo] = None,
     ):
         """
         Initialize tool executor.
@@ -61,10 +104,13 @@ class ToolExecutor:
         Args:
             project_dir: Path to project root (for file operations)
             index: Project semantic index (for code search)
+            virtual_fs: VirtualFileSystem with staged changes
+            memo: Session-scoped memo of tool results (optional)
         """
         self.project_dir = project_dir
         self.index = index or {}
         self.virtual_fs = virtual_fs  # NEW
+        self.memo = memo
         self._custom_tools: Dict[str, Callable] = {}
     
     
@@ -83,6 +129,25 @@ class ToolExecutor:
         """
         logger.info(f"Executing tool: {tool_name} with args: {list(arguments.keys())}")
         
+        # Custom tools are never memoized
+        if self.memo is None or tool_name in self._custom_tools:
+            return self._dispatch(tool_name, arguments)
+        
+        call_number = self.memo.next_call_number()
+        if not self.memo.is_memoizable(tool_name):
+            return self._dispatch(tool_name, arguments)
+        
+        cached = self.memo.lookup(tool_name, arguments)
+        if cached is not None:
+            return cached
+        
+        fingerprint = self.memo.snapshot(tool_name, arguments)
+        result = self._dispatch(tool_name, arguments)
+        self.memo.store(tool_name, arguments, result, call_number, fingerprint)
+        return result
+    
+    def _dispatch(self, tool_name: str, arguments: Dict[str, Any]) -> str:
+        """Route a tool call to its implementation"""
         try:
             # Check custom tools first
             if tool_name in self._custom_tools:
@@ -123,6 +188,8 @@ class ToolExecutor:
                 return self._execute_show_file_relations(arguments)
             elif tool_name == "read_line_context":
                 return self._execute_read_line_context(arguments)
+            elif tool_name == "run_affected_tests":
+                return self._execute_run_affected_tests(arguments)
             else:
                 return self._format_error(f"Unknown tool: {tool_name}")
                 
@@ -130,6 +197,31 @@ class ToolExecutor:
             logger.error(f"Tool execution error ({tool_name}): {e}")
             return self._format_error(f"Tool execution failed: {e}")
     
+    def execute_batch(
+        self,
+        calls: List[Tuple[str, Dict[str, Any]]],
+        max_workers: int = MAX_BATCH_WORKERS,
+    ) -> List[BatchToolResult]:
+        """
+        Execute several tool calls, running independent read-only tools concurrently.
+        
+        Args:
+            calls: List of (tool_name, arguments) in the order requested by the LLM
+            max_workers: Thread pool size for read-only tools
+            
+        Returns:
+            Results in the same order as calls
+        """
+        return run_tool_batch(calls, self.execute, max_workers=max_workers)
+    
+    async def execute_batch_async(
+        self,
+        calls: List[Tuple[str, Dict[str, Any]]],
+        max_workers: int = MAX_BATCH_WORKERS,
+    ) -> List[BatchToolResult]:
+        """execute_batch() off the event loop thread"""
+        return await run_tool_batch_async(calls, self.execute, max_workers=max_workers)
+    
     
     def _execute_list_files(self, arguments: Dict[str, Any]) -> str:
         """Execute list_files tool"""
@@ -154,39 +246,37 @@ class ToolExecutor:
         content = None
         source = "disk"
         
-        if self.virtual_fs is not None:
+        if self.virtual_fs is not None and self._is_staged(file_path):
             staged_content = self.virtual_fs.read_file(file_path)
-            if staged_content is not None:
-                content = staged_content
-                source = "VFS"
-                logger.info(f"read_code_chunk: Reading '{file_path}' from VFS (staged)")
-        
-        # Fall back to disk if not in VFS
-        if content is None:
-            full_path = Path(self.project_dir) / file_path
-            if not full_path.exists():
+            if staged_content is None:
                 return self._format_error(f"File not found: {file_path}")
-            try:
-                content = full_path.read_text(encoding='utf-8')
-                source = "disk"
-            except Exception as e:
-                return self._format_error(f"Failed to read file: {e}")
+            content = staged_content
+            source = "VFS"
+            logger.info(f"read_code_chunk: Reading '{file_path}' from VFS (staged)")
+        
+        # Unstaged files are chunked in place (no full read + temp copy)
+        full_path = Path(self.project_dir) / file_path
+        if content is None and not full_path.is_file():
+            return self._format_error(f"File not found: {file_path}")
         
         try:
-            # Parse content with chunker
-            import tempfile
-            import os
+            chunker = SmartPythonChunker()
             
-            # SmartPythonChunker needs a file path, so write to temp file
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False, encoding='utf-8') as f:
-                f.write(content)
-                temp_path = f.name
-            
-            try:
-                chunker = SmartPythonChunker()
-                chunks = chunker.chunk_file(temp_path)
-            finally:
-                os.unlink(temp_path)
+            if content is None:
+                chunks = chunker.chunk_file(str(full_path))
+            else:
+                import tempfile
+                import os
+                
+                # SmartPythonChunker needs a file path, so write to temp file
+                with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False, encoding='utf-8') as f:
+                    f.write(content)
+                    temp_path = f.name
+                
+                try:
+                    chunks = chunker.chunk_file(temp_path)
+                finally:
+                    os.unlink(temp_path)
             
             # Find target chunk
             target_chunk = next((c for c in chunks if c.name == chunk_name), None)
@@ -222,9 +312,9 @@ class ToolExecutor:
         file_path = arguments.get("file_path", "")
         include_line_numbers = arguments.get("include_line_numbers", True)
         
-        # Check VFS first for staged files
-        if self.virtual_fs is not None:
-            # Check if file is staged (created or modified in current session)
+        # Check VFS first for staged files (unstaged files go through
+        # read_file_tool, which reads large files by range within max_tokens)
+        if self.virtual_fs is not None and self._is_staged(file_path):
             staged_content = self.virtual_fs.read_file(file_path)
             if staged_content is not None:
                 # File exists in VFS - return it with XML formatting
@@ -424,6 +514,34 @@ class ToolExecutor:
             virtual_fs=self.virtual_fs
         )
 
+    def _execute_run_affected_tests(self, arguments: Dict[str, Any]) -> str:
+        """
+        Execute run_affected_tests tool.
+        
+        Needs the VFS: the affected set is computed from its staged changes.
+        """
+        if self.virtual_fs is None:
+            return self._format_error("run_affected_tests requires a virtual file system")
+        
+        kwargs: Dict[str, Any] = {}
+        if arguments.get("timeout_sec") is not None:
+            kwargs["timeout_sec"] = int(arguments["timeout_sec"])
+        
+        return run_affected_tests(
+            project_dir=str(self.project_dir),
+            virtual_fs=self.virtual_fs,
+            changed_files=arguments.get("changed_files") or None,
+            **kwargs,
+        )
+
+
+    def _is_staged(self, file_path: str) -> bool:
+        """True if file_path has a pending change in the VFS"""
+        get_change = getattr(self.virtual_fs, "get_change", None)
+        if get_change is None:
+            # VFS without staging info - treat every VFS read as staged
+            return True
+        return get_change(file_path) is not None
 
     def register_tool(self, name: str, func: Callable) -> None:
         """
@@ -455,6 +573,147 @@ class ToolExecutor:
 </error>"""
 
 
+# ============================================================================
+# BATCH EXECUTION
+# ============================================================================
+
+def run_tool_batch(
+    calls: List[Tuple[str, Dict[str, Any]]],
+    execute_fn: Callable[[str, Dict[str, Any]], str],
+    max_workers: int = MAX_BATCH_WORKERS,
+    read_only_tools: FrozenSet[str] = READ_ONLY_TOOLS,
+) -> List[BatchToolResult]:
+    """
+    Execute tool calls with any executor function (ToolExecutor.execute or a
+    custom callback wrapper).
+    
+    Consecutive read-only calls form a group that runs on a thread pool;
+    a mutating call is a barrier: it starts after the preceding group has
+    finished and before any following call starts. Results keep the
+    original order, so they can be appended to the message history as is.
+    """
+    results: List[Optional[BatchToolResult]] = [None] * len(calls)
+    
+    def run_one(index: int, parallel: bool) -> None:
+        name, args = calls[index]
+        started = time.perf_counter()
+        try:
+            output = execute_fn(name, args)
+        except Exception as e:
+            logger.error(f"Tool execution error ({name}): {e}")
+            output = f"""<!-- ERROR -->
+<error>
+  <message>Tool execution failed: {e}</message>
+</error>"""
+        results[index] = BatchToolResult(
+            index=index,
+            tool_name=name,
+            arguments=args,
+            output=output,
+            duration_ms=(time.perf_counter() - started) * 1000,
+            parallel=parallel,
+        )
+    
+    groups = _split_into_groups(calls, read_only_tools)
+    
+    pool: Optional[ThreadPoolExecutor] = None
+    try:
+        for group in groups:
+            if len(group) == 1 or max_workers <= 1:
+                for i in group:
+                    run_one(i, parallel=False)
+                continue
+            
+            if pool is None:
+                pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool_batch")
+            futures = [pool.submit(run_one, i, True) for i in group]
+            for future in futures:
+                future.result()
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True)
+    
+    _log_batch(results, groups)
+    return results
+
+
+async def run_tool_batch_async(
+    calls: List[Tuple[str, Dict[str, Any]]],
+    execute_fn: Callable[[str, Dict[str, Any]], str],
+    max_workers: int = MAX_BATCH_WORKERS,
+    read_only_tools: FrozenSet[str] = READ_ONLY_TOOLS,
+) -> List[BatchToolResult]:
+    """run_tool_batch() in a worker thread so the event loop is not blocked"""
+    if not calls:
+        return []
+    return await asyncio.to_thread(
+        run_tool_batch, calls, execute_fn, max_workers, read_only_tools
+    )
+
+
+async def run_async_tool_batch(
+    calls: List[Tuple[str, Dict[str, Any]]],
+    execute_coro: Callable[[str, Dict[str, Any]], Awaitable[str]],
+    read_only_tools: FrozenSet[str] = READ_ONLY_TOOLS,
+) -> List[BatchToolResult]:
+    """
+    Same scheduling as run_tool_batch() for tools implemented as coroutines
+    (e.g. general_web_search): read-only groups are awaited with gather().
+    """
+    results: List[Optional[BatchToolResult]] = [None] * len(calls)
+    
+    async def run_one(index: int, parallel: bool) -> None:
+        name, args = calls[index]
+        started = time.perf_counter()
+        try:
+            output = await execute_coro(name, args)
+        except Exception as e:
+            logger.error(f"Tool execution error ({name}): {e}")
+            output = f"""<!-- ERROR -->
+<error>
+  <message>Tool execution failed: {e}</message>
+</error>"""
+        results[index] = BatchToolResult(
+            index=index,
+            tool_name=name,
+            arguments=args,
+            output=output,
+            duration_ms=(time.perf_counter() - started) * 1000,
+            parallel=parallel,
+        )
+    
+    groups = _split_into_groups(calls, read_only_tools)
+    for group in groups:
+        if len(group) == 1:
+            await run_one(group[0], parallel=False)
+        else:
+            await asyncio.gather(*(run_one(i, True) for i in group))
+    
+    _log_batch(results, groups)
+    return results
+
+
+def _split_into_groups(
+    calls: List[Tuple[str, Dict[str, Any]]],
+    read_only_tools: FrozenSet[str],
+) -> List[List[int]]:
+    """Indices grouped as [consecutive read-only calls] or [single mutating call]"""
+    groups: List[List[int]] = []
+    for i, (name, _) in enumerate(calls):
+        if name in read_only_tools and groups and calls[groups[-1][0]][0] in read_only_tools:
+            groups[-1].append(i)
+        else:
+            groups.append([i])
+    return groups
+
+
+def _log_batch(results: List[BatchToolResult], groups: List[List[int]]) -> None:
+    if len(results) < 2:
+        return
+    timings = ", ".join(f"{r.tool_name}={r.duration_ms:.0f}ms" for r in results)
+    logger.info(f"Tool batch: {len(results)} call(s) in {len(groups)} group(s): {timings}")
+
+
 # ============================================================================
 # CONVENIENCE FUNCTION
 # ============================================================================
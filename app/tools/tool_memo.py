@@ -0,0 +1,285 @@
+# app/tools/tool_memo.py
+"""
+Tool Result Memo - кэш результатов инструментов в пределах сессии оркестратора.
+
+Оркестратор часто повторяет одинаковые вызовы между итерациями (тот же
+read_file, тот же search_code). Memo хранит результат по ключу
+(tool_name, нормализованные аргументы) вместе со снимком состояния того,
+от чего результат зависит:
+
+- read_file / read_code_chunk / read_line_context: один файл
+  (staged-версия в VFS + mtime/size файла на диске)
+- list_files: staged-файлы под каталогом + mtime каталога
+- search_code / grep_search / show_file_relations: весь staging VFS
+
+При следующем обращении снимок пересчитывается; если зависимость
+изменилась, запись выбрасывается и инструмент выполняется заново.
+
+Опционально повтор возвращается компактной ссылкой
+"unchanged since call #N" вместо полного текста.
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import logging
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# Инструменты, результат которых зависит от одного файла (аргумент file_path)
+FILE_SCOPED_TOOLS = frozenset({
+    "read_file",
+    "read_code_chunk",
+    "read_line_context",
+})
+
+# Инструменты, результат которых зависит от каталога (аргумент directory_path)
+DIRECTORY_SCOPED_TOOLS = frozenset({
+    "list_files",
+})
+
+# Инструменты, результат которых может зависеть от любого файла проекта
+PROJECT_SCOPED_TOOLS = frozenset({
+    "search_code",
+    "grep_search",
+    "show_file_relations",
+})
+
+MEMOIZABLE_TOOLS = FILE_SCOPED_TOOLS | DIRECTORY_SCOPED_TOOLS | PROJECT_SCOPED_TOOLS
+
+# Аргументы-пути, которые нормализуются в ключе ("./app/x.py" == "app/x.py")
+PATH_ARGUMENTS = frozenset({"file_path", "directory_path"})
+
+
+@dataclass
+class MemoEntry:
+    """Закэшированный результат инструмента"""
+    tool_name: str
+    output: str
+    call_number: int  # Номер вызова в сессии, который дал этот результат
+    fingerprint: Tuple
+    hits: int = 0
+
+
+@dataclass
+class MemoStats:
+    """Статистика memo за сессию"""
+    calls: int = 0
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+    compact_refs: int = 0
+    hits_by_tool: Dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "compact_refs": self.compact_refs,
+            "hits_by_tool": dict(self.hits_by_tool),
+            "hit_rate": round(self.hits / self.calls, 3) if self.calls else 0.0,
+        }
+
+
+class ToolResultMemo:
+    """
+    Session-scoped memo для ToolExecutor.
+
+    Потокобезопасен (ToolExecutor.execute_batch выполняет read-only
+    инструменты параллельно).
+
+    Example:
+        >>> memo = ToolResultMemo(project_dir, virtual_fs=vfs)
+        >>> executor = ToolExecutor(project_dir, index, virtual_fs=vfs, memo=memo)
+        >>> executor.execute("read_file", {"file_path": "app/main.py"})  # miss, call #1
+        >>> executor.execute("read_file", {"file_path": "./app/main.py"})  # hit
+        >>> memo.stats.to_dict()
+    """
+
+    def __init__(
+        self,
+        project_dir: str,
+        virtual_fs: Optional[Any] = None,
+        compact_repeats: bool = False,
+    ):
+        """
+        Args:
+            project_dir: Корень проекта (для mtime файлов на диске)
+            virtual_fs: VirtualFileSystem сессии
+            compact_repeats: Возвращать ссылку на предыдущий вызов вместо
+                полного повтора (экономит контекст, но модель должна видеть
+                исходный результат — не включать при сжатии истории)
+        """
+        self.project_dir = project_dir
+        self.virtual_fs = virtual_fs
+        self.compact_repeats = compact_repeats
+        self.stats = MemoStats()
+        self._entries: Dict[Tuple[str, str], MemoEntry] = {}
+        self._call_counter = 0
+        self._lock = threading.Lock()
+
+    # ========================================================================
+    # PUBLIC API
+    # ========================================================================
+
+    def is_memoizable(self, tool_name: str) -> bool:
+        return tool_name in MEMOIZABLE_TOOLS
+
+    def next_call_number(self) -> int:
+        """Номер очередного вызова инструмента в сессии (для ссылок #N)"""
+        with self._lock:
+            self._call_counter += 1
+            return self._call_counter
+
+    def lookup(self, tool_name: str, arguments: Dict[str, Any]) -> Optional[str]:
+        """Возвращает сохранённый результат, если его зависимости не изменились"""
+        key = self._make_key(tool_name, arguments)
+        with self._lock:
+            self.stats.calls += 1
+            entry = self._entries.get(key)
+
+        if entry is None:
+            with self._lock:
+                self.stats.misses += 1
+            return None
+
+        if self.snapshot(tool_name, arguments) != entry.fingerprint:
+            with self._lock:
+                self._entries.pop(key, None)
+                self.stats.invalidations += 1
+                self.stats.misses += 1
+            logger.debug(f"Tool memo: invalidated {tool_name} {key[1][:100]}")
+            return None
+
+        with self._lock:
+            entry.hits += 1
+            self.stats.hits += 1
+            self.stats.hits_by_tool[tool_name] = self.stats.hits_by_tool.get(tool_name, 0) + 1
+            if self.compact_repeats:
+                self.stats.compact_refs += 1
+
+        logger.info(f"Tool memo: hit for {tool_name} (call #{entry.call_number})")
+
+        if self.compact_repeats:
+            return _format_unchanged_ref(tool_name, arguments, entry.call_number)
+        return entry.output
+
+    def store(
+        self,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        output: str,
+        call_number: int = 0,
+        fingerprint: Optional[Tuple] = None,
+    ) -> None:
+        """
+        Сохраняет результат вызова call_number (ошибки не кэшируются).
+
+        fingerprint следует снять через snapshot() ДО выполнения инструмента,
+        чтобы изменение файла во время вызова не "узаконило" старый результат.
+        """
+        if _is_error_output(output):
+            return
+        key = self._make_key(tool_name, arguments)
+        if fingerprint is None:
+            fingerprint = self.snapshot(tool_name, arguments)
+        with self._lock:
+            self._entries[key] = MemoEntry(
+                tool_name=tool_name,
+                output=output,
+                call_number=call_number,
+                fingerprint=fingerprint,
+            )
+
+    def clear(self) -> None:
+        """Сбрасывает записи и статистику (новая сессия)"""
+        with self._lock:
+            self._entries.clear()
+            self._call_counter = 0
+            self.stats = MemoStats()
+
+    # ========================================================================
+    # KEYS & FINGERPRINTS
+    # ========================================================================
+
+    def _make_key(self, tool_name: str, arguments: Dict[str, Any]) -> Tuple[str, str]:
+        # Нормализуются только пути: паттерны и запросы ("def " и "def")
+        # дают разные результаты и должны давать разные ключи
+        normalized = {}
+        for name, value in arguments.items():
+            if value is None:
+                continue
+            if name in PATH_ARGUMENTS and isinstance(value, str):
+                value = _normalize_path(value)
+            normalized[name] = value
+        return tool_name, json.dumps(normalized, sort_keys=True, ensure_ascii=False, default=str)
+
+    def snapshot(self, tool_name: str, arguments: Dict[str, Any]) -> Tuple:
+        """Снимок состояния файлов, от которых зависит результат вызова"""
+        if tool_name in FILE_SCOPED_TOOLS:
+            rel_path = _normalize_path(str(arguments.get("file_path", "")))
+            return ("file", rel_path, self._staged_state(rel_path), self._disk_state(rel_path))
+
+        if tool_name in DIRECTORY_SCOPED_TOOLS:
+            directory = _normalize_path(str(arguments.get("directory_path", "") or "."))
+            prefix = "" if directory in ("", ".") else directory.rstrip("/") + "/"
+            staged = tuple(
+                (path, self._staged_state(path))
+                for path in self._staged_paths()
+                if path.startswith(prefix)
+            )
+            return ("dir", prefix, staged, self._disk_state(directory or "."))
+
+        staged = tuple((path, self._staged_state(path)) for path in self._staged_paths())
+        return ("project", staged)
+
+    def _staged_paths(self) -> Tuple[str, ...]:
+        if self.virtual_fs is None or not hasattr(self.virtual_fs, "get_staged_files"):
+            return ()
+        return tuple(sorted(self.virtual_fs.get_staged_files()))
+
+    def _staged_state(self, rel_path: str) -> Optional[Tuple]:
+        if self.virtual_fs is None or not hasattr(self.virtual_fs, "get_change"):
+            return None
+        change = self.virtual_fs.get_change(rel_path)
+        if change is None:
+            return None
+        # hash() строки кэшируется в объекте, повторные проверки дешёвые
+        change_type = getattr(change.change_type, "value", change.change_type)
+        return (change_type, hash(change.new_content or ""))
+
+    def _disk_state(self, rel_path: str) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(Path(self.project_dir) / rel_path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+
+def _normalize_path(path: str) -> str:
+    path = path.strip().replace("\\", "/")
+    while path.startswith("./"):
+        path = path[2:]
+    return path
+
+
+def _is_error_output(output: str) -> bool:
+    head = output.lstrip()[:40]
+    return head.startswith("<!-- ERROR") or head.startswith("<error>")
+
+
+def _format_unchanged_ref(tool_name: str, arguments: Dict[str, Any], call_number: int) -> str:
+    target = arguments.get("file_path") or arguments.get("query") or arguments.get("pattern") or ""
+    return f"""<!-- UNCHANGED: same result as call #{call_number} -->
+<tool_result_ref tool="{tool_name}" call="{call_number}">
+  <target>{target}</target>
+  <message>Result is unchanged since call #{call_number} (no relevant file changed). Refer to that output.</message>
+</tool_result_ref>"""
@@ -0,0 +1,208 @@
+# app/utils/file_range_reader.py
+"""
+File Range Reader - чтение диапазонов строк без загрузки всего файла.
+
+Для каждого файла строится индекс смещений начала строк (по mmap), который
+кэшируется в процессе и инвалидируется по (mtime, size). Повторные чтения
+окна строк или чанка делают seek сразу к нужному смещению и декодируют
+только возвращаемые байты.
+
+Используется read_file / read_line_context / read_code_chunk для больших
+сгенерированных файлов и логов, где полная загрузка и подсчёт токенов по
+всему содержимому слишком дороги.
+
+Example:
+    >>> reader = get_file_range_reader()
+    >>> reader.line_count("/project/big.log")
+    1250000
+    >>> reader.read_lines("/project/big.log", 1000, 1010)  # 1-based, inclusive
+    ['...', ...]
+"""
+
+from __future__ import annotations
+
+import os
+import mmap
+import bisect
+import logging
+import threading
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# Сколько индексов держать в памяти (LRU)
+MAX_CACHED_INDEXES = 256
+
+
+@dataclass
+class LineOffsetIndex:
+    """
+    Индекс смещений строк файла.
+
+    Attributes:
+        path: Абсолютный путь
+        mtime_ns: mtime на момент построения
+        size: Размер файла в байтах
+        offsets: Смещение начала каждой строки (offsets[0] == 0)
+    """
+    path: str
+    mtime_ns: int
+    size: int
+    offsets: array
+
+    @property
+    def line_count(self) -> int:
+        if self.size == 0:
+            return 0
+        # Завершающий '\n' не порождает новую строку (как str.splitlines)
+        if self.offsets[-1] >= self.size:
+            return len(self.offsets) - 1
+        return len(self.offsets)
+
+    def byte_range(self, start_line: int, end_line: int) -> Tuple[int, int]:
+        """Байтовый диапазон строк [start_line, end_line] (1-based, включительно)"""
+        begin = self.offsets[start_line - 1]
+        end = self.offsets[end_line] if end_line < len(self.offsets) else self.size
+        return begin, end
+
+    def line_at(self, byte_offset: int) -> int:
+        """Номер строки (1-based), содержащей байт byte_offset"""
+        return bisect.bisect_right(self.offsets, byte_offset)
+
+
+class FileRangeReader:
+    """
+    Чтение строк файла по номерам через кэшируемый индекс смещений.
+
+    Потокобезопасен: индексы строятся под блокировкой, чтение идёт через
+    отдельный file handle на каждый вызов.
+    """
+
+    def __init__(self, max_cached: int = MAX_CACHED_INDEXES):
+        self._indexes: "OrderedDict[str, LineOffsetIndex]" = OrderedDict()
+        self._max_cached = max_cached
+        self._lock = threading.Lock()
+
+    # ========================================================================
+    # PUBLIC API
+    # ========================================================================
+
+    def get_index(self, path: str) -> LineOffsetIndex:
+        """Возвращает индекс файла (из кэша, если mtime и размер не изменились)"""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+
+        with self._lock:
+            cached = self._indexes.get(path)
+            if cached is not None and cached.mtime_ns == st.st_mtime_ns and cached.size == st.st_size:
+                self._indexes.move_to_end(path)
+                return cached
+
+        index = self._build_index(path, st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            self._indexes[path] = index
+            self._indexes.move_to_end(path)
+            while len(self._indexes) > self._max_cached:
+                self._indexes.popitem(last=False)
+
+        return index
+
+    def line_count(self, path: str) -> int:
+        return self.get_index(path).line_count
+
+    def read_lines(self, path: str, start_line: int, end_line: int) -> List[str]:
+        """
+        Читает строки [start_line, end_line] (1-based, включительно).
+
+        Диапазон обрезается по границам файла. Окончания строк удаляются.
+        """
+        index = self.get_index(path)
+        total = index.line_count
+        start_line = max(1, start_line)
+        end_line = min(total, end_line)
+        if total == 0 or start_line > end_line:
+            return []
+
+        begin, end = index.byte_range(start_line, end_line)
+        with open(index.path, 'rb') as f:
+            f.seek(begin)
+            data = f.read(end - begin)
+
+        # Делим только по '\n', чтобы нумерация совпадала с индексом
+        # (splitlines() режет также по \x0c,   и т.п.)
+        text = _decode(data)
+        if text.endswith('\n'):
+            text = text[:-1]
+        return [line[:-1] if line.endswith('\r') else line for line in text.split('\n')]
+
+    def read_text(self, path: str, start_line: int, end_line: int) -> str:
+        """То же, что read_lines(), но одной строкой с '\\n'"""
+        return '\n'.join(self.read_lines(path, start_line, end_line))
+
+    def find_line(self, path: str, pattern: str) -> Optional[int]:
+        """
+        Номер первой строки (1-based), содержащей подстроку pattern.
+
+        Поиск идёт по байтам через mmap без декодирования файла.
+        """
+        index = self.get_index(path)
+        # Многострочный паттерн не может совпасть с одной строкой
+        if index.size == 0 or not pattern or '\n' in pattern:
+            return None
+
+        with open(index.path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                pos = mm.find(pattern.encode('utf-8'))
+
+        if pos == -1:
+            return None
+        return index.line_at(pos)
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Сбрасывает индекс файла (или все индексы)"""
+        with self._lock:
+            if path is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(os.path.abspath(path), None)
+
+    # ========================================================================
+    # INTERNAL
+    # ========================================================================
+
+    @staticmethod
+    def _build_index(path: str, mtime_ns: int, size: int) -> LineOffsetIndex:
+        offsets = array('Q', [0])
+        if size > 0:
+            with open(path, 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    pos = mm.find(b'\n')
+                    while pos != -1:
+                        offsets.append(pos + 1)
+                        pos = mm.find(b'\n', pos + 1)
+        logger.debug(f"Built line index for {path}: {len(offsets)} lines, {size} bytes")
+        return LineOffsetIndex(path=path, mtime_ns=mtime_ns, size=size, offsets=offsets)
+
+
+def _decode(data: bytes) -> str:
+    """UTF-8 с fallback на latin-1 (как read_file_tool)"""
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data.decode('latin-1')
+
+
+_reader: Optional[FileRangeReader] = None
+
+
+def get_file_range_reader() -> FileRangeReader:
+    """Возвращает общий для процесса FileRangeReader"""
+    global _reader
+    if _reader is None:
+        _reader = FileRangeReader()
+    return _reader
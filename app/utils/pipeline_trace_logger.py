@@ -108,6 +108,12 @@ class PipelineTrace:
     total_duration_ms: float = 0
     error_message: str = ""
     
+    # Повторные вызовы инструментов, обслуженные из memo сессии
+    tool_memo: Dict[str, Any] = field(default_factory=dict)
+    
+    # Разборы Python AST по итерациям (выполненные / взятые из кэша)
+    ast_cache: List[Dict[str, Any]] = field(default_factory=list)
+    
     def __post_init__(self):
         if not self.started_at:
             self.started_at = datetime.now().isoformat()
@@ -205,6 +211,16 @@ class PipelineTraceLogger:
         ))
         self._save()
     
+    def set_tool_memo_stats(self, stats: Dict[str, Any]):
+        """Сохраняет статистику memo инструментов за сессию (hits/misses/invalidations)"""
+        self.trace.tool_memo = dict(stats)
+        self._save()
+    
+    def add_ast_cache_stats(self, iteration: int, stats: Dict[str, Any]):
+        """Сохраняет статистику кэша разбора AST за итерацию"""
+        self.trace.ast_cache.append({"iteration": iteration, **stats})
+        self._save()
+    
     # === Инструкция (подробно) ===
     
     def set_instruction(self, instruction: str):
@@ -1,5 +1,4 @@
 # app/utils/token_counter.py
-import tiktoken
 
 class TokenCounter:
     """
@@ -7,6 +6,8 @@ class TokenCounter:
     По умолчанию используем cl100k_base (подходит для DeepSeek / Qwen / GPT-4-семейства).
     """
     def __init__(self, encoding_name: str = "cl100k_base"):
+        # tiktoken импортируется при первом создании счётчика, не при старте
+        import tiktoken
         self.encoding = tiktoken.get_encoding(encoding_name)
 
     def count(self, text: str) -> int:
@@ -412,8 +412,12 @@ def check_translation_available() -> bool:
         return False
     
     try:
+        import importlib.util
         from config.settings import cfg
-        from app.llm.api_client import call_llm
+        
+        # LLM-клиент (httpx) не импортируем на старте - только проверяем наличие
+        if importlib.util.find_spec("httpx") is None:
+            raise ImportError("No module named 'httpx'")
         
         # Проверяем наличие модели
         if not hasattr(cfg, 'MODEL_GEMINI_2_FLASH'):
@@ -2,7 +2,6 @@
 import os
 from dotenv import load_dotenv
 from pathlib import Path
-from openai import OpenAI
 
 
 # Находим .env и загружаем его
@@ -437,6 +436,9 @@ class Config:
     # ============ НАСТРОЙКИ AI АГЕНТА ============
     PRE_FILTER_MAX_CHUNKS = 5
     PRE_FILTER_MAX_TOKENS = 75000  # Лимит 75k токенов
+    # BM25 первый этап: в LLM уходят только top-K лексических кандидатов
+    PRE_FILTER_LEXICAL_ENABLED = True
+    PRE_FILTER_LEXICAL_TOP_K = 15
     
     HISTORY_COMPRESSION_ENABLED = True
     HISTORY_THRESHOLD_TOKENS = 8000
@@ -479,6 +481,12 @@ class Config:
         "ai_validator_model_small": MODEL_GEMINI_FLASH_LITE,
         "ai_validator_model_large": "deepseek-chat",
         
+        # --- Code Generator Candidates ---
+        # >1: несколько кандидатов параллельно, выбор по SYNTAX + IMPORTS проверке
+        "generator_candidates": 1,
+        # Модели кандидатов по кругу; пусто - модель генератора сессии
+        "generator_candidate_models": [],
+        
         # --- Validation Levels ---
         # ВСЕ уровни включены по умолчанию
         # Соответствует ValidatorConfig в change_validator.py
@@ -24,12 +24,6 @@ Autogenesia - Главная точка входа
 """
 
 from __future__ import annotations
-from app.agents.pre_filter import analyze_query, PreFilterMode, PreFilterAdvice
-from app.llm.prompt_templates import (
-    _build_prefilter_advice_section,
-    _build_prefilter_advice_section_agent,
-    _build_prefilter_advice_section_new_project_agent,
-)
 
 import pydoc
 import re
@@ -73,28 +67,37 @@ from datetime import datetime
 # Rich для красивого терминального интерфейса
 from rich.console import Console
 from rich.panel import Panel
-from rich.markdown import Markdown
 from rich.prompt import Prompt, Confirm
 from rich.table import Table
-from rich.tree import Tree
-from rich.live import Live
-from rich.spinner import Spinner
 from rich.text import Text
-from rich.syntax import Syntax
-from rich.layout import Layout
 from rich import box
 
 # Импорты проекта
+# Тяжёлые подсистемы (pre-filter, промпты, агенты, пайплайн, tree-sitter)
+# импортируются при первом использовании - до меню грузится только
+# необходимое (см. scripts/bench_startup.py)
 from config.settings import cfg
 from app.history.manager import HistoryManager
 from app.history.storage import Thread, Message
-from app.utils.token_counter import TokenCounter
 
 
 from typing import Optional, List, Dict, Any, Tuple, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from app.agents.agent_pipeline import AgentPipeline
+    from app.agents.pre_filter import PreFilterAdvice
+
+
+def Markdown(*args, **kwargs):
+    """rich.markdown.Markdown (markdown-it импортируется при первом рендере)"""
+    from rich.markdown import Markdown as _Markdown
+    return _Markdown(*args, **kwargs)
+
+
+def Syntax(*args, **kwargs):
+    """rich.syntax.Syntax (pygments импортируется при первой подсветке)"""
+    from rich.syntax import Syntax as _Syntax
+    return _Syntax(*args, **kwargs)
 
 
 
@@ -1122,6 +1125,7 @@ AI Код Агент — это интеллектуальный помощни
 - `search_code` — поиск по индексу
 - `web_search` — поиск в интернете (макс. 3 за сессию)
 - `run_project_tests` — запуск тестов (макс. 5 за сессию)
+- `run_affected_tests` — запуск только затронутых изменениями тестов (общий лимит с `run_project_tests`)
 
 ### Навигация
 
@@ -1312,6 +1316,8 @@ async def run_prefilter_analysis(
     is_planning: bool = False,
     is_new_project: bool = False,
     on_tool_call: Optional[Callable] = None,
+    project_map: Optional[str] = None,
+    compact_index: Optional[str] = None,
 ) -> Tuple[str, Optional[PreFilterAdvice]]:
     """
     Запускает Pre-filter анализ запроса и возвращает советы для Оркестратора.
@@ -1327,6 +1333,8 @@ async def run_prefilter_analysis(
         project_index: Семантический индекс проекта
         mode: Режим работы ("normal" или "advanced")
         model: Модель для Pre-filter (None = из конфига)
+        project_map: Уже загруженный project_map (None = загрузить здесь)
+        compact_index: Уже загруженный compact_index (None = загрузить здесь)
 
     Returns:
         Tuple[str, Optional[PreFilterAdvice]]:
@@ -1353,6 +1361,8 @@ async def run_prefilter_analysis(
     
     logger.info(f"[PRE-FILTER] Starting analysis: mode={mode}, model={model or 'default'}")
     
+    from app.agents.pre_filter import analyze_query, PreFilterMode
+    
     try:
         # Определяем режим Pre-filter
         prefilter_mode = PreFilterMode.ADVANCED if mode == "advanced" else PreFilterMode.NORMAL
@@ -1368,19 +1378,24 @@ async def run_prefilter_analysis(
         
         logger.info(f"[PRE-FILTER] Using model: {model_display}")
         
-        # Получаем project_map
-        console.print(f"\n   [dim]📂 Загрузка project_map...[/]")
-        pm_start = _time.time()
-        project_map = get_project_map_for_prompt(project_dir) if project_dir else ""
-        pm_elapsed = _time.time() - pm_start
-        console.print(f"   [dim]   → project_map: {len(project_map)} символов ({pm_elapsed:.1f}с)[/]")
+        # Получаем project_map (если не передан уже загруженный планом запроса)
+        if project_map is not None:
+            console.print(f"\n   [dim]📂 project_map: {len(project_map)} символов [загружен заранее][/]")
+        else:
+            console.print(f"\n   [dim]📂 Загрузка project_map...[/]")
+            pm_start = _time.time()
+            project_map = get_project_map_for_prompt(project_dir) if project_dir else ""
+            pm_elapsed = _time.time() - pm_start
+            console.print(f"   [dim]   → project_map: {len(project_map)} символов ({pm_elapsed:.1f}с)[/]")
         
         # Загружаем compact_index из файла (как Orchestrator)
-        console.print(f"   [dim]📋 Загрузка compact_index...[/]")
-        compact_index = ""
         ci_start = _time.time()
         
-        if project_dir:
+        if compact_index is not None:
+            console.print(f"   [dim]📋 compact_index: {len(compact_index)} символов [загружен заранее][/]")
+        elif project_dir:
+            console.print(f"   [dim]📋 Загрузка compact_index...[/]")
+            compact_index = ""
             compact_md_path = Path(project_dir) / ".ai-agent" / "compact_index.md"
             if compact_md_path.exists():
                 try:
@@ -1402,6 +1417,7 @@ async def run_prefilter_analysis(
                     ci_elapsed = _time.time() - ci_start
                     console.print(f"   [dim]   → compact_index: {len(compact_index)} символов ({ci_elapsed:.1f}с) [сгенерирован][/]")
         else:
+            compact_index = ""
             console.print(f"   [dim]   → compact_index: пропущен (нет project_dir)[/]")
         
         # =====================================================================
@@ -1534,6 +1550,12 @@ def _format_prefilter_advice_for_orchestrator(
     
     Использует соответствующие шаблоны из prompt_templates.py в зависимости от режима.
     """
+    from app.llm.prompt_templates import (
+        _build_prefilter_advice_section,
+        _build_prefilter_advice_section_agent,
+        _build_prefilter_advice_section_new_project_agent,
+    )
+    
     if not advice:
         return ""
     
@@ -1679,6 +1701,15 @@ def print_tool_call(tool_name: str, args: Dict, output: str, success: bool):
         # Показываем результат теста полностью (важно!)
         output_preview = _truncate_output(output, 1000)
         
+    elif tool_name == "run_affected_tests":
+        emoji = "🧪"
+        changed = args.get("changed_files") or []
+        if changed:
+            description = f"Тесты, затронутые изменениями в: [bold yellow]{', '.join(changed[:3])}[/]"
+        else:
+            description = "Тесты, затронутые staged-изменениями"
+        output_preview = _truncate_output(output, 1000)
+        
     elif tool_name == "search_pypi":
         emoji = "📚"
         query = args.get("query", "")
@@ -3864,6 +3895,8 @@ async def attach_files():
     console.print("Введите 'готово' или пустую строку для завершения.")
     console.print("Введите 'очистить' для удаления всех прикреплённых файлов.\n")
     
+    from app.utils.token_counter import TokenCounter
+    
     token_counter = TokenCounter()
     total_tokens = sum(f['tokens'] for f in state.attached_files)
     max_tokens = cfg.MAX_USER_FILES_TOKENS
@@ -4254,166 +4287,194 @@ async def handle_ask_mode(query: str):
         await save_message("user", query)
         
         await update_thread_title_if_first_message(query)
+        
         # =====================================================================
-        # ЗАГРУЗКА ИСТОРИИ (идентично Agent и General Chat)
+        # ПЛАН ЗАПРОСА: роутер, pre-filter, история и контекст - параллельно
         # =====================================================================
-        history: List[Dict[str, str]] = []
+        # Шаги друг от друга не зависят, поэтому запускаются графом задач.
+        # История грузится без active_model (порог сжатия по умолчанию, как
+        # и в Agent-режиме), так что решения роутера она не ждёт.
+        from app.agents.request_planner import RequestTaskGraph
         
-        trace_stage("HISTORY_START", {
-            "has_history_manager": bool(state.history_manager),
-            "has_current_thread": bool(state.current_thread),
-            "thread_id": state.current_thread.id if state.current_thread else None,
-        })
-        
-        history_messages = []
-        compression_stats = None
-        
-        if state.history_manager and state.current_thread:
-            history_messages, compression_stats = await state.history_manager.get_session_history(
-               thread_id=state.current_thread.id,
-                current_query=query
-            )
+        # =====================================================================
+        # ЗАГРУЗКА ИСТОРИИ (идентично Agent и General Chat)
+        # =====================================================================
+        async def load_history(_deps):
+            history: List[Dict[str, str]] = []
+            compression_stats = None
             
-            trace_stage("HISTORY_RAW", {
-                "raw_messages_count": len(history_messages),
-                "compressed": bool(compression_stats),
+            trace_stage("HISTORY_START", {
+                "has_history_manager": bool(state.history_manager),
+                "has_current_thread": bool(state.current_thread),
+                "thread_id": state.current_thread.id if state.current_thread else None,
             })
             
-            for msg in history_messages:
-                if msg.role in ("user", "assistant"):
-                    content = msg.content
-                    
-                    # Нормализуем content
-                    if isinstance(content, list):
-                        text_parts = []
-                        for item in content:
-                            if isinstance(item, dict):
-                                if "text" in item:
-                                    text_parts.append(item["text"])
-                                elif "content" in item:
-                                    text_parts.append(str(item["content"]))
-                            elif isinstance(item, str):
-                                text_parts.append(item)
-                        content = "\n".join(text_parts) if text_parts else ""
-                    elif isinstance(content, dict):
-                        content = content.get("text", content.get("content", str(content)))
-                    
-                    if not isinstance(content, str):
-                        content = str(content) if content else ""
-                    
-                    if content.strip():
-                        history.append({"role": msg.role, "content": content})
-            
-            # DEBUG: показываем размер контекста
-            total_chars = sum(len(h["content"]) for h in history)
-            console.print(f"[dim]📊 История: {len(history)} сообщений, ~{total_chars // 4:,} токенов[/]")
+            if state.history_manager and state.current_thread:
+                history_messages, compression_stats = await state.history_manager.get_session_history(
+                    thread_id=state.current_thread.id,
+                    current_query=query,
+                )
+                
+                trace_stage("HISTORY_RAW", {
+                    "raw_messages_count": len(history_messages),
+                    "compressed": bool(compression_stats),
+                })
+                
+                for msg in history_messages:
+                    if msg.role in ("user", "assistant"):
+                        content = msg.content
+                        
+                        # Нормализуем content
+                        if isinstance(content, list):
+                            text_parts = []
+                            for item in content:
+                                if isinstance(item, dict):
+                                    if "text" in item:
+                                        text_parts.append(item["text"])
+                                    elif "content" in item:
+                                        text_parts.append(str(item["content"]))
+                                elif isinstance(item, str):
+                                    text_parts.append(item)
+                            content = "\n".join(text_parts) if text_parts else ""
+                        elif isinstance(content, dict):
+                            content = content.get("text", content.get("content", str(content)))
+                        
+                        if not isinstance(content, str):
+                            content = str(content) if content else ""
+                        
+                        if content.strip():
+                            history.append({"role": msg.role, "content": content})
+                
+                total_chars = sum(len(h["content"]) for h in history)
+                trace_stage("HISTORY_PROCESSED", {
+                    "messages_count": len(history),
+                    "total_chars": total_chars,
+                    "estimated_tokens": total_chars // 4,
+                })
+            else:
+                trace_stage("HISTORY_PROCESSED", {
+                    "messages_count": 0,
+                    "reason": "no_manager_or_thread",
+                })
             
-            trace_stage("HISTORY_PROCESSED", {
-                "messages_count": len(history),
-                "total_chars": total_chars,
-                "estimated_tokens": total_chars // 4,
-            })
-        else:
-            trace_stage("HISTORY_PROCESSED", {
-                "messages_count": 0,
-                "reason": "no_manager_or_thread",
-            })
+            return history, compression_stats
         
         # =====================================================================
-        # ШАГ 1: РОУТЕР
+        # ШАГ 1: РОУТЕР (без console.status - идёт параллельно с pre-filter)
         # =====================================================================
-        console.print("\n" + "=" * 60)
-        console.print("[bold cyan]🔍 ШАГ 1: РОУТЕР — Выбор модели[/]")
-        console.print("=" * 60)
-        
-        trace_stage("ROUTER_START", {
-            "use_router": state.use_router,
-            "fixed_model": state.get_current_orchestrator_model(),
-        })
-        
-        try:
-            if state.use_router:
-                with console.status("[bold cyan]🔍 Анализ сложности запроса...[/]"):
+        async def run_router(_deps):
+            trace_stage("ROUTER_START", {
+                "use_router": state.use_router,
+                "fixed_model": state.get_current_orchestrator_model(),
+            })
+            try:
+                if state.use_router:
                     routing = await route_request(query, project_index)
-                    model = routing.orchestrator_model
-                    model_name = get_model_short_name(model)
-                    
-                console.print(f"[green]✓[/] Роутер выбрал: [bold]{model_name}[/]")
-                console.print(f"   [dim]Сложность: {routing.complexity_level}[/]")
-                if routing.reasoning:
-                    reasoning_preview = routing.reasoning[:150] + "..." if len(routing.reasoning) > 150 else routing.reasoning
-                    console.print(f"   [dim]Причина: {reasoning_preview}[/]")
-                    
-                trace_stage("ROUTER_COMPLETE", {
-                    "model": model,
-                    "model_name": model_name,
-                    "complexity_level": routing.complexity_level,
-                    "reasoning": routing.reasoning[:200] if routing.reasoning else None,
-                })
-            else:
-                model = state.get_current_orchestrator_model()
-                model_name = get_model_short_name(model)
-                console.print(f"[green]✓[/] Используется фиксированная модель: [bold]{model_name}[/]")
+                    trace_stage("ROUTER_COMPLETE", {
+                        "model": routing.orchestrator_model,
+                        "model_name": get_model_short_name(routing.orchestrator_model),
+                        "complexity_level": routing.complexity_level,
+                        "reasoning": routing.reasoning[:200] if routing.reasoning else None,
+                    })
+                    return routing.orchestrator_model, routing, None
                 
+                model = state.get_current_orchestrator_model()
                 trace_stage("ROUTER_COMPLETE", {
                     "model": model,
-                    "model_name": model_name,
+                    "model_name": get_model_short_name(model),
                     "source": "fixed",
                 })
-        except Exception as e:
-            logger.error(f"Ошибка роутера: {e}", exc_info=True)
-            model = cfg.ORCHESTRATOR_SIMPLE_MODEL
-            model_name = get_model_short_name(model)
-            console.print(f"[yellow]⚠️ Ошибка роутера, используется модель по умолчанию: {model_name}[/]")
-            
-            trace_stage("ROUTER_ERROR", {
-                "error": str(e),
-                "fallback_model": model,
-            })
+                return model, None, None
+            except Exception as e:
+                logger.error(f"Ошибка роутера: {e}", exc_info=True)
+                trace_stage("ROUTER_ERROR", {
+                    "error": str(e),
+                    "fallback_model": cfg.ORCHESTRATOR_SIMPLE_MODEL,
+                })
+                return cfg.ORCHESTRATOR_SIMPLE_MODEL, None, e
+        
+        # Компактный индекс - читаем готовый MD файл; project map
+        def read_context():
+            compact_index = ""
+            if state.project_dir:
+                compact_md_path = Path(state.project_dir) / ".ai-agent" / "compact_index.md"
+                if compact_md_path.exists():
+                    try:
+                        compact_index = compact_md_path.read_text(encoding="utf-8")
+                        logger.info(f"Loaded compact_index.md ({len(compact_index)} chars)")
+                    except Exception as e:
+                        logger.warning(f"Failed to load compact_index.md: {e}")
+                        compact_index = create_chunks_list_auto(project_index) if project_index else ""
+            project_map = get_project_map_for_prompt(state.project_dir or ".")
+            return compact_index, project_map
         
-    # =====================================================================
+        async def load_context(_deps):
+            return await asyncio.to_thread(read_context)
+        
+        # =====================================================================
         # ШАГ 2: PRE-FILTER АНАЛИЗ (СОВЕТЫ ДЛЯ ОРКЕСТРАТОРА)
         # =====================================================================
+        async def run_prefilter(deps):
+            compact_index, project_map = deps["context"]
+            try:
+                advice_str, advice_obj = await run_prefilter_analysis(
+                    user_query=query,
+                    project_dir=state.project_dir or ".",
+                    project_index=project_index,
+                    mode=state.prefilter_mode,
+                    model=state.prefilter_model,
+                    is_new_project=state.is_new_project,
+                    on_tool_call=_prefilter_streaming_handler,
+                    project_map=project_map,
+                    # Пустой - pre-filter сам сгенерирует из индекса
+                    compact_index=compact_index or None,
+                )
+                
+                trace_stage("PREFILTER_ANALYSIS", {
+                    "mode": state.prefilter_mode,
+                    "has_advice": bool(advice_str),
+                    "tool_calls": advice_obj.tool_calls_made if advice_obj else 0,
+                })
+                return advice_str, advice_obj
+            except Exception as e:
+                logger.warning(f"Pre-filter analysis failed: {e}")
+                trace_stage("PREFILTER_ANALYSIS_ERROR", {"error": str(e)})
+                return "", None
+        
         console.print("\n" + "=" * 60)
-        console.print("[bold cyan]💡 ШАГ 2: PRE-FILTER АНАЛИЗ — Советы для Оркестратора[/]")
+        console.print("[bold cyan]🔍 ШАГ 1-2: РОУТЕР + PRE-FILTER АНАЛИЗ (параллельно)[/]")
         console.print("=" * 60)
         
-        prefilter_advice_str = ""
-        prefilter_advice_obj = None
+        graph = RequestTaskGraph("ask")
+        graph.add("router", run_router)
+        graph.add("context", load_context)
+        graph.add("history", load_history)
+        graph.add("prefilter", run_prefilter, deps=("context",))
+        plan = await graph.run()
         
-        try:
-            prefilter_advice_str, prefilter_advice_obj = await run_prefilter_analysis(
-                user_query=query,
-                project_dir=state.project_dir or ".",
-                project_index=project_index,
-                mode=state.prefilter_mode,
-                model=state.prefilter_model,
-                is_new_project=state.is_new_project,
-                on_tool_call=_prefilter_streaming_handler
-            )
-            
-            trace_stage("PREFILTER_ANALYSIS", {
-                "mode": state.prefilter_mode,
-                "has_advice": bool(prefilter_advice_str),
-                "tool_calls": prefilter_advice_obj.tool_calls_made if prefilter_advice_obj else 0,
-            })
-        except Exception as e:
-            logger.warning(f"Pre-filter analysis failed: {e}")
-            trace_stage("PREFILTER_ANALYSIS_ERROR", {"error": str(e)})
+        trace_stage("REQUEST_PLAN", {"timeline": graph.timeline()})
         
-        # Компактный индекс - читаем готовый MD файл
-        compact_index = ""
-        if state.project_dir:
-            compact_md_path = Path(state.project_dir) / ".ai-agent" / "compact_index.md"
-            if compact_md_path.exists():
-                try:
-                    compact_index = compact_md_path.read_text(encoding="utf-8")
-                    logger.info(f"Loaded compact_index.md ({len(compact_index)} chars)")
-                except Exception as e:
-                    logger.warning(f"Failed to load compact_index.md: {e}")
-                    compact_index = create_chunks_list_auto(project_index) if project_index else ""        
+        model, routing, router_error = plan["router"]
+        model_name = get_model_short_name(model)
+        compact_index, project_map = plan["context"]
+        prefilter_advice_str, prefilter_advice_obj = plan["prefilter"]
+        history, compression_stats = plan["history"]
         
-        project_map = get_project_map_for_prompt(state.project_dir or ".")
+        if router_error is not None:
+            console.print(f"[yellow]⚠️ Ошибка роутера, используется модель по умолчанию: {model_name}[/]")
+        elif routing is not None:
+            console.print(f"[green]✓[/] Роутер выбрал: [bold]{model_name}[/]")
+            console.print(f"   [dim]Сложность: {routing.complexity_level}[/]")
+            if routing.reasoning:
+                reasoning_preview = routing.reasoning[:150] + "..." if len(routing.reasoning) > 150 else routing.reasoning
+                console.print(f"   [dim]Причина: {reasoning_preview}[/]")
+        else:
+            console.print(f"[green]✓[/] Используется фиксированная модель: [bold]{model_name}[/]")
+        
+        # DEBUG: показываем размер контекста
+        if state.history_manager and state.current_thread:
+            total_chars = sum(len(h["content"]) for h in history)
+            console.print(f"[dim]📊 История: {len(history)} сообщений, ~{total_chars // 4:,} токенов[/]")
         
         # DEBUG: размер контекста
         from app.utils.token_counter import TokenCounter
@@ -4945,20 +5006,16 @@ async def handle_agent_mode(query: str):
             )
 
     # =====================================================================
-    # PRE-FILTER АНАЛИЗ ИЛИ ПЛАНИРОВАНИЕ
+    # ПЛАНИРОВАНИЕ (интерактивное, до остальных шагов)
     # =====================================================================
     is_planning = state.prefilter_mode == 'advanced'
     
-    if is_planning:
-        console.print("\n[bold cyan]💡 Этап планирования архитектуры (Pre-filter)...[/]")
-    else:
-        console.print("\n[bold cyan]💡 Pre-filter анализ...[/]")
-    
     prefilter_advice_str = ""
     prefilter_advice_obj = None
     
-    try:
-        if is_planning:
+    if is_planning:
+        console.print("\n[bold cyan]💡 Этап планирования архитектуры (Pre-filter)...[/]")
+        try:
             plan_accepted = False
             current_query = query
             
@@ -5009,26 +5066,9 @@ async def handle_agent_mode(query: str):
                         f"--- USER FEEDBACK FOR IMPROVEMENT ---\n{user_input}"
                     )
                     console.print("[cyan]Отправляю правки планировщику...[/]")
-        else:
-            prefilter_advice_str, prefilter_advice_obj = await run_prefilter_analysis(
-                user_query=query,
-                project_dir=state.project_dir or ".",
-                project_index=state.project_index or {},
-                mode=state.prefilter_mode,
-                model=state.prefilter_model,
-                is_planning=False,
-                is_new_project=state.is_new_project,
-                on_tool_call=_prefilter_streaming_handler
-            )
-            
-            log_pipeline_stage("PREFILTER_ANALYSIS", f"Pre-filter completed", {
-                "mode": state.prefilter_mode,
-                "has_advice": bool(prefilter_advice_str),
-                "tool_calls": prefilter_advice_obj.tool_calls_made if prefilter_advice_obj else 0,
-            })
-    except Exception as e:
-        logger.warning(f"Pre-filter analysis failed: {e}")
-        log_pipeline_stage("PREFILTER_ANALYSIS", f"Pre-filter failed: {e}")
+        except Exception as e:
+            logger.warning(f"Pre-filter analysis failed: {e}")
+            log_pipeline_stage("PREFILTER_ANALYSIS", f"Pre-filter failed: {e}")
 
 
     log_pipeline_stage("START", f"Processing agent request: {query[:100]}...", {
@@ -5050,10 +5090,6 @@ async def handle_agent_mode(query: str):
                 return
             log_pipeline_stage("INDEX_CHECK", "Index reloaded successfully")
 
-    # Инкрементальное обновление
-    if state.project_dir and not state.is_new_project:
-        await run_incremental_update(state.project_dir)
-
     # === ИНИЦИАЛИЗАЦИЯ PIPELINE ===
     if state.pipeline is None:
         log_pipeline_stage("PIPELINE_INIT", "Creating new AgentPipeline")
@@ -5078,7 +5114,82 @@ async def handle_agent_mode(query: str):
     await save_message("user", query)
     
     await update_thread_title_if_first_message(query)
-    history = await load_conversation_history(current_query=query)
+
+    # =====================================================================
+    # ПЛАН ЗАПРОСА: инкрементальное обновление, pre-filter, роутер, история
+    # =====================================================================
+    # Роутер и загрузка истории не ждут pre-filter; pre-filter ждёт только
+    # обновления индекса. История в режиме агента от модели не зависит
+    # (грузится без active_model), поэтому сверка с роутером не нужна.
+    from app.agents.request_planner import RequestTaskGraph
+    from app.agents.router import route_request
+    
+    if not is_planning:
+        console.print("\n[bold cyan]💡 Pre-filter анализ...[/]")
+    
+    async def run_update(_deps):
+        if state.project_dir and not state.is_new_project:
+            await run_incremental_update(state.project_dir)
+    
+    async def run_prefilter(_deps):
+        try:
+            advice_str, advice_obj = await run_prefilter_analysis(
+                user_query=query,
+                project_dir=state.project_dir or ".",
+                project_index=state.project_index or {},
+                mode=state.prefilter_mode,
+                model=state.prefilter_model,
+                is_planning=False,
+                is_new_project=state.is_new_project,
+                on_tool_call=_prefilter_streaming_handler
+            )
+            
+            log_pipeline_stage("PREFILTER_ANALYSIS", f"Pre-filter completed", {
+                "mode": state.prefilter_mode,
+                "has_advice": bool(advice_str),
+                "tool_calls": advice_obj.tool_calls_made if advice_obj else 0,
+            })
+            return advice_str, advice_obj
+        except Exception as e:
+            logger.warning(f"Pre-filter analysis failed: {e}")
+            log_pipeline_stage("PREFILTER_ANALYSIS", f"Pre-filter failed: {e}")
+            return "", None
+    
+    async def run_router(_deps):
+        if not state.use_router:
+            return None
+        try:
+            return await route_request(query, state.project_index or {})
+        except Exception as e:
+            logger.error(f"Ошибка роутера: {e}", exc_info=True)
+            return None
+    
+    async def load_history(_deps):
+        return await load_conversation_history(current_query=query)
+    
+    graph = RequestTaskGraph("agent")
+    graph.add("update", run_update)
+    if not is_planning:
+        graph.add("prefilter", run_prefilter, deps=("update",))
+    graph.add("router", run_router)
+    graph.add("history", load_history)
+    plan = await graph.run()
+    
+    if not is_planning:
+        prefilter_advice_str, prefilter_advice_obj = plan["prefilter"]
+    history = plan["history"]
+    
+    routing = plan["router"]
+    routed_model = routing.orchestrator_model if routing else None
+    if routing:
+        console.print(f"[green]✓[/] Роутер выбрал: [bold]{get_model_short_name(routed_model)}[/] "
+                      f"[dim]({routing.complexity_level})[/]")
+        log_pipeline_stage("ROUTER", f"Router selected {routed_model}", {
+            "complexity_level": routing.complexity_level,
+        })
+    elif state.use_router:
+        # Роутер не ответил - пайплайн вызовет его сам
+        console.print("[yellow]⚠️ Ошибка роутера, выбор модели передан пайплайну[/]")
 
     console.print("\n[bold cyan]🤖 Режим Агента - Автономная генерация кода[/]\n")
     console.print("=" * 60)
@@ -5538,6 +5649,7 @@ async def handle_agent_mode(query: str):
             on_stage=on_stage_callback,
             on_user_decision=on_user_decision_callback,
             prefilter_advice=prefilter_advice_str,
+            routed_model=routed_model,
         )
         
         log_pipeline_stage("PIPELINE_RESULT", f"Completed: {result.status.value}", {
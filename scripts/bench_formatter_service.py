@@ -0,0 +1,92 @@
+# scripts/bench_formatter_service.py
+"""
+Benchmark: per-call cost of a formatter subprocess vs the warm formatter
+daemon (app/services/formatter_service.py).
+
+Python formatters are run with the current interpreter; Java needs a
+google-java-format jar, prettier needs the `prettier` CLI on PATH.
+Formatters that are not installed are skipped.
+
+Run: python scripts/bench_formatter_service.py [runs] [google-java-format.jar]
+"""
+
+import sys
+import time
+import shutil
+import subprocess
+from pathlib import Path
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.services.formatter_service import get_formatter_service
+
+PYTHON_SAMPLE = "import os\nimport sys\ndef f(a,b):\n  return {'a':a,'b':b}\n"
+JAVA_SAMPLE = "import java.util.List;\nclass A { int f(int a){return a+1;} }\n"
+JS_SAMPLE = "const a = {b:1,c:[1,2,3]}\nfunction f(x){return x+1}\n"
+
+
+def _timed(fn, runs: int):
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return sum(times) / len(times)
+
+
+def _report(label: str, cold_avg: float, warm_avg: float):
+    speedup = cold_avg / warm_avg if warm_avg > 0 else 0
+    print(f"  {label:<20} subprocess {cold_avg:8.1f} ms   daemon {warm_avg:7.1f} ms   x{speedup:.1f}")
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    jar = sys.argv[2] if len(sys.argv) > 2 else None
+    service = get_formatter_service()
+
+    print(f"Runs: {runs}")
+
+    for tool, args, options in (
+        ("black", ["-q", "-"], {"line_length": 120}),
+        ("isort", ["-", "--profile", "black"], {"profile": "black"}),
+        ("autopep8", ["-"], {}),
+        ("yapf", ["--style", "pep8"], {"style": "pep8"}),
+    ):
+        if service.format_python(tool, PYTHON_SAMPLE, sys.executable, **options) is None:
+            print(f"  {tool:<20} not installed, skipped")
+            continue
+        cold = _timed(lambda: subprocess.run(
+            [sys.executable, "-m", tool, *args], input=PYTHON_SAMPLE, capture_output=True, text=True
+        ), runs)
+        warm = _timed(lambda: service.format_python(tool, PYTHON_SAMPLE, sys.executable, **options), runs)
+        _report(tool, cold, warm)
+
+    if jar and shutil.which("java") and service.format_java(JAVA_SAMPLE, Path(jar)) is not None:
+        cold = _timed(lambda: subprocess.run(
+            ["java", "-jar", jar, "-"], input=JAVA_SAMPLE, capture_output=True, text=True
+        ), runs)
+        warm = _timed(lambda: service.format_java(JAVA_SAMPLE, Path(jar)), runs)
+        _report("google-java-format", cold, warm)
+    else:
+        print(f"  {'google-java-format':<20} no jar/java, skipped")
+
+    if service.format_prettier(JS_SAMPLE, "sample.js") is not None:
+        cold = _timed(lambda: subprocess.run(
+            ["prettier", "--stdin-filepath", "sample.js"], input=JS_SAMPLE, capture_output=True, text=True
+        ), runs)
+        warm = _timed(lambda: service.format_prettier(JS_SAMPLE, "sample.js"), runs)
+        _report("prettier", cold, warm)
+    else:
+        print(f"  {'prettier':<20} not installed, skipped")
+
+    print()
+    for key, stats in service.stats()["daemons"].items():
+        print(f"  {key}: startup {stats['startup_ms']} ms, {stats['requests']} requests")
+    service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+# scripts/bench_incremental_parse.py
+"""
+Benchmark: applying N code blocks to one large Python file with and without
+the incremental Tree-sitter cache (app/services/tree_sitter_parser.py).
+
+Builds a synthetic file (default 5000 lines), applies REPLACE_METHOD blocks
+one after another through FileModifier.apply_code_block (as staging does),
+each followed by a FaultTolerantParser.parse structure check. Reports the
+time per mode, the cache counters and checks that both modes produce the
+same content.
+
+Run: python scripts/bench_incremental_parse.py [blocks] [lines]
+Example: python scripts/bench_incremental_parse.py 20 5000
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.services.file_modifier import FileModifier, ParsedCodeBlock
+from app.services.tree_sitter_parser import FaultTolerantParser, get_tree_cache
+
+METHOD_LINES = 8
+
+
+def _build_source(lines: int) -> str:
+    """Файл из классов по 5 методов (~METHOD_LINES строк на метод)"""
+    parts = ["import os", "import sys", ""]
+    index = 0
+    while len(parts) < lines:
+        parts.append(f"class Service{index}:")
+        for m in range(5):
+            parts.append(f"    def method_{m}(self, value):")
+            parts.append(f"        total = value + {m}")
+            parts.append("        for item in range(3):")
+            parts.append("            total += item")
+            parts.append("        if total > 10:")
+            parts.append("            return total")
+            parts.append(f"        return total * {index}")
+            parts.append("")
+        index += 1
+    return "\n".join(parts) + "\n"
+
+
+def _build_blocks(count: int, classes: int):
+    step = max(1, classes // count)
+    blocks = []
+    for i in range(count):
+        cls = (i * step) % classes
+        code = (
+            f"def method_2(self, value):\n"
+            f"    # replaced by block {i}\n"
+            f"    return value * {i + 2}\n"
+        )
+        blocks.append(ParsedCodeBlock(
+            file_path="big_module.py",
+            mode="REPLACE_METHOD",
+            code=code,
+            target_class=f"Service{cls}",
+            target_method="method_2",
+        ))
+    return blocks
+
+
+def _run(source: str, blocks, incremental: bool):
+    cache = get_tree_cache()
+    cache.clear()
+    cache.stats = {"hits": 0, "incremental": 0, "full": 0}
+    # Без инкрементального режима каждый парс полный (кэш не используется)
+    cache.MIN_SOURCE_BYTES = type(cache).MIN_SOURCE_BYTES if incremental else float("inf")
+
+    modifier = FileModifier()
+    checker = FaultTolerantParser()
+    content = source
+    failed = 0
+    started = time.perf_counter()
+    for block in blocks:
+        result = modifier.apply_code_block(content, block)
+        if not result.success or result.new_content is None:
+            failed += 1
+            continue
+        if checker.parse(result.new_content).errors:
+            failed += 1
+            continue
+        content = result.new_content
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    return content, elapsed_ms, failed, dict(cache.stats)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    lines = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+    source = _build_source(lines)
+    classes = source.count("\nclass ")
+    blocks = _build_blocks(count, classes)
+    print(f"File: {source.count(chr(10))} lines, {len(source) // 1024} KB; {count} REPLACE_METHOD blocks")
+
+    full_content, full_ms, full_failed, _ = _run(source, blocks, incremental=False)
+    inc_content, inc_ms, inc_failed, stats = _run(source, blocks, incremental=True)
+
+    print(f"  full reparse:  {full_ms:8.0f} ms  ({full_failed} failed blocks)")
+    print(f"  incremental:   {inc_ms:8.0f} ms  ({inc_failed} failed blocks)  cache {stats}")
+    if inc_ms > 0:
+        print(f"  speedup: {full_ms / inc_ms:.2f}x")
+
+    if full_content != inc_content:
+        print("\nFAIL: incremental and full reparse produced different content")
+        return 1
+    print("\nOK: identical content")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
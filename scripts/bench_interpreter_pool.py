@@ -0,0 +1,99 @@
+# scripts/bench_interpreter_pool.py
+"""
+Benchmark: per-test overhead of a fresh `python -c` subprocess vs a fork of
+the pre-warmed interpreter pool (app/services/interpreter_pool.py).
+
+Each run executes the same import-only check script RuntimeTester uses.
+
+Run: python scripts/bench_interpreter_pool.py [runs] [preload modules...]
+Example: python scripts/bench_interpreter_pool.py 50 json email
+"""
+
+import sys
+import time
+import tempfile
+import subprocess
+from pathlib import Path
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.services.interpreter_pool import WarmInterpreterPool
+
+
+def _check_script(modules):
+    lines = [f"import {name}" for name in modules]
+    lines.append("print('IMPORT_SUCCESS')")
+    return "\n".join(lines)
+
+
+def _bench_subprocess(script: str, cwd: str, runs: int):
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            capture_output=True,
+            text=True,
+            timeout=30,
+            cwd=cwd,
+        )
+        times.append((time.perf_counter() - started) * 1000)
+        assert "IMPORT_SUCCESS" in result.stdout, result.stderr
+    return times
+
+
+def _bench_pool(pool: WarmInterpreterPool, script: str, cwd: str, runs: int):
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = pool.run(script, cwd=cwd, timeout=30)
+        times.append((time.perf_counter() - started) * 1000)
+        assert "IMPORT_SUCCESS" in result.stdout, result.stderr
+    return times
+
+
+def _summary(label: str, times):
+    ordered = sorted(times)
+    avg = sum(times) / len(times)
+    p50 = ordered[len(ordered) // 2]
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"  {label:<12} avg {avg:7.1f} ms   p50 {p50:7.1f} ms   p95 {p95:7.1f} ms")
+    return avg
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    modules = sys.argv[2:] or ["json", "email.parser", "http.client"]
+
+    if not WarmInterpreterPool.is_supported():
+        print("Interpreter pool is not supported on this platform (no fork)")
+        return 1
+
+    script = _check_script(modules)
+
+    print(f"Interpreter: {sys.executable}")
+    print(f"Runs: {runs}, modules: {', '.join(modules)}")
+
+    with tempfile.TemporaryDirectory() as cwd:
+        cold = _bench_subprocess(script, cwd, runs)
+
+        pool = WarmInterpreterPool(sys.executable, preload=modules)
+        try:
+            pool.start()
+            warm = _bench_pool(pool, script, cwd, runs)
+        finally:
+            pool.close()
+
+    print()
+    print(f"  pool startup {pool.startup_ms:.1f} ms (paid once per session)")
+    cold_avg = _summary("subprocess", cold)
+    warm_avg = _summary("pool", warm)
+    if warm_avg > 0:
+        print(f"\n  speedup x{cold_avg / warm_avg:.1f} per test")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+# scripts/bench_prefilter_lexical.py
+"""
+Benchmark: BM25 first stage of the pre-filter (app/services/lexical_index.py).
+
+For each query checks that the expected chunks are among the top-K lexical
+candidates (recall of the first stage - the LLM can only pick what it is
+shown), and compares the input the pre-filter LLM would receive with and
+without the lexical stage.
+
+Uses the project's .ai-agent semantic index.
+
+Run: python scripts/bench_prefilter_lexical.py [project_dir] [queries.json | -] [top_k]
+queries.json: [{"query": "...", "expected": ["path/file.py:Name", ...]}, ...]
+Without queries.json a built-in query set for this repository is used.
+"""
+
+import sys
+import json
+import time
+from pathlib import Path
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.services import lexical_index
+from app.services.index_manager import load_semantic_index
+from app.agents.pre_filter import _load_all_chunks_with_code, _build_chunks_for_llm
+from config.settings import cfg
+
+DEFAULT_QUERIES = [
+    {
+        "query": "history grows too large, messages should be compressed when over the token threshold",
+        "expected": ["app/history/compressor.py:compress_history_if_needed"],
+    },
+    {
+        "query": "pre-filter loads every chunk with its code from the index",
+        "expected": ["app/agents/pre_filter.py:_load_all_chunks_with_code"],
+    },
+    {
+        "query": "chunks for the LLM are trimmed to the token budget",
+        "expected": ["app/agents/pre_filter.py:_build_chunks_for_llm"],
+    },
+    {
+        "query": "extract the explanation section from the code generator response",
+        "expected": ["app/agents/code_generator.py:_extract_explanation"],
+    },
+    {
+        "query": "LLM client with multiple providers fails over between models",
+        "expected": ["app/llm/api_client.py:LLMClient"],
+    },
+    {
+        "query": "prompt for the AI validator that checks generated code against the request",
+        "expected": ["app/llm/prompt_templates.py:_build_ai_validator_system_prompt"],
+    },
+    {
+        "query": "user feedback the orchestrator must address",
+        "expected": ["app/agents/feedback_handler.py:UserFeedback"],
+    },
+    {
+        "query": "промпт для режима общего чата orchestrator general",
+        "expected": ["app/llm/prompt_templates.py:format_orchestrator_prompt_general"],
+    },
+]
+
+
+def main():
+    project_dir = sys.argv[1] if len(sys.argv) > 1 else str(PROJECT_ROOT)
+    queries = DEFAULT_QUERIES
+    if len(sys.argv) > 2 and sys.argv[2] not in ("", "-"):
+        queries = json.loads(Path(sys.argv[2]).read_text(encoding="utf-8"))
+    top_k = int(sys.argv[3]) if len(sys.argv) > 3 else cfg.PRE_FILTER_LEXICAL_TOP_K
+
+    if not lexical_index.is_available():
+        print("NumPy is not installed - lexical stage unavailable")
+        return 1
+
+    index = load_semantic_index(project_dir)
+    if not index:
+        print(f"No semantic index in {project_dir}/.ai-agent")
+        return 1
+
+    started = time.perf_counter()
+    lexical = lexical_index.build_lexical_index(index, project_dir)
+    build_ms = (time.perf_counter() - started) * 1000
+    print(f"Index: {lexical.size} chunks, {len(lexical.vocab)} terms, built in {build_ms:.0f} ms")
+
+    started = time.perf_counter()
+    all_chunks = _load_all_chunks_with_code(index, project_dir)
+    baseline, baseline_tokens = _build_chunks_for_llm(all_chunks, cfg.PRE_FILTER_MAX_TOKENS)
+    baseline_ms = (time.perf_counter() - started) * 1000
+    baseline_ids = {c.chunk_id for c in baseline}
+    print(
+        f"Without lexical stage: {len(baseline)} chunks, {baseline_tokens:,} tokens to LLM "
+        f"(load {baseline_ms:.0f} ms)\n"
+    )
+
+    hits = baseline_hits = total = 0
+    candidate_tokens = []
+    for item in queries:
+        started = time.perf_counter()
+        ranked = lexical.search(item["query"], top_k=top_k)
+        search_ms = (time.perf_counter() - started) * 1000
+
+        candidate_ids = {chunk_id for chunk_id, _ in ranked}
+        chunks = _load_all_chunks_with_code(index, project_dir, chunk_ids=candidate_ids)
+        _, tokens = _build_chunks_for_llm(chunks, cfg.PRE_FILTER_MAX_TOKENS, keep_order=True)
+        candidate_tokens.append(tokens)
+
+        found = [e for e in item["expected"] if e in candidate_ids]
+        found_baseline = [e for e in item["expected"] if e in baseline_ids]
+        hits += len(found)
+        baseline_hits += len(found_baseline)
+        total += len(item["expected"])
+
+        ranks = [i + 1 for i, (chunk_id, _) in enumerate(ranked) if chunk_id in item["expected"]]
+        print(
+            f"  [{len(found)}/{len(item['expected'])}] rank {ranks or '-'}  "
+            f"{tokens:>6,} tokens  {search_ms:5.1f} ms  {item['query'][:60]}"
+        )
+
+    avg_tokens = sum(candidate_tokens) / max(len(candidate_tokens), 1)
+    print()
+    print(f"  recall@{top_k}: {hits}/{total} (without lexical stage: {baseline_hits}/{total})")
+    print(f"  LLM input: {avg_tokens:,.0f} tokens avg vs {baseline_tokens:,} "
+          f"(x{baseline_tokens / max(avg_tokens, 1):.1f} less)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+# scripts/bench_startup.py
+"""
+Benchmark: startup import time of main.py (`python -X importtime -c "import main"`).
+
+Reports the median cumulative import time of `main` over several runs and the
+heaviest modules of the last run. Fails (exit code 1) when:
+- the median exceeds the threshold (ms), or
+- one of the subsystems that must load lazily is imported at startup.
+
+Run: python scripts/bench_startup.py [runs] [threshold_ms]
+Example: python scripts/bench_startup.py 5 600
+"""
+
+import sys
+import statistics
+import subprocess
+from pathlib import Path
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+
+DEFAULT_RUNS = 5
+DEFAULT_THRESHOLD_MS = 600
+
+# Подсистемы, которые должны импортироваться при первом использовании, а не до меню
+LAZY_MODULES = (
+    "app.agents.pre_filter",
+    "app.agents.agent_pipeline",
+    "app.agents.orchestrator",
+    "app.llm.prompt_templates",
+    "app.llm.api_client",
+    "app.services.tree_sitter_parser",
+    "app.services.runtime_tester",
+    "app.tools.dependency_manager",
+    "numpy",
+    "tiktoken",
+    "rich.markdown",
+    "rich.syntax",
+)
+
+
+def _run_importtime():
+    """Один запуск: {module: (self_us, cumulative_us)}"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        capture_output=True,
+        text=True,
+        timeout=120,
+        cwd=PROJECT_ROOT,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import main failed:\n{result.stderr[-2000:]}")
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # заголовок
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_RUNS
+    threshold_ms = float(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_THRESHOLD_MS
+
+    totals = []
+    modules = {}
+    for _ in range(runs):
+        modules = _run_importtime()
+        totals.append(modules["main"][1] / 1000)
+
+    median_ms = statistics.median(totals)
+    print(f"import main: median {median_ms:.0f} ms over {runs} runs "
+          f"(min {min(totals):.0f}, max {max(totals):.0f}), threshold {threshold_ms:.0f} ms")
+
+    print("\nHeaviest modules (self time, last run):")
+    for name, (self_us, cumulative_us) in sorted(modules.items(), key=lambda kv: -kv[1][0])[:15]:
+        print(f"  {self_us / 1000:7.1f} ms  (cumulative {cumulative_us / 1000:7.1f} ms)  {name}")
+
+    eager = [name for name in LAZY_MODULES if name in modules]
+    failed = False
+    if eager:
+        print(f"\nFAIL: imported at startup, expected lazy: {', '.join(eager)}")
+        failed = True
+    if median_ms > threshold_ms:
+        print(f"\nFAIL: startup regression, {median_ms:.0f} ms > {threshold_ms:.0f} ms")
+        failed = True
+    if not failed:
+        print("\nOK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# scripts/test_chunk_store.py
+"""
+Тесты ChunkStore (app/services/chunk_store.py): обновление и компакция.
+
+Проверяет:
+1. Код и токены чанка читаются из store
+2. Компакция не падает на пустых чанках (digest "") и сохраняет манифест
+
+Запуск:
+    python scripts/test_chunk_store.py
+"""
+
+import sys
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+# Добавляем корень проекта в путь
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.services.chunk_store import ChunkStore
+
+
+class _CharCounter:
+    """Детерминированный счётчик токенов без tiktoken"""
+
+    def count(self, text: str) -> int:
+        return len(text)
+
+
+def _index(*functions):
+    return {"files": {"mod.py": {"classes": [], "functions": [
+        {"name": name, "lines": lines} for name, lines in functions
+    ]}}}
+
+
+class ChunkStoreTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.project_dir = tempfile.mkdtemp(prefix="chunk_store_")
+        self.source = Path(self.project_dir) / "mod.py"
+
+    def tearDown(self):
+        shutil.rmtree(self.project_dir, ignore_errors=True)
+
+    def test_chunk_is_readable(self):
+        self.source.write_text("def f():\n    return 1\n", encoding="utf-8")
+        store = ChunkStore(self.project_dir)
+        store.update(_index(("f", "1-2")), token_counter=_CharCounter())
+
+        with store.open_reader() as reader:
+            code, tokens = reader.get("mod.py", "f", "1-2")
+        self.assertEqual(code, "def f():\n    return 1")
+        self.assertEqual(tokens, len(code))
+
+    def test_compaction_with_empty_chunk(self):
+        # Большой чанк + пустой (строки 3-4 - пробелы)
+        body = "".join(f"    x{i} = {i}\n" for i in range(50))
+        self.source.write_text("def big():\n" + body + "\n\n", encoding="utf-8")
+        store = ChunkStore(self.project_dir)
+        store.update(_index(("big", "1-51"), ("blank", "52-53")), token_counter=_CharCounter())
+        self.assertEqual(store.files["mod.py"]["chunks"]["blank|52-53"], "")
+
+        # Файл уменьшился: старый блоб - мусор, запускается компакция
+        self.source.write_text("def big():\n    pass\n\n\n", encoding="utf-8")
+        store.update(_index(("big", "1-2"), ("blank", "3-4")), token_counter=_CharCounter())
+
+        reloaded = ChunkStore(self.project_dir)
+        self.assertEqual(reloaded.files, store.files)
+        self.assertEqual(len(reloaded.blobs), 1)
+        with reloaded.open_reader() as reader:
+            self.assertEqual(reader.get("mod.py", "big", "1-2")[0], "def big():\n    pass")
+            self.assertIsNone(reader.get("mod.py", "blank", "3-4"))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# scripts/test_tool_memo.py
+"""
+Тесты ToolResultMemo (app/tools/tool_memo.py): ключи и инвалидация.
+
+Проверяет:
+1. Пути нормализуются ("./app/x.py" и "app/x.py" - один ключ)
+2. Паттерны и запросы не нормализуются ("def " и "def" - разные ключи)
+3. Изменение staged-файла инвалидирует запись
+
+Запуск:
+    python scripts/test_tool_memo.py
+"""
+
+import sys
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+# Добавляем корень проекта в путь
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.services.virtual_fs import VirtualFileSystem
+from app.tools.tool_memo import ToolResultMemo
+
+
+class ToolMemoTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.project_dir = tempfile.mkdtemp(prefix="tool_memo_")
+        (Path(self.project_dir) / "app").mkdir()
+        (Path(self.project_dir) / "app" / "x.py").write_text("def f():\n    pass\n", encoding="utf-8")
+        self.vfs = VirtualFileSystem(self.project_dir)
+        self.memo = ToolResultMemo(self.project_dir, virtual_fs=self.vfs)
+
+    def tearDown(self):
+        shutil.rmtree(self.project_dir, ignore_errors=True)
+
+    def test_paths_are_normalized(self):
+        self.memo.store("read_file", {"file_path": "./app/x.py"}, "content", call_number=1)
+        self.assertEqual(self.memo.lookup("read_file", {"file_path": "app/x.py"}), "content")
+
+    def test_patterns_differing_in_whitespace_are_distinct(self):
+        self.memo.store("grep_search", {"pattern": "def "}, "with space", call_number=1)
+        self.assertIsNone(self.memo.lookup("grep_search", {"pattern": "def"}))
+
+        self.memo.store("grep_search", {"pattern": "def"}, "without space", call_number=2)
+        self.assertEqual(self.memo.lookup("grep_search", {"pattern": "def "}), "with space")
+        self.assertEqual(self.memo.lookup("grep_search", {"pattern": "def"}), "without space")
+
+    def test_queries_are_not_stripped(self):
+        self.memo.store("search_code", {"query": " parse "}, "padded", call_number=1)
+        self.assertIsNone(self.memo.lookup("search_code", {"query": "parse"}))
+
+    def test_staged_change_invalidates_entry(self):
+        self.memo.store("read_file", {"file_path": "app/x.py"}, "old", call_number=1)
+        self.vfs.stage_change("app/x.py", "def f():\n    return 1\n")
+        self.assertIsNone(self.memo.lookup("read_file", {"file_path": "app/x.py"}))
+        self.assertEqual(self.memo.stats.invalidations, 1)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)